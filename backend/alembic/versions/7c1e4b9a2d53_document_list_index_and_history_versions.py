@@ -0,0 +1,100 @@
+"""Document list index and history versions
+
+Brings a database created by ``create_all`` from the original models up to date:
+documents are listed by keyset on (user_id, updated_at, id), so that index replaces the
+one on user_id alone and updated_at can no longer be NULL. History versions are numbered
+per document and stored as deltas between keyframes; every existing history row held a
+full copy, so each becomes a keyframe, numbered by creation time.
+
+Revision ID: 7c1e4b9a2d53
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+
+import json
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7c1e4b9a2d53"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "UPDATE documents SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)"
+        " WHERE updated_at IS NULL"
+    )
+    # Batch mode issues plain ALTERs on Postgres and rebuilds the table on SQLite
+    with op.batch_alter_table("documents") as batch:
+        batch.alter_column("updated_at", existing_type=sa.DateTime(), nullable=False)
+        batch.create_index("ix_documents_user_updated_id", ["user_id", "updated_at", "id"])
+        batch.drop_index("ix_documents_user_id")
+
+    with op.batch_alter_table("document_history") as batch:
+        batch.add_column(sa.Column("version", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("keyframe_version", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("delta", sa.Text(), nullable=True))
+        batch.add_column(sa.Column("content_length", sa.Integer(), nullable=True))
+        batch.alter_column("content", existing_type=sa.Text(), nullable=True)
+    op.execute(
+        """
+        UPDATE document_history
+        SET version = numbered.version,
+            keyframe_version = numbered.version,
+            content_length = LENGTH(document_history.content)
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY document_id ORDER BY created_at, id)
+                AS version
+            FROM document_history
+        ) AS numbered
+        WHERE document_history.id = numbered.id
+        """
+    )
+    with op.batch_alter_table("document_history") as batch:
+        batch.alter_column("version", existing_type=sa.Integer(), nullable=False)
+        batch.alter_column("keyframe_version", existing_type=sa.Integer(), nullable=False)
+        batch.alter_column("content_length", existing_type=sa.Integer(), nullable=False)
+        # The unique constraint's index serves lookups by document, so the old index goes
+        batch.create_unique_constraint(
+            "document_history_document_id_version_key", ["document_id", "version"]
+        )
+        batch.drop_index("ix_document_history_document_id")
+
+
+def downgrade() -> None:
+    # Versions stored as deltas get their full text back before the delta columns go
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.text("SELECT id, content, delta FROM document_history ORDER BY document_id, version")
+    )
+    text = ""
+    for row in rows.all():
+        if row.delta is None:
+            text = row.content
+            continue
+        for start, end, insert in json.loads(row.delta):
+            text = text[:start] + insert + text[end:]
+        connection.execute(
+            sa.text("UPDATE document_history SET content = :content WHERE id = :id"),
+            {"content": text, "id": row.id},
+        )
+
+    with op.batch_alter_table("document_history") as batch:
+        batch.create_index("ix_document_history_document_id", ["document_id"])
+        batch.drop_constraint("document_history_document_id_version_key", type_="unique")
+        batch.alter_column("content", existing_type=sa.Text(), nullable=False)
+        batch.drop_column("content_length")
+        batch.drop_column("delta")
+        batch.drop_column("keyframe_version")
+        batch.drop_column("version")
+
+    with op.batch_alter_table("documents") as batch:
+        batch.create_index("ix_documents_user_id", ["user_id"])
+        batch.drop_index("ix_documents_user_updated_id")
+        batch.alter_column("updated_at", existing_type=sa.DateTime(), nullable=True)
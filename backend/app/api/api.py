@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import auth, health, llm, text
+from app.api.endpoints import auth, chat_sessions, documents, editor, health, jobs, llm, stats, text
 
 api_router = APIRouter()
 
@@ -8,4 +8,9 @@ api_router = APIRouter()
 api_router.include_router(auth.router)  # Auth router already has prefix and tags
 api_router.include_router(llm.router, tags=["llm"])
 api_router.include_router(text.router, tags=["text"])
+api_router.include_router(chat_sessions.router)  # Chat sessions router already has prefix and tags
+api_router.include_router(documents.router)  # Documents router already has prefix and tags
+api_router.include_router(jobs.router)  # Jobs router already has prefix and tags
+api_router.include_router(editor.router, tags=["editor"])
 api_router.include_router(health.router, tags=["health"])
+api_router.include_router(stats.router, tags=["stats"])
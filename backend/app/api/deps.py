@@ -5,7 +5,7 @@ Dependencies for API endpoints.
 import uuid
 from typing import Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import ValidationError
@@ -15,10 +15,19 @@ from app.core.config import settings
 from app.db.database import AsyncSessionLocal
 from app.models.auth import TokenPayload
 from app.models.user import User
+from app.services.admission import AdmissionRejected
+from app.services.cancellation import DeadlineExceeded
+from app.services.llm_manager import LLMConnectionManager
+from app.services.llm_registry import ProfileRequiresUser, llm_registry
+from app.services.user_cache import user_cache
 from app.services.user_service import get_user_by_id
 
 # Create OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+# Same scheme, but a missing token yields None instead of a 401
+optional_oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False
+)
 
 
 async def get_session() -> AsyncSession:
@@ -35,6 +44,23 @@ async def get_session() -> AsyncSession:
         yield session
 
 
+def overloaded_exception(error: AdmissionRejected) -> HTTPException:
+    """Shed load with a 503 that tells the client when to retry."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+def cancelled_exception(error: Exception) -> HTTPException:
+    """Report a request abandoned for its deadline (504) or by its client (499)."""
+    if isinstance(error, DeadlineExceeded):
+        return HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(error))
+    # Nginx's "client closed request"; the client will not see it, but logs will
+    return HTTPException(status_code=499, detail=str(error))
+
+
 # Create module-level variables for dependency functions
 get_db_dependency = get_session
 
@@ -46,6 +72,9 @@ async def get_current_user(
     """
     Get the current user from the token.
 
+    Users are served from the token cache when possible, then from trusted token
+    claims if enabled, and only otherwise looked up in the database.
+
     Args:
         db: Database session.
         token: JWT token.
@@ -56,6 +85,10 @@ async def get_current_user(
     Raises:
         HTTPException: If the token is invalid or the user is not found.
     """
+    cached_user = user_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         token_data = TokenPayload(**payload)
@@ -75,6 +108,11 @@ async def get_current_user(
         )
 
     try:
+        claims_user = user_cache.from_claims(uuid.UUID(user_id), payload)
+        if claims_user is not None:
+            return claims_user
+
+        user_cache.record_lookup()
         user = await get_user_by_id(db, uuid.UUID(user_id))
         if user is None:
             raise HTTPException(
@@ -82,7 +120,9 @@ async def get_current_user(
                 detail="User not found",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        return user
+        return user_cache.put(token, user, payload.get("exp"))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -118,15 +158,46 @@ async def get_current_active_user(
     return current_user
 
 
+def is_admin(user: User) -> bool:
+    """Return whether a user is listed in ADMIN_EMAILS."""
+    admins = {email.strip().lower() for email in settings.ADMIN_EMAILS.split(",")}
+    return str(user.email).lower() in admins - {""}
+
+
+async def get_admin_user(
+    current_user: User = Depends(current_user_dependency),
+) -> User:
+    """
+    Get the current user, who must be an admin.
+
+    Args:
+        current_user: Current user.
+
+    Returns:
+        The current user.
+
+    Raises:
+        HTTPException: If the user is not listed in ADMIN_EMAILS.
+    """
+    if not is_admin(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return current_user
+
+
 async def get_optional_current_user(
-    db: AsyncSession = Depends(get_db_dependency),
-    token: Optional[str] = Depends(oauth2_scheme),
+    token: Optional[str] = Depends(optional_oauth2_scheme),
 ) -> Optional[User]:
     """
     Get the current user from the token, or None if no token is provided.
 
+    The lookup runs in its own short-lived session that is closed before the
+    endpoint runs, so endpoints that go on to make long LLM calls do not hold a
+    pooled database connection for the duration of the call.
+
     Args:
-        db: Database session.
         token: JWT token.
 
     Returns:
@@ -134,8 +205,54 @@ async def get_optional_current_user(
     """
     if token is None:
         return None
+    return await authenticate_token(token)
+
+
+async def authenticate_token(token: str) -> Optional[User]:
+    """
+    Resolve a bearer token to its user in a short-lived session.
 
+    Args:
+        token: JWT token.
+
+    Returns:
+        The user, or None if the token is invalid.
+
+    Raises:
+        HTTPException: If the token could not be checked, for example because the
+            database is unavailable; the request is not downgraded to anonymous.
+    """
     try:
-        return await get_current_user(db, token)
-    except HTTPException:
-        return None
+        async with AsyncSessionLocal() as db:
+            return await get_current_user(db, token)
+    except HTTPException as e:
+        if e.status_code == status.HTTP_401_UNAUTHORIZED:
+            return None
+        raise
+
+
+async def get_llm_manager(
+    current_user: Optional[User] = Depends(get_optional_current_user),
+    x_llm_profile: Optional[str] = Header(None),
+) -> LLMConnectionManager:
+    """
+    Get the LLM connection for the current user or one of their connection profiles.
+
+    Args:
+        current_user: Current user, if authenticated.
+        x_llm_profile: Optional named connection profile from the X-LLM-Profile header.
+
+    Returns:
+        The user's or profile's connection, or the default connection.
+
+    Raises:
+        HTTPException: If a profile is requested without authenticating.
+    """
+    try:
+        return llm_registry.resolve(current_user, x_llm_profile)
+    except ProfileRequiresUser as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
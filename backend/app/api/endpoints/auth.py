@@ -10,12 +10,19 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import current_user_dependency, get_db_dependency
+from app.api.deps import current_user_dependency, get_db_dependency, overloaded_exception
 from app.core.config import settings
 from app.core.security import create_access_token
-from app.models.auth import Token, UserCreate, UserLogin, UserResponse
+from app.models.auth import PasswordUpdate, Token, UserCreate, UserLogin, UserResponse
 from app.models.user import User
-from app.services.user_service import authenticate_user, create_user, get_user_by_email
+from app.services.admission import AdmissionRejected
+from app.services.user_service import (
+    authenticate_user,
+    create_user,
+    get_user_by_email,
+    update_user_password,
+    user_claims,
+)
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -43,7 +50,11 @@ async def login_access_token(
         Access token.
     """
     logger.info(f"Attempting OAuth2 login for user: {form_data.username}")
-    user = await authenticate_user(db, form_data.username, form_data.password)
+    try:
+        user = await authenticate_user(db, form_data.username, form_data.password)
+    except AdmissionRejected as e:
+        logger.warning("Password hashing queue is full; rejecting login")
+        raise overloaded_exception(e)
     if not user:
         logger.warning(f"Failed login attempt for user: {form_data.username}")
         raise HTTPException(
@@ -62,7 +73,9 @@ async def login_access_token(
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     logger.info(f"Successful login for user: {form_data.username}")
     return {
-        "access_token": create_access_token(user.id, expires_delta=access_token_expires),
+        "access_token": create_access_token(
+            user.id, expires_delta=access_token_expires, claims=user_claims(user)
+        ),
         "token_type": "bearer",
     }
 
@@ -83,7 +96,11 @@ async def login_json(
         Access token.
     """
     logger.info(f"Attempting JSON login for user: {login_data.username_or_email}")
-    user = await authenticate_user(db, login_data.username_or_email, login_data.password)
+    try:
+        user = await authenticate_user(db, login_data.username_or_email, login_data.password)
+    except AdmissionRejected as e:
+        logger.warning("Password hashing queue is full; rejecting login")
+        raise overloaded_exception(e)
     if not user:
         logger.warning(f"Failed login attempt for user: {login_data.username_or_email}")
         raise HTTPException(
@@ -102,7 +119,9 @@ async def login_json(
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     logger.info(f"Successful JSON login for user: {login_data.username_or_email}")
     return {
-        "access_token": create_access_token(user.id, expires_delta=access_token_expires),
+        "access_token": create_access_token(
+            user.id, expires_delta=access_token_expires, claims=user_claims(user)
+        ),
         "token_type": "bearer",
     }
 
@@ -148,6 +167,11 @@ async def register_user(
             "is_verified": user.is_verified,
         }
         return user_dict
+    except HTTPException:
+        raise
+    except AdmissionRejected as e:
+        logger.warning("Password hashing queue is full; rejecting registration")
+        raise overloaded_exception(e)
     except Exception as e:
         logger.error(f"Error during user registration: {e}")
         raise HTTPException(
@@ -156,6 +180,41 @@ async def register_user(
         )
 
 
+@router.post("/password", status_code=status.HTTP_204_NO_CONTENT)
+async def change_password(
+    password_data: PasswordUpdate,
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(current_user_dependency),
+) -> None:
+    """
+    Change the current user's password.
+
+    The user's cached tokens are dropped, so they are checked against the database again.
+
+    Args:
+        password_data: Current and new password.
+        db: Database session.
+        current_user: Current user.
+
+    Raises:
+        HTTPException: If the current password is wrong.
+    """
+    try:
+        user = await authenticate_user(db, str(current_user.email), password_data.current_password)
+        if user:
+            await update_user_password(db, current_user.id, password_data.new_password)
+    except AdmissionRejected as e:
+        logger.warning("Password hashing queue is full; rejecting password change")
+        raise overloaded_exception(e)
+    if not user:
+        logger.warning(f"Failed password change for user ID: {current_user.id}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Incorrect password",
+        )
+    logger.info(f"Password changed for user ID: {current_user.id}")
+
+
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(
     current_user: User = Depends(current_user_dependency),
@@ -0,0 +1,205 @@
+"""
+Chat session endpoints.
+"""
+
+import logging
+import uuid
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import (
+    cancelled_exception,
+    current_user_dependency,
+    get_db_dependency,
+    get_llm_manager,
+    overloaded_exception,
+)
+from app.db.database import AsyncSessionLocal
+from app.models.chat import ChatMessageResponse, ChatSession, ChatSessionCreate, ChatSessionResponse
+from app.models.text import ChatRequest, TextResponse
+from app.models.user import User
+from app.services import chat_sessions
+from app.services.admission import AdmissionRejected
+from app.services.cancellation import (
+    ClientDisconnected,
+    DeadlineExceeded,
+    run_until_disconnected,
+    stream_until_disconnected,
+)
+from app.services.llm_manager import LLMConnectionManager, StreamChunk
+from app.services.streaming import stream_generation
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/chat/sessions", tags=["chat"])
+
+
+def _session_response(
+    chat_session: ChatSession, messages: Optional[List[ChatMessageResponse]] = None
+) -> ChatSessionResponse:
+    return ChatSessionResponse(
+        id=str(chat_session.id),
+        document_id=str(chat_session.document_id) if chat_session.document_id else None,
+        title=chat_session.title,
+        summary=chat_session.summary,
+        summarized_through=chat_session.summarized_through,
+        message_count=chat_session.message_count,
+        created_at=chat_session.created_at,
+        updated_at=chat_session.updated_at,
+        messages=messages,
+    )
+
+
+async def _get_session_or_404(
+    db: AsyncSession, current_user: User, session_id: uuid.UUID
+) -> ChatSession:
+    chat_session = await chat_sessions.get_session(db, current_user.id, session_id)
+    if chat_session is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat session not found")
+    return chat_session
+
+
+@router.post("", response_model=ChatSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_chat_session(
+    request: ChatSessionCreate,
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(current_user_dependency),
+) -> ChatSessionResponse:
+    """Start a chat session, optionally about one of the user's stored documents."""
+    try:
+        chat_session = await chat_sessions.create_session(
+            db, current_user.id, request.document_id, request.title, request.context
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return _session_response(chat_session)
+
+
+@router.get("", response_model=List[ChatSessionResponse])
+async def list_chat_sessions(
+    document_id: Optional[uuid.UUID] = None,
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(current_user_dependency),
+) -> List[ChatSessionResponse]:
+    """List the user's chat sessions, optionally only those about one document."""
+    sessions = await chat_sessions.list_sessions(db, current_user.id, document_id)
+    return [_session_response(chat_session) for chat_session in sessions]
+
+
+@router.get("/{session_id}", response_model=ChatSessionResponse)
+async def get_chat_session(
+    session_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(current_user_dependency),
+) -> ChatSessionResponse:
+    """Get a chat session with its full message history."""
+    chat_session = await _get_session_or_404(db, current_user, session_id)
+    messages = await chat_sessions.get_messages(db, chat_session.id)
+    return _session_response(
+        chat_session,
+        [
+            ChatMessageResponse(seq=m.seq, role=m.role, content=m.content, created_at=m.created_at)
+            for m in messages
+        ],
+    )
+
+
+@router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_chat_session(
+    session_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(current_user_dependency),
+) -> None:
+    """Delete a chat session and its messages."""
+    chat_session = await _get_session_or_404(db, current_user, session_id)
+    await chat_sessions.delete_session(db, chat_session)
+
+
+@router.post("/{session_id}/messages", response_model=TextResponse)
+async def send_chat_session_message(
+    session_id: uuid.UUID,
+    request: ChatRequest,
+    http_request: Request,
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(current_user_dependency),
+    llm_manager: LLMConnectionManager = Depends(get_llm_manager),
+) -> TextResponse:
+    """
+    Send a message in a chat session and return the reply.
+
+    Only the new message is sent; ``context`` is needed only when the document changed.
+    """
+    if not llm_manager.is_connected:
+        raise HTTPException(status_code=400, detail="No active LLM connection")
+    chat_session = await _get_session_or_404(db, current_user, session_id)
+    sticky_key = str(current_user.id)
+
+    async def reply() -> str:
+        prompt = await chat_sessions.prepare_turn(
+            db, llm_manager, chat_session, request, sticky_key
+        )
+        text = await llm_manager.generate_text(prompt, sticky_key=sticky_key)
+        await chat_sessions.record_turn(db, session_id, request.message, text)
+        return text
+
+    try:
+        return TextResponse(
+            text=await run_until_disconnected(reply(), http_request.is_disconnected)
+        )
+    except AdmissionRejected as e:
+        raise overloaded_exception(e)
+    except (ClientDisconnected, DeadlineExceeded) as e:
+        raise cancelled_exception(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _record_streamed_turn(
+    chunks: AsyncIterator[StreamChunk], session_id: uuid.UUID, message: str
+) -> AsyncIterator[StreamChunk]:
+    """Forward a reply's chunks and save the turn once the reply is complete."""
+    deltas = []
+    async for chunk in chunks:
+        deltas.append(chunk.delta)
+        yield chunk
+    # The request's database session is closed once the response has started
+    async with AsyncSessionLocal() as db:
+        await chat_sessions.record_turn(db, session_id, message, "".join(deltas))
+
+
+@router.post("/{session_id}/messages/stream")
+async def stream_chat_session_message(
+    session_id: uuid.UUID,
+    request: ChatRequest,
+    http_request: Request,
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(current_user_dependency),
+    llm_manager: LLMConnectionManager = Depends(get_llm_manager),
+) -> StreamingResponse:
+    """Stream the reply to a message in a chat session as server-sent events."""
+    if not llm_manager.is_connected:
+        raise HTTPException(status_code=400, detail="No active LLM connection")
+    chat_session = await _get_session_or_404(db, current_user, session_id)
+    sticky_key = str(current_user.id)
+
+    # Shed load, and fold old turns, before the stream starts
+    try:
+        llm_manager.admission().check()
+        prompt = await chat_sessions.prepare_turn(
+            db, llm_manager, chat_session, request, sticky_key
+        )
+    except AdmissionRejected as e:
+        raise overloaded_exception(e)
+    except DeadlineExceeded as e:
+        raise cancelled_exception(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    chunks = _record_streamed_turn(
+        llm_manager.stream_text(prompt, sticky_key), session_id, request.message
+    )
+    events = stream_until_disconnected(stream_generation(chunks), http_request.is_disconnected)
+    return StreamingResponse(events, media_type="text/event-stream")
@@ -0,0 +1,174 @@
+"""
+Document endpoints.
+"""
+
+import uuid
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import current_user_dependency, get_db_dependency
+from app.core.config import settings
+from app.models.document import (
+    Document,
+    DocumentCreate,
+    DocumentPage,
+    DocumentResponse,
+    DocumentSummary,
+    DocumentUpdate,
+    DocumentVersionPage,
+    DocumentVersionResponse,
+    DocumentVersionSummary,
+)
+from app.models.user import User
+from app.services import document_history, document_service
+
+router = APIRouter(prefix="/documents", tags=["documents"])
+
+
+def _document_response(document: Document) -> DocumentResponse:
+    return DocumentResponse(
+        id=str(document.id),
+        title=document.title,
+        document_type=document.document_type,
+        created_at=document.created_at,
+        updated_at=document.updated_at,
+        content=document.content,
+    )
+
+
+async def _get_document_or_404(
+    db: AsyncSession, current_user: User, document_id: uuid.UUID
+) -> Document:
+    document = await document_service.get_document(db, current_user.id, document_id)
+    if document is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+    return document
+
+
+async def _require_document(db: AsyncSession, current_user: User, document_id: uuid.UUID) -> None:
+    if not await document_service.owns_document(db, current_user.id, document_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+
+
+def _version_summary(row: Any) -> DocumentVersionSummary:
+    return DocumentVersionSummary(
+        version=row.version,
+        keyframe=row.version == row.keyframe_version,
+        content_length=row.content_length,
+        created_at=row.created_at,
+    )
+
+
+@router.get("", response_model=DocumentPage)
+async def list_documents(
+    limit: int = Query(settings.DOCUMENTS_PAGE_SIZE, ge=1, le=settings.DOCUMENTS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    document_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(current_user_dependency),
+) -> DocumentPage:
+    """
+    List the user's documents, most recently updated first, without their content.
+
+    Pass the returned ``next_cursor`` as ``cursor`` to get the next page.
+    """
+    try:
+        rows, next_cursor = await document_service.list_documents(
+            db, current_user.id, limit, cursor, document_type
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    items = [
+        DocumentSummary(
+            id=str(row.id),
+            title=row.title,
+            document_type=row.document_type,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+        )
+        for row in rows
+    ]
+    return DocumentPage(items=items, next_cursor=next_cursor)
+
+
+@router.post("", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
+async def create_document(
+    request: DocumentCreate,
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(current_user_dependency),
+) -> DocumentResponse:
+    """Create a document."""
+    document = await document_service.create_document(db, current_user.id, request)
+    return _document_response(document)
+
+
+@router.get("/{document_id}", response_model=DocumentResponse)
+async def get_document(
+    document_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(current_user_dependency),
+) -> DocumentResponse:
+    """Get a document with its content."""
+    return _document_response(await _get_document_or_404(db, current_user, document_id))
+
+
+@router.patch("/{document_id}", response_model=DocumentResponse)
+async def update_document(
+    document_id: uuid.UUID,
+    request: DocumentUpdate,
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(current_user_dependency),
+) -> DocumentResponse:
+    """Change a document's title, type or content; fields left out are kept."""
+    document = await _get_document_or_404(db, current_user, document_id)
+    document = await document_service.update_document(db, document, request)
+    return _document_response(document)
+
+
+@router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_document(
+    document_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(current_user_dependency),
+) -> None:
+    """Delete a document and its history."""
+    if not await document_service.delete_document(db, current_user.id, document_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+
+
+@router.get("/{document_id}/history", response_model=DocumentVersionPage)
+async def list_document_versions(
+    document_id: uuid.UUID,
+    limit: int = Query(settings.DOCUMENTS_PAGE_SIZE, ge=1, le=settings.DOCUMENTS_MAX_PAGE_SIZE),
+    cursor: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(current_user_dependency),
+) -> DocumentVersionPage:
+    """
+    List a document's versions, newest first, without their content.
+
+    Pass the returned ``next_cursor`` as ``cursor`` to get the next page.
+    """
+    await _require_document(db, current_user, document_id)
+    rows, next_cursor = await document_history.list_versions(db, document_id, limit, cursor)
+    return DocumentVersionPage(
+        items=[_version_summary(row) for row in rows], next_cursor=next_cursor
+    )
+
+
+@router.get("/{document_id}/history/{version}", response_model=DocumentVersionResponse)
+async def get_document_version(
+    document_id: uuid.UUID,
+    version: int,
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(current_user_dependency),
+) -> DocumentVersionResponse:
+    """Get the content of one version of a document."""
+    await _require_document(db, current_user, document_id)
+    found = await document_history.get_version(db, document_id, version)
+    if found is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Version not found")
+    row, content = found
+    return DocumentVersionResponse(**_version_summary(row).model_dump(), content=content)
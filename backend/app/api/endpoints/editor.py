@@ -0,0 +1,81 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+
+from app.api.deps import authenticate_token
+from app.core.config import settings
+from app.models.user import User
+from app.services.editor_session import EditorSession
+from app.services.llm_registry import llm_registry
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Close code for a socket that did not authenticate (4000-4999 are application codes)
+WS_UNAUTHORIZED = 4401
+WS_INTERNAL_ERROR = 1011
+
+
+async def _receive_message(websocket: WebSocket) -> Optional[Dict[str, Any]]:
+    """Receive one JSON object, or None if the message is not one."""
+    try:
+        message = json.loads(await websocket.receive_text())
+    except ValueError:
+        return None
+    return message if isinstance(message, dict) else None
+
+
+async def _authenticate(websocket: WebSocket) -> Optional[User]:
+    """Authenticate the socket once, from its first message."""
+    try:
+        message = await asyncio.wait_for(
+            _receive_message(websocket), settings.EDITOR_AUTH_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        return None
+    if message is None or message.get("type") != "auth" or not message.get("token"):
+        return None
+    return await authenticate_token(str(message["token"]))
+
+
+@router.websocket("/editor/session")
+async def editor_session(websocket: WebSocket) -> None:
+    """
+    Run one authenticated editor session over a WebSocket.
+
+    The first message must be ``{"type": "auth", "token": ...}``. The document is then
+    sent once and kept current with deltas, and action, eval and chat requests run
+    concurrently, tagged with client-chosen ids; see ``app/services/editor_session.py``.
+    """
+    await websocket.accept()
+    try:
+        user = await _authenticate(websocket)
+    except HTTPException as e:
+        logger.error(f"Could not authenticate editor session: {e.detail}")
+        await websocket.close(code=WS_INTERNAL_ERROR, reason="Authentication is unavailable")
+        return
+    if user is None:
+        await websocket.close(code=WS_UNAUTHORIZED, reason="Could not validate credentials")
+        return
+
+    llm_manager = llm_registry.resolve(user, websocket.headers.get("x-llm-profile"))
+    session = EditorSession(llm_manager, user, websocket.send_json)
+    await session.send({"type": "ready", "user_id": str(user.id)})
+    try:
+        while True:
+            message = await _receive_message(websocket)
+            if message is None:
+                await session.send(
+                    {"type": "error", "id": None, "detail": "Expected a JSON object"}
+                )
+                continue
+            await session.handle(message)
+    except WebSocketDisconnect:
+        logger.debug(f"Editor session for user {user.id} closed")
+    finally:
+        # Cancelling in-flight requests closes their upstream generations
+        await session.close()
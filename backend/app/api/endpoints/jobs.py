@@ -0,0 +1,99 @@
+from functools import partial
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import current_user_dependency, get_llm_manager
+from app.models.job import JobResponse
+from app.models.text import ActionRequest
+from app.models.user import User
+from app.services.actions import run_action
+from app.services.cancellation import stream_until_disconnected
+from app.services.job_manager import JobLimitExceeded, JobRecord, job_manager
+from app.services.llm_manager import LLMConnectionManager
+from app.services.streaming import format_sse
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+    responses={404: {"description": "Job not found or expired"}},
+)
+
+
+async def _get_owned_job(job_id: str, owner: str) -> JobRecord:
+    """Return a job belonging to the owner, or raise a 404."""
+    record = await job_manager.get(job_id)
+    if record is None or record.owner != owner:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return record
+
+
+@router.post("/actions", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_action_job(
+    request: ActionRequest,
+    current_user: User = Depends(current_user_dependency),
+    llm_manager: LLMConnectionManager = Depends(get_llm_manager),
+) -> JobResponse:
+    """Queue a text action as a background job and return its id at once."""
+    if not llm_manager.is_connected:
+        raise HTTPException(status_code=400, detail="No active LLM connection")
+
+    try:
+        record = await job_manager.submit(
+            str(current_user.id),
+            request.action,
+            partial(run_action, llm_manager, request, sticky_key=str(current_user.id)),
+        )
+    except JobLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    return record.response()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(current_user_dependency),
+) -> JobResponse:
+    """Return a job's status and, once it has finished, its result or error."""
+    record = await _get_owned_job(job_id, str(current_user.id))
+    return record.response()
+
+
+@router.get("/{job_id}/events")
+async def stream_job(
+    job_id: str,
+    http_request: Request,
+    current_user: User = Depends(current_user_dependency),
+) -> StreamingResponse:
+    """
+    Stream a job's status changes as server-sent events.
+
+    Each change is sent as a ``status`` event carrying the job; the stream ends with a
+    ``done`` event carrying the finished job and its result or error.
+    """
+    await _get_owned_job(job_id, str(current_user.id))
+
+    async def events() -> AsyncIterator[str]:
+        async for record in job_manager.watch(job_id):
+            payload = record.response().model_dump(mode="json")
+            yield format_sse(payload, event="done" if record.finished else "status")
+
+    return StreamingResponse(
+        stream_until_disconnected(events(), http_request.is_disconnected),
+        media_type="text/event-stream",
+    )
+
+
+@router.delete("/{job_id}", response_model=JobResponse)
+async def cancel_job(
+    job_id: str,
+    current_user: User = Depends(current_user_dependency),
+) -> JobResponse:
+    """Cancel a queued or running job; finished jobs are returned unchanged."""
+    record = await _get_owned_job(job_id, str(current_user.id))
+    return (await job_manager.cancel(job_id) or record).response()
@@ -1,18 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Optional
 
-from app.api.deps import get_db_dependency, get_optional_current_user
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.api.deps import get_admin_user, get_llm_manager, get_optional_current_user, is_admin
 from app.models.llm import LLMConnectionRequest, LLMConnectionResponse, LLMType
 from app.models.user import User
-from app.services.llm_manager import llm_manager
+from app.services.llm_cache import response_cache
+from app.services.llm_manager import LLMConnectionManager
+from app.services.llm_registry import DEFAULT_CONNECTION_KEY, connection_key, llm_registry
+from app.services.llm_simulator import SimulatorConfig
 
 router = APIRouter()
 
 
-def _handle_openai_connection(api_key: str) -> LLMConnectionResponse:
+async def _handle_openai_connection(
+    llm_manager: LLMConnectionManager, api_key: str
+) -> LLMConnectionResponse:
     """Handle OpenAI connection logic."""
     try:
-        llm_manager.connect_openai(api_key)
+        await llm_manager.connect_openai(api_key)
         return LLMConnectionResponse(
             success=True,
             message="Successfully connected to OpenAI",
@@ -22,10 +28,17 @@ def _handle_openai_connection(api_key: str) -> LLMConnectionResponse:
         raise HTTPException(status_code=500, detail=error_msg)
 
 
-def _handle_llama_connection(host: str, port: str) -> LLMConnectionResponse:
+async def _handle_llama_connection(
+    llm_manager: LLMConnectionManager, request: LLMConnectionRequest
+) -> LLMConnectionResponse:
     """Handle Llama connection logic."""
+    if request.endpoints:
+        endpoints = [(endpoint.host, endpoint.port) for endpoint in request.endpoints]
+    else:
+        endpoints = [(str(request.host), str(request.port))]
+
     try:
-        llm_manager.connect_llama(host, port)
+        await llm_manager.connect_llama_pool(endpoints, request.routing, request.sticky)
         return LLMConnectionResponse(
             success=True,
             message="Successfully connected to Llama.cpp server",
@@ -35,30 +48,93 @@ def _handle_llama_connection(host: str, port: str) -> LLMConnectionResponse:
         raise HTTPException(status_code=500, detail=error_msg)
 
 
+async def _handle_simulated_connection(
+    llm_manager: LLMConnectionManager, request: LLMConnectionRequest
+) -> LLMConnectionResponse:
+    """Handle simulated LLM connection logic."""
+    options = request.simulator.model_dump() if request.simulator else {}
+    await llm_manager.connect_simulated(SimulatorConfig.from_settings(**options))
+    return LLMConnectionResponse(
+        success=True,
+        message="Successfully connected to the LLM simulator",
+    )
+
+
+def _connection_key(request: LLMConnectionRequest, current_user: Optional[User]) -> str:
+    """Return the key of the connection a request may replace, or raise if it may not."""
+    if current_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Sign in to connect an LLM",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not request.default:
+        return connection_key(current_user, request.profile)
+    if request.profile:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The default connection has no profile",
+        )
+    if not is_admin(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can replace the default connection",
+        )
+    return DEFAULT_CONNECTION_KEY
+
+
 @router.post("/connect_llm", response_model=LLMConnectionResponse)
 async def connect_llm(
     request: LLMConnectionRequest,
-    db: AsyncSession = Depends(get_db_dependency),
-    current_user: User = Depends(get_optional_current_user),
+    current_user: Optional[User] = Depends(get_optional_current_user),
 ) -> LLMConnectionResponse:
-    """Test connection to the specified LLM provider and store the connection."""
+    """
+    Test connection to the specified LLM provider and store the connection.
+
+    Users replace their own connection or one of their profiles; only admins may replace
+    the default connection that anonymous requests use.
+    """
+    key = _connection_key(request, current_user)
     try:
-        # Disconnect existing connection if any
+        # Only the caller's own connection is replaced
+        llm_manager = llm_registry.connection_for(key)
         llm_manager.disconnect()
 
         if request.type == LLMType.OPENAI:
             if not request.api_key:
                 raise HTTPException(status_code=400, detail="API key is required for OpenAI")
-            return _handle_openai_connection(request.api_key)
+            return await _handle_openai_connection(llm_manager, request.api_key)
 
         elif request.type == LLMType.LLAMA:
-            if not request.host or not request.port:
+            if not request.endpoints and (not request.host or not request.port):
                 raise HTTPException(
                     status_code=400, detail="Host and port are required for Llama.cpp"
                 )
-            return _handle_llama_connection(request.host, request.port)
+            return await _handle_llama_connection(llm_manager, request)
+
+        elif request.type == LLMType.SIMULATED:
+            return await _handle_simulated_connection(llm_manager, request)
 
     except HTTPException as http_error:
         return LLMConnectionResponse(success=False, message=http_error.detail)
     except Exception as e:
         return LLMConnectionResponse(success=False, message=str(e))
+
+
+@router.delete("/llm_cache")
+async def clear_llm_cache(
+    current_user: User = Depends(get_admin_user),
+) -> Dict[str, Any]:
+    """Invalidate every cached LLM response; the cache is shared, so only admins may."""
+    await response_cache.invalidate()
+    return {"success": True, "cache": response_cache.stats()}
+
+
+@router.get("/llm_backends")
+async def get_llm_backends(
+    llm_manager: LLMConnectionManager = Depends(get_llm_manager),
+) -> Dict[str, Any]:
+    """Report per-endpoint in-flight requests, latency and health for the current connection."""
+    if llm_manager.llama_pool is None:
+        return {"routing": None, "sticky": False, "backends": []}
+    return llm_manager.llama_pool.stats()
@@ -0,0 +1,49 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_admin_user
+from app.db.database import pool_stats
+from app.models.user import User
+from app.services.admission import admission_stats
+from app.services.cancellation import cancellation_stats
+from app.services.chat_sessions import chat_memory_stats
+from app.services.document_history import document_history_stats
+from app.services.document_limits import generation_budget_stats
+from app.services.editor_session import editor_session_stats
+from app.services.evaluation import evaluation_stats
+from app.services.job_manager import job_manager
+from app.services.llm_cache import response_cache
+from app.services.llm_registry import llm_registry
+from app.services.output_validator import validation_stats
+from app.services.password_hasher import password_hasher
+from app.services.prompt_cache import prompt_cache_stats
+from app.services.retrieval import retrieval_cache
+from app.services.user_cache import user_cache
+
+router = APIRouter()
+
+
+# The counters name backends and connections, so only admins may read them
+@router.get("/stats")
+async def get_stats(current_user: User = Depends(get_admin_user)) -> Dict[str, Any]:
+    """Return runtime counters for sizing caches and pools."""
+    return {
+        "auth_user_cache": user_cache.stats(),
+        "chat_retrieval": retrieval_cache.stats(),
+        "chat_sessions": chat_memory_stats.stats(),
+        "database_pool": pool_stats(),
+        "document_history": document_history_stats.stats(),
+        "editor_sessions": editor_session_stats.stats(),
+        "jobs": job_manager.stats(),
+        "llm_admission": admission_stats(),
+        "llm_cache": response_cache.stats(),
+        "llm_cancellations": cancellation_stats.stats(),
+        "llm_connections": llm_registry.stats(),
+        "llm_evaluations": evaluation_stats.stats(),
+        "llm_generation_budget": generation_budget_stats.stats(),
+        "llm_output_validation": validation_stats.stats(),
+        "llm_prompt_cache": prompt_cache_stats.stats(),
+        "llm_single_flight": llm_registry.single_flight_stats(),
+        "password_hashing": password_hasher.stats(),
+    }
@@ -1,85 +1,313 @@
-import re
-from typing import Any, Dict
+import logging
+from functools import partial
+from typing import Any, Dict, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
-from app.api.deps import get_db_dependency, get_optional_current_user
-from app.models.text import ActionRequest, ChatRequest, EvalRequest, TextResponse
+from app.api.deps import (
+    cancelled_exception,
+    get_llm_manager,
+    get_optional_current_user,
+    overloaded_exception,
+)
+from app.core.config import settings
+from app.models.text import (
+    ActionRequest,
+    BatchActionRequest,
+    BatchEvalRequest,
+    ChatRequest,
+    EvalRequest,
+    TextResponse,
+)
 from app.models.user import User
-from app.services.llm_manager import llm_manager
-from app.services.text_formatter import format_action_prompt, format_eval_prompt
+from app.services.actions import run_action
+from app.services.admission import AdmissionRejected
+from app.services.batch_runner import run_batch
+from app.services.cancellation import (
+    ClientDisconnected,
+    DeadlineExceeded,
+    run_until_disconnected,
+    stream_until_disconnected,
+)
+from app.services.chunked_action import ChunkedAction, use_long_document_mode
+from app.services.document_limits import budget_for, limits_for
+from app.services.evaluation import FusedEvaluation, evaluate
+from app.services.llm_manager import LLMConnectionManager
+from app.services.retrieval import with_relevant_context
+from app.services.streaming import (
+    limit_stream,
+    stream_batch,
+    stream_chunked_action,
+    stream_generation,
+)
+from app.services.text_formatter import format_action_prompt, format_chat_prompt
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _cache_options(cache_control: Optional[str], cached_by_default: bool) -> Tuple[bool, bool]:
+    """
+    Map a Cache-Control request header to response cache options.
+
+    ``no-store`` bypasses the cache entirely; ``no-cache`` skips the lookup but
+    replaces the stored response with the fresh one; ``max-stale`` accepts a stored
+    response. Without any of them the endpoint's default applies.
+
+    Args:
+        cache_control: The request's Cache-Control header.
+        cached_by_default: Whether to use the cache when the header asks for nothing.
+
+    Returns:
+        Tuple of (use_cache, refresh_cache).
+    """
+    directives = {d.strip().lower() for d in (cache_control or "").split(",")}
+    if "no-store" in directives:
+        return False, False
+    if "no-cache" in directives:
+        return True, True
+    return cached_by_default or "max-stale" in directives, False
+
+
+def _sticky_key(current_user: Optional[User]) -> Optional[str]:
+    """Route a user's requests to the same Llama.cpp server to keep its prompt cache warm."""
+    return str(current_user.id) if current_user is not None else None
+
+
+def _check_batch(llm_manager: LLMConnectionManager, items: int) -> None:
+    """Validate a batch request and shed load before its stream starts."""
+    if not llm_manager.is_connected:
+        raise HTTPException(status_code=400, detail="No active LLM connection")
+    if items > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400, detail=f"A batch can contain at most {settings.BATCH_MAX_ITEMS} items"
+        )
+    try:
+        llm_manager.admission().check()
+    except AdmissionRejected as e:
+        raise overloaded_exception(e)
+
+
 @router.post("/submit_action")
 async def submit_action(
     request: ActionRequest,
-    db: AsyncSession = Depends(get_db_dependency),
+    http_request: Request,
     current_user: User = Depends(get_optional_current_user),
+    llm_manager: LLMConnectionManager = Depends(get_llm_manager),
+    cache_control: Optional[str] = Header(None),
 ) -> Dict[str, Any]:
     """Process a text modification action using the connected LLM."""
     if not llm_manager.is_connected:
         raise HTTPException(status_code=400, detail="No active LLM connection")
 
     try:
-        print("Sending prompt to LLM:", format_action_prompt(request))
-        response_text = await llm_manager.generate_text(format_action_prompt(request))
-        return {"success": True, "text": response_text}
+        # Running an action again should give a new generation unless the client opts in
+        use_cache, refresh_cache = _cache_options(cache_control, cached_by_default=False)
+        result = await run_until_disconnected(
+            run_action(llm_manager, request, use_cache, refresh_cache, _sticky_key(current_user)),
+            http_request.is_disconnected,
+        )
+        return {"success": True, **result}
+    except AdmissionRejected as e:
+        raise overloaded_exception(e)
+    except (ClientDisconnected, DeadlineExceeded) as e:
+        raise cancelled_exception(e)
     except Exception as e:
-        print(f"Error processing action: {str(e)}")
+        logger.error(f"Error processing action: {str(e)}")
         return {"success": False, "detail": str(e)}
 
 
+@router.post("/submit_action/stream")
+async def submit_action_stream(
+    request: ActionRequest,
+    http_request: Request,
+    current_user: User = Depends(get_optional_current_user),
+    llm_manager: LLMConnectionManager = Depends(get_llm_manager),
+) -> StreamingResponse:
+    """Stream a text modification action from the connected LLM as server-sent events."""
+    if not llm_manager.is_connected:
+        raise HTTPException(status_code=400, detail="No active LLM connection")
+
+    # Shed load before the stream starts; a 503 cannot be sent once it has begun
+    try:
+        llm_manager.admission().check()
+    except AdmissionRejected as e:
+        raise overloaded_exception(e)
+
+    if use_long_document_mode(request):
+        action = ChunkedAction(
+            llm_manager,
+            request,
+            consistency_pass=request.consistency_pass,
+            sticky_key=_sticky_key(current_user),
+        )
+        events = stream_until_disconnected(
+            stream_chunked_action(action), http_request.is_disconnected
+        )
+        return StreamingResponse(events, media_type="text/event-stream")
+
+    chunks = llm_manager.stream_text(
+        format_action_prompt(request),
+        _sticky_key(current_user),
+        budget=budget_for(request.document_type, request.text),
+    )
+    chunks = limit_stream(chunks, limits_for(request.document_type).max_chars)
+    events = stream_until_disconnected(stream_generation(chunks), http_request.is_disconnected)
+    return StreamingResponse(events, media_type="text/event-stream")
+
+
 @router.post("/submit_eval")
 async def submit_eval(
     request: EvalRequest,
-    db: AsyncSession = Depends(get_db_dependency),
+    http_request: Request,
     current_user: User = Depends(get_optional_current_user),
+    llm_manager: LLMConnectionManager = Depends(get_llm_manager),
+    cache_control: Optional[str] = Header(None),
 ) -> Dict[str, Any]:
     """Process a text evaluation using the connected LLM."""
     if not llm_manager.is_connected:
         raise HTTPException(status_code=400, detail="No active LLM connection")
 
     try:
-        print("Sending evaluation prompt to LLM:", format_eval_prompt(request))
-        response_text = await llm_manager.generate_text(format_eval_prompt(request))
-
-        # Extract score from the response
-        score = 5  # Default score
-        rating_match = re.search(r"rating:?\s*(\d+)(?:\s*\/\s*10)?", response_text, re.IGNORECASE)
-        score_match = re.search(r"score:?\s*(\d+)(?:\s*\/\s*10)?", response_text, re.IGNORECASE)
-
-        if rating_match and rating_match.group(1):
-            extracted_score = int(rating_match.group(1))
-            if 0 <= extracted_score <= 10:
-                score = extracted_score
-        elif score_match and score_match.group(1):
-            extracted_score = int(score_match.group(1))
-            if 0 <= extracted_score <= 10:
-                score = extracted_score
-
-        return {"success": True, "result": response_text, "score": score}
+        use_cache, refresh_cache = _cache_options(cache_control, cached_by_default=True)
+        result = await run_until_disconnected(
+            evaluate(llm_manager, request, use_cache, refresh_cache, _sticky_key(current_user)),
+            http_request.is_disconnected,
+        )
+        return {"success": True, **result}
+    except AdmissionRejected as e:
+        raise overloaded_exception(e)
+    except (ClientDisconnected, DeadlineExceeded) as e:
+        raise cancelled_exception(e)
     except Exception as e:
-        print(f"Error processing evaluation: {str(e)}")
+        logger.error(f"Error processing evaluation: {str(e)}")
         return {"success": False, "detail": str(e)}
 
 
 @router.post("/chat", response_model=TextResponse)
 async def chat(
     request: ChatRequest,
-    db: AsyncSession = Depends(get_db_dependency),
+    http_request: Request,
     current_user: User = Depends(get_optional_current_user),
+    llm_manager: LLMConnectionManager = Depends(get_llm_manager),
 ) -> TextResponse:
     """Process a chat message using the connected LLM and return a response."""
     if not llm_manager.is_connected:
         raise HTTPException(status_code=400, detail="No active LLM connection")
 
     try:
-        context = f"\nContext: {request.context}" if request.context else ""
-        prompt = f"{request.message}{context}"
-        response_text = await llm_manager.generate_text(prompt)
+        response_text = await run_until_disconnected(
+            llm_manager.generate_text(
+                format_chat_prompt(with_relevant_context(request)),
+                sticky_key=_sticky_key(current_user),
+            ),
+            http_request.is_disconnected,
+        )
         return TextResponse(text=response_text)
+    except AdmissionRejected as e:
+        raise overloaded_exception(e)
+    except (ClientDisconnected, DeadlineExceeded) as e:
+        raise cancelled_exception(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    http_request: Request,
+    current_user: User = Depends(get_optional_current_user),
+    llm_manager: LLMConnectionManager = Depends(get_llm_manager),
+) -> StreamingResponse:
+    """Stream a chat response from the connected LLM as server-sent events."""
+    if not llm_manager.is_connected:
+        raise HTTPException(status_code=400, detail="No active LLM connection")
+
+    # Shed load before the stream starts; a 503 cannot be sent once it has begun
+    try:
+        llm_manager.admission().check()
+    except AdmissionRejected as e:
+        raise overloaded_exception(e)
+
+    chunks = llm_manager.stream_text(
+        format_chat_prompt(with_relevant_context(request)), _sticky_key(current_user)
+    )
+    events = stream_until_disconnected(stream_generation(chunks), http_request.is_disconnected)
+    return StreamingResponse(events, media_type="text/event-stream")
+
+
+@router.post("/submit_actions")
+async def submit_actions(
+    request: BatchActionRequest,
+    http_request: Request,
+    current_user: User = Depends(get_optional_current_user),
+    llm_manager: LLMConnectionManager = Depends(get_llm_manager),
+    cache_control: Optional[str] = Header(None),
+) -> StreamingResponse:
+    """Run several actions on one text concurrently, streaming each result as it finishes."""
+    _check_batch(llm_manager, len(request.actions))
+
+    use_cache, refresh_cache = _cache_options(cache_control, cached_by_default=False)
+    context = request.model_dump(exclude={"actions"})
+    tasks = [
+        partial(
+            run_action,
+            llm_manager,
+            ActionRequest(**context, **item.model_dump()),
+            use_cache,
+            refresh_cache,
+            _sticky_key(current_user),
+        )
+        for item in request.actions
+    ]
+    results = run_batch(tasks, settings.BATCH_MAX_PARALLEL)
+    names = [item.action for item in request.actions]
+    events = stream_until_disconnected(stream_batch(results, names), http_request.is_disconnected)
+    return StreamingResponse(events, media_type="text/event-stream")
+
+
+@router.post("/submit_evals")
+async def submit_evals(
+    request: BatchEvalRequest,
+    http_request: Request,
+    current_user: User = Depends(get_optional_current_user),
+    llm_manager: LLMConnectionManager = Depends(get_llm_manager),
+    cache_control: Optional[str] = Header(None),
+) -> StreamingResponse:
+    """
+    Run several evaluations of one text, streaming each result as it finishes.
+
+    With ``fused`` set, every criterion is evaluated in one LLM call returning structured
+    JSON; criteria it does not cover validly are then evaluated separately.
+    """
+    _check_batch(llm_manager, len(request.evals))
+
+    use_cache, refresh_cache = _cache_options(cache_control, cached_by_default=True)
+    if request.fused:
+        fused = FusedEvaluation(
+            llm_manager,
+            request.text,
+            request.evals,
+            use_cache=use_cache,
+            refresh_cache=refresh_cache,
+            sticky_key=_sticky_key(current_user),
+        )
+        results = fused.results()
+    else:
+        tasks = [
+            partial(
+                evaluate,
+                llm_manager,
+                EvalRequest(text=request.text, **criterion.model_dump()),
+                use_cache,
+                refresh_cache,
+                _sticky_key(current_user),
+            )
+            for criterion in request.evals
+        ]
+        results = run_batch(tasks, settings.BATCH_MAX_PARALLEL)
+    names = [criterion.eval_name for criterion in request.evals]
+    events = stream_until_disconnected(stream_batch(results, names), http_request.is_disconnected)
+    return StreamingResponse(events, media_type="text/event-stream")
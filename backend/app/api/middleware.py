@@ -0,0 +1,36 @@
+"""
+ASGI middleware for the API.
+"""
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.services.cancellation import (
+    DEADLINE_HEADER,
+    request_timeout,
+    reset_deadline,
+    start_deadline,
+)
+
+
+class RequestDeadlineMiddleware:
+    """
+    Give each HTTP request a deadline that the LLM layer enforces.
+
+    The deadline covers the whole response, including streamed bodies, and is taken
+    from the ``X-Request-Timeout`` header (seconds) or the configured default.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = start_deadline(request_timeout(Headers(scope=scope).get(DEADLINE_HEADER)))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_deadline(token)
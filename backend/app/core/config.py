@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -21,12 +23,137 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Comma-separated emails of the users allowed to change state shared by everyone, such
+    # as the response cache
+    ADMIN_EMAILS: str = ""
+
+    # Authenticated-user cache; trusting token claims skips the database entirely
+    AUTH_USER_CACHE_ENABLED: bool = True
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_USER_CACHE_TTL_SECONDS: float = 60.0
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+
+    # bcrypt runs in a bounded "thread" or "process" pool instead of on the event loop
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_MAX_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+
     # Optional CORS settings
     ALLOWED_ORIGINS: str = "http://localhost:3000"
 
     # OpenAI settings
     OPENAI_API_KEY: str = "your_openai_api_key_here"
 
+    # LLM HTTP client settings (limits apply to the keep-alive pool shared by all connections)
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 30.0
+
+    # Generation budgets: max_tokens, stop sequences and a timeout per request, sized from
+    # the document type and input length (see app/services/document_limits.py)
+    LLM_GENERATION_BUDGETS: bool = True
+    LLM_MAX_OUTPUT_TOKENS: int = 50000
+    LLM_MIN_TOKENS_PER_SECOND: float = 10.0
+    LLM_TIMEOUT_FLOOR_SECONDS: float = 5.0
+    # Generate and condense passes for output that breaks its document type's limits
+    LLM_VALIDATION_MAX_ATTEMPTS: int = 3
+
+    # Default deadline per request (an X-Request-Timeout header can shorten it; 0 disables
+    # it) and how often long-running requests check whether their client has gone
+    REQUEST_DEADLINE_SECONDS: float = 120.0
+    DISCONNECT_POLL_SECONDS: float = 0.5
+
+    # Admission control per LLM backend (scaled by the number of Llama.cpp endpoints)
+    LLM_MAX_CONCURRENCY_PER_BACKEND: int = 8
+    LLM_MAX_QUEUE_PER_BACKEND: int = 32
+    LLM_RETRY_AFTER_SECONDS: int = 5
+
+    # Interval between health checks of pooled Llama.cpp endpoints
+    LLAMA_HEALTH_CHECK_INTERVAL_SECONDS: float = 10.0
+
+    # Llama.cpp prompt cache hints: reuse the KV cache of a matching prompt prefix, and pin
+    # each user to one of LLAMA_SLOTS_PER_SERVER slots (0 lets the server pick the slot)
+    LLAMA_CACHE_PROMPT: bool = True
+    LLAMA_SLOTS_PER_SERVER: int = 0
+
+    # Per-user LLM connection registry settings
+    LLM_REGISTRY_MAX_CONNECTIONS: int = 256
+    LLM_REGISTRY_IDLE_SECONDS: float = 1800.0
+
+    # LLM response cache settings (set LLM_CACHE_SQLITE_PATH to persist across restarts;
+    # the file keeps at most LLM_CACHE_SQLITE_MAX_ENTRIES responses)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_TTL_SECONDS: float = 3600.0
+    LLM_CACHE_SQLITE_PATH: Optional[str] = None
+    LLM_CACHE_SQLITE_MAX_ENTRIES: int = 100000
+
+    # Long documents are split on Markdown structure and processed in parallel chunks
+    LONG_DOCUMENT_THRESHOLD_CHARS: int = 12000
+    LONG_DOCUMENT_CHUNK_CHARS: int = 6000
+    LONG_DOCUMENT_MAX_PARALLEL: int = 4
+
+    # Batch endpoints: items per request and items running at once per request
+    BATCH_MAX_ITEMS: int = 20
+    BATCH_MAX_PARALLEL: int = 4
+
+    # Background jobs: worker tasks, unfinished jobs per user and in total, how long a job
+    # may run and how long its result is kept. JOB_PERSIST also stores jobs in Postgres so
+    # results survive a restart and can be read from any worker process; each process then
+    # renews a lease of JOB_LEASE_SECONDS on its unfinished jobs, and other processes fail
+    # them only once the lease has lapsed.
+    JOB_WORKERS: int = 4
+    JOB_MAX_ACTIVE_PER_USER: int = 3
+    JOB_MAX_QUEUED: int = 100
+    JOB_TIMEOUT_SECONDS: float = 600.0
+    JOB_RESULT_TTL_SECONDS: float = 3600.0
+    JOB_PERSIST: bool = False
+    JOB_LEASE_SECONDS: float = 60.0
+
+    # WebSocket editor sessions: time allowed for the auth message and requests running at
+    # once per socket
+    EDITOR_AUTH_TIMEOUT_SECONDS: float = 10.0
+    EDITOR_MAX_IN_FLIGHT: int = 8
+
+    # Chat sessions: token budget for a session's summary and recent turns in each prompt.
+    # Past it, the oldest turns are folded into the summary until the history is back under
+    # CHAT_HISTORY_LOW_WATER of the budget. The last CHAT_KEEP_RECENT_MESSAGES messages are
+    # always sent verbatim, and CHAT_SUMMARY_TOKENS bounds the summary.
+    CHAT_HISTORY_TOKENS: int = 2000
+    CHAT_HISTORY_LOW_WATER: float = 0.5
+    CHAT_KEEP_RECENT_MESSAGES: int = 4
+    CHAT_SUMMARY_TOKENS: int = 300
+
+    # Chat contexts over CHAT_CONTEXT_TOKENS (0 sends them whole) are replaced by the
+    # document outline and the RETRIEVAL_TOP_K best-matching passages of about
+    # RETRIEVAL_PASSAGE_CHARS, within the same budget. Passage indexes are cached per
+    # document text.
+    CHAT_CONTEXT_TOKENS: int = 1500
+    RETRIEVAL_TOP_K: int = 4
+    RETRIEVAL_PASSAGE_CHARS: int = 1200
+    RETRIEVAL_CACHE_ENTRIES: int = 64
+
+    # Document lists: page size when none is given, and the largest allowed
+    DOCUMENTS_PAGE_SIZE: int = 50
+    DOCUMENTS_MAX_PAGE_SIZE: int = 200
+
+    # Document history stores each version as a delta against the one before it. A full
+    # keyframe is stored every DOCUMENT_HISTORY_KEYFRAME_INTERVAL versions, or when the
+    # delta would be over DOCUMENT_HISTORY_MAX_DELTA_RATIO of the text, so rebuilding any
+    # version applies fewer than DOCUMENT_HISTORY_KEYFRAME_INTERVAL deltas.
+    DOCUMENT_HISTORY_KEYFRAME_INTERVAL: int = 32
+    DOCUMENT_HISTORY_MAX_DELTA_RATIO: float = 0.5
+
+    # Defaults for the simulated LLM provider and the stand-in server in app.simulator
+    SIMULATOR_TTFT_MS: float = 200.0
+    SIMULATOR_TOKENS_PER_SECOND: float = 50.0
+    SIMULATOR_ERROR_RATE: float = 0.0
+    SIMULATOR_OUTPUT_TOKENS: int = 128
+    SIMULATOR_SEED: int = 0
+
     @computed_field
     @property
     def DATABASE_URL(self) -> str:
@@ -3,10 +3,10 @@ Database connection and session management.
 """
 
 from contextlib import contextmanager
-from typing import AsyncGenerator, Generator
+from typing import Any, AsyncGenerator, Dict, Generator, Optional
 
 from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, sessionmaker
 
@@ -81,3 +81,29 @@ def get_sync_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def pool_stats(async_engine: Optional[AsyncEngine] = None) -> Dict[str, Any]:
+    """
+    Report how much of an async engine's connection pool is in use.
+
+    Args:
+        async_engine: Engine to inspect; defaults to the application engine.
+
+    Returns:
+        Pool size, checked-out connections, overflow and saturation (checked out / capacity).
+    """
+    pool = (async_engine or engine).pool
+    if not hasattr(pool, "checkedout"):
+        return {"pool": type(pool).__name__}
+
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    checked_out = pool.checkedout()
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
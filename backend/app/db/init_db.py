@@ -6,15 +6,21 @@ It should be run when the container starts up.
 """
 
 import logging
+from pathlib import Path
 from typing import Any
 
-from sqlalchemy import text
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from alembic import command
+from alembic.config import Config
 from app.db.database import Base, engine
 
 logger = logging.getLogger(__name__)
 
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
 
 async def create_extensions(db: AsyncSession) -> None:
     """
@@ -33,19 +39,44 @@ async def create_extensions(db: AsyncSession) -> None:
         raise
 
 
+def migrate(connection: Connection) -> None:
+    """
+    Bring the database schema up to date with the models.
+
+    A new database gets every table from the models and is stamped with the latest
+    migration. An existing one, including one created before there were migrations, is
+    migrated first; tables added to the models since are then created.
+
+    Args:
+        connection: Database connection to migrate on
+    """
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    # env.py runs the migrations on this connection
+    config.attributes["connection"] = connection
+
+    tables = inspect(connection).get_table_names()
+    if "alembic_version" not in tables and "documents" not in tables:
+        Base.metadata.create_all(connection)
+        command.stamp(config, "head")
+        logger.info("Created database tables")
+    else:
+        command.upgrade(config, "head")
+        Base.metadata.create_all(connection)
+        logger.info("Migrated database tables")
+
+
 async def init_db() -> None:
     """
     Initialize database with tables and extensions.
 
-    This function creates all tables defined in SQLAlchemy models
+    This function creates or migrates all tables defined in SQLAlchemy models
     and ensures the necessary PostgreSQL extensions are installed.
     """
     try:
-        # Create all tables
         async with engine.begin() as conn:
-            # Create tables
-            await conn.run_sync(Base.metadata.create_all)
-            logger.info("Created database tables")
+            # Create or migrate tables
+            await conn.run_sync(migrate)
 
             # Create a session to run extension creation
             async with AsyncSession(engine) as session:
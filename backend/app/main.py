@@ -10,8 +10,14 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.api import api_router
+from app.api.middleware import RequestDeadlineMiddleware
 from app.core.config import settings
 from app.db.init_db import init_db
+from app.services.job_manager import job_manager
+from app.services.llm_cache import response_cache
+from app.services.llm_manager import close_shared_http_client
+from app.services.llm_registry import llm_registry
+from app.services.password_hasher import password_hasher
 
 # Configure root logger first
 root_logger = logging.getLogger()
@@ -61,6 +67,9 @@ if allowed_origins:
         allow_headers=["*"],
     )
 
+# Bound every request by a deadline that the LLM layer enforces
+app.add_middleware(RequestDeadlineMiddleware)
+
 # Include routers
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -71,6 +80,18 @@ async def startup_event() -> None:
     logger.info("Initializing database...")
     await init_db()
     logger.info("Database initialized successfully")
+    await job_manager.recover()
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    """Stop job workers and release LLM connections, the cache and hashing workers."""
+    await job_manager.shutdown()
+    for manager in llm_registry.managers().values():
+        await manager.aclose()
+    await close_shared_http_client()
+    response_cache.close()
+    password_hasher.shutdown()
 
 
 @app.get("/health")
@@ -11,10 +11,45 @@ from app.models.auth import (
     UserLogin,
     UserResponse,
 )
+from app.models.chat import (
+    ChatMessage,
+    ChatMessageResponse,
+    ChatSession,
+    ChatSessionCreate,
+    ChatSessionResponse,
+)
 from app.models.custom_action import CustomAction
-from app.models.document import Document, DocumentHistory
-from app.models.llm import LLMConnectionRequest, LLMConnectionResponse, LLMType
-from app.models.text import ActionRequest, ChatRequest, EvalRequest, TextResponse
+from app.models.document import (
+    Document,
+    DocumentCreate,
+    DocumentHistory,
+    DocumentPage,
+    DocumentResponse,
+    DocumentSummary,
+    DocumentUpdate,
+    DocumentVersionPage,
+    DocumentVersionResponse,
+    DocumentVersionSummary,
+)
+from app.models.job import Job, JobResponse
+from app.models.llm import (
+    LlamaEndpoint,
+    LLMConnectionRequest,
+    LLMConnectionResponse,
+    LLMType,
+    SimulatorOptions,
+)
+from app.models.text import (
+    ActionItem,
+    ActionRequest,
+    BatchActionRequest,
+    BatchEvalRequest,
+    ChatRequest,
+    CriterionEvaluation,
+    EvalCriterion,
+    EvalRequest,
+    TextResponse,
+)
 from app.models.user import User
 from app.models.user_preference import UserPreference
 
@@ -23,16 +58,38 @@ __all__ = [
     "User",
     "Document",
     "DocumentHistory",
+    "ChatSession",
+    "ChatMessage",
     "CustomAction",
+    "Job",
     "UserPreference",
     # API models
     "LLMType",
+    "LlamaEndpoint",
     "LLMConnectionRequest",
     "LLMConnectionResponse",
+    "SimulatorOptions",
     "ActionRequest",
     "EvalRequest",
     "ChatRequest",
+    "EvalCriterion",
+    "BatchEvalRequest",
+    "CriterionEvaluation",
+    "ActionItem",
+    "BatchActionRequest",
     "TextResponse",
+    "JobResponse",
+    "DocumentCreate",
+    "DocumentUpdate",
+    "DocumentSummary",
+    "DocumentResponse",
+    "DocumentPage",
+    "DocumentVersionSummary",
+    "DocumentVersionResponse",
+    "DocumentVersionPage",
+    "ChatSessionCreate",
+    "ChatSessionResponse",
+    "ChatMessageResponse",
     # Auth models
     "Token",
     "TokenPayload",
@@ -0,0 +1,96 @@
+"""
+Chat session models for server-held conversation history.
+"""
+
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.database import Base
+
+
+class ChatSession(Base):
+    """Chat session model for storing a user's conversation about a document."""
+
+    __tablename__ = "chat_sessions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    document_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("documents.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+    title = Column(String(255), nullable=True)
+    # Document text last sent for the session; sent again only when it changes
+    context = Column(Text, nullable=True)
+    # Rolling summary of every message up to and including seq summarized_through
+    summary = Column(Text, nullable=True)
+    summarized_through = Column(Integer, nullable=False, default=0)
+    message_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        """Return string representation of chat session."""
+        return f"<ChatSession {self.id}>"
+
+
+class ChatMessage(Base):
+    """Chat message model for storing one turn of a chat session."""
+
+    __tablename__ = "chat_messages"
+    __table_args__ = (UniqueConstraint("session_id", "seq", name="uq_chat_messages_session_seq"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    session_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("chat_sessions.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    # Position in the session, starting at 1
+    seq = Column(Integer, nullable=False)
+    role = Column(String(20), nullable=False)
+    content = Column(Text, nullable=False)
+    # Estimated tokens, so history budgets are computed without re-reading content
+    tokens = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        """Return string representation of chat message."""
+        return f"<ChatMessage {self.session_id}#{self.seq}>"
+
+
+class ChatSessionCreate(BaseModel):
+    document_id: Optional[uuid.UUID] = None
+    title: Optional[str] = None
+    context: Optional[str] = None
+
+
+class ChatMessageResponse(BaseModel):
+    seq: int
+    role: str
+    content: str
+    created_at: Optional[datetime] = None
+
+
+class ChatSessionResponse(BaseModel):
+    """A chat session, with its messages when a single session is requested."""
+
+    id: str
+    document_id: Optional[str] = None
+    title: Optional[str] = None
+    summary: Optional[str] = None
+    summarized_through: int
+    message_count: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    messages: Optional[List[ChatMessageResponse]] = None
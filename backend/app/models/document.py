@@ -4,8 +4,10 @@ Document models for storing user documents and document history.
 
 import uuid
 from datetime import datetime
+from typing import List, Optional
 
-from sqlalchemy import Column, DateTime, ForeignKey, String, Text
+from pydantic import BaseModel, Field
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -16,21 +18,26 @@ class Document(Base):
     """Document model for storing user documents."""
 
     __tablename__ = "documents"
+    # Lists page through a user's documents, most recently updated first, by keyset on
+    # this index; it also serves lookups by user alone
+    __table_args__ = (Index("ix_documents_user_updated_id", "user_id", "updated_at", "id"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(
-        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
-    )
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title = Column(String(255), nullable=False)
     content = Column(Text, nullable=True)
     document_type = Column(String(50), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     user = relationship("User", back_populates="documents")
+    # History rows are removed by the database's ON DELETE CASCADE, without loading them
     history = relationship(
-        "DocumentHistory", back_populates="document", cascade="all, delete-orphan"
+        "DocumentHistory",
+        back_populates="document",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     def __repr__(self) -> str:
@@ -39,18 +46,30 @@ class Document(Base):
 
 
 class DocumentHistory(Base):
-    """Document history model for storing document version history."""
+    """
+    Document history model for storing document version history.
+
+    Versions are numbered from 1 per document. A keyframe stores the full text in
+    ``content``; other versions store ``delta``, the JSON replacement ops that turn the
+    previous version into this one (see app/services/document_history.py).
+    """
 
     __tablename__ = "document_history"
+    # Serves rebuilding a version from its keyframe and paging through versions
+    __table_args__ = (UniqueConstraint("document_id", "version"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     document_id = Column(
         UUID(as_uuid=True),
         ForeignKey("documents.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
-    content = Column(Text, nullable=False)
+    version = Column(Integer, nullable=False)
+    # The keyframe this version is rebuilt from; its own version for keyframes
+    keyframe_version = Column(Integer, nullable=False)
+    content = Column(Text, nullable=True)
+    delta = Column(Text, nullable=True)
+    content_length = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -59,3 +78,58 @@ class DocumentHistory(Base):
     def __repr__(self) -> str:
         """Return string representation of document history."""
         return f"<DocumentHistory {self.id}>"
+
+
+class DocumentCreate(BaseModel):
+    title: str = Field(..., min_length=1, max_length=255)
+    content: Optional[str] = None
+    document_type: str = Field("Custom", max_length=50)
+
+
+class DocumentUpdate(BaseModel):
+    """Fields to change; fields left out are kept."""
+
+    title: Optional[str] = Field(None, min_length=1, max_length=255)
+    content: Optional[str] = None
+    document_type: Optional[str] = Field(None, max_length=50)
+
+
+class DocumentSummary(BaseModel):
+    """A document as listed, without its content."""
+
+    id: str
+    title: str
+    document_type: str
+    created_at: Optional[datetime] = None
+    updated_at: datetime
+
+
+class DocumentResponse(DocumentSummary):
+    content: Optional[str] = None
+
+
+class DocumentPage(BaseModel):
+    """One page of a document list; pass ``next_cursor`` back to get the next page."""
+
+    items: List[DocumentSummary]
+    next_cursor: Optional[str] = None
+
+
+class DocumentVersionSummary(BaseModel):
+    """A history version as listed, without its content."""
+
+    version: int
+    keyframe: bool
+    content_length: int
+    created_at: Optional[datetime] = None
+
+
+class DocumentVersionResponse(DocumentVersionSummary):
+    content: str
+
+
+class DocumentVersionPage(BaseModel):
+    """One page of a document's history, newest first; pass ``next_cursor`` back for more."""
+
+    items: List[DocumentVersionSummary]
+    next_cursor: Optional[int] = None
@@ -0,0 +1,52 @@
+"""
+Background job models for long-running text actions.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import JSON, Column, DateTime, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.database import Base
+
+
+class Job(Base):
+    """Job model for persisting background job status and results."""
+
+    __tablename__ = "jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Id of the user who queued the job
+    owner = Column(String(64), nullable=False, index=True)
+    action = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False, index=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True, index=True)
+    # Process running the job, and when its claim lapses unless that process renews it
+    instance_id = Column(String(32), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        """Return string representation of job."""
+        return f"<Job {self.id} {self.status}>"
+
+
+class JobResponse(BaseModel):
+    """A background job's status and, once it has finished, its result or error."""
+
+    id: str
+    action: str
+    status: str
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
@@ -1,12 +1,28 @@
 from enum import Enum
-from typing import Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class LLMType(str, Enum):
     OPENAI = "openai"
     LLAMA = "llama"
+    SIMULATED = "simulated"
+
+
+class LlamaEndpoint(BaseModel):
+    host: str
+    port: str
+
+
+class SimulatorOptions(BaseModel):
+    """Overrides for the simulated provider; unset fields use the SIMULATOR_* settings."""
+
+    ttft_ms: Optional[float] = Field(default=None, ge=0)
+    tokens_per_second: Optional[float] = Field(default=None, ge=0)
+    error_rate: Optional[float] = Field(default=None, ge=0, le=1)
+    output_tokens: Optional[int] = Field(default=None, ge=0)
+    seed: Optional[int] = None
 
 
 class LLMConnectionRequest(BaseModel):
@@ -14,6 +30,15 @@ class LLMConnectionRequest(BaseModel):
     api_key: Optional[str] = None
     host: Optional[str] = None
     port: Optional[str] = None
+    # Several Llama.cpp servers to balance across, instead of a single host/port
+    endpoints: Optional[List[LlamaEndpoint]] = None
+    routing: Literal["least_outstanding", "power_of_two"] = "least_outstanding"
+    sticky: bool = False
+    # One of the user's named connections, selected later with an X-LLM-Profile header
+    profile: Optional[str] = None
+    # Replace the default connection that anonymous requests use (admins only)
+    default: bool = False
+    simulator: Optional[SimulatorOptions] = None
 
 
 class LLMConnectionResponse(BaseModel):
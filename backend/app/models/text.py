@@ -1,6 +1,6 @@
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ActionRequest(BaseModel):
@@ -15,6 +15,10 @@ class ActionRequest(BaseModel):
             "Custom", "Blog", "Essay", "LinkedIn", "X", "Threads", "Reddit", "Email", "Newsletter"
         ]
     ] = "Custom"
+    # Process the text in chunks; None decides by length and document type
+    long_document: Optional[bool] = None
+    # After a chunked run, revise each chunk against its neighbours
+    consistency_pass: bool = False
 
 
 class EvalRequest(BaseModel):
@@ -23,6 +27,45 @@ class EvalRequest(BaseModel):
     text: str
 
 
+class EvalCriterion(BaseModel):
+    eval_name: str
+    eval_description: str
+
+
+class BatchEvalRequest(BaseModel):
+    text: str
+    evals: List[EvalCriterion] = Field(..., min_length=1)
+    # Evaluate every criterion in one LLM call instead of one call per criterion
+    fused: bool = False
+
+
+class CriterionEvaluation(BaseModel):
+    """One criterion's entry in a fused evaluation, as returned by the LLM."""
+
+    criterion: str
+    score: int = Field(..., ge=0, le=10)
+    summary: str
+    suggestions: List[str] = []
+
+
+class ActionItem(BaseModel):
+    action: str
+    action_description: str
+
+
+class BatchActionRequest(BaseModel):
+    text: str
+    about_me: str
+    preferred_style: str
+    tone: str
+    document_type: Optional[
+        Literal[
+            "Custom", "Blog", "Essay", "LinkedIn", "X", "Threads", "Reddit", "Email", "Newsletter"
+        ]
+    ] = "Custom"
+    actions: List[ActionItem] = Field(..., min_length=1)
+
+
 class ChatRequest(BaseModel):
     message: str
     context: Optional[str] = None
@@ -6,6 +6,7 @@ import uuid
 
 from sqlalchemy import Boolean, Column, String
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
 
 from app.db.database import Base
 
@@ -20,6 +21,25 @@ class User(Base):
     password_hash = Column(String, nullable=False)
     is_verified = Column(Boolean, default=False)
 
+    # Relationships
+    documents = relationship("Document", back_populates="user", cascade="all, delete-orphan")
+    custom_actions = relationship(
+        "CustomAction", back_populates="user", cascade="all, delete-orphan"
+    )
+    preferences = relationship(
+        "UserPreference", back_populates="user", uselist=False, cascade="all, delete-orphan"
+    )
+
+    @property
+    def username(self) -> str:
+        """Users sign in with their email address."""
+        return str(self.email)
+
+    @property
+    def is_active(self) -> bool:
+        """Accounts cannot be deactivated, so every user is active."""
+        return True
+
     def __repr__(self) -> str:
         """Return string representation of user."""
         return f"<User {self.email}>"
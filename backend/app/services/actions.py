@@ -0,0 +1,60 @@
+"""
+Running text actions, shared by the action endpoints and background jobs.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from app.models.text import ActionRequest
+from app.services.chunked_action import ChunkedAction, use_long_document_mode
+from app.services.llm_manager import LLMConnectionManager
+from app.services.output_validator import attempts_payload, generate_validated
+from app.services.text_formatter import format_action_prompt
+
+logger = logging.getLogger(__name__)
+
+
+async def run_action(
+    llm_manager: LLMConnectionManager,
+    request: ActionRequest,
+    use_cache: bool = False,
+    refresh_cache: bool = False,
+    sticky_key: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run one text action, in chunks if the document is long.
+
+    Args:
+        llm_manager: Connection to generate with.
+        request: The action and the text to apply it to.
+        use_cache: Serve and store responses through the response cache.
+        refresh_cache: Skip the cache lookup but still store fresh responses.
+        sticky_key: Key (user or document) that should keep hitting the same backend.
+
+    Returns:
+        The new ``text``, with the number of ``chunks`` for chunked runs or the
+        validation ``attempts`` otherwise.
+    """
+    if use_long_document_mode(request):
+        action = ChunkedAction(
+            llm_manager,
+            request,
+            consistency_pass=request.consistency_pass,
+            use_cache=use_cache,
+            refresh_cache=refresh_cache,
+            sticky_key=sticky_key,
+        )
+        return {"text": await action.run(), "chunks": len(action.chunks)}
+
+    prompt = format_action_prompt(request)
+    logger.debug(f"Sending prompt to LLM: {prompt}")
+    text, attempts = await generate_validated(
+        llm_manager,
+        prompt,
+        request.document_type,
+        request.text,
+        use_cache=use_cache,
+        refresh_cache=refresh_cache,
+        sticky_key=sticky_key,
+    )
+    return {"text": text, "attempts": attempts_payload(attempts)}
@@ -0,0 +1,146 @@
+"""
+Admission control for LLM generation.
+
+Each backend gets a concurrency limit with a bounded priority wait queue. Interactive
+requests are admitted ahead of background ones, and when the queue is full new
+requests are rejected immediately so the server sheds load instead of piling up
+requests that will time out.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Deque, Dict, List, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Number of recent queue waits kept for percentile reporting
+WAIT_SAMPLE_SIZE = 1000
+
+
+class Priority(IntEnum):
+    """Admission priority; lower values are admitted first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class AdmissionRejected(Exception):
+    """Raised when a backend's wait queue is full."""
+
+    def __init__(self, message: str, retry_after: int) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency limiter with a bounded priority wait queue."""
+
+    def __init__(self, max_concurrency: int, max_queue: int, retry_after: int) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.active = 0
+        self._queue: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+        self._sequence = itertools.count()
+        self._waits_ms: Deque[float] = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, future in self._queue if not future.done())
+
+    def check(self) -> None:
+        """Raise AdmissionRejected if a new request could not even be queued."""
+        if self.active >= self.max_concurrency and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected("LLM backend is overloaded", self.retry_after)
+
+    async def _acquire(self, priority: Priority) -> None:
+        start = time.perf_counter()
+        if self.active < self.max_concurrency and not self.queued:
+            self.active += 1
+        else:
+            self.check()
+            future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._queue, (int(priority), next(self._sequence), future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                # The slot may have been handed over just as the waiter was cancelled
+                if future.done() and not future.cancelled():
+                    self._release()
+                raise
+        self.admitted += 1
+        self._waits_ms.append((time.perf_counter() - start) * 1000)
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next live waiter, highest priority first
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.INTERACTIVE) -> AsyncIterator[None]:
+        """Hold one generation slot for the duration of the block."""
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, wait time and rejection counters."""
+        waits = sorted(self._waits_ms)
+        return {
+            "active": self.active,
+            "max_concurrency": self.max_concurrency,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_ms_p50": round(waits[len(waits) // 2], 1) if waits else 0.0,
+            "wait_ms_p95": round(waits[int(len(waits) * 0.95)], 1) if waits else 0.0,
+            "wait_ms_max": round(waits[-1], 1) if waits else 0.0,
+        }
+
+
+_controllers: Dict[str, AdmissionController] = {}
+
+
+def get_admission_controller(backend_key: str, backends: int = 1) -> AdmissionController:
+    """
+    Return the admission controller shared by every connection to a backend.
+
+    Args:
+        backend_key: Identity of the upstream backend (or pool of backends).
+        backends: Number of servers behind the key; limits scale with it.
+
+    Returns:
+        The backend's admission controller.
+    """
+    controller = _controllers.get(backend_key)
+    if controller is None:
+        controller = AdmissionController(
+            max_concurrency=settings.LLM_MAX_CONCURRENCY_PER_BACKEND * backends,
+            max_queue=settings.LLM_MAX_QUEUE_PER_BACKEND * backends,
+            retry_after=settings.LLM_RETRY_AFTER_SECONDS,
+        )
+        _controllers[backend_key] = controller
+    return controller
+
+
+def admission_stats() -> Dict[str, Dict[str, Any]]:
+    """Return statistics for every backend's admission controller."""
+    return {key: controller.stats() for key, controller in _controllers.items()}
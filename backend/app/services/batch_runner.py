@@ -0,0 +1,72 @@
+"""
+Run many LLM tasks for one request concurrently and report each as it finishes.
+
+Batches share the request's authentication and text, run with bounded parallelism
+on top of the backend's admission control, and isolate failures: one failed item
+does not fail the batch.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.services.admission import AdmissionRejected
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of one item of a batch."""
+
+    index: int
+    success: bool
+    elapsed_ms: float
+    data: Dict[str, Any] = field(default_factory=dict)
+    detail: Optional[str] = None
+    retry_after: Optional[int] = None
+
+
+async def run_batch(
+    tasks: List[Callable[[], Awaitable[Dict[str, Any]]]], max_parallel: int
+) -> AsyncIterator[BatchItemResult]:
+    """
+    Run batch items concurrently, yielding each result as soon as it is ready.
+
+    Args:
+        tasks: One factory per item, returning the item's result fields.
+        max_parallel: Maximum number of items running at once.
+
+    Yields:
+        Item results in completion order.
+    """
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def run(index: int) -> BatchItemResult:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                data = await tasks[index]()
+                return BatchItemResult(index, True, _elapsed_ms(start), data=data)
+            except AdmissionRejected as e:
+                return BatchItemResult(
+                    index, False, _elapsed_ms(start), detail=str(e), retry_after=e.retry_after
+                )
+            except Exception as e:
+                logger.error(f"Batch item {index} failed: {str(e)}")
+                return BatchItemResult(index, False, _elapsed_ms(start), detail=str(e))
+
+    futures = [asyncio.ensure_future(run(index)) for index in range(len(tasks))]
+    try:
+        for next_done in asyncio.as_completed(futures):
+            yield await next_done
+    finally:
+        # Stop remaining items if the client goes away mid-batch
+        for future in futures:
+            future.cancel()
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
@@ -0,0 +1,240 @@
+"""
+Request deadlines and cancellation of generations nobody is waiting for.
+
+Each request carries a deadline, from the ``X-Request-Timeout`` header or the configured
+default, in a context variable that the LLM manager reads, so every generation a request
+starts (including chunked and batch work running in other tasks) stops when the deadline
+passes. Endpoints also watch for the client going away and cancel their work when it
+does. Cancelling a generation closes its upstream connection, which makes Llama.cpp stop
+generating and frees its slot instead of finishing a completion nobody will read.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+from app.core.config import settings
+from app.services.document_limits import CHARS_PER_TOKEN, GenerationBudget
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEADLINE_HEADER = "x-request-timeout"
+
+REASON_CANCELLED = "cancelled"
+REASON_DEADLINE = "deadline"
+REASON_DISCONNECT = "disconnect"
+REASON_SUPERSEDED = "superseded"
+
+# Monotonic time by which the current request must be answered, if any
+_deadline: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before its generation finished."""
+
+
+class ClientDisconnected(Exception):
+    """The client went away before its request finished."""
+
+
+def request_timeout(header: Optional[str]) -> Optional[float]:
+    """
+    Resolve a request's timeout from its header and the configured default.
+
+    A header can only shorten the configured deadline; malformed or non-positive
+    values are ignored.
+
+    Args:
+        header: Value of the ``X-Request-Timeout`` header, in seconds.
+
+    Returns:
+        Seconds the request may take, or None for no deadline.
+    """
+    default = settings.REQUEST_DEADLINE_SECONDS or None
+    try:
+        requested = float(header) if header is not None else None
+    except ValueError:
+        requested = None
+    if requested is None or requested <= 0:
+        return default
+    return min(requested, default) if default is not None else requested
+
+
+def start_deadline(seconds: Optional[float]) -> "contextvars.Token[Optional[float]]":
+    """Set the current request's deadline to ``seconds`` from now."""
+    return _deadline.set(time.monotonic() + seconds if seconds is not None else None)
+
+
+def reset_deadline(token: "contextvars.Token[Optional[float]]") -> None:
+    """Restore the deadline in effect before ``start_deadline``."""
+    _deadline.reset(token)
+
+
+def time_left() -> Optional[float]:
+    """
+    Return the seconds left before the current request's deadline.
+
+    Raises:
+        DeadlineExceeded: If the deadline has already passed.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        cancellation_stats.record_request(REASON_DEADLINE)
+        raise DeadlineExceeded("Request deadline exceeded")
+    return remaining
+
+
+class CancellationStats:
+    """Counters for abandoned requests and the upstream generations cancelled for them."""
+
+    def __init__(self) -> None:
+        self.requests: Dict[str, int] = {
+            REASON_CANCELLED: 0,
+            REASON_DEADLINE: 0,
+            REASON_DISCONNECT: 0,
+            REASON_SUPERSEDED: 0,
+        }
+        self.generations_cancelled = 0
+        self.tokens_generated = 0
+        self.tokens_saved = 0
+
+    def record_request(self, reason: str) -> None:
+        self.requests[reason] = self.requests.get(reason, 0) + 1
+
+    def record_generation(self, budget: Optional[GenerationBudget], generated_chars: int) -> None:
+        """
+        Count an upstream generation stopped before it finished.
+
+        Tokens saved are estimated from what was left of the generation's budget, so
+        they are an upper bound; non-streaming generations count nothing as generated.
+        """
+        generated = generated_chars // CHARS_PER_TOKEN
+        self.generations_cancelled += 1
+        self.tokens_generated += generated
+        if budget is not None:
+            self.tokens_saved += max(0, budget.max_tokens - generated)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "default_deadline_seconds": settings.REQUEST_DEADLINE_SECONDS,
+            "requests_cancelled": dict(self.requests),
+            "generations_cancelled": self.generations_cancelled,
+            "tokens_generated_before_cancel": self.tokens_generated,
+            "estimated_tokens_saved": self.tokens_saved,
+        }
+
+
+# Create a singleton instance
+cancellation_stats = CancellationStats()
+
+
+async def with_deadline(items: AsyncIterator[T]) -> AsyncIterator[T]:
+    """
+    Stop a stream when the current request's deadline passes.
+
+    Args:
+        items: Stream to bound.
+
+    Yields:
+        The stream's items until it ends or the deadline passes.
+
+    Raises:
+        DeadlineExceeded: If the deadline passes first.
+    """
+    iterator = items.__aiter__()
+    try:
+        while True:
+            timeout = time_left()
+            try:
+                item = await asyncio.wait_for(iterator.__anext__(), timeout)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                cancellation_stats.record_request(REASON_DEADLINE)
+                raise DeadlineExceeded(f"Request deadline exceeded after {timeout:.1f}s")
+            yield item
+    finally:
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+async def run_until_disconnected(
+    work: Awaitable[T],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    poll_seconds: Optional[float] = None,
+) -> T:
+    """
+    Await work, cancelling it if the client disconnects first.
+
+    Args:
+        work: The request's work.
+        is_disconnected: Check for the client having gone, such as ``Request.is_disconnected``.
+        poll_seconds: Interval between checks; defaults to the setting.
+
+    Returns:
+        The work's result.
+
+    Raises:
+        ClientDisconnected: If the client went away first.
+    """
+    poll_seconds = poll_seconds or settings.DISCONNECT_POLL_SECONDS
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_seconds)
+            if done:
+                return task.result()
+            if await is_disconnected():
+                cancellation_stats.record_request(REASON_DISCONNECT)
+                logger.info("Client disconnected; cancelling its generation")
+                raise ClientDisconnected("Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+            # Let the cancellation close upstream connections before returning
+            await asyncio.gather(task, return_exceptions=True)
+
+
+async def stream_until_disconnected(
+    items: AsyncIterator[T],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    poll_seconds: Optional[float] = None,
+) -> AsyncIterator[T]:
+    """
+    Forward a stream, closing it as soon as the client disconnects.
+
+    Disconnects are noticed while waiting for the next item, not only when the next
+    write to the client fails, so a slow generation is cancelled promptly.
+
+    Args:
+        items: Stream to forward, such as server-sent events.
+        is_disconnected: Check for the client having gone, such as ``Request.is_disconnected``.
+        poll_seconds: Interval between checks; defaults to the setting.
+
+    Yields:
+        The stream's items until it ends or the client goes away.
+    """
+    iterator = items.__aiter__()
+    try:
+        while True:
+            try:
+                item = await run_until_disconnected(
+                    iterator.__anext__(), is_disconnected, poll_seconds
+                )
+            except (StopAsyncIteration, ClientDisconnected):
+                return
+            yield item
+    finally:
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
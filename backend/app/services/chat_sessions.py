@@ -0,0 +1,288 @@
+"""
+Server-side chat sessions with a bounded, incrementally summarized history.
+
+A session keeps its messages in Postgres along with the document text last sent for it,
+so each turn only carries the new message. Prompts are built from the document, a rolling
+summary of older turns and the recent turns verbatim. When the summary and recent turns
+outgrow ``CHAT_HISTORY_TOKENS``, the oldest recent turns are folded into the summary. The
+LLM then sees only the previous summary and the turns being folded, never the whole
+conversation, so summarizing costs the same however long the session gets. Folding goes
+down to a low-water mark, so it happens once every few turns rather than on every turn.
+"""
+
+import logging
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, cast
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.chat import ChatMessage, ChatSession
+from app.models.document import Document
+from app.models.text import ChatRequest
+from app.services.document_limits import GenerationBudget, estimate_tokens
+from app.services.llm_manager import LLMConnectionManager
+from app.services.retrieval import select_context
+from app.services.text_formatter import format_chat_session_prompt, format_chat_summary_prompt
+
+logger = logging.getLogger(__name__)
+
+ROLE_USER = "user"
+ROLE_ASSISTANT = "assistant"
+
+# Words per token, for telling the LLM how long the summary may be
+WORDS_PER_TOKEN = 0.75
+
+
+def messages_to_fold(
+    summary_tokens: int, messages: Sequence[ChatMessage], incoming_tokens: int
+) -> int:
+    """
+    Decide how many of the oldest unsummarized messages to fold into the summary.
+
+    Nothing is folded while the summary, the unsummarized messages and the incoming
+    message fit in ``CHAT_HISTORY_TOKENS``. Past that, messages are folded until what is
+    left, plus a summary of at most ``CHAT_SUMMARY_TOKENS``, is under the low-water mark,
+    keeping at least ``CHAT_KEEP_RECENT_MESSAGES`` and never separating a user message
+    from the reply to it.
+
+    Args:
+        summary_tokens: Tokens in the current summary.
+        messages: Unsummarized messages, oldest first.
+        incoming_tokens: Tokens in the message about to be sent.
+
+    Returns:
+        Number of messages to fold, from the start of ``messages``.
+    """
+    recent = incoming_tokens + sum(m.tokens for m in messages)
+    if summary_tokens + recent <= settings.CHAT_HISTORY_TOKENS:
+        return 0
+
+    target = (
+        settings.CHAT_HISTORY_TOKENS * settings.CHAT_HISTORY_LOW_WATER
+        - settings.CHAT_SUMMARY_TOKENS
+    )
+    foldable = len(messages) - settings.CHAT_KEEP_RECENT_MESSAGES
+    count = 0
+    while count < foldable and recent > target:
+        recent -= messages[count].tokens
+        count += 1
+    # Fold whole exchanges: take the reply along, or leave the question out
+    if count and messages[count - 1].role == ROLE_USER:
+        count = count + 1 if count < foldable else count - 1
+    return count
+
+
+class ChatMemoryStats:
+    """Counters showing how big chat session prompts get and how often history is folded."""
+
+    def __init__(self) -> None:
+        self.turns = 0
+        self.history_tokens = 0
+        self.max_history_tokens = 0
+        self.folds = 0
+        self.messages_folded = 0
+        self.fold_input_tokens = 0
+
+    def record_prompt(self, history_tokens: int) -> None:
+        self.turns += 1
+        self.history_tokens += history_tokens
+        self.max_history_tokens = max(self.max_history_tokens, history_tokens)
+
+    def record_fold(self, messages: Sequence[ChatMessage], prompt: str) -> None:
+        self.folds += 1
+        self.messages_folded += len(messages)
+        self.fold_input_tokens += estimate_tokens(prompt)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "history_token_budget": settings.CHAT_HISTORY_TOKENS,
+            "turns": self.turns,
+            "avg_history_tokens": round(self.history_tokens / self.turns, 1) if self.turns else 0,
+            "max_history_tokens": self.max_history_tokens,
+            "folds": self.folds,
+            "messages_folded": self.messages_folded,
+            "avg_fold_input_tokens": (
+                round(self.fold_input_tokens / self.folds, 1) if self.folds else 0
+            ),
+        }
+
+
+# Create a singleton instance
+chat_memory_stats = ChatMemoryStats()
+
+
+async def create_session(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    document_id: Optional[uuid.UUID] = None,
+    title: Optional[str] = None,
+    context: Optional[str] = None,
+) -> ChatSession:
+    """Create a chat session, optionally about one of the user's stored documents"""
+    if document_id is not None:
+        document = await db.get(Document, document_id)
+        if document is None or document.user_id != user_id:
+            raise ValueError("Document not found")
+    chat_session = ChatSession(
+        user_id=user_id,
+        document_id=document_id,
+        title=title,
+        context=context,
+        summarized_through=0,
+        message_count=0,
+    )
+    db.add(chat_session)
+    await db.commit()
+    await db.refresh(chat_session)
+    return chat_session
+
+
+async def get_session(
+    db: AsyncSession, user_id: uuid.UUID, session_id: uuid.UUID
+) -> Optional[ChatSession]:
+    """Get one of a user's chat sessions"""
+    stmt = select(ChatSession).where(ChatSession.id == session_id, ChatSession.user_id == user_id)
+    result = await db.execute(stmt)
+    return cast(Optional[ChatSession], result.scalar_one_or_none())
+
+
+async def list_sessions(
+    db: AsyncSession, user_id: uuid.UUID, document_id: Optional[uuid.UUID] = None
+) -> List[ChatSession]:
+    """List a user's chat sessions, most recently used first"""
+    stmt = select(ChatSession).where(ChatSession.user_id == user_id)
+    if document_id is not None:
+        stmt = stmt.where(ChatSession.document_id == document_id)
+    result = await db.execute(stmt.order_by(ChatSession.updated_at.desc()))
+    return list(result.scalars().all())
+
+
+async def delete_session(db: AsyncSession, chat_session: ChatSession) -> None:
+    """Delete a chat session; its messages are deleted with it"""
+    await db.delete(chat_session)
+    await db.commit()
+
+
+async def get_messages(
+    db: AsyncSession, session_id: uuid.UUID, after_seq: int = 0
+) -> List[ChatMessage]:
+    """Get a session's messages after ``after_seq``, oldest first"""
+    stmt = (
+        select(ChatMessage)
+        .where(ChatMessage.session_id == session_id, ChatMessage.seq > after_seq)
+        .order_by(ChatMessage.seq)
+    )
+    result = await db.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def fold_into_summary(
+    llm_manager: LLMConnectionManager,
+    summary: Optional[str],
+    messages: Sequence[ChatMessage],
+    sticky_key: Optional[str] = None,
+) -> str:
+    """
+    Fold messages into a running summary.
+
+    Args:
+        llm_manager: LLM manager to summarize with.
+        summary: The summary so far, if any.
+        messages: Messages to add to it, oldest first.
+        sticky_key: Key that keeps the user on the same Llama.cpp server.
+
+    Returns:
+        The new summary.
+    """
+    prompt = format_chat_summary_prompt(
+        summary,
+        [(m.role, m.content) for m in messages],
+        int(settings.CHAT_SUMMARY_TOKENS * WORDS_PER_TOKEN),
+    )
+    new_summary = await llm_manager.generate_text(
+        prompt,
+        sticky_key=sticky_key,
+        budget=GenerationBudget(max_tokens=settings.CHAT_SUMMARY_TOKENS),
+    )
+    chat_memory_stats.record_fold(messages, prompt)
+    return new_summary.strip()
+
+
+async def _session_context(db: AsyncSession, chat_session: ChatSession) -> Optional[str]:
+    """The session's document text: as last sent, or else the stored document's"""
+    if chat_session.context is not None or chat_session.document_id is None:
+        return cast(Optional[str], chat_session.context)
+    document = await db.get(Document, chat_session.document_id)
+    return cast(Optional[str], document.content) if document is not None else None
+
+
+async def prepare_turn(
+    db: AsyncSession,
+    llm_manager: LLMConnectionManager,
+    chat_session: ChatSession,
+    request: ChatRequest,
+    sticky_key: Optional[str] = None,
+) -> str:
+    """
+    Build the prompt for a new message, first folding old turns if the history is too long.
+
+    A ``context`` on the request replaces the session's stored document text. The fold is
+    saved straight away, and the message itself is saved with its reply by ``record_turn``.
+
+    Args:
+        db: Database session.
+        llm_manager: LLM manager, used to fold old turns into the summary.
+        chat_session: The session.
+        request: The new message.
+        sticky_key: Key that keeps the user on the same Llama.cpp server.
+
+    Returns:
+        The prompt for the new message.
+    """
+    if request.context is not None:
+        chat_session.context = request.context
+    recent = await get_messages(db, chat_session.id, chat_session.summarized_through)
+    count = messages_to_fold(
+        estimate_tokens(chat_session.summary), recent, estimate_tokens(request.message)
+    )
+    if count:
+        chat_session.summary = await fold_into_summary(
+            llm_manager, chat_session.summary, recent[:count], sticky_key
+        )
+        chat_session.summarized_through = recent[count - 1].seq
+        recent = recent[count:]
+
+    chat_memory_stats.record_prompt(
+        estimate_tokens(chat_session.summary) + sum(m.tokens for m in recent)
+    )
+    prompt = format_chat_session_prompt(
+        request.message,
+        select_context(await _session_context(db, chat_session), request.message),
+        chat_session.summary,
+        [(m.role, m.content) for m in recent],
+    )
+    if count or request.context is not None:
+        await db.commit()
+    return prompt
+
+
+async def record_turn(db: AsyncSession, session_id: uuid.UUID, message: str, reply: str) -> None:
+    """Save a message and the reply to it, unless the session was deleted meanwhile"""
+    # Lock the session so concurrent turns number their messages one after the other
+    chat_session = await db.get(ChatSession, session_id, with_for_update=True)
+    if chat_session is None:
+        return
+    for role, content in ((ROLE_USER, message), (ROLE_ASSISTANT, reply)):
+        chat_session.message_count += 1
+        db.add(
+            ChatMessage(
+                session_id=chat_session.id,
+                seq=chat_session.message_count,
+                role=role,
+                content=content,
+                tokens=estimate_tokens(content),
+            )
+        )
+    await db.commit()
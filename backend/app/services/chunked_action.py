@@ -0,0 +1,164 @@
+"""
+Map-reduce processing of long documents for text actions.
+
+A long document is split on its Markdown structure and the action runs on each chunk
+concurrently, with bounded parallelism and the same user and style context in every
+prompt. Results are stitched back together in document order. An optional consistency
+pass then revises each chunk against the edges of its neighbours, so terminology and
+transitions line up across chunk boundaries.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.core.config import settings
+from app.models.text import ActionRequest
+from app.services.document_chunker import outline, split_markdown
+from app.services.document_limits import budget_for
+from app.services.llm_manager import LLMConnectionManager
+from app.services.text_formatter import format_chunk_action_prompt, format_consistency_prompt
+
+logger = logging.getLogger(__name__)
+
+PHASE_ACTION = "action"
+PHASE_CONSISTENCY = "consistency"
+
+# Document types with hard length limits are condensed as a whole, never in parts
+SHORT_FORM_TYPES = ("X", "Threads")
+
+# Characters of each neighbouring chunk shown to the consistency pass
+NEIGHBOUR_CONTEXT_CHARS = 600
+
+
+def use_long_document_mode(request: ActionRequest) -> bool:
+    """Whether an action should run in chunks, honouring an explicit request flag."""
+    if request.document_type in SHORT_FORM_TYPES:
+        return False
+    if request.long_document is not None:
+        return request.long_document
+    return len(request.text) > settings.LONG_DOCUMENT_THRESHOLD_CHARS
+
+
+@dataclass
+class ChunkResult:
+    """One chunk finishing one phase of a chunked action."""
+
+    phase: str
+    index: int
+    total: int
+    text: str
+    elapsed_ms: float
+
+
+class ChunkedAction:
+    """Run a text action over a long document in parallel chunks."""
+
+    def __init__(
+        self,
+        llm_manager: LLMConnectionManager,
+        request: ActionRequest,
+        consistency_pass: bool = False,
+        max_parallel: Optional[int] = None,
+        use_cache: bool = False,
+        refresh_cache: bool = False,
+        sticky_key: Optional[str] = None,
+    ) -> None:
+        self.llm_manager = llm_manager
+        self.request = request
+        self.consistency_pass = consistency_pass
+        self.max_parallel = max_parallel or settings.LONG_DOCUMENT_MAX_PARALLEL
+        self.use_cache = use_cache
+        self.refresh_cache = refresh_cache
+        self.sticky_key = sticky_key
+        self.chunks = split_markdown(request.text, settings.LONG_DOCUMENT_CHUNK_CHARS)
+        self.headings = outline(request.text)
+
+    @property
+    def phases(self) -> List[str]:
+        return [PHASE_ACTION, PHASE_CONSISTENCY] if self.consistency_pass else [PHASE_ACTION]
+
+    async def _generate(self, prompt: str, text: str) -> str:
+        # Unchanged chunks of a re-run document are served from the response cache
+        return await self.llm_manager.generate_text(
+            prompt,
+            use_cache=self.use_cache,
+            refresh_cache=self.refresh_cache,
+            sticky_key=self.sticky_key,
+            budget=budget_for(self.request.document_type, text),
+        )
+
+    def _prompt(self, phase: str, index: int, previous: List[str]) -> str:
+        if phase == PHASE_ACTION:
+            return format_chunk_action_prompt(
+                self.request, self.chunks[index], index, len(self.chunks), self.headings
+            )
+        previous_tail = previous[index - 1][-NEIGHBOUR_CONTEXT_CHARS:] if index > 0 else ""
+        next_head = (
+            previous[index + 1][:NEIGHBOUR_CONTEXT_CHARS] if index + 1 < len(previous) else ""
+        )
+        return format_consistency_prompt(self.request, previous[index], previous_tail, next_head)
+
+    async def _run_phase(self, phase: str, previous: List[str]) -> AsyncIterator[ChunkResult]:
+        """Run one phase over every chunk, yielding results as they complete."""
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        total = len(self.chunks)
+
+        async def run(index: int) -> ChunkResult:
+            async with semaphore:
+                start = time.perf_counter()
+                text = await self._generate(self._prompt(phase, index, previous), previous[index])
+                elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+                return ChunkResult(phase, index, total, text.strip(), elapsed_ms)
+
+        tasks = [asyncio.ensure_future(run(index)) for index in range(total)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                logger.info(
+                    f"Long document {phase}: chunk {result.index + 1}/{total} "
+                    f"finished in {result.elapsed_ms} ms"
+                )
+                yield result
+        finally:
+            # One failed chunk fails the action; stop paying for the others
+            for task in tasks:
+                task.cancel()
+
+    async def progress(self) -> AsyncIterator[ChunkResult]:
+        """
+        Run every phase and report each chunk as it finishes.
+
+        Yields:
+            Chunk results in completion order; the last phase's results are final.
+
+        Raises:
+            AdmissionRejected: If the LLM backend's wait queue is full.
+        """
+        texts = list(self.chunks)
+        for phase in self.phases:
+            results: Dict[int, str] = {}
+            async for result in self._run_phase(phase, texts):
+                results[result.index] = result.text
+                yield result
+            texts = [results[index] for index in range(len(self.chunks))]
+
+    async def run(self) -> str:
+        """
+        Run the action and return the stitched document.
+
+        Returns:
+            The modified document, chunks joined in document order.
+        """
+        final: Dict[int, str] = {}
+        async for result in self.progress():
+            if result.phase == self.phases[-1]:
+                final[result.index] = result.text
+        return stitch([final[index] for index in range(len(self.chunks))])
+
+
+def stitch(chunks: List[str]) -> str:
+    """Join processed chunks back into one document."""
+    return "\n\n".join(chunk for chunk in chunks if chunk)
@@ -0,0 +1,105 @@
+"""
+Split long Markdown documents into chunks an LLM can process independently.
+
+Chunks follow the document's structure: they break before headings where possible,
+otherwise between paragraphs, and only split inside a paragraph (at line, then
+sentence boundaries) when a single paragraph is too long on its own. Fenced code
+blocks are never split. Joining the chunks with blank lines restores the document.
+"""
+
+import re
+from typing import List
+
+HEADING = re.compile(r"^#{1,6}\s")
+FENCE = re.compile(r"^(```|~~~)")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# A chunk at least this full breaks before the next heading rather than absorbing it
+HEADING_BREAK_FILL = 0.5
+
+
+def _blocks(text: str) -> List[str]:
+    """Split text into paragraphs on blank lines, keeping fenced code blocks whole."""
+    blocks: List[str] = []
+    current: List[str] = []
+    in_fence = False
+    for line in text.splitlines():
+        if FENCE.match(line.strip()):
+            in_fence = not in_fence
+        if not line.strip() and not in_fence:
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+            continue
+        if HEADING.match(line) and not in_fence and current:
+            # Headings start their own block even without a blank line before them
+            blocks.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+def _split_block(block: str, max_chars: int) -> List[str]:
+    """Split an oversized block at line, then sentence, then character boundaries."""
+    if len(block) <= max_chars or FENCE.match(block.strip()):
+        return [block]
+
+    for separator, pieces in (
+        ("\n", block.split("\n")),
+        (" ", SENTENCE_END.split(block)),
+    ):
+        if len(pieces) > 1:
+            parts: List[str] = []
+            current = ""
+            for piece in pieces:
+                candidate = f"{current}{separator}{piece}" if current else piece
+                if current and len(candidate) > max_chars:
+                    parts.append(current)
+                    current = piece
+                else:
+                    current = candidate
+            parts.append(current)
+            if len(parts) > 1:
+                return [p for part in parts for p in _split_block(part, max_chars)]
+
+    return [block[i : i + max_chars] for i in range(0, len(block), max_chars)]
+
+
+def split_markdown(text: str, max_chars: int) -> List[str]:
+    """
+    Split a Markdown document into chunks of at most ``max_chars`` characters.
+
+    Args:
+        text: The document.
+        max_chars: Target maximum chunk size; fenced code blocks may exceed it.
+
+    Returns:
+        The chunks, in document order.
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks: List[List[str]] = [[]]
+    size = 0
+    for block in _blocks(text):
+        for piece in _split_block(block, max_chars):
+            current = chunks[-1]
+            needed = len(piece) + (2 if current else 0)
+            heading_break = HEADING.match(piece) and size >= max_chars * HEADING_BREAK_FILL
+            if current and (size + needed > max_chars or heading_break):
+                # Keep a trailing heading together with the content it introduces
+                carried = [current.pop()] if HEADING.match(current[-1]) and current[:-1] else []
+                chunks.append(carried)
+                size = sum(len(b) for b in carried) + 2 * len(carried)
+                needed = len(piece) + (2 if carried else 0)
+            chunks[-1].append(piece)
+            size += needed
+
+    return ["\n\n".join(chunk) for chunk in chunks if chunk]
+
+
+def outline(text: str) -> List[str]:
+    """Return the document's headings, for giving each chunk a view of the whole."""
+    return [block.split("\n", 1)[0] for block in _blocks(text) if HEADING.match(block)]
@@ -0,0 +1,258 @@
+"""
+Delta-encoded document history.
+
+Each version is stored as a delta against the version before it: the replacement ops
+of an editor delta (each replaces ``text[start:end]`` and applies to the result of the
+ops before it), stored as ``[start, end, text]`` triples in JSON. Deltas come from a
+line diff, with each changed block trimmed to the characters that actually differ, so
+an autosave that edits one paragraph stores only that edit.
+
+A full keyframe is stored for a document's first version, every
+``DOCUMENT_HISTORY_KEYFRAME_INTERVAL`` versions, and whenever the delta would be over
+``DOCUMENT_HISTORY_MAX_DELTA_RATIO`` of the text. Rebuilding a version reads its
+keyframe and the deltas after it in one range query, so it never applies more than
+``DOCUMENT_HISTORY_KEYFRAME_INTERVAL - 1`` deltas. History lists only read version
+metadata and never rebuild content.
+"""
+
+import difflib
+import json
+import logging
+import uuid
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.document import DocumentHistory
+
+logger = logging.getLogger(__name__)
+
+Op = Tuple[int, int, str]
+
+# The only columns a history list reads
+VERSION_COLUMNS = (
+    DocumentHistory.version,
+    DocumentHistory.keyframe_version,
+    DocumentHistory.content_length,
+    DocumentHistory.created_at,
+)
+
+
+def make_delta(old: str, new: str) -> List[Op]:
+    """
+    Compute replacement ops that turn ``old`` into ``new``.
+
+    Ops are ordered from the end of the text to the start, so each op's offsets are
+    also valid in ``old``.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    old_offsets = [0, *accumulate(len(line) for line in old_lines)]
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+
+    ops: List[Op] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        start, end = old_offsets[i1], old_offsets[i2]
+        removed, inserted = old[start:end], "".join(new_lines[j1:j2])
+        # Keep only the characters that differ within the changed lines
+        prefix = 0
+        limit = min(len(removed), len(inserted))
+        while prefix < limit and removed[prefix] == inserted[prefix]:
+            prefix += 1
+        suffix = 0
+        while (
+            suffix < limit - prefix
+            and removed[len(removed) - 1 - suffix] == inserted[len(inserted) - 1 - suffix]
+        ):
+            suffix += 1
+        ops.append((start + prefix, end - suffix, inserted[prefix : len(inserted) - suffix]))
+    ops.reverse()
+    return ops
+
+
+def apply_delta(text: str, ops: Sequence[Sequence[Any]]) -> str:
+    """Apply replacement ops from ``make_delta`` to the text they were made against."""
+    for start, end, insert in ops:
+        text = text[:start] + insert + text[end:]
+    return text
+
+
+def encode_delta(previous: Optional[str], content: str, chain_length: int) -> Optional[str]:
+    """
+    Encode a new version as a delta, or return None when it should be a keyframe.
+
+    Args:
+        previous: Text of the previous version, or None when there is none.
+        content: Text of the new version.
+        chain_length: Versions from the last keyframe up to and including the previous
+            version.
+
+    Returns:
+        The JSON delta, or None to store ``content`` as a keyframe.
+    """
+    if previous is None or chain_length >= settings.DOCUMENT_HISTORY_KEYFRAME_INTERVAL:
+        return None
+    delta = json.dumps(make_delta(previous, content), ensure_ascii=False, separators=(",", ":"))
+    if len(delta) > len(content) * settings.DOCUMENT_HISTORY_MAX_DELTA_RATIO:
+        return None
+    return delta
+
+
+class DocumentHistoryStats:
+    """Counters for the storage delta encoding saves and the cost of rebuilding versions."""
+
+    def __init__(self) -> None:
+        self.versions = 0
+        self.keyframes = 0
+        self.stored_chars = 0
+        self.full_chars = 0
+        self.rebuilds = 0
+        self.deltas_applied = 0
+        self.max_deltas_applied = 0
+
+    def record_version(self, content: str, delta: Optional[str]) -> None:
+        self.versions += 1
+        self.keyframes += delta is None
+        self.stored_chars += len(content if delta is None else delta)
+        self.full_chars += len(content)
+
+    def record_rebuild(self, deltas: int) -> None:
+        self.rebuilds += 1
+        self.deltas_applied += deltas
+        self.max_deltas_applied = max(self.max_deltas_applied, deltas)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keyframe_interval": settings.DOCUMENT_HISTORY_KEYFRAME_INTERVAL,
+            "versions": self.versions,
+            "keyframes": self.keyframes,
+            "stored_chars": self.stored_chars,
+            "full_chars": self.full_chars,
+            "stored_ratio": (
+                round(self.stored_chars / self.full_chars, 3) if self.full_chars else 0
+            ),
+            "rebuilds": self.rebuilds,
+            "avg_deltas_applied": (
+                round(self.deltas_applied / self.rebuilds, 1) if self.rebuilds else 0
+            ),
+            "max_deltas_applied": self.max_deltas_applied,
+        }
+
+
+# Create a singleton instance
+document_history_stats = DocumentHistoryStats()
+
+
+async def record_version(
+    db: AsyncSession, document_id: uuid.UUID, previous: Optional[str], content: str
+) -> DocumentHistory:
+    """
+    Add the next version of a document to the session, as a delta or a keyframe.
+
+    The caller commits, and must hold the document row lock so versions are numbered in
+    order and ``previous`` is the latest version's text.
+
+    Args:
+        db: Database session.
+        document_id: Document the version belongs to.
+        previous: Text of the document's latest version, or None to store a keyframe.
+        content: Text of the new version.
+
+    Returns:
+        The new history row.
+    """
+    stmt = (
+        select(DocumentHistory.version, DocumentHistory.keyframe_version)
+        .where(DocumentHistory.document_id == document_id)
+        .order_by(DocumentHistory.version.desc())
+        .limit(1)
+    )
+    latest = (await db.execute(stmt)).first()
+    if latest is None:
+        version, delta = 1, None
+    else:
+        version = latest.version + 1
+        delta = encode_delta(previous, content, latest.version - latest.keyframe_version + 1)
+
+    row = DocumentHistory(
+        document_id=document_id,
+        version=version,
+        keyframe_version=version if delta is None else latest.keyframe_version,
+        content=content if delta is None else None,
+        delta=delta,
+        content_length=len(content),
+    )
+    db.add(row)
+    document_history_stats.record_version(content, delta)
+    return row
+
+
+async def list_versions(
+    db: AsyncSession, document_id: uuid.UUID, limit: int, cursor: Optional[int] = None
+) -> Tuple[Sequence[Any], Optional[int]]:
+    """
+    List a page of a document's versions, newest first, without their content.
+
+    Args:
+        db: Database session.
+        document_id: Document whose history to list.
+        limit: Page size.
+        cursor: Cursor from the previous page, if any.
+
+    Returns:
+        Tuple of (rows of ``VERSION_COLUMNS``, cursor for the next page or None).
+    """
+    stmt = select(*VERSION_COLUMNS).where(DocumentHistory.document_id == document_id)
+    if cursor is not None:
+        stmt = stmt.where(DocumentHistory.version < cursor)
+    # One extra row tells whether there is a next page
+    stmt = stmt.order_by(DocumentHistory.version.desc()).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+
+    next_cursor = rows[limit - 1].version if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+async def get_version(
+    db: AsyncSession, document_id: uuid.UUID, version: int
+) -> Optional[Tuple[Any, str]]:
+    """
+    Rebuild one version of a document from its keyframe.
+
+    Args:
+        db: Database session.
+        document_id: Document the version belongs to.
+        version: Version number.
+
+    Returns:
+        Tuple of (the version's row of ``VERSION_COLUMNS``, its text), or None if the
+        document has no such version.
+    """
+    keyframe = (
+        select(DocumentHistory.keyframe_version)
+        .where(DocumentHistory.document_id == document_id, DocumentHistory.version == version)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(*VERSION_COLUMNS, DocumentHistory.content, DocumentHistory.delta)
+        .where(
+            DocumentHistory.document_id == document_id,
+            DocumentHistory.version >= keyframe,
+            DocumentHistory.version <= version,
+        )
+        .order_by(DocumentHistory.version)
+    )
+    rows = (await db.execute(stmt)).all()
+    if not rows:
+        return None
+
+    text = rows[0].content
+    for row in rows[1:]:
+        text = apply_delta(text, json.loads(row.delta))
+    document_history_stats.record_rebuild(len(rows) - 1)
+    return rows[-1], text
@@ -0,0 +1,187 @@
+"""
+Per-document-type length limits and the generation budgets derived from them.
+
+Each document type's hard character limit, length target, formatting rules and stop
+sequences live in one table. The table drives the length instructions in prompts, the
+``max_tokens``, stop sequences and timeout of each generation, and local trimming of
+output that still runs past a hard limit. Bounding generations keeps a runaway
+completion from holding a server slot until the request timeout.
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+# Rough characters per token of English text, for sizing budgets before tokenizing
+CHARS_PER_TOKEN = 4
+
+# Token headroom over a hard character limit, for markup, emoji and hashtags
+HARD_LIMIT_HEADROOM = 1.5
+
+# Smallest budget for documents without a hard limit, unless their type sets a larger one
+MIN_OUTPUT_TOKENS = 512
+
+# Explanations models append to short posts despite being told not to
+SHORT_FORM_STOP = ("\n\nNote:", "\n\nCharacter count", "\n\n---")
+
+SENTENCE_END = re.compile(r"[.!?…](?=\s|$)")
+
+
+@dataclass(frozen=True)
+class DocumentLimits:
+    """Length and formatting limits of one document type."""
+
+    max_chars: Optional[int] = None
+    target_words: Optional[Tuple[int, int]] = None
+    # Output must not use block-level Markdown (headings, tables, code blocks) or bold
+    plain_text: bool = False
+    # Output budget relative to the input's tokens, for documents without a hard limit
+    output_ratio: float = 3.0
+    # Smallest output budget, so a short prompt can still be expanded to a full document
+    min_output_tokens: int = MIN_OUTPUT_TOKENS
+    stop: Tuple[str, ...] = field(default_factory=tuple)
+
+
+DOCUMENT_LIMITS: Dict[str, DocumentLimits] = {
+    "X": DocumentLimits(max_chars=280, plain_text=True, stop=SHORT_FORM_STOP),
+    "Threads": DocumentLimits(max_chars=500, plain_text=True, stop=SHORT_FORM_STOP),
+    "Email": DocumentLimits(target_words=(50, 125), output_ratio=2.0),
+    "LinkedIn": DocumentLimits(min_output_tokens=1024),
+    "Reddit": DocumentLimits(min_output_tokens=1536),
+    "Newsletter": DocumentLimits(min_output_tokens=2048),
+    "Blog": DocumentLimits(min_output_tokens=3072),
+    "Essay": DocumentLimits(min_output_tokens=3072),
+}
+DEFAULT_LIMITS = DocumentLimits(min_output_tokens=2048)
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Estimate the tokens in a text, rounding up."""
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def limits_for(document_type: Optional[str]) -> DocumentLimits:
+    """Return the limits of a document type, or the defaults for unlisted types."""
+    return DOCUMENT_LIMITS.get(document_type or "", DEFAULT_LIMITS)
+
+
+@dataclass(frozen=True)
+class GenerationBudget:
+    """Bounds on one generation."""
+
+    max_tokens: int
+    stop: Tuple[str, ...] = ()
+    timeout_seconds: Optional[float] = None
+
+    def params(self) -> Dict[str, Any]:
+        """Sampling parameters for the request; part of the response cache key."""
+        params: Dict[str, Any] = {"max_tokens": self.max_tokens}
+        if self.stop:
+            params["stop"] = list(self.stop)
+        return params
+
+
+def generation_budget(document_type: Optional[str], text: str) -> GenerationBudget:
+    """
+    Compute the budget for rewriting a text as a given document type.
+
+    Documents with a hard character limit get just enough tokens to fill it; others
+    get a multiple of the input's length, but at least their type's minimum. The timeout allows for generating the whole
+    budget at the slowest expected token rate, within the global request timeout.
+
+    Args:
+        document_type: Target document type.
+        text: Input text.
+
+    Returns:
+        The generation budget.
+    """
+    limits = limits_for(document_type)
+    if limits.max_chars is not None:
+        max_tokens = math.ceil(limits.max_chars / CHARS_PER_TOKEN * HARD_LIMIT_HEADROOM)
+    else:
+        input_tokens = math.ceil(len(text) / CHARS_PER_TOKEN)
+        max_tokens = max(limits.min_output_tokens, math.ceil(input_tokens * limits.output_ratio))
+    max_tokens = min(max_tokens, settings.LLM_MAX_OUTPUT_TOKENS)
+
+    timeout_seconds = min(
+        settings.LLM_REQUEST_TIMEOUT_SECONDS,
+        settings.LLM_TIMEOUT_FLOOR_SECONDS + max_tokens / settings.LLM_MIN_TOKENS_PER_SECOND,
+    )
+    return GenerationBudget(max_tokens, limits.stop, round(timeout_seconds, 1))
+
+
+def budget_for(document_type: Optional[str], text: str) -> Optional[GenerationBudget]:
+    """Return the generation budget for a text, or None when budgets are disabled."""
+    if not settings.LLM_GENERATION_BUDGETS:
+        return None
+    return generation_budget(document_type, text)
+
+
+def trim_to_limit(text: str, max_chars: Optional[int]) -> str:
+    """
+    Trim text to a hard character limit, preferring sentence, then word boundaries.
+
+    Args:
+        text: Generated text.
+        max_chars: Hard limit, or None for no limit.
+
+    Returns:
+        The text, unchanged if it fits.
+    """
+    if max_chars is None or len(text.strip()) <= max_chars:
+        return text
+    text = text.strip()
+
+    head = text[:max_chars]
+    sentence_ends = [match.end() for match in SENTENCE_END.finditer(head)]
+    # Only cut at a sentence end if that keeps most of the allowed length
+    if sentence_ends and sentence_ends[-1] >= max_chars // 2:
+        return head[: sentence_ends[-1]]
+    if not text[max_chars].isspace() and " " in head:
+        head = head.rsplit(" ", 1)[0]
+    return head.rstrip()
+
+
+class GenerationBudgetStats:
+    """Counters for budgeted generations and output trimmed to hard limits."""
+
+    def __init__(self) -> None:
+        self.budgeted = 0
+        self.max_tokens = 0
+        self.trimmed = 0
+        self.trimmed_chars = 0
+
+    def record_budget(self, budget: GenerationBudget) -> None:
+        self.budgeted += 1
+        self.max_tokens += budget.max_tokens
+
+    def record_trim(self, before: str, after: str) -> None:
+        if after != before:
+            self.trimmed += 1
+            self.trimmed_chars += len(before) - len(after)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.LLM_GENERATION_BUDGETS,
+            "budgeted_requests": self.budgeted,
+            "average_max_tokens": (
+                round(self.max_tokens / self.budgeted, 1) if self.budgeted else 0.0
+            ),
+            "trimmed_outputs": self.trimmed,
+            "trimmed_chars": self.trimmed_chars,
+        }
+
+
+# Create a singleton instance
+generation_budget_stats = GenerationBudgetStats()
+
+
+def enforce_limit(text: str, document_type: Optional[str]) -> str:
+    """Trim generated text to its document type's hard limit, counting what was cut."""
+    trimmed = trim_to_limit(text, limits_for(document_type).max_chars)
+    generation_budget_stats.record_trim(text, trimmed)
+    return trimmed
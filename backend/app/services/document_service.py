@@ -0,0 +1,154 @@
+"""
+Document service for storing, listing and editing user documents.
+
+Lists page by keyset on ``(updated_at, id)`` rather than by offset, using the composite
+``(user_id, updated_at, id)`` index. Each page is then a single index range scan,
+however deep into the list it is. Lists only select the columns they show, so a page of
+summaries never reads document content. Content changes are added to the document's
+history as deltas (see app/services/document_history.py).
+"""
+
+import base64
+import binascii
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple, cast
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.document import Document, DocumentCreate, DocumentUpdate
+from app.services.document_history import record_version
+
+logger = logging.getLogger(__name__)
+
+# The only columns a document list reads
+SUMMARY_COLUMNS = (
+    Document.id,
+    Document.title,
+    Document.document_type,
+    Document.created_at,
+    Document.updated_at,
+)
+
+
+def encode_cursor(updated_at: datetime, document_id: uuid.UUID) -> str:
+    """Encode the position after a listed document as an opaque cursor"""
+    raw = f"{updated_at.isoformat()}|{document_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Decode a cursor from ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        updated_at, document_id = raw.split("|")
+        return datetime.fromisoformat(updated_at), uuid.UUID(document_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+async def list_documents(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    limit: int,
+    cursor: Optional[str] = None,
+    document_type: Optional[str] = None,
+) -> Tuple[Sequence[Any], Optional[str]]:
+    """
+    List a page of a user's documents, most recently updated first, without their content.
+
+    Args:
+        db: Database session.
+        user_id: Owner of the documents.
+        limit: Page size.
+        cursor: Cursor from the previous page, if any.
+        document_type: Only list documents of this type.
+
+    Returns:
+        Tuple of (rows of ``SUMMARY_COLUMNS``, cursor for the next page or None).
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    stmt = select(*SUMMARY_COLUMNS).where(Document.user_id == user_id)
+    if document_type is not None:
+        stmt = stmt.where(Document.document_type == document_type)
+    if cursor is not None:
+        updated_at, document_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Document.updated_at, Document.id) < (updated_at, document_id))
+    # One extra row tells whether there is a next page
+    stmt = stmt.order_by(Document.updated_at.desc(), Document.id.desc()).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.updated_at, last.id)
+    return rows[:limit], next_cursor
+
+
+async def owns_document(db: AsyncSession, user_id: uuid.UUID, document_id: uuid.UUID) -> bool:
+    """Check that a document exists and belongs to the user, without loading it"""
+    stmt = select(Document.id).where(Document.id == document_id, Document.user_id == user_id)
+    return (await db.execute(stmt)).first() is not None
+
+
+async def get_document(
+    db: AsyncSession, user_id: uuid.UUID, document_id: uuid.UUID
+) -> Optional[Document]:
+    """Get one of a user's documents, with its content"""
+    stmt = select(Document).where(Document.id == document_id, Document.user_id == user_id)
+    result = await db.execute(stmt)
+    return cast(Optional[Document], result.scalar_one_or_none())
+
+
+async def create_document(
+    db: AsyncSession, user_id: uuid.UUID, request: DocumentCreate
+) -> Document:
+    """Create a document and its first history version"""
+    document = Document(id=uuid.uuid4(), user_id=user_id, **request.model_dump())
+    db.add(document)
+    if document.content is not None:
+        await record_version(db, document.id, None, document.content)
+    await db.commit()
+    await db.refresh(document)
+    return document
+
+
+async def update_document(
+    db: AsyncSession, document: Document, request: DocumentUpdate
+) -> Document:
+    """Apply the fields set on a request, recording a history version when content changes"""
+    # Only content can be cleared; a null title or type leaves it unchanged
+    changes = {
+        field: value
+        for field, value in request.model_dump(exclude_unset=True).items()
+        if value is not None or field == "content"
+    }
+    previous = document.content
+    if "content" in changes:
+        # Lock the document so concurrent edits number their versions in order
+        await db.refresh(document, with_for_update=True)
+        previous = document.content
+    for field, value in changes.items():
+        setattr(document, field, value)
+    if document.content != previous and document.content is not None:
+        await record_version(db, document.id, previous, document.content)
+    await db.commit()
+    await db.refresh(document)
+    return document
+
+
+async def delete_document(db: AsyncSession, user_id: uuid.UUID, document_id: uuid.UUID) -> bool:
+    """Delete one of a user's documents and its history; return whether it existed"""
+    stmt = delete(Document).where(Document.id == document_id, Document.user_id == user_id)
+    result = await db.execute(stmt)
+    await db.commit()
+    return cast(int, result.rowcount) > 0
@@ -0,0 +1,383 @@
+"""
+WebSocket editor sessions multiplexing cancellable LLM requests.
+
+A session belongs to one authenticated user. It holds the user's document, which is sent
+once and then kept current with versioned deltas, and their writing preferences, so
+requests only say what to do. Action, eval and chat requests run concurrently. Each
+carries a client-chosen id that tags every message sent back for it. A request can be
+cancelled by id, and a new request on the same channel (by default one channel for
+actions and one per eval criterion) supersedes the one still running there. Cancelling
+a request closes its upstream generation.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.models.text import ActionRequest, ChatRequest, EvalRequest
+from app.models.user import User
+from app.services.actions import run_action
+from app.services.admission import AdmissionRejected
+from app.services.cancellation import (
+    REASON_CANCELLED,
+    REASON_DISCONNECT,
+    REASON_SUPERSEDED,
+    cancellation_stats,
+    request_timeout,
+    start_deadline,
+)
+from app.services.chunked_action import use_long_document_mode
+from app.services.document_limits import budget_for, limits_for
+from app.services.evaluation import evaluate
+from app.services.llm_manager import LLMConnectionManager, StreamChunk
+from app.services.retrieval import with_relevant_context
+from app.services.streaming import limit_stream
+from app.services.text_formatter import format_action_prompt, format_chat_prompt
+
+logger = logging.getLogger(__name__)
+
+PREFERENCE_FIELDS = ("about_me", "preferred_style", "tone")
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+Work = Callable[[str, int], Awaitable[None]]
+
+
+class SessionError(Exception):
+    """A message the session cannot act on; reported to the client, which stays connected."""
+
+
+@dataclass
+class EditorDocument:
+    """The session's copy of the document being edited."""
+
+    text: str = ""
+    version: int = 0
+    document_type: Optional[str] = None
+
+    def apply(self, base_version: int, version: int, ops: List[Dict[str, Any]]) -> int:
+        """
+        Apply a delta made against ``base_version``.
+
+        Each op replaces ``text[start:end]`` with ``text`` and is applied to the result
+        of the ops before it.
+
+        Args:
+            base_version: Version the delta was made against.
+            version: Version after the delta.
+            ops: Replacement ops, in order.
+
+        Returns:
+            Characters sent in the delta.
+
+        Raises:
+            SessionError: If the versions do not line up or an op is out of range; the
+                client should then resend the whole document.
+        """
+        if base_version != self.version or version <= base_version:
+            raise SessionError(
+                f"Delta for version {base_version} does not apply to version {self.version}"
+            )
+        text = self.text
+        sent = 0
+        for op in ops:
+            start, end, insert = op.get("start"), op.get("end"), op.get("text", "")
+            if (
+                not isinstance(start, int)
+                or not isinstance(end, int)
+                or not isinstance(insert, str)
+            ):
+                raise SessionError("Delta ops need integer start and end and a text")
+            if not 0 <= start <= end <= len(text):
+                raise SessionError(f"Delta op {start}:{end} is outside the document")
+            text = text[:start] + insert + text[end:]
+            sent += len(insert)
+        self.text, self.version = text, version
+        return sent
+
+
+class EditorSessionStats:
+    """Counters for editor sessions and the document text they avoid resending."""
+
+    def __init__(self) -> None:
+        self.opened = 0
+        self.open = 0
+        self.requests: Counter = Counter()
+        self.deltas = 0
+        self.delta_chars = 0
+        self.resyncs = 0
+        self.chars_not_resent = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "open": self.open,
+            "opened": self.opened,
+            "requests": dict(self.requests),
+            "deltas": self.deltas,
+            "delta_chars": self.delta_chars,
+            "resyncs": self.resyncs,
+            "document_chars_not_resent": self.chars_not_resent,
+        }
+
+
+# Create a singleton instance
+editor_session_stats = EditorSessionStats()
+
+
+class EditorSession:
+    """One socket's document, preferences and in-flight requests."""
+
+    def __init__(self, llm_manager: LLMConnectionManager, user: User, send: Send) -> None:
+        self.llm_manager = llm_manager
+        self.user = user
+        self.document = EditorDocument()
+        self.preferences: Dict[str, str] = {}
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self._closed = False
+        self._tasks: Dict[str, "asyncio.Future[None]"] = {}
+        self._channels: Dict[str, str] = {}
+        editor_session_stats.opened += 1
+        editor_session_stats.open += 1
+
+    @property
+    def sticky_key(self) -> str:
+        return str(self.user.id)
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        """Send a message, one at a time; messages after the socket closes are dropped."""
+        if self._closed:
+            return
+        try:
+            async with self._send_lock:
+                await self._send(message)
+        except Exception as e:
+            logger.debug(f"Dropping editor session message: {e}")
+
+    async def handle(self, message: Dict[str, Any]) -> None:
+        """
+        Act on one client message, reporting protocol errors back to the client.
+
+        Args:
+            message: Decoded JSON message with a ``type``.
+        """
+        handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[None]]] = {
+            "document": self._set_document,
+            "delta": self._apply_delta,
+            "preferences": self._set_preferences,
+            "action": self._start_action,
+            "eval": self._start_eval,
+            "chat": self._start_chat,
+            "cancel": self._cancel_request,
+        }
+        handler = handlers.get(message.get("type", ""))
+        try:
+            if handler is None:
+                raise SessionError(f"Unknown message type: {message.get('type')}")
+            await handler(message)
+        except (SessionError, ValidationError, TypeError, ValueError) as e:
+            await self.send({"type": "error", "id": message.get("id"), "detail": str(e)})
+
+    async def close(self) -> None:
+        """Cancel every in-flight request once the socket has gone."""
+        self._closed = True
+        for request_id in list(self._tasks):
+            await self.cancel(request_id, REASON_DISCONNECT)
+        editor_session_stats.open -= 1
+
+    async def cancel(self, request_id: str, reason: str) -> bool:
+        """
+        Cancel an in-flight request, closing its upstream generation.
+
+        Args:
+            request_id: The request to cancel.
+            reason: Why, reported to the client and counted.
+
+        Returns:
+            Whether the request was still running.
+        """
+        task = self._forget(request_id)
+        if task is None:
+            return False
+        task.cancel()
+        cancellation_stats.record_request(reason)
+        await self.send({"type": "cancelled", "id": request_id, "reason": reason})
+        return True
+
+    async def _set_document(self, message: Dict[str, Any]) -> None:
+        if not isinstance(message.get("text"), str):
+            raise SessionError("A document message needs its text")
+        self.document = EditorDocument(
+            text=message["text"],
+            version=int(message.get("version", 0)),
+            document_type=message.get("document_type"),
+        )
+        if self.document.version > 0:
+            editor_session_stats.resyncs += 1
+        await self.send({"type": "ack", "version": self.document.version})
+
+    async def _apply_delta(self, message: Dict[str, Any]) -> None:
+        sent = self.document.apply(
+            int(message.get("base_version", -1)),
+            int(message.get("version", -1)),
+            message.get("ops") or [],
+        )
+        if "document_type" in message:
+            self.document.document_type = message["document_type"]
+        editor_session_stats.deltas += 1
+        editor_session_stats.delta_chars += sent
+        await self.send({"type": "ack", "version": self.document.version})
+
+    async def _set_preferences(self, message: Dict[str, Any]) -> None:
+        self.preferences.update(
+            {field: str(message[field]) for field in PREFERENCE_FIELDS if field in message}
+        )
+
+    async def _cancel_request(self, message: Dict[str, Any]) -> None:
+        if not await self.cancel(str(message.get("id")), REASON_CANCELLED):
+            raise SessionError("No such request in flight")
+
+    async def _start(
+        self,
+        message: Dict[str, Any],
+        default_channel: Optional[str],
+        work: Work,
+    ) -> None:
+        """Run a request in its own task, superseding the request on its channel."""
+        request_id = message.get("id")
+        if not isinstance(request_id, str) or not request_id:
+            raise SessionError("Requests need a string id")
+        if request_id in self._tasks:
+            raise SessionError(f"Request {request_id} is already in flight")
+        if len(self._tasks) >= settings.EDITOR_MAX_IN_FLIGHT:
+            raise SessionError(
+                f"At most {settings.EDITOR_MAX_IN_FLIGHT} requests can run at once per session"
+            )
+
+        channel = message.get("channel", default_channel)
+        if channel is not None and channel in self._channels:
+            await self.cancel(self._channels[channel], REASON_SUPERSEDED)
+
+        editor_session_stats.requests[message["type"]] += 1
+        editor_session_stats.chars_not_resent += len(self.document.text)
+        timeout = message.get("timeout")
+        task = asyncio.ensure_future(
+            self._run(
+                request_id,
+                work,
+                self.document.version,
+                request_timeout(str(timeout) if timeout is not None else None),
+            )
+        )
+        self._tasks[request_id] = task
+        if channel is not None:
+            self._channels[channel] = request_id
+
+    async def _run(
+        self, request_id: str, work: Work, version: int, timeout: Optional[float]
+    ) -> None:
+        start_deadline(timeout)
+        try:
+            await work(request_id, version)
+        except AdmissionRejected as e:
+            await self.send(
+                {"type": "error", "id": request_id, "detail": str(e), "retry_after": e.retry_after}
+            )
+        except Exception as e:
+            logger.error(f"Editor session request {request_id} failed: {str(e)}")
+            await self.send({"type": "error", "id": request_id, "detail": str(e)})
+        finally:
+            # A cancelled request was already forgotten, and its id may have been reused
+            if self._tasks.get(request_id) is asyncio.current_task():
+                self._forget(request_id)
+
+    def _forget(self, request_id: str) -> Optional["asyncio.Future[None]"]:
+        """Stop tracking a request and free its channel."""
+        self._channels = {c: owner for c, owner in self._channels.items() if owner != request_id}
+        return self._tasks.pop(request_id, None)
+
+    async def _stream(
+        self, request_id: str, version: int, chunks: AsyncIterator[StreamChunk]
+    ) -> None:
+        """Send a generation's tokens, then a ``done`` message with usage and timing."""
+        start = time.perf_counter()
+        usage: Optional[Dict[str, int]] = None
+        async for chunk in chunks:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if chunk.delta:
+                await self.send({"type": "token", "id": request_id, "delta": chunk.delta})
+        total_ms = round((time.perf_counter() - start) * 1000, 1)
+        await self.send(
+            {
+                "type": "done",
+                "id": request_id,
+                "version": version,
+                "usage": usage,
+                "timing": {"total_ms": total_ms},
+            }
+        )
+
+    async def _start_action(self, message: Dict[str, Any]) -> None:
+        fields = {k: v for k, v in message.items() if k not in ("type", "id", "channel", "timeout")}
+        request = ActionRequest(
+            **{
+                "text": self.document.text,
+                "document_type": self.document.document_type or "Custom",
+                **self.preferences,
+                **fields,
+            }
+        )
+
+        async def work(request_id: str, version: int) -> None:
+            if use_long_document_mode(request):
+                result = await run_action(self.llm_manager, request, sticky_key=self.sticky_key)
+                await self.send({"type": "done", "id": request_id, "version": version, **result})
+                return
+            chunks = self.llm_manager.stream_text(
+                format_action_prompt(request),
+                self.sticky_key,
+                budget=budget_for(request.document_type, request.text),
+            )
+            await self._stream(
+                request_id,
+                version,
+                limit_stream(chunks, limits_for(request.document_type).max_chars),
+            )
+
+        await self._start(message, "action", work)
+
+    async def _start_eval(self, message: Dict[str, Any]) -> None:
+        request = EvalRequest(
+            text=self.document.text,
+            eval_name=message.get("eval_name"),
+            eval_description=message.get("eval_description"),
+        )
+
+        async def work(request_id: str, version: int) -> None:
+            result = await evaluate(
+                self.llm_manager, request, True, False, sticky_key=self.sticky_key
+            )
+            await self.send({"type": "result", "id": request_id, "version": version, **result})
+
+        await self._start(message, f"eval:{request.eval_name}", work)
+
+    async def _start_chat(self, message: Dict[str, Any]) -> None:
+        # The document is the chat's context unless the message brings its own
+        request = ChatRequest(
+            message=message.get("message"),
+            context=message.get("context", self.document.text or None),
+        )
+
+        async def work(request_id: str, version: int) -> None:
+            chunks = self.llm_manager.stream_text(
+                format_chat_prompt(with_relevant_context(request)), self.sticky_key
+            )
+            await self._stream(request_id, version, chunks)
+
+        await self._start(message, None, work)
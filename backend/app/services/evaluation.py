@@ -0,0 +1,249 @@
+"""
+Text evaluations, one LLM call per criterion or several criteria fused into one call.
+
+A fused evaluation sends the document once with every criterion and asks for JSON with
+a score, summary and suggestions per criterion, so the document's input tokens are paid
+for once instead of once per criterion. The JSON is validated entry by entry; criteria
+without a valid entry are evaluated separately with the regular per-criterion prompt.
+"""
+
+import json
+import logging
+import time
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.models.text import CriterionEvaluation, EvalCriterion, EvalRequest
+from app.services.admission import AdmissionRejected, Priority
+from app.services.batch_runner import BatchItemResult, run_batch
+from app.services.cancellation import ClientDisconnected, DeadlineExceeded
+from app.services.llm_manager import LLMConnectionManager
+from app.services.text_formatter import (
+    format_eval_prompt,
+    format_fused_eval_prompt,
+    parse_eval_score,
+)
+
+logger = logging.getLogger(__name__)
+
+MODE_FUSED = "fused"
+MODE_SINGLE = "single"
+
+
+class MalformedEvaluation(ValueError):
+    """The LLM's fused evaluation is not the requested JSON."""
+
+
+class EvaluationStats:
+    """Counters showing how often fused evaluations fall back to per-criterion calls."""
+
+    def __init__(self) -> None:
+        self.fused_calls = 0
+        self.malformed_responses = 0
+        self.fused_criteria = 0
+        self.fallback_criteria = 0
+        self.document_chars_saved = 0
+
+    def stats(self) -> Dict[str, Any]:
+        evaluated = self.fused_criteria + self.fallback_criteria
+        return {
+            "fused_calls": self.fused_calls,
+            "malformed_responses": self.malformed_responses,
+            "fused_criteria": self.fused_criteria,
+            "fallback_criteria": self.fallback_criteria,
+            "fallback_rate": round(self.fallback_criteria / evaluated, 4) if evaluated else 0.0,
+            "document_chars_saved": self.document_chars_saved,
+        }
+
+
+# Create a singleton instance
+evaluation_stats = EvaluationStats()
+
+
+async def evaluate(
+    llm_manager: LLMConnectionManager,
+    request: EvalRequest,
+    use_cache: bool = True,
+    refresh_cache: bool = False,
+    sticky_key: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Evaluate a text against one criterion.
+
+    Returns:
+        The evaluation as Markdown and its score.
+    """
+    response_text = await llm_manager.generate_text(
+        format_eval_prompt(request),
+        use_cache=use_cache,
+        refresh_cache=refresh_cache,
+        sticky_key=sticky_key,
+        priority=Priority.BACKGROUND,
+    )
+    return {"result": response_text, "score": parse_eval_score(response_text)}
+
+
+def _extract_json(response_text: str) -> Any:
+    """Decode the outermost JSON object, tolerating code fences or prose around it."""
+    start, end = response_text.find("{"), response_text.rfind("}")
+    if start == -1 or end < start:
+        raise MalformedEvaluation("No JSON object in the response")
+    try:
+        return json.loads(response_text[start : end + 1])
+    except json.JSONDecodeError as e:
+        raise MalformedEvaluation(f"Invalid JSON: {e}")
+
+
+def parse_fused_evaluation(response_text: str, names: List[str]) -> Dict[int, CriterionEvaluation]:
+    """
+    Parse a fused evaluation and match its entries to the requested criteria.
+
+    Entries are matched by criterion name, ignoring case. Invalid entries, unknown
+    criteria and duplicates are dropped, so the caller can re-evaluate what is missing.
+
+    Args:
+        response_text: The LLM's response.
+        names: Requested criterion names, by index.
+
+    Returns:
+        Valid evaluations keyed by criterion index.
+
+    Raises:
+        MalformedEvaluation: If the response is not a JSON object with an evaluations list.
+    """
+    data = _extract_json(response_text)
+    entries = data.get("evaluations") if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        raise MalformedEvaluation("Response has no evaluations list")
+
+    indexes = {name.strip().lower(): index for index, name in enumerate(names)}
+    parsed: Dict[int, CriterionEvaluation] = {}
+    for entry in entries:
+        try:
+            evaluation = CriterionEvaluation.model_validate(entry)
+        except ValidationError as e:
+            logger.warning(f"Dropping invalid fused evaluation entry: {e.error_count()} errors")
+            continue
+        index = indexes.get(evaluation.criterion.strip().lower())
+        if index is not None and index not in parsed:
+            parsed[index] = evaluation
+    return parsed
+
+
+def render_evaluation(evaluation: CriterionEvaluation) -> str:
+    """Render a structured evaluation as the Markdown a per-criterion evaluation returns."""
+    lines = [evaluation.summary, "", f"**Rating: {evaluation.score}/10**"]
+    if evaluation.suggestions:
+        lines += ["", "**Suggestions:**"] + [f"- {s}" for s in evaluation.suggestions]
+    return "\n".join(lines)
+
+
+class FusedEvaluation:
+    """Evaluate a text against several criteria in one LLM call."""
+
+    def __init__(
+        self,
+        llm_manager: LLMConnectionManager,
+        text: str,
+        criteria: List[EvalCriterion],
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        sticky_key: Optional[str] = None,
+        max_parallel: Optional[int] = None,
+    ) -> None:
+        self.llm_manager = llm_manager
+        self.text = text
+        self.criteria = criteria
+        self.use_cache = use_cache
+        self.refresh_cache = refresh_cache
+        self.sticky_key = sticky_key
+        self.max_parallel = max_parallel or settings.BATCH_MAX_PARALLEL
+
+    async def _fused(self) -> Dict[int, CriterionEvaluation]:
+        """
+        Run the fused call, returning no evaluations if its output is unusable.
+
+        Failures of the call itself are raised: only output that cannot be parsed is
+        worth retrying one criterion at a time.
+        """
+        evaluation_stats.fused_calls += 1
+        try:
+            response_text = await self.llm_manager.generate_text(
+                format_fused_eval_prompt(self.text, self.criteria),
+                use_cache=self.use_cache,
+                refresh_cache=self.refresh_cache,
+                sticky_key=self.sticky_key,
+                priority=Priority.BACKGROUND,
+            )
+            return parse_fused_evaluation(
+                response_text, [criterion.eval_name for criterion in self.criteria]
+            )
+        except MalformedEvaluation as e:
+            evaluation_stats.malformed_responses += 1
+            logger.warning(f"Malformed fused evaluation, evaluating criteria separately: {e}")
+        return {}
+
+    def _fallback(self, missing: List[int]) -> AsyncIterator[BatchItemResult]:
+        """Evaluate the criteria the fused call did not cover, one call each."""
+        tasks = [
+            partial(
+                evaluate,
+                self.llm_manager,
+                EvalRequest(text=self.text, **self.criteria[index].model_dump()),
+                self.use_cache,
+                self.refresh_cache,
+                self.sticky_key,
+            )
+            for index in missing
+        ]
+        return run_batch(tasks, self.max_parallel)
+
+    async def results(self) -> AsyncIterator[BatchItemResult]:
+        """
+        Evaluate every criterion, falling back to per-criterion calls where needed.
+
+        Yields:
+            One result per criterion: fused results first, then fallbacks as they finish.
+        """
+        start = time.perf_counter()
+        try:
+            parsed = await self._fused()
+        except ClientDisconnected:
+            raise
+        except Exception as e:
+            # Fanning out would only add load to a saturated or failing backend, or start
+            # calls after the request's deadline has passed
+            if not isinstance(e, (AdmissionRejected, DeadlineExceeded)):
+                logger.error(f"Fused evaluation failed: {str(e)}")
+            retry_after = e.retry_after if isinstance(e, AdmissionRejected) else None
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+            for index in range(len(self.criteria)):
+                yield BatchItemResult(
+                    index, False, elapsed_ms, detail=str(e), retry_after=retry_after
+                )
+            return
+
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        for index, evaluation in sorted(parsed.items()):
+            data = {
+                "result": render_evaluation(evaluation),
+                "score": evaluation.score,
+                "summary": evaluation.summary,
+                "suggestions": evaluation.suggestions,
+                "mode": MODE_FUSED,
+            }
+            yield BatchItemResult(index, True, elapsed_ms, data=data)
+
+        missing = [index for index in range(len(self.criteria)) if index not in parsed]
+        evaluation_stats.fused_criteria += len(parsed)
+        evaluation_stats.fallback_criteria += len(missing)
+        evaluation_stats.document_chars_saved += len(self.text) * max(len(parsed) - 1, 0)
+
+        async for result in self._fallback(missing):
+            result.index = missing[result.index]
+            if result.success:
+                result.data["mode"] = MODE_SINGLE
+            yield result
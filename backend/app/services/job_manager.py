@@ -0,0 +1,482 @@
+"""
+Background jobs for long-running text actions.
+
+Submitting a job returns its id straight away. A pool of worker tasks runs queued jobs,
+and clients poll or stream the job's status instead of holding an HTTP request open past
+proxy timeouts. Each user may only have a few unfinished jobs at a time, and results
+expire after ``JOB_RESULT_TTL_SECONDS``. With ``JOB_PERSIST`` set, jobs are also stored
+in Postgres, so results survive a restart and can be read from any worker process. Each
+process holds a lease on its unfinished persisted jobs and renews it while it runs; jobs
+whose lease has lapsed, because their process stopped, are marked failed by the next
+process to start or sweep expired results.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional
+
+from sqlalchemy import delete, or_, update
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.job import Job, JobResponse
+from app.services.cancellation import start_deadline
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = frozenset({JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED})
+
+# Minimum interval between sweeps of expired results
+PURGE_INTERVAL_SECONDS = 60.0
+
+# Interval between status checks of a job running in another process
+REMOTE_POLL_SECONDS = 1.0
+
+WAIT_SAMPLE_SIZE = 1000
+
+JobWork = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class JobLimitExceeded(Exception):
+    """Raised when a user has too many unfinished jobs or the queue is full."""
+
+    def __init__(self, message: str, retry_after: int) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class JobRecord:
+    """A job's status and, once finished, its result or error."""
+
+    id: str
+    owner: str
+    action: str
+    status: str = JOB_QUEUED
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    instance_id: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def expired(self, now: datetime) -> bool:
+        return self.expires_at is not None and self.expires_at <= now
+
+    def response(self) -> JobResponse:
+        return JobResponse(
+            id=self.id,
+            action=self.action,
+            status=self.status,
+            result=self.result,
+            error=self.error,
+            created_at=self.created_at or datetime.utcnow(),
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            expires_at=self.expires_at,
+        )
+
+
+class PostgresJobStore:
+    """
+    Job records in the ``jobs`` table.
+
+    Persistence is best effort: errors are logged, and the in-memory job keeps running.
+    """
+
+    async def save(self, record: JobRecord) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.merge(
+                    Job(
+                        id=uuid.UUID(record.id),
+                        owner=record.owner,
+                        action=record.action,
+                        status=record.status,
+                        result=record.result,
+                        error=record.error,
+                        created_at=record.created_at,
+                        started_at=record.started_at,
+                        finished_at=record.finished_at,
+                        expires_at=record.expires_at,
+                        instance_id=record.instance_id,
+                        lease_expires_at=record.lease_expires_at,
+                    )
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error persisting job {record.id}: {e}")
+
+    async def load(self, job_id: str) -> Optional[JobRecord]:
+        try:
+            key = uuid.UUID(job_id)
+        except ValueError:
+            return None
+        try:
+            async with AsyncSessionLocal() as db:
+                job = await db.get(Job, key)
+        except Exception as e:
+            logger.error(f"Error loading job {job_id}: {e}")
+            return None
+        if job is None:
+            return None
+        return JobRecord(
+            id=str(job.id),
+            owner=job.owner,
+            action=job.action,
+            status=job.status,
+            result=job.result,
+            error=job.error,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+            expires_at=job.expires_at,
+            instance_id=job.instance_id,
+            lease_expires_at=job.lease_expires_at,
+        )
+
+    async def renew_leases(
+        self, instance_id: str, job_ids: List[str], lease_expires_at: datetime
+    ) -> None:
+        """Extend this process's lease on its unfinished jobs."""
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(Job)
+                    .where(
+                        Job.id.in_([uuid.UUID(job_id) for job_id in job_ids]),
+                        Job.instance_id == instance_id,
+                        Job.status.in_([JOB_QUEUED, JOB_RUNNING]),
+                    )
+                    .values(lease_expires_at=lease_expires_at)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error renewing job leases: {e}")
+
+    async def purge(self, now: datetime) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(Job).where(Job.expires_at <= now))
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error purging expired jobs: {e}")
+
+    async def fail_abandoned(self, instance_id: str, now: datetime, expires_at: datetime) -> None:
+        """
+        Mark jobs left queued or running by a stopped process as failed.
+
+        Only jobs of other processes whose lease has lapsed are failed, so jobs that live
+        processes are still running are left alone.
+        """
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(Job)
+                    .where(
+                        Job.status.in_([JOB_QUEUED, JOB_RUNNING]),
+                        or_(Job.instance_id.is_(None), Job.instance_id != instance_id),
+                        or_(Job.lease_expires_at.is_(None), Job.lease_expires_at <= now),
+                    )
+                    .values(
+                        status=JOB_FAILED,
+                        error="Interrupted because its server stopped",
+                        finished_at=now,
+                        expires_at=expires_at,
+                    )
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error recovering abandoned jobs: {e}")
+
+
+class JobManager:
+    """In-process job queue run by a pool of worker tasks."""
+
+    def __init__(self, store: Optional[PostgresJobStore] = None) -> None:
+        self._store = store
+        self._jobs: Dict[str, JobRecord] = {}
+        self._work: Dict[str, JobWork] = {}
+        self._running: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._active: Counter = Counter()
+        self._queue: Optional["asyncio.Queue[str]"] = None
+        self._workers: List["asyncio.Future[None]"] = []
+        self._heartbeat: Optional["asyncio.Future[None]"] = None
+        self._last_purge = time.monotonic()
+        self._waits_ms: Deque[float] = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self.counts: Counter = Counter()
+        # Identifies this process's leases on persisted jobs
+        self.instance_id = uuid.uuid4().hex
+
+    def _get_store(self) -> Optional[PostgresJobStore]:
+        if self._store is None and settings.JOB_PERSIST:
+            self._store = PostgresJobStore()
+        return self._store
+
+    def _start(self) -> "asyncio.Queue[str]":
+        """Start the worker pool on first use."""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < settings.JOB_WORKERS:
+            self._workers.append(asyncio.ensure_future(self._worker(self._queue)))
+        if self._get_store() is not None and (self._heartbeat is None or self._heartbeat.done()):
+            self._heartbeat = asyncio.ensure_future(self._renew_leases())
+        return self._queue
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for record in self._jobs.values() if record.status == JOB_QUEUED)
+
+    async def submit(self, owner: str, action: str, work: JobWork) -> JobRecord:
+        """
+        Queue a job.
+
+        Args:
+            owner: Id of the user queueing the job.
+            action: Name of the action, for display.
+            work: Factory for the job's work, returning its result.
+
+        Returns:
+            The queued job.
+
+        Raises:
+            JobLimitExceeded: If the owner has too many unfinished jobs or the queue is full.
+        """
+        await self._purge()
+        if self._active[owner] >= settings.JOB_MAX_ACTIVE_PER_USER:
+            self.counts["rejected"] += 1
+            raise JobLimitExceeded(
+                f"At most {settings.JOB_MAX_ACTIVE_PER_USER} unfinished jobs per user",
+                settings.LLM_RETRY_AFTER_SECONDS,
+            )
+        if self.queued >= settings.JOB_MAX_QUEUED:
+            self.counts["rejected"] += 1
+            raise JobLimitExceeded("The job queue is full", settings.LLM_RETRY_AFTER_SECONDS)
+
+        record = JobRecord(
+            str(uuid.uuid4()),
+            owner,
+            action,
+            created_at=datetime.utcnow(),
+            instance_id=self.instance_id,
+        )
+        self._jobs[record.id] = record
+        self._work[record.id] = work
+        self._active[owner] += 1
+        self.counts["submitted"] += 1
+        await self._update(record)
+        self._start().put_nowait(record.id)
+        return record
+
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        """Return a job that has not expired, from memory or the store."""
+        record = self._jobs.get(job_id)
+        if record is None and self._get_store() is not None:
+            record = await self._get_store().load(job_id)
+        if record is None or record.expired(datetime.utcnow()):
+            return None
+        return record
+
+    async def cancel(self, job_id: str) -> Optional[JobRecord]:
+        """Cancel a queued or running job; cancelling a generation closes its upstream call."""
+        record = self._jobs.get(job_id)
+        if record is None or record.finished:
+            return record
+        self._work.pop(job_id, None)
+        task = self._running.pop(job_id, None)
+        if task is not None:
+            task.cancel()
+        await self._finish(record, JOB_CANCELLED, error="Job cancelled")
+        return record
+
+    async def watch(self, job_id: str) -> AsyncIterator[JobRecord]:
+        """
+        Yield a job each time its status changes, until it finishes.
+
+        Args:
+            job_id: The job to watch.
+
+        Yields:
+            The job, first as it is now and then after each status change.
+        """
+        last: Optional[str] = None
+        while True:
+            record = await self.get(job_id)
+            if record is None:
+                return
+            if record.status != last:
+                last = record.status
+                yield record
+                if record.finished:
+                    return
+                # Re-read: the status may have changed while the caller held the record
+                continue
+            if job_id in self._jobs:
+                event = self._changed.setdefault(job_id, asyncio.Event())
+                await event.wait()
+            else:
+                # Running in another process; only the store sees its progress
+                await asyncio.sleep(REMOTE_POLL_SECONDS)
+
+    async def recover(self) -> None:
+        """Fail persisted jobs that a stopped process left unfinished."""
+        store = self._get_store()
+        if store is not None:
+            now = datetime.utcnow()
+            await store.fail_abandoned(self.instance_id, now, self._expiry(now))
+
+    async def shutdown(self) -> None:
+        """Stop the workers, failing jobs that are still running."""
+        for job_id in list(self._running):
+            await self.cancel(job_id)
+        tasks = self._workers + ([self._heartbeat] if self._heartbeat is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._heartbeat = None
+
+    async def _worker(self, queue: "asyncio.Queue[str]") -> None:
+        while True:
+            job_id = await queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Error running job {job_id}: {e}")
+
+    async def _renew_leases(self) -> None:
+        """Keep this process's unfinished persisted jobs from being taken for abandoned."""
+        while True:
+            await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+            store = self._get_store()
+            job_ids = [job_id for job_id, record in self._jobs.items() if not record.finished]
+            if store is not None and job_ids:
+                await store.renew_leases(self.instance_id, job_ids, self._lease(datetime.utcnow()))
+
+    async def _execute(self, work: JobWork) -> Dict[str, Any]:
+        # Jobs outlive the request that queued them, so they get their own deadline
+        start_deadline(settings.JOB_TIMEOUT_SECONDS)
+        return await work()
+
+    async def _run(self, job_id: str) -> None:
+        record = self._jobs.get(job_id)
+        work = self._work.pop(job_id, None)
+        if record is None or work is None or record.status != JOB_QUEUED:
+            # Cancelled while queued
+            return
+
+        record.status = JOB_RUNNING
+        record.started_at = datetime.utcnow()
+        if record.created_at is not None:
+            wait = record.started_at - record.created_at
+            self._waits_ms.append(wait.total_seconds() * 1000)
+        await self._update(record)
+
+        task = asyncio.ensure_future(self._execute(work))
+        self._running[job_id] = task
+        try:
+            # Waiting does not cancel the job if the worker itself is cancelled
+            await asyncio.wait({task})
+        finally:
+            self._running.pop(job_id, None)
+
+        if task.cancelled():
+            await self._finish(record, JOB_CANCELLED, error="Job cancelled")
+        elif task.exception() is not None:
+            logger.error(f"Job {job_id} failed: {task.exception()}")
+            await self._finish(record, JOB_FAILED, error=str(task.exception()))
+        else:
+            await self._finish(record, JOB_SUCCEEDED, result=task.result())
+
+    def _expiry(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=settings.JOB_RESULT_TTL_SECONDS)
+
+    def _lease(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+    async def _finish(
+        self,
+        record: JobRecord,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        if record.finished:
+            return
+        record.status = status
+        record.result = result
+        record.error = error
+        record.finished_at = datetime.utcnow()
+        record.expires_at = self._expiry(record.finished_at)
+        self._active[record.owner] -= 1
+        if self._active[record.owner] <= 0:
+            del self._active[record.owner]
+        self.counts[status] += 1
+        await self._update(record)
+
+    async def _update(self, record: JobRecord) -> None:
+        """Persist a status change and wake anyone watching the job."""
+        store = self._get_store()
+        if store is not None:
+            if not record.finished:
+                record.lease_expires_at = self._lease(datetime.utcnow())
+            await store.save(record)
+        event = self._changed.pop(record.id, None)
+        if event is not None:
+            event.set()
+
+    async def _purge(self) -> None:
+        """Drop expired results and fail abandoned jobs, at most once per purge interval."""
+        if time.monotonic() - self._last_purge < PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = time.monotonic()
+        now = datetime.utcnow()
+        expired = [job_id for job_id, record in self._jobs.items() if record.expired(now)]
+        for job_id in expired:
+            del self._jobs[job_id]
+        self.counts["expired"] += len(expired)
+        store = self._get_store()
+        if store is not None:
+            await store.purge(now)
+            await store.fail_abandoned(self.instance_id, now, self._expiry(now))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, wait time and outcome counters."""
+        waits = sorted(self._waits_ms)
+        return {
+            "persisted": self._get_store() is not None,
+            "workers": len([worker for worker in self._workers if not worker.done()]),
+            "queued": self.queued,
+            "running": len(self._running),
+            "retained": len(self._jobs),
+            "submitted": self.counts["submitted"],
+            "rejected": self.counts["rejected"],
+            "succeeded": self.counts[JOB_SUCCEEDED],
+            "failed": self.counts[JOB_FAILED],
+            "cancelled": self.counts[JOB_CANCELLED],
+            "expired": self.counts["expired"],
+            "queue_wait_ms_p50": round(waits[len(waits) // 2], 1) if waits else 0.0,
+            "queue_wait_ms_max": round(waits[-1], 1) if waits else 0.0,
+        }
+
+
+# Create a singleton instance
+job_manager = JobManager()
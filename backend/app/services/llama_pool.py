@@ -0,0 +1,177 @@
+"""
+Load-balanced pool of llama.cpp backends.
+
+Each generation is routed to the backend with the fewest outstanding requests, or to
+the better of two random choices. Optional sticky routing sends a given key (a user
+or document) to the same backend so its prompt cache stays hot. Backends that fail
+are taken out of rotation and added back once a health check succeeds.
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ROUTING_LEAST_OUTSTANDING = "least_outstanding"
+ROUTING_POWER_OF_TWO = "power_of_two"
+
+# Weight of the newest sample in the latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+
+
+def normalize_base_url(host: str, port: str) -> str:
+    """Build a backend base URL, defaulting to http:// when no scheme is given."""
+    if not host.startswith(("http://", "https://")):
+        host = f"http://{host}"
+    return f"{host}:{port}"
+
+
+@dataclass
+class LlamaBackend:
+    """A single llama.cpp server and its routing statistics."""
+
+    base_url: str
+    healthy: bool = True
+    in_flight: int = 0
+    requests: int = 0
+    failures: int = 0
+    latency_ewma_ms: Optional[float] = None
+
+    def record_latency(self, elapsed_ms: float) -> None:
+        if self.latency_ewma_ms is None:
+            self.latency_ewma_ms = elapsed_ms
+        else:
+            self.latency_ewma_ms = (
+                LATENCY_EWMA_ALPHA * elapsed_ms + (1 - LATENCY_EWMA_ALPHA) * self.latency_ewma_ms
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "latency_ewma_ms": (
+                round(self.latency_ewma_ms, 1) if self.latency_ewma_ms is not None else None
+            ),
+        }
+
+
+class LlamaBackendPool:
+    """Route generations across several llama.cpp servers."""
+
+    def __init__(
+        self,
+        base_urls: List[str],
+        routing: str = ROUTING_LEAST_OUTSTANDING,
+        sticky: bool = False,
+    ) -> None:
+        if not base_urls:
+            raise ValueError("At least one Llama.cpp endpoint is required")
+        if routing not in (ROUTING_LEAST_OUTSTANDING, ROUTING_POWER_OF_TWO):
+            raise ValueError(f"Unknown routing strategy: {routing}")
+        self.backends = [LlamaBackend(base_url=url) for url in base_urls]
+        self.routing = routing
+        self.sticky = sticky
+        self._health_task: Optional["asyncio.Task[None]"] = None
+
+    def _candidates(self) -> List[LlamaBackend]:
+        healthy = [b for b in self.backends if b.healthy]
+        # With every backend down, keep trying all of them rather than failing outright
+        return healthy or self.backends
+
+    def choose(self, sticky_key: Optional[str] = None) -> LlamaBackend:
+        """Pick the backend for the next generation."""
+        candidates = self._candidates()
+        if len(candidates) == 1:
+            return candidates[0]
+
+        if self.sticky and sticky_key:
+            # Rendezvous hashing: only keys owned by a failed backend move elsewhere
+            return max(
+                candidates,
+                key=lambda b: hashlib.sha256(f"{sticky_key}|{b.base_url}".encode()).digest(),
+            )
+
+        if self.routing == ROUTING_POWER_OF_TWO:
+            candidates = random.sample(candidates, 2)
+
+        return min(
+            candidates,
+            key=lambda b: (b.in_flight, b.latency_ewma_ms or 0.0),
+        )
+
+    @asynccontextmanager
+    async def acquire(self, sticky_key: Optional[str] = None) -> AsyncIterator[LlamaBackend]:
+        """Reserve a backend for one generation and record its outcome."""
+        backend = self.choose(sticky_key)
+        backend.in_flight += 1
+        backend.requests += 1
+        start = time.perf_counter()
+        try:
+            yield backend
+        except httpx.TransportError:
+            backend.failures += 1
+            backend.healthy = False
+            logger.warning(f"Llama.cpp backend {backend.base_url} failed; removing from rotation")
+            raise
+        except Exception:
+            backend.failures += 1
+            raise
+        else:
+            backend.record_latency((time.perf_counter() - start) * 1000)
+        finally:
+            backend.in_flight -= 1
+
+    async def check_health(self, client: httpx.AsyncClient) -> None:
+        """Probe every backend and update its health."""
+
+        async def probe(backend: LlamaBackend) -> None:
+            try:
+                response = await client.get(
+                    f"{backend.base_url}/v1/models", timeout=settings.LLM_CONNECT_TIMEOUT_SECONDS
+                )
+                healthy = response.status_code == 200
+            except httpx.HTTPError:
+                healthy = False
+            if healthy != backend.healthy:
+                state = "recovered" if healthy else "failed its health check"
+                logger.info(f"Llama.cpp backend {backend.base_url} {state}")
+            backend.healthy = healthy
+
+        await asyncio.gather(*(probe(b) for b in self.backends))
+
+    def start_health_checks(self, client: httpx.AsyncClient, interval: float) -> None:
+        """Run health checks in the background until stopped."""
+
+        async def loop() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                await self.check_health(client)
+
+        self.stop_health_checks()
+        self._health_task = asyncio.ensure_future(loop())
+
+    def stop_health_checks(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return routing settings and per-endpoint statistics."""
+        return {
+            "routing": self.routing,
+            "sticky": self.sticky,
+            "backends": [b.stats() for b in self.backends],
+        }
@@ -0,0 +1,242 @@
+"""
+Exact-match cache for LLM responses.
+
+Entries are keyed on a hash of the normalized prompt plus the provider, model and
+sampling parameters. A bounded in-memory LRU tier with TTL expiry sits in front of
+an optional SQLite tier so warm entries survive restarts. The SQLite tier is bounded
+too: expired and least recently used rows are pruned as new ones are written.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize whitespace that does not change the meaning of a prompt."""
+    lines = [line.rstrip() for line in prompt.replace("\r\n", "\n").split("\n")]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def make_cache_key(prompt: str, provider: str, model: str, params: Dict[str, Any]) -> str:
+    """Build the cache key for a prompt and the generation settings it was sent with."""
+    material = json.dumps(
+        {
+            "prompt": normalize_prompt(prompt),
+            "provider": provider,
+            "model": model,
+            "params": params,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class _SQLiteTier:
+    """
+    Persistent cache tier backed by a local SQLite file.
+
+    Holds at most ``max_entries`` rows: every ``PRUNE_EVERY`` writes, expired rows are
+    deleted and then the least recently used rows past the bound.
+    """
+
+    # Writes between prunes; a prune counts the rows, so it does not run on every write
+    PRUNE_EVERY = 64
+
+    def __init__(self, path: str, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.pruned = 0
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL DEFAULT 0)"
+            )
+            # Files written before the tier was bounded have no access times
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(llm_cache)")}
+            if "accessed_at" not in columns:
+                self._conn.execute(
+                    "ALTER TABLE llm_cache ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0"
+                )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at)"
+            )
+            self._prune(time.time())
+            self._conn.commit()
+
+    def _prune(self, now: float) -> None:
+        """Delete expired rows, then the least recently used rows over the bound."""
+        self._writes = 0
+        deleted = self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        self.pruned += deleted.rowcount
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        if count > self.max_entries:
+            deleted = self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            self.pruned += deleted.rowcount
+
+    def get(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return str(row[0]), float(row[1])
+
+    def set(self, key: str, value: str, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, time.time()),
+            )
+            self._writes += 1
+            if self._writes >= self.PRUNE_EVERY:
+                self._prune(time.time())
+            self._conn.commit()
+
+    def delete(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._conn.execute("DELETE FROM llm_cache")
+            else:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LLMResponseCache:
+    """Two-tier LRU/TTL cache of LLM responses."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        sqlite_path: Optional[str] = None,
+        enabled: bool = True,
+        sqlite_max_entries: int = 100000,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._disk: Optional[_SQLiteTier] = (
+            _SQLiteTier(sqlite_path, sqlite_max_entries) if sqlite_path else None
+        )
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _store_in_memory(self, key: str, value: str, expires_at: float) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return a cached response, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            del self._entries[key]
+
+        if self._disk is not None:
+            stored = await asyncio.to_thread(self._disk.get, key, now)
+            if stored is not None:
+                self._store_in_memory(key, stored[0], stored[1])
+                self.hits += 1
+                self.disk_hits += 1
+                return stored[0]
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        """Store a response in every tier."""
+        if not self.enabled:
+            return
+
+        expires_at = time.time() + self.ttl_seconds
+        self._store_in_memory(key, value, expires_at)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.set, key, value, expires_at)
+
+    async def invalidate(self, key: Optional[str] = None) -> None:
+        """Remove one entry, or every entry when no key is given."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.delete, key)
+
+    def close(self) -> None:
+        """Close the persistent tier."""
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for sizing the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "persistent": self._disk is not None,
+            "disk_max_entries": self._disk.max_entries if self._disk is not None else 0,
+            "disk_pruned": self._disk.pruned if self._disk is not None else 0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Create a singleton instance
+response_cache = LLMResponseCache(
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    sqlite_path=settings.LLM_CACHE_SQLITE_PATH,
+    enabled=settings.LLM_CACHE_ENABLED,
+    sqlite_max_entries=settings.LLM_CACHE_SQLITE_MAX_ENTRIES,
+)
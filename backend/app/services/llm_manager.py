@@ -1,10 +1,103 @@
-from typing import Optional
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple
 
-import openai
-import requests
+import httpx
+from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletion
 
+from app.core.config import settings
 from app.models.llm import LLMType
+from app.services.admission import AdmissionController, Priority, get_admission_controller
+from app.services.cancellation import (
+    REASON_DEADLINE,
+    DeadlineExceeded,
+    cancellation_stats,
+    time_left,
+    with_deadline,
+)
+from app.services.document_limits import GenerationBudget, generation_budget_stats
+from app.services.llama_pool import ROUTING_LEAST_OUTSTANDING, LlamaBackendPool, normalize_base_url
+from app.services.llm_cache import make_cache_key, response_cache
+from app.services.llm_simulator import SIMULATOR_MODEL, LLMSimulator, SimulatorConfig
+from app.services.prompt_cache import llama_cache_hints, prompt_cache_stats
+from app.services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+OPENAI_MODEL = "gpt-3.5-turbo"
+LLAMA_MODEL = "Llama-3.2-3B-Instruct"
+LLAMA_MAX_TOKENS = 50000
+LLAMA_SYSTEM_PROMPT = (
+    "You are a helpful writing assistant. You take the user's prompt and return a modified "
+    "text according to the user's preferences."
+)
+USAGE_FIELDS = {"prompt_tokens", "completion_tokens", "total_tokens"}
+
+
+@dataclass
+class StreamChunk:
+    """A piece of a streamed completion; the final chunk may carry token usage."""
+
+    delta: str = ""
+    usage: Optional[Dict[str, int]] = None
+
+
+def create_http_client(**kwargs: Any) -> httpx.AsyncClient:
+    """Create a keep-alive HTTP client bounded by the configured connection limits."""
+    limits = httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS,
+    )
+    timeout = httpx.Timeout(
+        settings.LLM_REQUEST_TIMEOUT_SECONDS, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, **kwargs)
+
+
+async def _parse_llama_stream(response: httpx.Response) -> AsyncIterator[StreamChunk]:
+    """Parse Llama.cpp's OpenAI-compatible server-sent events into stream chunks."""
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:") :].strip()
+        if data == "[DONE]":
+            break
+        event = json.loads(data)
+        choices = event.get("choices") or []
+        content = choices[0].get("delta", {}).get("content") if choices else None
+        if content:
+            yield StreamChunk(delta=str(content))
+        if event.get("timings"):
+            prompt_cache_stats.record(event["timings"])
+        if event.get("usage"):
+            usage = {k: int(v) for k, v in event["usage"].items() if k in USAGE_FIELDS}
+            yield StreamChunk(usage=usage)
+
+
+_shared_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_shared_http_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled HTTP client that bounds total upstream sockets."""
+    global _shared_http_client
+    if _shared_http_client is None or _shared_http_client.is_closed:
+        _shared_http_client = create_http_client()
+    return _shared_http_client
+
+
+async def close_shared_http_client() -> None:
+    """Close the process-wide pooled HTTP client."""
+    global _shared_http_client
+    if _shared_http_client is not None:
+        await _shared_http_client.aclose()
+        _shared_http_client = None
 
 
 class LLMConnectionManager:
@@ -14,112 +107,428 @@ class LLMConnectionManager:
         self.host: Optional[str] = None
         self.port: Optional[str] = None
         self.is_connected: bool = False
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._openai_client: Optional[AsyncOpenAI] = None
+        self.llama_pool: Optional[LlamaBackendPool] = None
+        self.simulator: Optional[LLMSimulator] = None
+        self.single_flight = SingleFlight()
+        self.in_flight: int = 0
+        self.last_used: float = time.monotonic()
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Return this connection's HTTP client, defaulting to the shared pool."""
+        if self._http_client is not None:
+            return self._http_client
+        return get_shared_http_client()
+
+    def _touch(self, delta: int) -> None:
+        """Track in-flight requests and recency for idle eviction."""
+        self.in_flight += delta
+        self.last_used = time.monotonic()
 
-    def connect_openai(self, api_key: str) -> None:
-        openai.api_key = api_key
+    async def connect_openai(self, api_key: str) -> None:
+        client = AsyncOpenAI(api_key=api_key, http_client=self._get_http_client())
         # Test the connection
         try:
-            openai.models.list()
+            await client.models.list()
+            self._openai_client = client
             self.llm_type = LLMType.OPENAI
             self.api_key = api_key
             self.is_connected = True
         except Exception as e:
             raise Exception(f"Failed to connect to OpenAI: {str(e)}")
 
-    def connect_llama(self, host: str, port: str) -> None:
-        # Ensure host has http:// prefix
-        if not host.startswith(("http://", "https://")):
-            host = f"http://{host}"
+    async def connect_llama(self, host: str, port: str) -> None:
+        await self.connect_llama_pool([(host, port)])
 
-        llama_url = f"{host}:{port}/v1/models"  # Using OpenAI-compatible endpoint
-        print(f"Attempting to connect to Llama.cpp at: {llama_url}")
-        try:
-            response = requests.get(llama_url, timeout=5)
-            print(f"Llama.cpp connection response: {response.status_code}")
-            if response.status_code != 200:
-                raise Exception(f"Llama.cpp server returned status code: {response.status_code}")
-            self.llm_type = LLMType.LLAMA
-            self.host = host
-            self.port = port
-            self.is_connected = True
-        except requests.exceptions.RequestException as e:
-            print(f"Error connecting to Llama.cpp: {str(e)}")
-            raise
+    async def connect_llama_pool(
+        self,
+        endpoints: List[Tuple[str, str]],
+        routing: str = ROUTING_LEAST_OUTSTANDING,
+        sticky: bool = False,
+    ) -> None:
+        """
+        Connect to one or more Llama.cpp servers and balance generations across them.
+
+        Endpoints that do not respond are kept out of rotation until a background
+        health check sees them recover. At least one endpoint must be reachable.
+
+        Args:
+            endpoints: (host, port) pairs of Llama.cpp servers.
+            routing: Routing strategy, least outstanding requests or power of two choices.
+            sticky: Route each sticky key (user or document) to the same server.
+        """
+        pool = LlamaBackendPool(
+            [normalize_base_url(host, port) for host, port in endpoints],
+            routing=routing,
+            sticky=sticky,
+        )
+        logger.info(f"Attempting to connect to Llama.cpp at: {[b.base_url for b in pool.backends]}")
+        await pool.check_health(self._get_http_client())
+
+        healthy = [b for b in pool.backends if b.healthy]
+        if not healthy:
+            raise Exception("No Llama.cpp server responded at the given endpoints")
+
+        self.llm_type = LLMType.LLAMA
+        self.host, self.port = healthy[0].base_url.rsplit(":", 1)
+        self.llama_pool = pool
+        self.is_connected = True
+        if len(pool.backends) > 1:
+            pool.start_health_checks(
+                self._get_http_client(), settings.LLAMA_HEALTH_CHECK_INTERVAL_SECONDS
+            )
+
+    async def connect_simulated(self, config: Optional[SimulatorConfig] = None) -> None:
+        """
+        Connect to the in-process simulator instead of a real model.
+
+        Args:
+            config: Simulated latency, token rate and error rate; defaults to settings.
+        """
+        self.simulator = LLMSimulator(config or SimulatorConfig.from_settings())
+        self.llm_type = LLMType.SIMULATED
+        self.is_connected = True
+        logger.info(f"Connected to the LLM simulator: {self.simulator.stats()}")
 
     def disconnect(self) -> None:
+        if self.llama_pool is not None:
+            self.llama_pool.stop_health_checks()
         self.llm_type = None
         self.api_key = None
         self.host = None
         self.port = None
         self.is_connected = False
+        self._openai_client = None
+        self.llama_pool = None
+        self.simulator = None
+
+    async def aclose(self) -> None:
+        """Disconnect and release a dedicated HTTP client, if one was assigned."""
+        self.disconnect()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    @property
+    def provider(self) -> str:
+        """Name of the connected provider, or an empty string when disconnected."""
+        return LLMType(self.llm_type).value if self.llm_type else ""
+
+    @property
+    def model(self) -> Optional[str]:
+        """Name of the model requests are sent to."""
+        if self.llm_type == LLMType.OPENAI:
+            return OPENAI_MODEL
+        elif self.llm_type == LLMType.LLAMA:
+            return LLAMA_MODEL
+        elif self.llm_type == LLMType.SIMULATED:
+            return SIMULATOR_MODEL
+        return None
+
+    def generation_params(self, budget: Optional[GenerationBudget] = None) -> Dict[str, Any]:
+        """Sampling parameters sent with each request."""
+        if budget is not None:
+            return budget.params()
+        if self.llm_type == LLMType.LLAMA:
+            return {"max_tokens": LLAMA_MAX_TOKENS}
+        return {}
+
+    def admission(self) -> AdmissionController:
+        """Return the admission controller for the backend (or API key) this connection uses."""
+        if self.llm_type == LLMType.LLAMA:
+            pool = self._get_llama_pool()
+            urls = sorted(b.base_url for b in pool.backends)
+            return get_admission_controller(f"llama:{','.join(urls)}", len(urls))
+        key = self.provider or "none"
+        if self.api_key:
+            # Each API key has its own upstream rate limits, so tenants do not share slots
+            key = f"{key}:{hashlib.sha256(self.api_key.encode()).hexdigest()[:12]}"
+        return get_admission_controller(key)
+
+    def cache_key(self, prompt: str, budget: Optional[GenerationBudget] = None) -> str:
+        """Fingerprint a prompt together with the provider, model and sampling parameters."""
+        return make_cache_key(
+            prompt, self.provider, self.model or "", self.generation_params(budget)
+        )
 
-    def _generate_openai_text(self, prompt: str) -> str:
+    async def _generate_openai_text(
+        self, prompt: str, budget: Optional[GenerationBudget] = None
+    ) -> str:
         """Handle OpenAI text generation."""
+        if self._openai_client is None:
+            raise Exception("OpenAI client is not initialized")
         try:
-            response: ChatCompletion = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
+            response: ChatCompletion = await self._openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
                 messages=[{"role": "user", "content": prompt}],
+                **self.generation_params(budget),
             )
             return str(response.choices[0].message.content)
         except Exception as e:
             raise Exception(f"OpenAI API error: {str(e)}")
 
-    def _generate_llama_text(self, prompt: str) -> str:
+    def _llama_payload(
+        self,
+        prompt: str,
+        sticky_key: Optional[str] = None,
+        budget: Optional[GenerationBudget] = None,
+    ) -> Dict[str, Any]:
+        """Build the chat completion payload for Llama.cpp."""
+        return {
+            "model": LLAMA_MODEL,
+            "messages": [
+                {"role": "system", "content": LLAMA_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            **self.generation_params(budget),
+            **llama_cache_hints(sticky_key),
+        }
+
+    def _get_llama_pool(self) -> LlamaBackendPool:
+        """Return the backend pool, treating a bare host and port as a pool of one."""
+        if self.llama_pool is None:
+            self.llama_pool = LlamaBackendPool([f"{self.host}:{self.port}"])
+        return self.llama_pool
+
+    async def _generate_llama_text(
+        self,
+        prompt: str,
+        sticky_key: Optional[str] = None,
+        budget: Optional[GenerationBudget] = None,
+    ) -> str:
         """Handle Llama text generation."""
         try:
-            url = f"{self.host}:{self.port}/v1/chat/completions"
-            print(f"Sending request to Llama.cpp at: {url}")
-
-            payload = {
-                "model": "Llama-3.2-3B-Instruct",
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "You are a helpful writing assistant. You take the user's prompt and return a modified text according to the user's preferences.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                "max_tokens": 50000,
-            }
-
-            print(f"Request payload: {payload}")
-            response = requests.post(
-                url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=30,
-            )
-            print(f"Llama.cpp response status: {response.status_code}")
+            async with self._get_llama_pool().acquire(sticky_key) as backend:
+                url = f"{backend.base_url}/v1/chat/completions"
+                logger.debug(f"Sending request to Llama.cpp at: {url}")
 
-            if response.status_code == 200:
-                data = response.json()
-                print(f"Llama.cpp response data: {data}")
-                if "choices" in data and len(data["choices"]) > 0:
-                    return str(data["choices"][0]["message"]["content"])
-                raise Exception("Invalid response format from Llama.cpp")
+                payload = self._llama_payload(prompt, sticky_key, budget)
+                response = await self._get_http_client().post(url, json=payload)
+                logger.debug(f"Llama.cpp response status: {response.status_code}")
 
-            error_msg = f"Llama.cpp server error: {response.status_code} - {response.text}"
-            raise Exception(error_msg)
+                if response.status_code == 200:
+                    data = response.json()
+                    if data.get("timings"):
+                        prompt_cache_stats.record(data["timings"])
+                    if "choices" in data and len(data["choices"]) > 0:
+                        return str(data["choices"][0]["message"]["content"])
+                    raise Exception("Invalid response format from Llama.cpp")
 
-        except requests.exceptions.RequestException as e:
-            print(f"Llama.cpp request error: {str(e)}")
+                error_msg = f"Llama.cpp server error: {response.status_code} - {response.text}"
+                raise Exception(error_msg)
+
+        except httpx.HTTPError as e:
+            logger.error(f"Llama.cpp request error: {str(e)}")
             raise Exception(f"Llama.cpp request error: {str(e)}")
+
+    def _get_simulator(self) -> LLMSimulator:
+        if self.simulator is None:
+            raise Exception("LLM simulator is not initialized")
+        return self.simulator
+
+    async def _generate_simulated_text(
+        self, prompt: str, budget: Optional[GenerationBudget] = None
+    ) -> str:
+        """Handle simulated text generation."""
+        max_tokens = budget.max_tokens if budget is not None else None
+        return await self._get_simulator().complete(prompt, max_tokens)
+
+    async def _stream_simulated_text(
+        self, prompt: str, budget: Optional[GenerationBudget] = None
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream simulated completion tokens at the configured rate."""
+        simulator = self._get_simulator()
+        max_tokens = budget.max_tokens if budget is not None else None
+        completion = ""
+        async for token in simulator.stream(prompt, max_tokens):
+            completion += token
+            yield StreamChunk(delta=token)
+        yield StreamChunk(usage=simulator.usage(prompt, completion))
+
+    async def _stream_openai_text(
+        self, prompt: str, budget: Optional[GenerationBudget] = None
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream OpenAI completion tokens as they arrive."""
+        if self._openai_client is None:
+            raise Exception("OpenAI client is not initialized")
+        try:
+            stream = await self._openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                stream=True,
+                stream_options={"include_usage": True},
+                **self.generation_params(budget),
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield StreamChunk(delta=chunk.choices[0].delta.content)
+                if chunk.usage is not None:
+                    yield StreamChunk(usage=chunk.usage.model_dump(include=USAGE_FIELDS))
         except Exception as e:
-            print(f"Unexpected error with Llama.cpp: {str(e)}")
-            raise
+            raise Exception(f"OpenAI API error: {str(e)}")
+
+    async def _stream_llama_text(
+        self,
+        prompt: str,
+        sticky_key: Optional[str] = None,
+        budget: Optional[GenerationBudget] = None,
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream Llama.cpp completion tokens from its server-sent events."""
+        payload = {**self._llama_payload(prompt, sticky_key, budget), "stream": True}
+        try:
+            async with self._get_llama_pool().acquire(sticky_key) as backend:
+                url = f"{backend.base_url}/v1/chat/completions"
+                async with self._get_http_client().stream("POST", url, json=payload) as response:
+                    if response.status_code != 200:
+                        body = (await response.aread()).decode(errors="replace")
+                        raise Exception(f"Llama.cpp server error: {response.status_code} - {body}")
+                    async for chunk in _parse_llama_stream(response):
+                        yield chunk
+        except httpx.HTTPError as e:
+            logger.error(f"Llama.cpp request error: {str(e)}")
+            raise Exception(f"Llama.cpp request error: {str(e)}")
 
-    async def generate_text(self, prompt: str) -> str:
-        """Generate text using the configured LLM."""
+    async def _stream(
+        self,
+        prompt: str,
+        sticky_key: Optional[str],
+        priority: Priority,
+        budget: Optional[GenerationBudget] = None,
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream from the configured provider once admitted."""
+        if self.llm_type == LLMType.OPENAI:
+            chunks = self._stream_openai_text(prompt, budget)
+        elif self.llm_type == LLMType.LLAMA:
+            chunks = self._stream_llama_text(prompt, sticky_key, budget)
+        elif self.llm_type == LLMType.SIMULATED:
+            chunks = self._stream_simulated_text(prompt, budget)
+        else:
+            raise Exception("Unknown LLM type")
+
+        async with self.admission().slot(priority):
+            generated = 0
+            try:
+                async for chunk in chunks:
+                    generated += len(chunk.delta)
+                    yield chunk
+            except (asyncio.CancelledError, GeneratorExit):
+                # Closing the upstream stream makes Llama.cpp stop and free the slot
+                cancellation_stats.record_generation(budget, generated)
+                raise
+
+    async def stream_text(
+        self,
+        prompt: str,
+        sticky_key: Optional[str] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        budget: Optional[GenerationBudget] = None,
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream text from the configured LLM as it is generated."""
         if not self.is_connected:
             raise Exception("No active LLM connection")
 
+        # Identical concurrent streams share one upstream generation
+        factory = partial(self._stream, prompt, sticky_key, priority, budget)
+        chunks = self.single_flight.stream(self.cache_key(prompt, budget), factory)
+        self._touch(1)
+        try:
+            # The upstream stream is cancelled once every subscriber has hit its deadline
+            async for chunk in with_deadline(chunks):
+                yield chunk
+        finally:
+            self._touch(-1)
+
+    def _generate_provider(
+        self, prompt: str, sticky_key: Optional[str], budget: Optional[GenerationBudget]
+    ) -> Awaitable[str]:
         if self.llm_type == LLMType.OPENAI:
-            return self._generate_openai_text(prompt)
+            return self._generate_openai_text(prompt, budget)
         elif self.llm_type == LLMType.LLAMA:
-            return self._generate_llama_text(prompt)
-
+            return self._generate_llama_text(prompt, sticky_key, budget)
+        elif self.llm_type == LLMType.SIMULATED:
+            return self._generate_simulated_text(prompt, budget)
         raise Exception("Unknown LLM type")
 
+    async def _generate(
+        self,
+        prompt: str,
+        sticky_key: Optional[str],
+        priority: Priority,
+        budget: Optional[GenerationBudget] = None,
+    ) -> str:
+        """Send a prompt to the configured provider once admitted."""
+        async with self.admission().slot(priority):
+            generation = self._generate_provider(prompt, sticky_key, budget)
+            timeout = budget.timeout_seconds if budget is not None else None
+            try:
+                # Cancelling the request frees the server slot a runaway generation holds
+                return await asyncio.wait_for(generation, timeout)
+            except asyncio.TimeoutError:
+                cancellation_stats.record_generation(budget, 0)
+                raise Exception(f"LLM generation timed out after {timeout}s")
+            except asyncio.CancelledError:
+                cancellation_stats.record_generation(budget, 0)
+                raise
+
+    async def generate_text(
+        self,
+        prompt: str,
+        use_cache: bool = False,
+        refresh_cache: bool = False,
+        sticky_key: Optional[str] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        budget: Optional[GenerationBudget] = None,
+    ) -> str:
+        """
+        Generate text using the configured LLM.
+
+        Args:
+            prompt: Prompt to send.
+            use_cache: Serve and store the response through the response cache.
+            refresh_cache: Skip the cache lookup but still store the fresh response.
+            sticky_key: Key (user or document) that should keep hitting the same backend.
+            priority: Admission priority when the backend is saturated.
+            budget: Bounds on the generation's length and duration.
+
+        Returns:
+            The generated text.
+
+        Raises:
+            AdmissionRejected: If the backend's wait queue is full.
+            DeadlineExceeded: If the request's deadline passes first.
+        """
+        if not self.is_connected:
+            raise Exception("No active LLM connection")
+
+        if budget is not None:
+            generation_budget_stats.record_budget(budget)
+
+        key = self.cache_key(prompt, budget)
+        if use_cache and not refresh_cache:
+            cached = await response_cache.get(key)
+            if cached is not None:
+                return cached
+
+        # Identical concurrent requests share one upstream generation
+        # Check the deadline before queueing; the upstream call is cancelled once every
+        # caller sharing it has given up
+        timeout = time_left()
+        call = self.single_flight.do(
+            key, partial(self._generate, prompt, sticky_key, priority, budget)
+        )
+        self._touch(1)
+        try:
+            response_text = await asyncio.wait_for(call, timeout)
+        except asyncio.TimeoutError:
+            cancellation_stats.record_request(REASON_DEADLINE)
+            raise DeadlineExceeded(f"Request deadline exceeded after {timeout:.1f}s")
+        finally:
+            self._touch(-1)
+        if use_cache:
+            await response_cache.set(key, response_text)
+        return response_text
+
 
 # Create a singleton instance
 llm_manager = LLMConnectionManager()
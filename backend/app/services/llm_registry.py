@@ -0,0 +1,139 @@
+"""
+Registry of LLM connections keyed by user or by a user's named connection profile.
+
+Each user (and each of a user's profiles) gets its own LLMConnectionManager so one
+user's connection never replaces or lends credentials to another's. Anonymous requests
+use the default connection, which only admins can replace. All managers share the pooled
+HTTP client, which bounds the total number of upstream sockets, and idle managers are
+evicted LRU-first.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.models.user import User
+from app.services.llm_manager import LLMConnectionManager, llm_manager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECTION_KEY = "default"
+
+
+class ProfileRequiresUser(ValueError):
+    """A connection profile was requested without an authenticated user to own it."""
+
+
+def connection_key(user: Optional[User], profile: Optional[str] = None) -> str:
+    """
+    Return the registry key for a user or one of the user's named connection profiles.
+
+    Profiles belong to the user who connected them, so two users' profiles of the same
+    name are different connections.
+
+    Raises:
+        ProfileRequiresUser: If a profile is requested without a user.
+    """
+    if profile:
+        if user is None:
+            raise ProfileRequiresUser("Connection profiles require an authenticated user")
+        return f"user:{user.id}:profile:{profile}"
+    if user is not None:
+        return f"user:{user.id}"
+    return DEFAULT_CONNECTION_KEY
+
+
+class LLMConnectionRegistry:
+    """LRU registry of per-user LLM connections."""
+
+    def __init__(
+        self, default: LLMConnectionManager, max_connections: int, idle_seconds: float
+    ) -> None:
+        self.default = default
+        self.max_connections = max_connections
+        self.idle_seconds = idle_seconds
+        self._managers: "OrderedDict[str, LLMConnectionManager]" = OrderedDict()
+        self.evictions = 0
+
+    def _evict(self, key: str) -> None:
+        manager = self._managers.pop(key)
+        manager.disconnect()
+        self.evictions += 1
+        logger.info(f"Evicted idle LLM connection: {key}")
+
+    def _evict_idle(self) -> None:
+        """Drop connections that have been idle too long, then enforce the size bound."""
+        now = time.monotonic()
+        for key, manager in list(self._managers.items()):
+            if manager.in_flight == 0 and now - manager.last_used > self.idle_seconds:
+                self._evict(key)
+
+        # Least recently used first; connections with requests in flight are never evicted
+        for key, manager in list(self._managers.items()):
+            if len(self._managers) < self.max_connections:
+                break
+            if manager.in_flight == 0:
+                self._evict(key)
+
+    def connection_for(self, key: str) -> LLMConnectionManager:
+        """Return the manager that stores the connection for a key, creating it if needed."""
+        if key == DEFAULT_CONNECTION_KEY:
+            return self.default
+
+        manager = self._managers.get(key)
+        if manager is None:
+            self._evict_idle()
+            manager = LLMConnectionManager()
+            self._managers[key] = manager
+        self._managers.move_to_end(key)
+        return manager
+
+    def resolve(self, user: Optional[User], profile: Optional[str] = None) -> LLMConnectionManager:
+        """
+        Return the connection a request should generate with.
+
+        Falls back to the default connection when the user or profile has not
+        connected its own.
+
+        Raises:
+            ProfileRequiresUser: If a profile is requested without a user.
+        """
+        key = connection_key(user, profile)
+        manager = self._managers.get(key)
+        if manager is not None and manager.is_connected:
+            self._managers.move_to_end(key)
+            return manager
+        return self.default
+
+    def managers(self) -> Dict[str, LLMConnectionManager]:
+        """Return every registered connection, including the default."""
+        return {DEFAULT_CONNECTION_KEY: self.default, **self._managers}
+
+    def stats(self) -> Dict[str, Any]:
+        """Return registry size and eviction counters."""
+        managers = self.managers().values()
+        return {
+            "connections": len(self._managers),
+            "connected": sum(1 for m in managers if m.is_connected),
+            "max_connections": self.max_connections,
+            "in_flight": sum(m.in_flight for m in managers),
+            "evictions": self.evictions,
+        }
+
+    def single_flight_stats(self) -> Dict[str, int]:
+        """Return coalescing counters summed across every connection."""
+        totals: Dict[str, int] = {}
+        for manager in self.managers().values():
+            for name, value in manager.single_flight.stats().items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+
+# Create a singleton instance
+llm_registry = LLMConnectionRegistry(
+    default=llm_manager,
+    max_connections=settings.LLM_REGISTRY_MAX_CONNECTIONS,
+    idle_seconds=settings.LLM_REGISTRY_IDLE_SECONDS,
+)
@@ -0,0 +1,159 @@
+"""
+Deterministic LLM simulator for benchmarks and load tests.
+
+Generates text locally with a configurable time to first token, token rate and error
+rate, so the full stack can be exercised reproducibly without a network or a model.
+The same prompt always yields the same text, and with a fixed seed the sequence of
+injected errors is the same from run to run. It backs the ``simulated`` LLM type and
+the stand-in OpenAI-compatible server in ``app.simulator``.
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+from dataclasses import dataclass, fields
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SIMULATOR_MODEL = "simulated"
+
+# Words the simulated completions are drawn from
+VOCABULARY = (
+    "the writer revised each draft with care so that every sentence carried one clear idea "
+    "and the reader could follow the argument from the opening line to the final paragraph "
+    "without losing the thread while examples grounded claims in concrete detail"
+).split()
+
+
+class SimulatedError(Exception):
+    """Raised when the simulator injects a failure."""
+
+
+@dataclass
+class SimulatorConfig:
+    """Latency, throughput and failure behaviour of the simulated model."""
+
+    ttft_ms: float = 200.0
+    tokens_per_second: float = 50.0
+    error_rate: float = 0.0
+    output_tokens: int = 128
+    seed: int = 0
+
+    @classmethod
+    def from_settings(cls, **overrides: Any) -> "SimulatorConfig":
+        """Build a config from the SIMULATOR_* settings, with optional overrides."""
+        values = {
+            "ttft_ms": settings.SIMULATOR_TTFT_MS,
+            "tokens_per_second": settings.SIMULATOR_TOKENS_PER_SECOND,
+            "error_rate": settings.SIMULATOR_ERROR_RATE,
+            "output_tokens": settings.SIMULATOR_OUTPUT_TOKENS,
+            "seed": settings.SIMULATOR_SEED,
+        }
+        names = {f.name for f in fields(cls)}
+        values.update({k: v for k, v in overrides.items() if k in names and v is not None})
+        return cls(**values)
+
+
+def count_tokens(text: str) -> int:
+    """Approximate a token count by whitespace-separated words."""
+    return len(text.split())
+
+
+class LLMSimulator:
+    """Generate deterministic completions with simulated latency."""
+
+    def __init__(self, config: SimulatorConfig) -> None:
+        self.config = config
+        self._failures = random.Random(config.seed)
+        self.requests = 0
+        self.errors = 0
+        self.tokens = 0
+
+    def _tokens(self, prompt: str, max_tokens: Optional[int]) -> Tuple[str, ...]:
+        digest = hashlib.sha256(f"{self.config.seed}|{prompt}".encode()).digest()
+        words = random.Random(digest)
+        count = self.config.output_tokens
+        if max_tokens is not None:
+            count = min(count, max_tokens)
+        return tuple(
+            ("" if i == 0 else " ") + words.choice(VOCABULARY) for i in range(max(count, 0))
+        )
+
+    def _admit(self) -> None:
+        self.requests += 1
+        if self._failures.random() < self.config.error_rate:
+            self.errors += 1
+            raise SimulatedError("Simulated LLM error")
+
+    def _token_interval(self) -> float:
+        if self.config.tokens_per_second <= 0:
+            return 0.0
+        return 1.0 / self.config.tokens_per_second
+
+    def usage(self, prompt: str, completion: str) -> Dict[str, int]:
+        """Return OpenAI-style token usage for a prompt and its completion."""
+        prompt_tokens = count_tokens(prompt)
+        completion_tokens = count_tokens(completion)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    async def complete(self, prompt: str, max_tokens: Optional[int] = None) -> str:
+        """
+        Return a whole completion after the time it would take to generate.
+
+        Args:
+            prompt: Prompt to complete.
+            max_tokens: Optional cap on the completion length.
+
+        Returns:
+            The completion text.
+
+        Raises:
+            SimulatedError: If the request was chosen to fail.
+        """
+        self._admit()
+        tokens = self._tokens(prompt, max_tokens)
+        await asyncio.sleep(self.config.ttft_ms / 1000 + len(tokens) * self._token_interval())
+        self.tokens += len(tokens)
+        return "".join(tokens)
+
+    async def stream(self, prompt: str, max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Yield a completion token by token at the configured rate.
+
+        Args:
+            prompt: Prompt to complete.
+            max_tokens: Optional cap on the completion length.
+
+        Yields:
+            Completion tokens.
+
+        Raises:
+            SimulatedError: If the request was chosen to fail.
+        """
+        self._admit()
+        await asyncio.sleep(self.config.ttft_ms / 1000)
+        interval = self._token_interval()
+        for index, token in enumerate(self._tokens(prompt, max_tokens)):
+            if index and interval:
+                await asyncio.sleep(interval)
+            self.tokens += 1
+            yield token
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the simulator's settings and request counters."""
+        return {
+            "ttft_ms": self.config.ttft_ms,
+            "tokens_per_second": self.config.tokens_per_second,
+            "error_rate": self.config.error_rate,
+            "requests": self.requests,
+            "errors": self.errors,
+            "tokens": self.tokens,
+        }
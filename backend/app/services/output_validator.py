@@ -0,0 +1,155 @@
+"""
+Server-side validation of generated text against its document type's limits.
+
+Prompts ask the model to respect character limits and formatting rules, but models do
+not always comply. Generated text is checked against the limits table; if it fails, a
+short condense pass rewrites the output itself (not the original prompt, so it is far
+cheaper than regenerating) and is checked again, up to a bounded number of attempts.
+Output that still fails is trimmed locally.
+"""
+
+import logging
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.document_limits import DocumentLimits, budget_for, enforce_limit, limits_for
+from app.services.llm_manager import LLMConnectionManager
+from app.services.text_formatter import format_condense_prompt
+
+logger = logging.getLogger(__name__)
+
+STAGE_GENERATE = "generate"
+STAGE_CONDENSE = "condense"
+
+MARKDOWN_RULES = (
+    (re.compile(r"^#{1,6}\s", re.MULTILINE), "uses Markdown headings"),
+    (re.compile(r"^\s*\|.*\|\s*$", re.MULTILINE), "uses a Markdown table"),
+    (re.compile(r"^(```|~~~)", re.MULTILINE), "uses a code block"),
+    (re.compile(r"\*\*[^*\n]+\*\*|__[^_\n]+__"), "uses bold Markdown"),
+)
+
+
+def validate_output(text: str, document_type: Optional[str]) -> List[str]:
+    """
+    Check generated text against its document type's limits.
+
+    Args:
+        text: Generated text.
+        document_type: Target document type.
+
+    Returns:
+        Human-readable violations; empty if the text is valid.
+    """
+    limits = limits_for(document_type)
+    violations: List[str] = []
+    length = len(text.strip())
+    if limits.max_chars is not None and length > limits.max_chars:
+        violations.append(f"is {length} characters long; the limit is {limits.max_chars}")
+    if limits.plain_text:
+        violations += [message for pattern, message in MARKDOWN_RULES if pattern.search(text)]
+    return violations
+
+
+def has_constraints(limits: DocumentLimits) -> bool:
+    """Whether output for these limits needs validating at all."""
+    return limits.max_chars is not None or limits.plain_text
+
+
+@dataclass
+class Attempt:
+    """One generation or condense pass and what was wrong with its output."""
+
+    stage: str
+    elapsed_ms: float
+    chars: int
+    violations: List[str] = field(default_factory=list)
+
+
+class ValidationStats:
+    """Counters showing how often output needs condensing or trimming."""
+
+    def __init__(self) -> None:
+        self.validated = 0
+        self.first_pass_valid = 0
+        self.condense_passes = 0
+        self.trimmed = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "validated": self.validated,
+            "first_pass_valid": self.first_pass_valid,
+            "condense_passes": self.condense_passes,
+            "trimmed_after_retries": self.trimmed,
+        }
+
+
+# Create a singleton instance
+validation_stats = ValidationStats()
+
+
+async def generate_validated(
+    llm_manager: LLMConnectionManager,
+    prompt: str,
+    document_type: Optional[str],
+    source_text: str,
+    use_cache: bool = True,
+    refresh_cache: bool = False,
+    sticky_key: Optional[str] = None,
+    max_attempts: Optional[int] = None,
+) -> Tuple[str, List[Attempt]]:
+    """
+    Generate text and condense it until it meets its document type's limits.
+
+    Args:
+        llm_manager: Connection to generate with.
+        prompt: The action prompt.
+        document_type: Target document type.
+        source_text: The text the action was run on, for sizing the first budget.
+        use_cache: Serve and store responses through the response cache.
+        refresh_cache: Skip the cache lookup but still store fresh responses.
+        sticky_key: Key (user or document) that should keep hitting the same backend.
+        max_attempts: Total generate and condense passes; defaults to the setting.
+
+    Returns:
+        The final text and every attempt made, in order.
+    """
+    max_attempts = max_attempts or settings.LLM_VALIDATION_MAX_ATTEMPTS
+    options: Dict[str, Any] = {
+        "use_cache": use_cache,
+        "refresh_cache": refresh_cache,
+        "sticky_key": sticky_key,
+    }
+
+    attempts: List[Attempt] = []
+    stage, stage_prompt, budget_text = STAGE_GENERATE, prompt, source_text
+    while True:
+        start = time.perf_counter()
+        text = await llm_manager.generate_text(
+            stage_prompt, budget=budget_for(document_type, budget_text), **options
+        )
+        violations = validate_output(text, document_type)
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        attempts.append(Attempt(stage, elapsed_ms, len(text.strip()), violations))
+        if not violations or len(attempts) >= max_attempts:
+            break
+        logger.info(f"{document_type} output failed validation ({'; '.join(violations)})")
+        # Condense the output itself: a short prompt instead of regenerating from scratch
+        stage, budget_text = STAGE_CONDENSE, text
+        stage_prompt = format_condense_prompt(text, document_type or "Custom", violations)
+
+    if has_constraints(limits_for(document_type)):
+        validation_stats.validated += 1
+        validation_stats.condense_passes += len(attempts) - 1
+        if not attempts[0].violations:
+            validation_stats.first_pass_valid += 1
+        if attempts[-1].violations:
+            validation_stats.trimmed += 1
+    return enforce_limit(text, document_type), attempts
+
+
+def attempts_payload(attempts: List[Attempt]) -> List[Dict[str, Any]]:
+    """Serialise attempts for an API response."""
+    return [asdict(attempt) for attempt in attempts]
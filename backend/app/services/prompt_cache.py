@@ -0,0 +1,66 @@
+"""
+Llama.cpp prompt cache hints and accounting.
+
+Prompts put stable content (instructions, document-type guidance, the user's profile)
+first, so consecutive requests from one user share a long prefix. With ``cache_prompt``
+set, Llama.cpp keeps the KV cache of a slot's last prompt and only processes the part of
+a new prompt after the common prefix, provided the request lands on the same slot. The
+server reports per-request ``timings``, from which the prompt-processing time saved by
+the cache is estimated.
+"""
+
+import zlib
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+
+def llama_cache_hints(sticky_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build the prompt cache fields of a Llama.cpp request.
+
+    Args:
+        sticky_key: Key (user or document) whose requests should share a slot.
+
+    Returns:
+        Payload fields to merge into the chat completion request.
+    """
+    hints: Dict[str, Any] = {"cache_prompt": settings.LLAMA_CACHE_PROMPT}
+    if sticky_key is not None and settings.LLAMA_SLOTS_PER_SERVER > 0:
+        hints["id_slot"] = zlib.crc32(sticky_key.encode()) % settings.LLAMA_SLOTS_PER_SERVER
+    return hints
+
+
+class PromptCacheStats:
+    """Prompt tokens processed versus served from Llama.cpp's prompt cache."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.prompt_ms = 0.0
+
+    def record(self, timings: Dict[str, Any]) -> None:
+        """Add the ``timings`` object of one Llama.cpp response."""
+        self.requests += 1
+        self.prompt_tokens += int(timings.get("prompt_n") or 0)
+        self.cached_tokens += int(timings.get("cache_n") or 0)
+        self.prompt_ms += float(timings.get("prompt_ms") or 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache reuse and the estimated prompt-processing time it saved."""
+        total = self.prompt_tokens + self.cached_tokens
+        ms_per_token = self.prompt_ms / self.prompt_tokens if self.prompt_tokens else 0.0
+        return {
+            "enabled": settings.LLAMA_CACHE_PROMPT,
+            "requests": self.requests,
+            "prompt_tokens_processed": self.prompt_tokens,
+            "prompt_tokens_cached": self.cached_tokens,
+            "cached_ratio": round(self.cached_tokens / total, 4) if total else 0.0,
+            "prompt_ms": round(self.prompt_ms, 1),
+            "estimated_ms_saved": round(self.cached_tokens * ms_per_token, 1),
+        }
+
+
+# Create a singleton instance
+prompt_cache_stats = PromptCacheStats()
@@ -0,0 +1,247 @@
+"""
+Lexical retrieval of the document passages relevant to a chat message.
+
+A chat context longer than ``CHAT_CONTEXT_TOKENS`` is not sent whole. It is split into
+passages along its Markdown structure and indexed with BM25, and the prompt gets the
+document outline plus the passages that best match the message, in document order and
+within the same budget. Indexes are built once per document text and kept in a small
+LRU cache, so follow-up questions about the same version of a document only pay for the
+query. Messages that match nothing (such as "summarize this") get the start of the
+document instead.
+"""
+
+import hashlib
+import logging
+import math
+import re
+import time
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.text import ChatRequest
+from app.services.document_chunker import HEADING, outline, split_markdown
+from app.services.document_limits import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# BM25 term frequency saturation and length normalisation
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+WORD = re.compile(r"\w+")
+
+STOPWORDS = frozenset(
+    """a an and are as at be but by can do does for from has have how i if in into is it
+    its me my of on or our so that the their them then there these they this to was we
+    were what when where which who why will with would you your""".split()
+)
+
+PASSAGES_HEADING = "Relevant passages:\n"
+PASSAGE_SEPARATOR = "\n\n[...]\n\n"
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms, without stopwords or a trailing plural ``s``."""
+    terms = []
+    for word in WORD.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+class BM25Index:
+    """An inverted BM25 index over a fixed list of passages."""
+
+    def __init__(self, passages: List[str]) -> None:
+        self.lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for index, passage in enumerate(passages):
+            terms = Counter(tokenize(passage))
+            self.lengths.append(sum(terms.values()))
+            for term, count in terms.items():
+                self.postings[term].append((index, count))
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    def _idf(self, term: str) -> float:
+        matches = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.lengths) - matches + 0.5) / (matches + 0.5))
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """
+        Rank passages against a query.
+
+        Args:
+            query: Free text, such as a chat message.
+            k: Most passages to return.
+
+        Returns:
+            Up to ``k`` (passage index, score) pairs with a positive score, best first.
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self._idf(term)
+            for index, count in self.postings.get(term, ()):
+                norm = 1 - BM25_B + BM25_B * self.lengths[index] / (self.average_length or 1)
+                scores[index] += idf * count * (BM25_K1 + 1) / (count + BM25_K1 * norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:k]
+
+
+@dataclass
+class DocumentIndex:
+    """One document version's passages, the section each starts in, and its index."""
+
+    passages: List[str]
+    sections: List[Optional[str]]
+    outline: List[str]
+    index: BM25Index
+
+    @classmethod
+    def build(cls, text: str, passage_chars: int) -> "DocumentIndex":
+        passages = split_markdown(text, passage_chars)
+        sections: List[Optional[str]] = []
+        section = None
+        for passage in passages:
+            # A passage that opens with a heading labels itself
+            sections.append(None if HEADING.match(passage) else section)
+            headings = outline(passage)
+            section = headings[-1] if headings else section
+        # Index each passage with its section heading, so questions naming a section match
+        indexed = [f"{s}\n{p}" if s else p for s, p in zip(sections, passages)]
+        return cls(passages, sections, outline(text), BM25Index(indexed))
+
+
+class RetrievalIndexCache:
+    """LRU cache of document indexes, keyed by a hash of the document text."""
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        self.max_entries = max_entries or settings.RETRIEVAL_CACHE_ENTRIES
+        self._entries: "OrderedDict[str, DocumentIndex]" = OrderedDict()
+        self.hits = 0
+        self.builds = 0
+        self.build_ms = 0.0
+        self.queries = 0
+        self.context_tokens = 0
+        self.selected_tokens = 0
+
+    def get(self, text: str) -> DocumentIndex:
+        """Return the index for a document text, building it on first use."""
+        key = hashlib.sha256(text.encode()).hexdigest()
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        start = time.perf_counter()
+        entry = DocumentIndex.build(text, settings.RETRIEVAL_PASSAGE_CHARS)
+        self.build_ms += (time.perf_counter() - start) * 1000
+        self.builds += 1
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def record_query(self, context_tokens: int, selected_tokens: int) -> None:
+        self.queries += 1
+        self.context_tokens += context_tokens
+        self.selected_tokens += selected_tokens
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "context_token_budget": settings.CHAT_CONTEXT_TOKENS,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "builds": self.builds,
+            "hits": self.hits,
+            "avg_build_ms": round(self.build_ms / self.builds, 2) if self.builds else 0.0,
+            "queries": self.queries,
+            "context_tokens": self.context_tokens,
+            "selected_tokens": self.selected_tokens,
+        }
+
+
+# Create a singleton instance
+retrieval_cache = RetrievalIndexCache()
+
+
+def _passage(document: DocumentIndex, index: int) -> str:
+    """A passage as sent, labelled with the section it starts in."""
+    section = document.sections[index]
+    passage = document.passages[index]
+    return f"(from {section})\n{passage}" if section else passage
+
+
+def _outline(document: DocumentIndex, budget: int) -> List[str]:
+    """As much of the outline as fits in a quarter of the budget."""
+    headings: List[str] = []
+    remaining = budget // 4
+    for heading in document.outline:
+        remaining -= estimate_tokens(heading) + 1
+        if remaining < 0:
+            break
+        headings.append(heading)
+    return headings
+
+
+def _select_passages(document: DocumentIndex, message: str, budget: int) -> List[int]:
+    """Pick the best-matching passages that fit the budget, falling back to the start."""
+    ranked = [index for index, _ in document.index.search(message, settings.RETRIEVAL_TOP_K)]
+    if not ranked:
+        ranked = list(range(min(settings.RETRIEVAL_TOP_K, len(document.passages))))
+    chosen = []
+    for index in ranked:
+        tokens = estimate_tokens(_passage(document, index) + PASSAGE_SEPARATOR)
+        if tokens <= budget:
+            chosen.append(index)
+            budget -= tokens
+    return sorted(chosen)
+
+
+def select_context(context: Optional[str], message: str) -> Optional[str]:
+    """
+    Reduce a chat context to what the message needs.
+
+    Contexts within ``CHAT_CONTEXT_TOKENS`` (or all contexts, when it is 0) are returned
+    as they are. Longer ones are replaced by the document outline and the passages most
+    relevant to the message, labelled with their sections, in document order.
+
+    Args:
+        context: The chat context, usually the document being edited.
+        message: The chat message.
+
+    Returns:
+        The context to put in the prompt.
+    """
+    budget = settings.CHAT_CONTEXT_TOKENS
+    if not context or not budget or estimate_tokens(context) <= budget:
+        return context
+
+    document = retrieval_cache.get(context)
+    parts = []
+    headings = _outline(document, budget)
+    if headings:
+        parts.append("Document outline:\n" + "\n".join(headings))
+    remaining = budget - estimate_tokens("\n\n".join(parts + [PASSAGES_HEADING]))
+    chosen = _select_passages(document, message, remaining)
+    parts.append(PASSAGES_HEADING + PASSAGE_SEPARATOR.join(_passage(document, i) for i in chosen))
+
+    selected = "\n\n".join(parts)
+    retrieval_cache.record_query(estimate_tokens(context), estimate_tokens(selected))
+    return selected
+
+
+def with_relevant_context(request: ChatRequest) -> ChatRequest:
+    """Return the chat request with its context reduced by ``select_context``."""
+    context = select_context(request.context, request.message)
+    if context is request.context:
+        return request
+    return request.model_copy(update={"context": context})
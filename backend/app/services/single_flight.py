@@ -0,0 +1,152 @@
+"""
+Single-flight coalescing of identical in-flight LLM requests.
+
+Concurrent callers that share a key wait on one upstream call and receive its result
+or its error. The upstream call is only cancelled once every waiter has gone.
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Call:
+    """A shared non-streaming upstream call."""
+
+    def __init__(self, task: "asyncio.Future[Any]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class _StreamCall:
+    """A shared streaming upstream call, buffered so late joiners can replay it."""
+
+    def __init__(self) -> None:
+        self.items: List[Any] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Condition()
+        self.subscribers = 0
+        self.task: Optional["asyncio.Future[None]"] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one upstream call."""
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _StreamCall] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    def _forget(self, registry: Dict[str, Any], key: str, call: Any) -> None:
+        if registry.get(key) is call:
+            del registry[key]
+
+    def _release(
+        self, registry: Dict[str, Any], key: str, call: Any, task: "asyncio.Future[Any]"
+    ) -> None:
+        """Cancel a call nobody waits on any more, forgetting it first so no caller joins it."""
+        if not task.done():
+            self._forget(registry, key, call)
+            task.cancel()
+            self.cancelled += 1
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``fn`` once for all concurrent callers with the same key.
+
+        Args:
+            key: Fingerprint of the request.
+            fn: Factory for the upstream call.
+
+        Returns:
+            The shared result.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(self._calls, key, call))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)  # type: ignore[no-any-return]
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0:
+                self._release(self._calls, key, call, call.task)
+
+    async def _pump(self, call: _StreamCall, factory: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            async for item in factory():
+                async with call.changed:
+                    call.items.append(item)
+                    call.changed.notify_all()
+        except Exception as e:
+            call.error = e
+        finally:
+            async with call.changed:
+                call.finished = True
+                call.changed.notify_all()
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """
+        Share one upstream stream between all concurrent subscribers with the same key.
+
+        Subscribers that join late replay the items already received.
+
+        Args:
+            key: Fingerprint of the request.
+            factory: Factory for the upstream stream.
+
+        Yields:
+            Items from the shared stream.
+        """
+        call = self._streams.get(key)
+        if call is None:
+            call = _StreamCall()
+            self._streams[key] = call
+            call.task = asyncio.ensure_future(self._pump(call, factory))
+            call.task.add_done_callback(lambda _: self._forget(self._streams, key, call))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        assert call.task is not None
+        call.subscribers += 1
+        index = 0
+        try:
+            while True:
+                async with call.changed:
+                    await call.changed.wait_for(lambda: index < len(call.items) or call.finished)
+                    pending = call.items[index:]
+                    finished = call.finished
+                index += len(pending)
+                for item in pending:
+                    yield item
+                if finished and index >= len(call.items):
+                    if call.error is not None:
+                        raise call.error
+                    return
+        finally:
+            call.subscribers -= 1
+            if call.subscribers == 0:
+                self._release(self._streams, key, call, call.task)
+
+    def stats(self) -> Dict[str, int]:
+        """Return coalescing counters."""
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+        }
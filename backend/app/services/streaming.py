@@ -0,0 +1,197 @@
+"""
+Server-sent event helpers for streaming LLM output to clients.
+"""
+
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.services.batch_runner import BatchItemResult
+from app.services.chunked_action import ChunkedAction
+from app.services.document_limits import generation_budget_stats
+from app.services.llm_manager import StreamChunk
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Encode a payload as a single server-sent event."""
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def stream_generation(chunks: AsyncIterator[StreamChunk]) -> AsyncIterator[str]:
+    """
+    Forward streamed LLM chunks as server-sent events.
+
+    Each token delta is sent as a ``token`` event. The stream ends with a ``done``
+    event carrying token usage and timing, or an ``error`` event if generation fails.
+
+    Args:
+        chunks: Stream of chunks from the LLM manager.
+
+    Yields:
+        Encoded server-sent events.
+    """
+    start = time.perf_counter()
+    first_token_at: Optional[float] = None
+    usage: Optional[Dict[str, int]] = None
+
+    try:
+        async for chunk in chunks:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if chunk.delta:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield format_sse({"delta": chunk.delta}, event="token")
+    except Exception as e:
+        logger.error(f"Error streaming generation: {str(e)}")
+        yield format_sse({"detail": str(e)}, event="error")
+        return
+
+    end = time.perf_counter()
+    timing = {
+        "time_to_first_token_ms": (
+            round((first_token_at - start) * 1000, 1) if first_token_at is not None else None
+        ),
+        "total_ms": round((end - start) * 1000, 1),
+    }
+    yield format_sse({"usage": usage, "timing": timing}, event="done")
+
+
+async def limit_stream(
+    chunks: AsyncIterator[StreamChunk], max_chars: Optional[int]
+) -> AsyncIterator[StreamChunk]:
+    """
+    Cut a token stream off at a hard character limit.
+
+    Tokens already sent cannot be taken back, so the stream is cut at the limit itself
+    rather than at a sentence boundary. Stopping early closes the upstream generation.
+
+    Args:
+        chunks: Stream of chunks from the LLM manager.
+        max_chars: Hard limit, or None for no limit.
+
+    Yields:
+        The chunks, with the last delta shortened and the rest dropped past the limit.
+    """
+    if max_chars is None:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    sent = 0
+    try:
+        async for chunk in chunks:
+            if sent + len(chunk.delta) >= max_chars:
+                delta = chunk.delta[: max_chars - sent]
+                generation_budget_stats.record_trim(chunk.delta, delta)
+                if delta:
+                    yield StreamChunk(delta=delta)
+                break
+            sent += len(chunk.delta)
+            yield chunk
+    finally:
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+async def stream_chunked_action(action: ChunkedAction) -> AsyncIterator[str]:
+    """
+    Report a chunked long-document action as server-sent events.
+
+    Every chunk that finishes a phase is reported as a ``progress`` event. Final chunks
+    are sent as ``token`` events in document order as soon as all earlier chunks are
+    done, so clients that only read tokens still receive the stitched document.
+
+    Args:
+        action: The chunked action to run.
+
+    Yields:
+        Encoded server-sent events.
+    """
+    start = time.perf_counter()
+    first_token_at: Optional[float] = None
+    final: Dict[int, str] = {}
+    next_index = 0
+
+    try:
+        async for result in action.progress():
+            yield format_sse(
+                {
+                    "phase": result.phase,
+                    "chunk": result.index,
+                    "total": result.total,
+                    "elapsed_ms": result.elapsed_ms,
+                },
+                event="progress",
+            )
+            if result.phase != action.phases[-1]:
+                continue
+            final[result.index] = result.text
+            while next_index in final:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                delta = final[next_index] if next_index == 0 else f"\n\n{final[next_index]}"
+                yield format_sse({"delta": delta}, event="token")
+                next_index += 1
+    except Exception as e:
+        logger.error(f"Error streaming chunked action: {str(e)}")
+        yield format_sse({"detail": str(e)}, event="error")
+        return
+
+    end = time.perf_counter()
+    timing = {
+        "time_to_first_token_ms": (
+            round((first_token_at - start) * 1000, 1) if first_token_at is not None else None
+        ),
+        "total_ms": round((end - start) * 1000, 1),
+    }
+    yield format_sse({"usage": None, "timing": timing, "chunks": len(action.chunks)}, event="done")
+
+
+async def stream_batch(
+    results: AsyncIterator[BatchItemResult], names: List[str]
+) -> AsyncIterator[str]:
+    """
+    Report batch items as server-sent events as they finish.
+
+    Each item is sent as a ``result`` event with its index, name and either its result
+    fields or the failure detail. The stream ends with a ``done`` event counting
+    successes and failures.
+
+    Args:
+        results: Item results in completion order.
+        names: Item names, by index.
+
+    Yields:
+        Encoded server-sent events.
+    """
+    start = time.perf_counter()
+    succeeded = 0
+    async for result in results:
+        payload: Dict[str, Any] = {
+            "index": result.index,
+            "name": names[result.index],
+            "success": result.success,
+            "elapsed_ms": result.elapsed_ms,
+        }
+        if result.success:
+            succeeded += 1
+            payload.update(result.data)
+        else:
+            payload["detail"] = result.detail
+            if result.retry_after is not None:
+                payload["retry_after"] = result.retry_after
+        yield format_sse(payload, event="result")
+
+    timing = {"total_ms": round((time.perf_counter() - start) * 1000, 1)}
+    yield format_sse(
+        {"succeeded": succeeded, "failed": len(names) - succeeded, "timing": timing}, event="done"
+    )
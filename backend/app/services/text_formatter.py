@@ -1,16 +1,21 @@
-from app.models.text import ActionRequest, EvalRequest
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from app.models.text import ActionRequest, ChatRequest, EvalCriterion, EvalRequest
+from app.services.document_limits import limits_for
 
 
 def _get_document_type_guidance(document_type: str) -> str:
     """Get the guidance text for a specific document type."""
+    max_chars = limits_for(document_type).max_chars
     if document_type == "X":
-        return """
+        return f"""
 Document Type: X (Twitter)
-STRICT REQUIREMENT: The response MUST be 280 characters or less.
+STRICT REQUIREMENT: The response MUST be {max_chars} characters or less.
 X (Twitter) posts are extremely short. Use concise language, abbreviations when appropriate.
-Include 1-2 relevant hashtags only if space permits. DO NOT exceed 280 characters under any circumstances.
+Include 1-2 relevant hashtags only if space permits. DO NOT exceed {max_chars} characters under any circumstances.
 If the original content is too long, focus on the most impactful point only.
-Character limits are ABSOLUTE - your ENTIRE response must be under 280 characters including spaces and punctuation."""
+Character limits are ABSOLUTE - your ENTIRE response must be under {max_chars} characters including spaces and punctuation."""
     elif document_type == "LinkedIn":
         return """
 Document Type: LinkedIn
@@ -19,13 +24,13 @@ Typical LinkedIn posts are 1-3 paragraphs. For longer content, use clear formatt
 Focus on professional insights, career development, industry trends, or thought leadership.
 Avoid overly promotional language. Include a call-to-action when appropriate."""
     elif document_type == "Threads":
-        return """
+        return f"""
 Document Type: Threads
-STRICT REQUIREMENT: The response MUST be 500 characters or less.
+STRICT REQUIREMENT: The response MUST be {max_chars} characters or less.
 Threads posts are concise and conversational. Can be part of a sequence of related posts.
 Visual, engaging, and personal tone works well. Keep paragraphs very short.
 Focus on clarity and engagement rather than formal structure.
-Character limits are ABSOLUTE - your ENTIRE response must be under 500 characters including spaces and punctuation."""
+Character limits are ABSOLUTE - your ENTIRE response must be under {max_chars} characters including spaces and punctuation."""
     elif document_type == "Reddit":
         return """
 Document Type: Reddit
@@ -71,22 +76,19 @@ following its typical style, length constraints, and engagement patterns."""
 
 def _get_character_count_warning(document_type: str) -> str:
     """Get character count warning based on document type."""
-    if document_type == "X":
-        return """
-CRITICAL: THE LENGTH LIMIT IS 280 CHARACTERS FOR X (TWITTER) POSTS. COUNT YOUR CHARACTERS CAREFULLY.
-Your final output MUST be 280 characters or fewer.
-If your draft exceeds this limit, aggressively condense until it fits the 280 character limit.
-This is not a suggestion but a hard requirement."""
-    elif document_type == "Threads":
-        return """
-CRITICAL: THE LENGTH LIMIT IS 500 CHARACTERS FOR THREADS POSTS. COUNT YOUR CHARACTERS CAREFULLY.
-Your final output MUST be 500 characters or fewer.
-If your draft exceeds this limit, aggressively condense until it fits the 500 character limit.
+    limits = limits_for(document_type)
+    if limits.max_chars is not None:
+        platform = "X (TWITTER)" if document_type == "X" else document_type.upper()
+        return f"""
+CRITICAL: THE LENGTH LIMIT IS {limits.max_chars} CHARACTERS FOR {platform} POSTS. COUNT YOUR CHARACTERS CAREFULLY.
+Your final output MUST be {limits.max_chars} characters or fewer.
+If your draft exceeds this limit, aggressively condense until it fits the {limits.max_chars} character limit.
 This is not a suggestion but a hard requirement."""
-    elif document_type == "Email":
-        return """
+    elif document_type == "Email" and limits.target_words is not None:
+        low, high = limits.target_words
+        return f"""
 For emails, aim for brevity and clarity. While there's no strict character limit,
-most effective emails are between 50-125 words. Longer emails risk being skimmed or ignored.
+most effective emails are between {low}-{high} words. Longer emails risk being skimmed or ignored.
 Keep paragraphs short (2-3 sentences) and use bullet points for multiple items."""
     return ""
 
@@ -99,7 +101,7 @@ def format_action_prompt(request: ActionRequest) -> str:
         document_type_guidance = _get_document_type_guidance(request.document_type)
 
     # Create a modified formatting guide based on document type
-    formatting_guide = """Format your response using Markdown:  # noqa: E501
+    formatting_guide = """Format your response using Markdown:
 - Use # for main headings
 - Use ## for subheadings
 - Use **bold** for emphasis
@@ -117,7 +119,15 @@ def format_action_prompt(request: ActionRequest) -> str:
     if request.document_type:
         character_count_warning = _get_character_count_warning(request.document_type)
 
-    return f"""As a writing assistant, please help modify the following text according to the specified requirements.  # noqa: E501
+    # Stable content first and per-request content last, so consecutive prompts share a
+    # long prefix that Llama.cpp can serve from its prompt cache
+    return f"""As a writing assistant, please help modify the text below according to the task given after it.
+
+Return ONLY the modified text with appropriate formatting. Do not include any other text, comments, or explanations.
+{document_type_guidance}
+
+{formatting_guide}
+{character_count_warning}
 
 User Background:
 {request.about_me}
@@ -125,33 +135,17 @@ User Background:
 Writing Preferences:
 - Style: {request.preferred_style}
 - Tone: {request.tone}
-{document_type_guidance}
-
-Task: {request.action_description}
 
 Original Text:
 {request.text}
 
-{formatting_guide}
-{character_count_warning}
-
-
-
-
-
-
-
-Return ONLY the modified text with appropriate formatting. Do not include any other text, comments, or explanations."""  # noqa: E501
+Task: {request.action_description}"""  # noqa: E501
 
 
 def format_eval_prompt(request: EvalRequest) -> str:
     """Format the prompt for evaluation."""
-    return f"""As a writing assistant, please evaluate the following text based on the specified criteria.  # noqa: E501
-
-Evaluation Criteria: {request.eval_description}
-
-Text to Evaluate:
-{request.text}
+    # The criterion comes after the text so evaluations of one text share its prefix
+    return f"""As a writing assistant, please evaluate the text below based on the criteria given after it.
 
 Please provide a detailed evaluation of the text based on the specified criteria. Your evaluation should:
 1. Start with a brief summary of your assessment
@@ -168,4 +162,163 @@ Format your response using Markdown:
 - Use bullet points where appropriate
 - Use > for important callouts
 
-Return ONLY the evaluation with Markdown formatting. Do not include any other text, comments, or explanations."""  # noqa: E501
+Return ONLY the evaluation with Markdown formatting. Do not include any other text, comments, or explanations.
+
+Text to Evaluate:
+{request.text}
+
+Evaluation Criteria: {request.eval_description}"""  # noqa: E501
+
+
+def format_fused_eval_prompt(text: str, criteria: List[EvalCriterion]) -> str:
+    """Format one prompt that evaluates a text against several criteria as JSON."""
+    criteria_list = "\n".join(
+        f'- "{criterion.eval_name}": {criterion.eval_description}' for criterion in criteria
+    )
+    return f"""As a writing assistant, please evaluate the text below based on each of the criteria given after it.
+
+Evaluate the text against each criterion separately. For every criterion:
+1. Write a brief summary of your assessment, with specific examples from the text
+2. Give a numerical score from 0 to 10 (where 0 is the worst and 10 is the best)
+3. Offer constructive suggestions for improvement
+
+Respond with a single JSON object and nothing else, in exactly this form:
+{{"evaluations": [{{"criterion": "<criterion name exactly as given>", "score": <integer 0-10>, "summary": "<summary>", "suggestions": ["<suggestion>", ...]}}]}}
+
+Include one entry per criterion. Return ONLY the JSON object. Do not wrap it in a code block or include any other text.
+
+Text to Evaluate:
+{text}
+
+Evaluation Criteria:
+{criteria_list}"""  # noqa: E501
+
+
+def format_chat_prompt(request: ChatRequest) -> str:
+    """Format the prompt for a chat message."""
+    context = f"\nContext: {request.context}" if request.context else ""
+    return f"{request.message}{context}"
+
+
+def _format_turns(turns: Sequence[Tuple[str, str]]) -> str:
+    """Format (role, content) chat turns as a transcript."""
+    return "\n".join(f"{role.capitalize()}: {content}" for role, content in turns)
+
+
+def format_chat_session_prompt(
+    message: str,
+    context: Optional[str],
+    summary: Optional[str],
+    history: Sequence[Tuple[str, str]],
+) -> str:
+    """
+    Format a turn of a chat session.
+
+    The document context comes first and the new message last, so consecutive turns
+    share the longest possible prompt prefix.
+    """
+    parts = []
+    if context:
+        parts.append(f"Context: {context}")
+    if summary:
+        parts.append(f"Summary of the earlier conversation:\n{summary}")
+    if history:
+        parts.append(f"Conversation so far:\n{_format_turns(history)}")
+    parts.append(f"User: {message}\nAssistant:")
+    return "\n\n".join(parts)
+
+
+def format_chat_summary_prompt(
+    summary: Optional[str], turns: Sequence[Tuple[str, str]], max_words: int
+) -> str:
+    """Format the prompt that folds older chat turns into a session's running summary."""
+    role = (
+        "You are keeping a running summary of a conversation between a user and a writing "
+        "assistant about the user's document."
+    )
+    instructions = (
+        "Rewrite the summary so it also covers these turns. Keep the user's requests and "
+        "decisions, facts about the document, and open questions; drop pleasantries. "
+        f"Write at most {max_words} words of plain prose and reply with the summary only."
+    )
+    return f"""{role}
+
+Summary so far:
+{summary or "(none yet)"}
+
+Turns to add to the summary:
+{_format_turns(turns)}
+
+{instructions}"""
+
+
+def format_chunk_action_prompt(
+    request: ActionRequest, chunk: str, index: int, total: int, headings: List[str]
+) -> str:
+    """Format the action prompt for one part of a long document."""
+    prompt = format_action_prompt(request.model_copy(update={"text": chunk}))
+    document_outline = "\n".join(headings) if headings else "(no headings)"
+    return f"""{prompt}
+
+This text is part {index + 1} of {total} of a longer document that is being modified in parts.
+Document outline:
+{document_outline}
+
+Modify ONLY this part. Do not add an introduction, conclusion or summary of the whole document unless this part already contains one."""  # noqa: E501
+
+
+def format_consistency_prompt(
+    request: ActionRequest, section: str, previous_tail: str, next_head: str
+) -> str:
+    """Format the prompt that aligns one modified part of a long document with its neighbours."""
+    return f"""As a writing assistant, you are making one section of a longer document consistent with the sections around it. Each section was modified separately.
+
+Writing Preferences:
+- Style: {request.preferred_style}
+- Tone: {request.tone}
+
+End of the previous section:
+{previous_tail or "(this is the first section)"}
+
+Start of the next section:
+{next_head or "(this is the last section)"}
+
+Section to revise:
+{section}
+
+Revise ONLY the section to revise so that its terminology, tone and transitions match the surrounding sections. Keep its content, structure and formatting. Do not repeat the surrounding sections.
+
+Return ONLY the revised section. Do not include any other text, comments, or explanations."""  # noqa: E501
+
+
+def format_condense_prompt(text: str, document_type: str, violations: List[str]) -> str:
+    """Format the prompt that fixes a generated post that broke its document type's limits."""
+    problems = "\n".join(f"- {violation}" for violation in violations)
+    return f"""Revise the following {document_type} post so that it meets its requirements.
+{_get_character_count_warning(document_type)}
+
+Problems to fix:
+{problems}
+
+Keep the message, voice and any hashtags that still fit. Use plain text without Markdown headings, bold, tables or code blocks.
+
+Post to revise:
+{text}
+
+Return ONLY the revised post. Do not include any other text, comments, character counts or explanations."""  # noqa: E501
+
+
+def parse_eval_score(response_text: str, default: int = 5) -> int:
+    """Extract the 0-10 score from an evaluation, preferring "Rating: X/10" over "Score: X"."""
+    rating_match = re.search(r"rating:?\s*(\d+)(?:\s*\/\s*10)?", response_text, re.IGNORECASE)
+    score_match = re.search(r"score:?\s*(\d+)(?:\s*\/\s*10)?", response_text, re.IGNORECASE)
+
+    if rating_match and rating_match.group(1):
+        extracted_score = int(rating_match.group(1))
+        if 0 <= extracted_score <= 10:
+            return extracted_score
+    elif score_match and score_match.group(1):
+        extracted_score = int(score_match.group(1))
+        if 0 <= extracted_score <= 10:
+            return extracted_score
+    return default
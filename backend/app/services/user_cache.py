@@ -0,0 +1,141 @@
+"""
+Cache of authenticated-user lookups.
+
+Maps bearer tokens to detached snapshots of the user they resolved to, so repeated
+requests from the same client skip the database. Entries expire after a short TTL
+(never later than the token itself) and are dropped when a user's credentials change.
+
+When token claims are trusted, users are resolved straight from the JWT's ``email``
+and ``ver`` claims. Tokens issued before the user's last credential change are
+rejected from that path. Revocations are tracked in process memory, so every worker
+only knows about changes made through itself.
+"""
+
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_user(user: User) -> User:
+    """Copy a user's columns into a new instance that is not bound to any session."""
+    return User(
+        id=user.id,
+        email=user.email,
+        password_hash=user.password_hash,
+        is_verified=user.is_verified,
+    )
+
+
+class UserCache:
+    """Bounded TTL cache of token to user snapshot."""
+
+    def __init__(
+        self, max_entries: int, ttl_seconds: float, trust_claims: bool, enabled: bool = True
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.trust_claims = trust_claims
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, Tuple[User, float]]" = OrderedDict()
+        self._tokens_by_user: Dict[uuid.UUID, Set[str]] = {}
+        self._revoked_before: Dict[uuid.UUID, int] = {}
+        self.hits = 0
+        self.claims_hits = 0
+        self.misses = 0
+        self.db_lookups = 0
+
+    def _drop(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is not None:
+            tokens = self._tokens_by_user.get(entry[0].id)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens_by_user[entry[0].id]
+
+    def get(self, token: str) -> Optional[User]:
+        """Return the cached user for a token, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(token)
+        if entry is not None and entry[1] > time.time():
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+        if entry is not None:
+            self._drop(token)
+        return None
+
+    def from_claims(self, user_id: uuid.UUID, payload: Dict[str, Any]) -> Optional[User]:
+        """Build a user from trusted token claims, if the token carries them and is current."""
+        if not self.trust_claims or "email" not in payload:
+            return None
+        issued_at = int(payload.get("iat", 0))
+        if issued_at < self._revoked_before.get(user_id, 0):
+            return None
+        self.claims_hits += 1
+        return User(id=user_id, email=payload["email"], is_verified=bool(payload.get("ver")))
+
+    def record_lookup(self) -> None:
+        """Count a user lookup that had to go to the database."""
+        self.misses += 1
+        self.db_lookups += 1
+
+    def put(self, token: str, user: User, token_expires_at: Optional[float] = None) -> User:
+        """Cache a snapshot of the user a token resolved to, and return the snapshot."""
+        snapshot = snapshot_user(user)
+        if not self.enabled:
+            return snapshot
+
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+
+        self._drop(token)
+        self._entries[token] = (snapshot, expires_at)
+        self._tokens_by_user.setdefault(snapshot.id, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+        return snapshot
+
+    def invalidate_user(self, user_id: uuid.UUID) -> None:
+        """Forget every cached token of a user and reject older tokens' claims."""
+        for token in list(self._tokens_by_user.get(user_id, ())):
+            self._drop(token)
+        self._revoked_before[user_id] = int(time.time())
+        logger.info(f"Invalidated cached authentication for user: {user_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and database lookups per resolution."""
+        resolutions = self.hits + self.claims_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "trust_claims": self.trust_claims,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "claims_hits": self.claims_hits,
+            "misses": self.misses,
+            "db_lookups": self.db_lookups,
+            "db_queries_per_request": (
+                round(self.db_lookups / resolutions, 4) if resolutions else 0.0
+            ),
+        }
+
+
+# Create a singleton instance
+user_cache = UserCache(
+    max_entries=settings.AUTH_USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS,
+    trust_claims=settings.AUTH_TRUST_TOKEN_CLAIMS,
+    enabled=settings.AUTH_USER_CACHE_ENABLED,
+)
@@ -4,13 +4,14 @@ User service for authentication and user management.
 
 import logging
 import uuid
-from typing import Optional, cast
+from typing import Any, Dict, Optional, cast
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_password_hash, verify_password
 from app.models.user import User
+from app.services.password_hasher import password_hasher
+from app.services.user_cache import user_cache
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +38,11 @@ async def get_user_by_id(db: AsyncSession, user_id: uuid.UUID) -> Optional[User]
         raise
 
 
+def user_claims(user: User) -> Dict[str, Any]:
+    """Token claims that let trusted-claims auth resolve the user without a query"""
+    return {"email": user.email, "ver": bool(user.is_verified)}
+
+
 async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
     """Authenticate a user with email and password"""
     try:
@@ -45,7 +51,7 @@ async def authenticate_user(db: AsyncSession, email: str, password: str) -> Opti
             return None
         # Extract the password hash as a string
         password_hash = str(user.password_hash)
-        if not verify_password(password, password_hash):
+        if not await password_hasher.verify(password, password_hash):
             return None
         return user
     except Exception as e:
@@ -59,7 +65,7 @@ async def create_user(
     """Create a new user in the database"""
     try:
         # Create a password hash and ensure it's a string
-        password_hash = get_password_hash(password)
+        password_hash = await password_hasher.hash(password)
         user = User(email=email, password_hash=password_hash, is_verified=is_verified)
         db.add(user)
         await db.commit()
@@ -81,11 +87,13 @@ async def update_user_password(
             return None
 
         # Create a password hash and ensure it's a string
-        password_hash = get_password_hash(new_password)
+        password_hash = await password_hasher.hash(new_password)
         # Use direct assignment with type ignore comment to avoid type errors
         user.password_hash = password_hash  # type: ignore
         await db.commit()
         await db.refresh(user)
+        # Cached sessions must re-authenticate against the new credentials
+        user_cache.invalidate_user(user_id)
         return user
     except Exception as e:
         await db.rollback()
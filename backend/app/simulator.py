@@ -0,0 +1,174 @@
+"""
+Stand-in OpenAI-compatible LLM server backed by the deterministic simulator.
+
+Speaks the ``/v1/models`` and ``/v1/chat/completions`` subset of the llama.cpp server
+API, so the backend can connect to it as a regular Llama.cpp endpoint. Behaviour is
+configured through the SIMULATOR_* settings or the command-line flags.
+
+Usage:
+    python -m app.simulator --port 8081 --ttft-ms 200 --tokens-per-second 50
+"""
+
+import argparse
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from app.services.llm_simulator import (
+    SIMULATOR_MODEL,
+    LLMSimulator,
+    SimulatedError,
+    SimulatorConfig,
+)
+
+
+class ChatMessage(BaseModel):
+    role: str
+    content: str
+
+
+class ChatCompletionRequest(BaseModel):
+    model: Optional[str] = None
+    messages: List[ChatMessage]
+    max_tokens: Optional[int] = None
+    stream: bool = False
+
+
+def _prompt(request: ChatCompletionRequest) -> str:
+    return "\n".join(message.content for message in request.messages)
+
+
+def _chunk(completion_id: str, model: str, **fields: Any) -> str:
+    """Format one OpenAI-style streaming chunk as a server-sent event."""
+    body = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        **fields,
+    }
+    return f"data: {json.dumps(body)}\n\n"
+
+
+def _error(error: SimulatedError) -> JSONResponse:
+    return JSONResponse(status_code=500, content={"error": {"message": str(error)}})
+
+
+async def _complete(
+    simulator: LLMSimulator, request: ChatCompletionRequest, completion_id: str
+) -> Any:
+    """Answer a non-streaming chat completion."""
+    prompt = _prompt(request)
+    try:
+        text = await simulator.complete(prompt, request.max_tokens)
+    except SimulatedError as e:
+        return _error(e)
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.model or SIMULATOR_MODEL,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": simulator.usage(prompt, text),
+    }
+
+
+async def _stream(
+    simulator: LLMSimulator, request: ChatCompletionRequest, completion_id: str
+) -> Any:
+    """Answer a streaming chat completion with OpenAI-style server-sent events."""
+    prompt = _prompt(request)
+    model = request.model or SIMULATOR_MODEL
+    tokens = simulator.stream(prompt, request.max_tokens)
+    try:
+        # Pull the first token up front so injected errors surface as a status code
+        first = await tokens.__anext__()
+    except SimulatedError as e:
+        return _error(e)
+    except StopAsyncIteration:
+        first = ""
+
+    async def events() -> AsyncIterator[str]:
+        completion = first
+        yield _chunk(completion_id, model, choices=[{"index": 0, "delta": {"content": first}}])
+        async for token in tokens:
+            completion += token
+            yield _chunk(completion_id, model, choices=[{"index": 0, "delta": {"content": token}}])
+        yield _chunk(
+            completion_id,
+            model,
+            choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            usage=simulator.usage(prompt, completion),
+        )
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def create_simulator_app(simulator: LLMSimulator) -> FastAPI:
+    """
+    Create a stand-in LLM server around a simulator.
+
+    Args:
+        simulator: Simulator that generates the completions.
+
+    Returns:
+        The FastAPI application.
+    """
+    app = FastAPI(title="CoWriter LLM simulator")
+
+    @app.get("/health")
+    async def health() -> Dict[str, str]:
+        return {"status": "ok"}
+
+    @app.get("/v1/models")
+    async def list_models() -> Dict[str, Any]:
+        return {"object": "list", "data": [{"id": SIMULATOR_MODEL, "object": "model"}]}
+
+    @app.get("/stats")
+    async def get_stats() -> Dict[str, Any]:
+        return simulator.stats()
+
+    @app.post("/v1/chat/completions", response_model=None)
+    async def chat_completions(request: ChatCompletionRequest) -> Any:
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        if request.stream:
+            return await _stream(simulator, request, completion_id)
+        return await _complete(simulator, request, completion_id)
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    defaults = SimulatorConfig.from_settings()
+    parser = argparse.ArgumentParser(description="Run the stand-in OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--ttft-ms", type=float, default=defaults.ttft_ms)
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--output-tokens", type=int, default=defaults.output_tokens)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args()
+
+    config = SimulatorConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        output_tokens=args.output_tokens,
+        seed=args.seed,
+    )
+    uvicorn.run(create_simulator_app(LLMSimulator(config)), host=args.host, port=args.port)
@@ -0,0 +1,146 @@
+"""
+Chat retrieval benchmark.
+
+Builds a long Markdown document with one section per topic and asks one question about
+each section, sending the chat context whole (the old behaviour) and reduced to the
+outline and the best-matching passages. Reports prompt tokens, the time spent building
+and querying the passage index, whether the passage that answers the question was sent,
+and the prompt processing time, estimated from ``--prompt-tokens-per-second``. With
+``--llm host:port`` the prompts are also sent to a running Llama.cpp server and the
+measured latencies are reported as well.
+
+Usage:
+    python -m benchmarks.chat_retrieval --sections 40
+    python -m benchmarks.chat_retrieval --llm 127.0.0.1:8080 --questions 5
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.text import ChatRequest
+from app.services.document_limits import GenerationBudget, estimate_tokens
+from app.services.llm_manager import LLMConnectionManager
+from app.services.retrieval import select_context
+from app.services.text_formatter import format_chat_prompt
+
+TOPICS = [
+    "hiring",
+    "onboarding",
+    "security",
+    "meetings",
+    "budget",
+    "travel",
+    "benefits",
+    "promotions",
+    "offsites",
+    "tooling",
+]
+FILLER = (
+    "Teams revisit this policy every year and collect feedback from everyone it affects. "
+    "Exceptions are discussed with a manager and written down so the next person can "
+    "follow the same reasoning. "
+)
+
+
+def document(sections: int) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    Build the document and one (question, answer sentence) pair per section.
+
+    Each section has filler paragraphs and one sentence with a fact only it contains.
+    """
+    parts = ["# Company handbook"]
+    questions = []
+    for index in range(sections):
+        topic = f"{TOPICS[index % len(TOPICS)]} {index}"
+        fact = f"The {topic} policy code is {topic.replace(' ', '-')}-{index * 7919 % 10007}."
+        parts.append(f"## {topic.title()}")
+        parts.extend([FILLER * 2, fact, FILLER * 2])
+        questions.append((f"What is the {topic} policy code?", fact))
+    return "\n\n".join(parts), questions
+
+
+def summarise(samples: List[float]) -> float:
+    return round(sum(samples) / len(samples), 2) if samples else 0.0
+
+
+def prompts(
+    context: str, questions: List[Tuple[str, str]], retrieval: bool
+) -> Tuple[List[str], Dict[str, Any]]:
+    """Format one prompt per question and measure retrieval, when it is used."""
+    results: List[str] = []
+    query_ms: List[float] = []
+    hits = 0
+    for question, answer in questions:
+        request_context: Optional[str] = context
+        if retrieval:
+            start = time.perf_counter()
+            request_context = select_context(context, question)
+            query_ms.append((time.perf_counter() - start) * 1000)
+        prompt = format_chat_prompt(ChatRequest(message=question, context=request_context))
+        hits += answer in prompt
+        results.append(prompt)
+    stats = {
+        "prompt_tokens": summarise([estimate_tokens(p) for p in results]),
+        "answer_sent": round(hits / len(questions), 3),
+    }
+    if retrieval:
+        # The first question builds the index; the rest reuse it
+        stats["build_and_query_ms"] = round(query_ms[0], 2)
+        stats["cached_query_ms"] = summarise(query_ms[1:])
+    return results, stats
+
+
+async def measure(llm: str, prompts: List[str], max_tokens: int) -> Dict[str, Any]:
+    """Send prompts to a Llama.cpp server one at a time and report their latency."""
+    host, port = llm.rsplit(":", 1)
+    manager = LLMConnectionManager()
+    await manager.connect_llama(host, port)
+    elapsed: List[float] = []
+    try:
+        for prompt in prompts:
+            start = time.perf_counter()
+            await manager.generate_text(prompt, budget=GenerationBudget(max_tokens=max_tokens))
+            elapsed.append((time.perf_counter() - start) * 1000)
+    finally:
+        await manager.aclose()
+    return {"mean_ms": summarise(elapsed), "max_ms": round(max(elapsed), 2)}
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.CHAT_CONTEXT_TOKENS = args.context_tokens
+    settings.RETRIEVAL_TOP_K = args.top_k
+    context, questions = document(args.sections)
+    questions = questions[: args.questions] if args.questions else questions
+    results: Dict[str, Any] = {"context_tokens": estimate_tokens(context)}
+    for name, retrieval_enabled in (("full", False), ("retrieved", True)):
+        layout_prompts, stats = prompts(context, questions, retrieval_enabled)
+        stats["prompt_ms"] = round(stats["prompt_tokens"] / args.prompt_tokens_per_second * 1000, 1)
+        if args.llm:
+            stats["server"] = await measure(args.llm, layout_prompts, args.max_tokens)
+        results[name] = stats
+
+    full, retrieved = results["full"], results["retrieved"]
+    results["prompt_tokens_saved"] = round(full["prompt_tokens"] - retrieved["prompt_tokens"])
+    results["prompt_ms_saved"] = round(full["prompt_ms"] - retrieved["prompt_ms"], 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sections", type=int, default=40, help="Sections in the document")
+    parser.add_argument("--questions", type=int, default=0, help="Questions to ask (0: all)")
+    parser.add_argument("--context-tokens", type=int, default=settings.CHAT_CONTEXT_TOKENS)
+    parser.add_argument("--top-k", type=int, default=settings.RETRIEVAL_TOP_K)
+    parser.add_argument(
+        "--prompt-tokens-per-second",
+        type=float,
+        default=400.0,
+        help="Prompt processing rate used for the estimate",
+    )
+    parser.add_argument("--max-tokens", type=int, default=32, help="Reply budget on a server")
+    parser.add_argument("--llm", help="host:port of a Llama.cpp server to measure against")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,125 @@
+"""
+Document history benchmark.
+
+Simulates autosaves of a growing Markdown document: each save types a few words into a
+random paragraph, and every few saves a new paragraph is appended. Every version is
+encoded the way ``document_history.record_version`` stores it, and the benchmark
+reports the characters stored as full copies (the old behaviour) and as deltas with
+keyframes, the time spent encoding each save, and the time to rebuild the slowest
+version. The rebuild is also timed with no keyframes after the first, to show what
+the keyframe interval bounds.
+
+Runs in-process without a database; stored characters are what the ``content`` and
+``delta`` columns would hold.
+
+Usage:
+    python -m benchmarks.document_history --saves 1000 --keyframe-interval 32
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.document_history import apply_delta, encode_delta
+
+WORDS = "the draft needs a clearer opening and one more example before the summary".split()
+
+
+def autosaves(saves: int, paragraphs: int, seed: int) -> List[str]:
+    """Return the text of the document at every save."""
+    rng = random.Random(seed)
+    doc = [" ".join(rng.choices(WORDS, k=60)) for _ in range(paragraphs)]
+    versions = []
+    for save in range(saves):
+        if save % 10 == 9:
+            doc.append(" ".join(rng.choices(WORDS, k=60)))
+        else:
+            index = rng.randrange(len(doc))
+            words = doc[index].split(" ")
+            words.insert(rng.randrange(len(words) + 1), " ".join(rng.choices(WORDS, k=3)))
+            doc[index] = " ".join(words)
+        versions.append("# Draft\n\n" + "\n\n".join(doc) + "\n")
+    return versions
+
+
+def encode(versions: List[str]) -> Tuple[List[Tuple[Optional[str], Optional[str]]], List[float]]:
+    """Encode each version as (keyframe content, delta), timing every save."""
+    rows: List[Tuple[Optional[str], Optional[str]]] = []
+    elapsed: List[float] = []
+    chain = 0
+    previous: Optional[str] = None
+    for content in versions:
+        start = time.perf_counter()
+        delta = encode_delta(previous, content, chain)
+        elapsed.append((time.perf_counter() - start) * 1000)
+        chain = 1 if delta is None else chain + 1
+        rows.append((content, None) if delta is None else (None, delta))
+        previous = content
+    return rows, elapsed
+
+
+def slowest_rebuild(rows: List[Tuple[Optional[str], Optional[str]]]) -> Dict[str, Any]:
+    """Rebuild the version furthest from its keyframe and time it."""
+    longest, chain_start = (0, 0), 0
+    for index, (content, _) in enumerate(rows):
+        if content is not None:
+            chain_start = index
+        longest = max(longest, (index - chain_start, index))
+    deltas, target = longest
+    keyframe = target - deltas
+
+    start = time.perf_counter()
+    text = rows[keyframe][0] or ""
+    for _, delta in rows[keyframe + 1 : target + 1]:
+        text = apply_delta(text, json.loads(delta or "[]"))
+    return {
+        "deltas_applied": deltas,
+        "rebuild_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+
+
+def run(versions: List[str], keyframe_interval: int) -> Dict[str, Any]:
+    settings.DOCUMENT_HISTORY_KEYFRAME_INTERVAL = keyframe_interval
+    rows, elapsed = encode(versions)
+    stored = sum(len(content or delta or "") for content, delta in rows)
+    return {
+        "keyframe_interval": keyframe_interval,
+        "keyframes": sum(content is not None for content, _ in rows),
+        "stored_chars": stored,
+        "mean_encode_ms": round(sum(elapsed) / len(elapsed), 3),
+        "max_encode_ms": round(max(elapsed), 3),
+        **slowest_rebuild(rows),
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    settings.DOCUMENT_HISTORY_MAX_DELTA_RATIO = args.max_delta_ratio
+    versions = autosaves(args.saves, args.paragraphs, args.seed)
+    full_copies = sum(len(text) for text in versions)
+    keyframed = run(versions, args.keyframe_interval)
+    results = {
+        "saves": args.saves,
+        "final_chars": len(versions[-1]),
+        "full_copy_chars": full_copies,
+        "deltas": keyframed,
+        "deltas_without_keyframes": run(versions, args.saves + 1),
+        "stored_ratio": round(keyframed["stored_chars"] / full_copies, 4),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--saves", type=int, default=1000, help="Autosaves to simulate")
+    parser.add_argument("--paragraphs", type=int, default=20, help="Paragraphs at the start")
+    parser.add_argument(
+        "--keyframe-interval", type=int, default=settings.DOCUMENT_HISTORY_KEYFRAME_INTERVAL
+    )
+    parser.add_argument(
+        "--max-delta-ratio", type=float, default=settings.DOCUMENT_HISTORY_MAX_DELTA_RATIO
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,150 @@
+"""
+Document list benchmark.
+
+Stores many documents for one user and pages through all of them three ways: by
+OFFSET, loading whole rows (content included) as a naive list would; by OFFSET with
+only the summary columns; and by keyset with only the summary columns, as
+``document_service.list_documents`` does. Reports the mean time per page, the time of
+the deepest page and the bytes of content each pass read.
+
+Runs against a throwaway SQLite database by default. Pass ``--database-url`` to use
+another database (for example ``postgresql+asyncpg://...``); its tables are created if
+needed and the benchmark's rows are removed afterwards.
+
+Usage:
+    python -m benchmarks.document_list --documents 20000 --page-size 50
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.models.document import Document, DocumentHistory
+from app.models.user import User
+from app.services.document_service import SUMMARY_COLUMNS, list_documents
+
+INSERT_BATCH = 1000
+
+
+def summarise(samples: List[float]) -> Dict[str, float]:
+    return {
+        "pages": len(samples),
+        "mean_page_ms": round(sum(samples) / len(samples), 3),
+        "last_page_ms": round(samples[-1], 3),
+        "total_ms": round(sum(samples), 1),
+    }
+
+
+async def seed(session: AsyncSession, user_id: uuid.UUID, documents: int, size: int) -> None:
+    """Store a user and their documents, each updated at a different time."""
+    session.add(User(id=user_id, email=f"{user_id}@example.com", password_hash="not-a-hash"))
+    await session.flush()
+    start = datetime(2024, 1, 1)
+    for offset in range(0, documents, INSERT_BATCH):
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "title": f"Document {index}",
+                "content": "x" * size,
+                "document_type": "Custom",
+                "created_at": start + timedelta(seconds=index),
+                "updated_at": start + timedelta(seconds=index),
+            }
+            for index in range(offset, min(offset + INSERT_BATCH, documents))
+        ]
+        await session.execute(insert(Document), rows)
+    await session.commit()
+
+
+async def offset_pages(
+    session: AsyncSession, user_id: uuid.UUID, page_size: int, full_rows: bool
+) -> Dict[str, Any]:
+    """Page through the user's documents with LIMIT/OFFSET."""
+    columns = (Document,) if full_rows else SUMMARY_COLUMNS
+    elapsed: List[float] = []
+    content_bytes = 0
+    offset = 0
+    while True:
+        start = time.perf_counter()
+        stmt = (
+            select(*columns)
+            .where(Document.user_id == user_id)
+            .order_by(Document.updated_at.desc(), Document.id.desc())
+            .offset(offset)
+            .limit(page_size)
+        )
+        rows = (await session.execute(stmt)).all()
+        elapsed.append((time.perf_counter() - start) * 1000)
+        if full_rows:
+            content_bytes += sum(len(row[0].content or "") for row in rows)
+            session.expunge_all()
+        if len(rows) < page_size:
+            break
+        offset += page_size
+    return {**summarise(elapsed), "content_bytes": content_bytes}
+
+
+async def keyset_pages(session: AsyncSession, user_id: uuid.UUID, page_size: int) -> Dict[str, Any]:
+    """Page through the user's documents by keyset cursor."""
+    elapsed: List[float] = []
+    cursor: Optional[str] = None
+    while True:
+        start = time.perf_counter()
+        _, cursor = await list_documents(session, user_id, page_size, cursor)
+        elapsed.append((time.perf_counter() - start) * 1000)
+        if cursor is None:
+            break
+    return {**summarise(elapsed), "content_bytes": 0}
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        url = args.database_url or f"sqlite+aiosqlite:///{directory}/documents.db"
+        engine = create_async_engine(url)
+        tables = [User.__table__, Document.__table__, DocumentHistory.__table__]
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=tables)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        user_id = uuid.uuid4()
+        results: Dict[str, Any] = {"documents": args.documents, "page_size": args.page_size}
+        try:
+            async with session_factory() as session:
+                start = time.perf_counter()
+                await seed(session, user_id, args.documents, args.content_chars)
+                results["seed_s"] = round(time.perf_counter() - start, 2)
+                results["offset_full_rows"] = await offset_pages(
+                    session, user_id, args.page_size, full_rows=True
+                )
+                results["offset_summaries"] = await offset_pages(
+                    session, user_id, args.page_size, full_rows=False
+                )
+                results["keyset_summaries"] = await keyset_pages(session, user_id, args.page_size)
+        finally:
+            async with session_factory() as session:
+                await session.execute(delete(Document).where(Document.user_id == user_id))
+                await session.execute(delete(User).where(User.id == user_id))
+                await session.commit()
+            await engine.dispose()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=20000, help="Documents to store")
+    parser.add_argument("--page-size", type=int, default=50, help="Documents per page")
+    parser.add_argument("--content-chars", type=int, default=4000, help="Size of each document")
+    parser.add_argument("--database-url", help="Async SQLAlchemy URL (default: temporary SQLite)")
+    asyncio.run(main(parser.parse_args()))
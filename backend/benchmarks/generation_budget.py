@@ -0,0 +1,90 @@
+"""
+Generation budget benchmark.
+
+Runs the same actions for several document types against the simulated LLM, set up to
+produce runaway completions far longer than any of the targets, once without generation
+budgets (the old behaviour) and once with them. Reports generation time, completion
+tokens and the length of the returned text per document type.
+
+Usage:
+    python -m benchmarks.generation_budget --runaway-tokens 4000 --tokens-per-second 1000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+from app.models.text import ActionRequest
+from app.services.document_limits import budget_for, enforce_limit
+from app.services.llm_manager import LLMConnectionManager
+from app.services.llm_simulator import SimulatorConfig, count_tokens
+from app.services.text_formatter import format_action_prompt
+
+DRAFT = (
+    "Remote work changed how teams communicate. Written updates replaced hallway "
+    "conversations, and decisions now leave a trail that new hires can follow. "
+) * 4
+
+
+async def run_type(
+    manager: LLMConnectionManager, document_type: str, requests: int, budgeted: bool
+) -> Dict[str, Any]:
+    """Run one document type's actions and summarise time and output length."""
+    elapsed: List[float] = []
+    tokens = chars = 0
+    for index in range(requests):
+        request = ActionRequest(
+            action="shorten",
+            action_description=f"Rewrite the text, variant {index}",
+            text=DRAFT,
+            about_me="I am a product manager writing about distributed teams.",
+            preferred_style="Clear and concrete",
+            tone="professional",
+            document_type=document_type,
+        )
+        budget = budget_for(document_type, request.text) if budgeted else None
+        start = time.perf_counter()
+        text = await manager.generate_text(format_action_prompt(request), budget=budget)
+        elapsed.append(time.perf_counter() - start)
+        tokens += count_tokens(text)
+        chars += len(enforce_limit(text, document_type) if budgeted else text)
+    return {
+        "mean_ms": round(sum(elapsed) / len(elapsed) * 1000, 1),
+        "completion_tokens": round(tokens / requests),
+        "output_chars": round(chars / requests),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    manager = LLMConnectionManager()
+    await manager.connect_simulated(
+        SimulatorConfig(
+            ttft_ms=args.ttft_ms,
+            tokens_per_second=args.tokens_per_second,
+            error_rate=0.0,
+            output_tokens=args.runaway_tokens,
+            seed=0,
+        )
+    )
+    results: Dict[str, Any] = {}
+    for document_type in args.document_types:
+        unbounded = await run_type(manager, document_type, args.requests, budgeted=False)
+        budgeted = await run_type(manager, document_type, args.requests, budgeted=True)
+        results[document_type] = {
+            "unbounded": unbounded,
+            "budgeted": budgeted,
+            "ms_saved_per_request": round(unbounded["mean_ms"] - budgeted["mean_ms"], 1),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=3, help="Actions per document type")
+    parser.add_argument("--runaway-tokens", type=int, default=4000)
+    parser.add_argument("--tokens-per-second", type=float, default=1000.0)
+    parser.add_argument("--ttft-ms", type=float, default=100.0)
+    parser.add_argument("--document-types", nargs="+", default=["X", "Threads", "Email", "Blog"])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,421 @@
+"""
+End-to-end load test for the API.
+
+Drives login, submit_action, submit_eval and chat at a fixed concurrency and reports
+throughput, latency percentiles, error rates and database pool saturation for each
+scenario. Results are saved as JSON, tagged with the git commit, so runs can be
+compared across commits.
+
+By default the app runs in-process against a throwaway SQLite database and the
+built-in simulated LLM, so nothing else needs to be running. Point ``--database-url``
+at Postgres, ``--llm`` at a stand-in server (``python -m app.simulator``) or
+``--base-url`` at a deployed backend to exercise more of the real stack.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 32 --duration 20
+    python -m benchmarks.load_test --base-url http://localhost:8000 --llm localhost:8081 \
+        --admin-token "$ADMIN_TOKEN"
+    python -m benchmarks.load_test --compare results/before.json results/after.json
+"""
+
+import argparse
+import asyncio
+import importlib
+import itertools
+import json
+import logging
+import subprocess
+import tempfile
+import time
+from contextlib import AsyncExitStack
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+
+SCENARIOS = ("login", "submit_action", "submit_eval", "chat")
+PASSWORD = "Password123!"
+RESULTS_DIR = Path(__file__).parent / "results"
+POOL_SAMPLE_INTERVAL_SECONDS = 0.05
+
+TEXT = (
+    "Remote work changed how teams write. Status updates replaced hallway chats, and "
+    "every decision now needs a paragraph that someone in another time zone can follow."
+)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Scenario:
+    """Builds the requests for one endpoint; each call gets a unique prompt."""
+
+    def __init__(self, name: str, users: List[Dict[str, str]]) -> None:
+        self.name = name
+        self.users = users
+        self._counter = itertools.count()
+
+    async def send(self, client: httpx.AsyncClient) -> httpx.Response:
+        n = next(self._counter)
+        user = self.users[n % len(self.users)]
+        headers = {"Authorization": f"Bearer {user['token']}", "Cache-Control": "no-store"}
+        api = settings.API_V1_STR
+
+        if self.name == "login":
+            return await client.post(
+                f"{api}/auth/login/json",
+                json={"username_or_email": user["email"], "password": PASSWORD},
+            )
+        if self.name == "submit_action":
+            body = {
+                "action": "Improve",
+                "action_description": "Tighten the prose",
+                "text": f"{TEXT} (request {n})",
+                "about_me": "Engineering manager",
+                "preferred_style": "Plain and direct",
+                "tone": "Professional",
+                "document_type": "Blog",
+            }
+            return await client.post(f"{api}/submit_action", json=body, headers=headers)
+        if self.name == "submit_eval":
+            body = {
+                "eval_name": "Clarity",
+                "eval_description": "How easy the text is to follow",
+                "text": f"{TEXT} (request {n})",
+            }
+            return await client.post(f"{api}/submit_eval", json=body, headers=headers)
+        body = {"message": f"How can I shorten this? (request {n})", "context": TEXT}
+        return await client.post(f"{api}/chat", json=body, headers=headers)
+
+
+def succeeded(response: httpx.Response) -> bool:
+    """Whether a response counts as a success; text endpoints report failures in the body."""
+    if response.status_code != 200:
+        return False
+    body = response.json()
+    return not (isinstance(body, dict) and body.get("success") is False)
+
+
+class PoolSampler:
+    """Periodically record database pool usage while a scenario runs."""
+
+    def __init__(self, read: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+        self.read = read
+        self.samples: List[Dict[str, Any]] = []
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                self.samples.append(await self.read())
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(POOL_SAMPLE_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        self.samples = []
+        self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self) -> Dict[str, Any]:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        saturation = [s["saturation"] for s in self.samples if "saturation" in s]
+        if not saturation:
+            return {"samples": len(self.samples)}
+        return {
+            "samples": len(saturation),
+            "capacity": self.samples[-1]["size"] + self.samples[-1]["max_overflow"],
+            "max_checked_out": max(s["checked_out"] for s in self.samples),
+            "saturation_mean": round(sum(saturation) / len(saturation), 3),
+            "saturation_max": max(saturation),
+            "saturated_fraction": round(sum(1 for v in saturation if v >= 1) / len(saturation), 3),
+        }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    concurrency: int,
+    duration: float,
+    sampler: PoolSampler,
+) -> Dict[str, Any]:
+    """Run one scenario with a closed loop of ``concurrency`` workers for ``duration`` seconds."""
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await scenario.send(client)
+                error = None if succeeded(response) else str(response.status_code)
+            except httpx.HTTPError as e:
+                error = type(e).__name__
+            latencies.append((time.perf_counter() - start) * 1000)
+            if error is not None:
+                errors[error] = errors.get(error, 0) + 1
+
+    sampler.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    pool = await sampler.stop()
+
+    failed = sum(errors.values())
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "error_rate": round(failed / len(latencies), 4) if latencies else 0.0,
+        "throughput_rps": round((len(latencies) - failed) / elapsed, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.5), 1),
+            "p95": round(percentile(latencies, 0.95), 1),
+            "p99": round(percentile(latencies, 0.99), 1),
+            "max": round(max(latencies, default=0.0), 1),
+        },
+        "database_pool": pool,
+    }
+
+
+async def register_users(
+    client: httpx.AsyncClient, count: int, prefix: str = "load"
+) -> List[Dict[str, str]]:
+    """Register benchmark users and log each of them in once."""
+    run_id = int(time.time())
+    users = []
+    for i in range(count):
+        email = f"{prefix}-{run_id}-{i}@example.com"
+        response = await client.post(
+            f"{settings.API_V1_STR}/auth/register", json={"email": email, "password": PASSWORD}
+        )
+        response.raise_for_status()
+        response = await client.post(
+            f"{settings.API_V1_STR}/auth/login/json",
+            json={"username_or_email": email, "password": PASSWORD},
+        )
+        response.raise_for_status()
+        users.append({"email": email, "token": response.json()["access_token"]})
+    return users
+
+
+async def admin_headers(client: httpx.AsyncClient, args: argparse.Namespace) -> Dict[str, str]:
+    """
+    Authenticate as an admin, who may replace the default LLM connection and read /stats.
+
+    A deployed backend needs ``--admin-token``; the in-process app gets a new admin.
+    """
+    if args.admin_token:
+        return {"Authorization": f"Bearer {args.admin_token}"}
+    [admin] = await register_users(client, 1, prefix="load-admin")
+    settings.ADMIN_EMAILS = admin["email"]
+    return {"Authorization": f"Bearer {admin['token']}"}
+
+
+async def connect_llm(
+    client: httpx.AsyncClient, llm: str, args: argparse.Namespace, headers: Dict[str, str]
+) -> None:
+    """Connect the default LLM connection to the simulator or a stand-in server."""
+    if llm == "simulated":
+        body: Dict[str, Any] = {
+            "type": "simulated",
+            "simulator": {
+                "ttft_ms": args.ttft_ms,
+                "tokens_per_second": args.tokens_per_second,
+                "error_rate": args.error_rate,
+                "output_tokens": args.output_tokens,
+            },
+        }
+    else:
+        host, port = llm.rsplit(":", 1)
+        body = {"type": "llama", "host": host, "port": port}
+    body["default"] = True
+    response = await client.post(f"{settings.API_V1_STR}/connect_llm", json=body, headers=headers)
+    response.raise_for_status()
+    if not response.json()["success"]:
+        raise RuntimeError(f"Could not connect the LLM: {response.json()['message']}")
+
+
+async def in_process_app(
+    stack: AsyncExitStack, database_url: Optional[str], pool_size: int, max_overflow: int
+) -> "tuple[httpx.AsyncClient, AsyncEngine]":
+    """Serve the app in-process against its own database engine."""
+    from app.api import deps
+    from app.db.database import Base
+    from app.main import app
+    from app.models.user import User
+
+    if database_url is None:
+        tmp = stack.enter_context(tempfile.TemporaryDirectory())
+        database_url = f"sqlite+aiosqlite:///{tmp}/load.db"
+    engine = create_async_engine(database_url, pool_size=pool_size, max_overflow=max_overflow)
+    stack.push_async_callback(engine.dispose)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[User.__table__])
+
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_session() -> AsyncGenerator[AsyncSession, None]:
+        async with session_factory() as session:
+            yield session
+
+    # Per-request debug logging would dominate the measurements
+    logging.getLogger("app").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    app.dependency_overrides[deps.get_db_dependency] = get_session
+    stack.callback(app.dependency_overrides.clear)
+    # Short-lived auth sessions are opened directly from the session factory
+    deps_module = importlib.import_module("app.api.deps")
+    original_factory = deps_module.AsyncSessionLocal
+    deps_module.AsyncSessionLocal = session_factory
+    stack.callback(setattr, deps_module, "AsyncSessionLocal", original_factory)
+
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None)
+    await stack.enter_async_context(client)
+    return client, engine
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    async with AsyncExitStack() as stack:
+        if args.base_url:
+            client = httpx.AsyncClient(base_url=args.base_url, timeout=None)
+            await stack.enter_async_context(client)
+
+            async def read_pool() -> Dict[str, Any]:
+                response = await client.get(f"{settings.API_V1_STR}/stats", headers=headers)
+                return dict(response.json()["database_pool"])
+
+        else:
+            from app.db.database import pool_stats
+
+            client, engine = await in_process_app(
+                stack, args.database_url, args.pool_size, args.max_overflow
+            )
+
+            async def read_pool() -> Dict[str, Any]:
+                return pool_stats(engine)
+
+        headers = await admin_headers(client, args)
+        await connect_llm(client, args.llm, args, headers)
+        users = await register_users(client, args.users)
+        sampler = PoolSampler(read_pool)
+
+        scenarios = {}
+        for name in args.scenarios:
+            print(f"Running {name} at concurrency {args.concurrency} for {args.duration}s...")
+            scenarios[name] = await run_scenario(
+                client, Scenario(name, users), args.concurrency, args.duration, sampler
+            )
+        server_stats = (await client.get(f"{settings.API_V1_STR}/stats", headers=headers)).json()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            key: getattr(args, key)
+            for key in (
+                "base_url",
+                "database_url",
+                "llm",
+                "concurrency",
+                "duration",
+                "users",
+                "pool_size",
+                "max_overflow",
+                "ttft_ms",
+                "tokens_per_second",
+                "error_rate",
+                "output_tokens",
+            )
+        },
+        "scenarios": scenarios,
+        "server_stats": server_stats,
+    }
+
+
+def compare(before_path: str, after_path: str) -> None:
+    """Print throughput and latency changes between two saved runs."""
+    before = json.loads(Path(before_path).read_text())
+    after = json.loads(Path(after_path).read_text())
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    for name, result in after["scenarios"].items():
+        previous = before["scenarios"].get(name)
+        if previous is None:
+            continue
+        changes = [f"rps {previous['throughput_rps']} -> {result['throughput_rps']}"]
+        for key in ("p50", "p95", "p99"):
+            changes.append(f"{key} {previous['latency_ms'][key]} -> {result['latency_ms'][key]} ms")
+        changes.append(f"errors {previous['error_rate']} -> {result['error_rate']}")
+        print(f"{name}: " + ", ".join(changes))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--users", type=int, default=8, help="Distinct users to spread load over")
+    parser.add_argument("--base-url", help="Target a running backend instead of an in-process app")
+    parser.add_argument(
+        "--admin-token", help="Bearer token of an admin on the --base-url backend (required there)"
+    )
+    parser.add_argument("--database-url", help="Async database URL for the in-process app")
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--max-overflow", type=int, default=10)
+    parser.add_argument(
+        "--llm", default="simulated", help='"simulated" or the host:port of a stand-in server'
+    )
+    parser.add_argument("--ttft-ms", type=float, default=settings.SIMULATOR_TTFT_MS)
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=settings.SIMULATOR_TOKENS_PER_SECOND
+    )
+    parser.add_argument("--error-rate", type=float, default=settings.SIMULATOR_ERROR_RATE)
+    parser.add_argument("--output-tokens", type=int, default=settings.SIMULATOR_OUTPUT_TOKENS)
+    parser.add_argument("--output", help="Where to save the JSON results")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+    if args.base_url and not args.compare and not args.admin_token:
+        parser.error("--base-url needs --admin-token to connect the LLM and read /stats")
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        results = asyncio.run(main(args))
+        output = Path(
+            args.output
+            or RESULTS_DIR
+            / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{results['commit'] or 'local'}.json"
+        )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2))
+        for name, result in results["scenarios"].items():
+            latency = result["latency_ms"]
+            print(
+                f"{name}: {result['throughput_rps']} req/s, p50 {latency['p50']} ms, "
+                f"p95 {latency['p95']} ms, p99 {latency['p99']} ms, "
+                f"errors {result['error_rate']:.2%}, "
+                f"pool saturation max {result['database_pool'].get('saturation_max', 'n/a')}"
+            )
+        print(f"Saved results to {output}")
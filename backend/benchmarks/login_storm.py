@@ -0,0 +1,153 @@
+"""
+Login storm benchmark.
+
+Fires a burst of concurrent logins at the app while a probe keeps calling a cheap
+endpoint, and reports login throughput alongside the probe's latency percentiles.
+Run once with bcrypt inline on the event loop (the old behaviour) and once per pool
+executor to see how much the storm stalls unrelated requests.
+
+The app runs in-process against a throwaway SQLite database, so no Postgres or LLM
+backend is needed.
+
+Usage:
+    python -m benchmarks.login_storm --logins 64 --modes inline thread process
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import statistics
+import tempfile
+import time
+from typing import Any, AsyncGenerator, Dict, List
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.deps import get_db_dependency
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password
+from app.db.database import Base
+from app.main import app
+from app.models.user import User
+from app.services.password_hasher import PasswordHasher
+
+EMAIL = "storm@example.com"
+PASSWORD = "Password123!"
+PROBE_PATH = "/health"
+PROBE_INTERVAL_SECONDS = 0.01
+
+
+class InlineHasher(PasswordHasher):
+    """Hash on the event loop thread, as the handlers did before the pool existed."""
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return verify_password(plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return get_password_hash(password)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def make_hasher(mode: str, workers: int, queue: int) -> PasswordHasher:
+    if mode == "inline":
+        return InlineHasher(executor="thread", max_workers=1, max_queue=0, retry_after=1)
+    return PasswordHasher(executor=mode, max_workers=workers, max_queue=queue, retry_after=1)
+
+
+async def run_storm(client: httpx.AsyncClient, logins: int) -> Dict[str, Any]:
+    """Run one login storm with a concurrent latency probe."""
+    probe_latencies: List[float] = []
+    login_latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    storm_done = asyncio.Event()
+
+    async def probe() -> None:
+        # Probes follow a fixed schedule and are timed from when they were due, so a
+        # stalled event loop shows up as latency instead of as fewer samples
+        due = time.perf_counter()
+        while not storm_done.is_set():
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            await client.get(PROBE_PATH)
+            probe_latencies.append((time.perf_counter() - due) * 1000)
+            due += PROBE_INTERVAL_SECONDS
+
+    async def login() -> None:
+        start = time.perf_counter()
+        response = await client.post(
+            f"{settings.API_V1_STR}/auth/login/json",
+            json={"username_or_email": EMAIL, "password": PASSWORD},
+        )
+        login_latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    probe_task = asyncio.ensure_future(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    storm_done.set()
+    await probe_task
+
+    return {
+        "logins": logins,
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "logins_per_s": round(statuses.get(200, 0) / elapsed, 1),
+        "login_ms_p50": round(percentile(login_latencies, 0.5), 1),
+        "login_ms_p99": round(percentile(login_latencies, 0.99), 1),
+        "probe_requests": len(probe_latencies),
+        "probe_ms_p50": round(statistics.median(probe_latencies), 1) if probe_latencies else 0.0,
+        "probe_ms_p99": round(percentile(probe_latencies, 0.99), 1),
+        "probe_ms_max": round(max(probe_latencies, default=0.0), 1),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/storm.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[User.__table__])
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as session:
+            session.add(User(email=EMAIL, password_hash=get_password_hash(PASSWORD)))
+            await session.commit()
+
+        async def get_test_session() -> AsyncGenerator[AsyncSession, None]:
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db_dependency] = get_test_session
+        user_service = importlib.import_module("app.services.user_service")
+        results = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for mode in args.modes:
+                hasher = make_hasher(mode, args.workers, args.queue)
+                user_service.password_hasher = hasher  # type: ignore[attr-defined]
+                results[mode] = {**await run_storm(client, args.logins), "hasher": hasher.stats()}
+                hasher.shutdown()
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=64, help="Concurrent logins per storm")
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=["inline", "thread", "process"],
+        choices=["inline", "thread", "process"],
+    )
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_MAX_WORKERS)
+    parser.add_argument("--queue", type=int, default=settings.PASSWORD_HASH_MAX_QUEUE)
+    asyncio.run(main(parser.parse_args()))
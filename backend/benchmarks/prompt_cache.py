@@ -0,0 +1,186 @@
+"""
+Prompt cache benchmark.
+
+Replays one user's editing session (a document edited a little between actions, with
+actions cycling through expand, shorten and critique) and compares the prompt prefix
+Llama.cpp can reuse from a slot's KV cache with the previous prompt layout, which put
+the task and text before the static formatting instructions, and the current one, which
+puts them last.
+
+By default reuse is computed offline: each prompt is compared with the previous one on
+the same slot, tokens are approximated by words, and prompt processing time is derived
+from ``--prompt-tokens-per-second``. With ``--llm host:port`` the prompts are also sent
+to a running Llama.cpp server and its reported ``timings`` are used instead.
+
+Usage:
+    python -m benchmarks.prompt_cache --requests 30
+    python -m benchmarks.prompt_cache --llm 127.0.0.1:8080
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Any, Callable, Dict, List
+
+from app.models.text import ActionRequest
+from app.services.llm_manager import LLAMA_SYSTEM_PROMPT, LLMConnectionManager
+from app.services.llm_simulator import count_tokens
+from app.services.prompt_cache import prompt_cache_stats
+from app.services.text_formatter import (
+    _get_character_count_warning,
+    _get_document_type_guidance,
+    format_action_prompt,
+)
+
+ACTIONS = [
+    ("expand", "Expand the text with more detail and examples"),
+    ("shorten", "Make the text more concise"),
+    ("critique", "Rewrite the text to address its weakest arguments"),
+]
+PARAGRAPH = (
+    "Remote work changed how teams communicate. Written updates replaced hallway "
+    "conversations, and decisions now leave a trail that new hires can follow. "
+)
+
+
+def legacy_action_prompt(request: ActionRequest) -> str:
+    """The action prompt layout used before stable content was moved to the front."""
+    formatting_guide = (
+        "Keep formatting minimal and appropriate for short-form content."
+        if request.document_type in ["X", "Threads"]
+        else "Format your response using Markdown:\n- Use # for main headings\n"
+        "- Use ## for subheadings\n- Use **bold** for emphasis\n"
+        "- Use *italic* for subtle emphasis\n- Use bullet points where appropriate\n"
+        "- Use numbered lists for sequential items\n- Use > for quotes or important callouts"
+    )
+    return f"""As a writing assistant, please help modify the following text according to the specified requirements.
+
+User Background:
+{request.about_me}
+
+Writing Preferences:
+- Style: {request.preferred_style}
+- Tone: {request.tone}
+{_get_document_type_guidance(request.document_type or "Custom")}
+
+Task: {request.action_description}
+
+Original Text:
+{request.text}
+
+{formatting_guide}
+{_get_character_count_warning(request.document_type or "Custom")}
+
+
+
+
+
+
+
+Return ONLY the modified text with appropriate formatting. Do not include any other text, comments, or explanations."""  # noqa: E501
+
+
+def session(requests: int, document_type: str) -> List[ActionRequest]:
+    """Build an editing session: the document grows by one sentence between actions."""
+    text = PARAGRAPH * 6
+    session_requests = []
+    for index in range(requests):
+        action, description = ACTIONS[index % len(ACTIONS)]
+        if index % len(ACTIONS) == 0:
+            text += f"Edit {index}: teams also rely on shared documents. "
+        session_requests.append(
+            ActionRequest(
+                action=action,
+                action_description=description,
+                text=text,
+                about_me="I am a product manager writing about how distributed teams work.",
+                preferred_style="Clear, concrete and free of jargon",
+                tone="professional",
+                document_type=document_type,
+            )
+        )
+    return session_requests
+
+
+def full_prompt(prompt: str) -> str:
+    """The text Llama.cpp tokenizes: the system prompt followed by the user prompt."""
+    return f"{LLAMA_SYSTEM_PROMPT}\n{prompt}"
+
+
+def common_prefix(a: str, b: str) -> str:
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return a[:length]
+
+
+def offline_reuse(prompts: List[str], prompt_tokens_per_second: float) -> Dict[str, Any]:
+    """Estimate prefix reuse with one slot that keeps the previous prompt's KV cache."""
+    total = cached = 0
+    previous = ""
+    for prompt in prompts:
+        text = full_prompt(prompt)
+        total += count_tokens(text)
+        cached += count_tokens(common_prefix(previous, text))
+        previous = text
+    processed = total - cached
+    return {
+        "prompt_tokens": total,
+        "prompt_tokens_cached": cached,
+        "cached_ratio": round(cached / total, 4) if total else 0.0,
+        "prompt_ms": round(processed / prompt_tokens_per_second * 1000, 1),
+        "prompt_ms_without_cache": round(total / prompt_tokens_per_second * 1000, 1),
+    }
+
+
+async def server_reuse(llm: str, prompts: List[str], sticky_key: str) -> Dict[str, Any]:
+    """Send the prompts to a Llama.cpp server and total the timings it reports."""
+    host, port = llm.rsplit(":", 1)
+    manager = LLMConnectionManager()
+    await manager.connect_llama(host, port)
+    before = prompt_cache_stats.stats()
+    try:
+        for prompt in prompts:
+            await manager.generate_text(prompt, sticky_key=sticky_key)
+    finally:
+        await manager.aclose()
+    after = prompt_cache_stats.stats()
+    return {
+        key: round(after[key] - before[key], 1)
+        for key in ("requests", "prompt_tokens_processed", "prompt_tokens_cached", "prompt_ms")
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    layouts: Dict[str, Callable[[ActionRequest], str]] = {
+        "legacy": legacy_action_prompt,
+        "current": format_action_prompt,
+    }
+    requests = session(args.requests, args.document_type)
+    results: Dict[str, Any] = {}
+    for name, layout in layouts.items():
+        prompts = [layout(request) for request in requests]
+        results[name] = {"offline": offline_reuse(prompts, args.prompt_tokens_per_second)}
+        if args.llm:
+            # A fresh sticky key per layout so the two runs do not share a warm slot
+            results[name]["server"] = await server_reuse(args.llm, prompts, f"bench-{name}")
+
+    legacy, current = results["legacy"]["offline"], results["current"]["offline"]
+    results["prompt_ms_saved"] = round(legacy["prompt_ms"] - current["prompt_ms"], 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=30, help="Actions in the session")
+    parser.add_argument("--document-type", default="Blog")
+    parser.add_argument(
+        "--prompt-tokens-per-second",
+        type=float,
+        default=400.0,
+        help="Prompt processing rate used for the offline estimate",
+    )
+    parser.add_argument("--llm", help="host:port of a Llama.cpp server to measure against")
+    asyncio.run(main(parser.parse_args()))
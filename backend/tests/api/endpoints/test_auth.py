@@ -0,0 +1,100 @@
+"""
+Tests for the password change endpoint.
+"""
+
+import importlib
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.deps import get_db_dependency
+from app.core.config import settings
+from app.db.database import Base
+from app.main import app
+from app.models.user import User
+from app.services.user_cache import UserCache
+
+AUTH_URL = f"{settings.API_V1_STR}/auth"
+EMAIL = "writer@example.com"
+PASSWORD = "Password123!"
+
+
+@pytest_asyncio.fixture
+async def auth_client(tmp_path, monkeypatch):
+    """
+    Serve the API against a SQLite database with a fresh authentication cache.
+
+    Args:
+        tmp_path: Pytest temporary directory.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        Tuple of (HTTP client, authentication cache).
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'auth.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[User.__table__])
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_db():
+        async with session_factory() as session:
+            yield session
+
+    cache = UserCache(max_entries=10, ttl_seconds=60, trust_claims=False)
+    monkeypatch.setattr(importlib.import_module("app.api.deps"), "user_cache", cache)
+    monkeypatch.setattr(importlib.import_module("app.services.user_service"), "user_cache", cache)
+    app.dependency_overrides[get_db_dependency] = get_db
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client, cache
+    app.dependency_overrides.pop(get_db_dependency, None)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_changing_a_password_drops_the_users_cached_tokens(auth_client):
+    """
+    Test that a password change needs the current password and invalidates cached tokens.
+
+    Args:
+        auth_client: HTTP client and authentication cache.
+
+    Returns:
+        None
+    """
+    client, cache = auth_client
+    await client.post(f"{AUTH_URL}/register", json={"email": EMAIL, "password": PASSWORD})
+    login = await client.post(
+        f"{AUTH_URL}/login/json", json={"username_or_email": EMAIL, "password": PASSWORD}
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    assert (await client.get(f"{AUTH_URL}/me", headers=headers)).status_code == 200
+    assert cache.stats()["entries"] == 1
+
+    wrong = await client.post(
+        f"{AUTH_URL}/password",
+        json={"current_password": "not-my-password", "new_password": "NewPassword123!"},
+        headers=headers,
+    )
+    assert wrong.status_code == 400
+    assert cache.stats()["entries"] == 1
+
+    changed = await client.post(
+        f"{AUTH_URL}/password",
+        json={"current_password": PASSWORD, "new_password": "NewPassword123!"},
+        headers=headers,
+    )
+    assert changed.status_code == 204
+    assert cache.stats()["entries"] == 0
+
+    old_login = await client.post(
+        f"{AUTH_URL}/login/json", json={"username_or_email": EMAIL, "password": PASSWORD}
+    )
+    new_login = await client.post(
+        f"{AUTH_URL}/login/json", json={"username_or_email": EMAIL, "password": "NewPassword123!"}
+    )
+    assert old_login.status_code == 401
+    assert new_login.status_code == 200
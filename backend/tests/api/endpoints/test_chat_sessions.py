@@ -0,0 +1,67 @@
+"""
+Tests for the chat session endpoints.
+"""
+
+import uuid
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.api.deps import current_user_dependency, get_db_dependency, get_llm_manager
+from app.core.config import settings
+from app.main import app
+from app.services import chat_sessions
+from app.services.llm_manager import llm_manager
+
+client = TestClient(app)
+
+
+def test_chat_sessions_require_authentication():
+    """
+    Test that chat sessions are per user, so anonymous requests are rejected.
+
+    Returns:
+        None
+    """
+    created = client.post(f"{settings.API_V1_STR}/chat/sessions", json={})
+    listed = client.get(f"{settings.API_V1_STR}/chat/sessions")
+
+    assert created.status_code == 401
+    assert listed.status_code == 401
+
+
+def test_streamed_message_reports_a_failure_to_fold_old_turns(mock_llm_manager, monkeypatch):
+    """
+    Test that an error preparing the turn, before the stream starts, returns a 500.
+
+    Args:
+        mock_llm_manager: Mocked LLM manager.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    user = SimpleNamespace(id=uuid.uuid4())
+
+    async def get_session(db, user_id, session_id):
+        return SimpleNamespace(id=session_id)
+
+    async def prepare_turn(db, manager, chat_session, request, sticky_key):
+        raise RuntimeError("Summary generation failed")
+
+    monkeypatch.setattr(chat_sessions, "get_session", get_session)
+    monkeypatch.setattr(chat_sessions, "prepare_turn", prepare_turn)
+    app.dependency_overrides[current_user_dependency] = lambda: user
+    app.dependency_overrides[get_db_dependency] = lambda: None
+    app.dependency_overrides[get_llm_manager] = lambda: llm_manager
+    try:
+        response = client.post(
+            f"{settings.API_V1_STR}/chat/sessions/{uuid.uuid4()}/messages/stream",
+            json={"message": "And the conclusion?"},
+        )
+    finally:
+        for dependency in (current_user_dependency, get_db_dependency, get_llm_manager):
+            app.dependency_overrides.pop(dependency, None)
+
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Summary generation failed"
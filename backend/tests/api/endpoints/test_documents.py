@@ -0,0 +1,248 @@
+"""
+Tests for the document endpoints.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.deps import current_user_dependency, get_db_dependency
+from app.core.config import settings
+from app.db.database import Base
+from app.main import app
+from app.models.document import Document, DocumentHistory
+from app.models.user import User
+
+DOCUMENTS_URL = f"{settings.API_V1_STR}/documents"
+
+
+@pytest_asyncio.fixture
+async def db_client(tmp_path):
+    """
+    Serve the API against a SQLite database as a stored user.
+
+    Args:
+        tmp_path: Pytest temporary directory.
+
+    Returns:
+        Tuple of (HTTP client, session factory, user).
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'documents.db'}")
+    tables = [User.__table__, Document.__table__, DocumentHistory.__table__]
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        user = User(id=uuid.uuid4(), email="writer@example.com", password_hash="not-a-real-hash")
+        session.add(user)
+        await session.commit()
+
+    async def get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db_dependency] = get_db
+    app.dependency_overrides[current_user_dependency] = lambda: user
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client, session_factory, user
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+async def seed_documents(session_factory, user_id, count):
+    """
+    Store documents updated one minute apart, some of them sharing a timestamp.
+
+    Args:
+        session_factory: Database session factory.
+        user_id: Owner of the documents.
+        count: Number of documents.
+
+    Returns:
+        None
+    """
+    start = datetime(2024, 1, 1)
+    async with session_factory() as session:
+        for index in range(count):
+            updated_at = start + timedelta(minutes=index // 2)
+            session.add(
+                Document(
+                    id=uuid.uuid4(),
+                    user_id=user_id,
+                    title=f"Document {index}",
+                    content="x" * 1000,
+                    document_type="Email" if index % 3 == 0 else "Custom",
+                    created_at=updated_at,
+                    updated_at=updated_at,
+                )
+            )
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_documents_can_be_created_read_updated_and_deleted(db_client):
+    """
+    Test a document's round trip, with a history version for each content change.
+
+    Args:
+        db_client: HTTP client, session factory and user.
+
+    Returns:
+        None
+    """
+    client, session_factory, _ = db_client
+
+    created = await client.post(
+        DOCUMENTS_URL, json={"title": "Draft", "content": "Hello", "document_type": "Email"}
+    )
+    assert created.status_code == 201
+    document_id = created.json()["id"]
+
+    renamed = await client.patch(f"{DOCUMENTS_URL}/{document_id}", json={"title": "Final"})
+    edited = await client.patch(f"{DOCUMENTS_URL}/{document_id}", json={"content": "Hello again"})
+    fetched = await client.get(f"{DOCUMENTS_URL}/{document_id}")
+
+    assert renamed.json()["content"] == "Hello"
+    assert edited.json()["title"] == "Final"
+    assert fetched.json()["content"] == "Hello again"
+    assert fetched.json()["document_type"] == "Email"
+    async with session_factory() as session:
+        versions = await session.scalar(select(func.count()).select_from(DocumentHistory))
+    assert versions == 2
+
+    deleted = await client.delete(f"{DOCUMENTS_URL}/{document_id}")
+    assert deleted.status_code == 204
+    assert (await client.get(f"{DOCUMENTS_URL}/{document_id}")).status_code == 404
+    assert (await client.delete(f"{DOCUMENTS_URL}/{document_id}")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_paging_visits_every_document_once_without_content(db_client):
+    """
+    Test that following cursors lists each document once, newest first, with ties broken.
+
+    Args:
+        db_client: HTTP client, session factory and user.
+
+    Returns:
+        None
+    """
+    client, session_factory, user = db_client
+    await seed_documents(session_factory, user.id, 25)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 7}
+        if cursor:
+            params["cursor"] = cursor
+        page = (await client.get(DOCUMENTS_URL, params=params)).json()
+        assert all("content" not in item for item in page["items"])
+        seen.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 25
+    assert len({item["id"] for item in seen}) == 25
+    assert [item["updated_at"] for item in seen] == sorted(
+        (item["updated_at"] for item in seen), reverse=True
+    )
+
+    emails = (await client.get(DOCUMENTS_URL, params={"document_type": "Email"})).json()
+    assert len(emails["items"]) == 9
+    assert emails["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_bad_cursors_and_page_sizes_are_rejected(db_client):
+    """
+    Test that malformed cursors and oversized pages are client errors.
+
+    Args:
+        db_client: HTTP client, session factory and user.
+
+    Returns:
+        None
+    """
+    client, _, _ = db_client
+    too_many = settings.DOCUMENTS_MAX_PAGE_SIZE + 1
+
+    assert (await client.get(DOCUMENTS_URL, params={"cursor": "not-a-cursor"})).status_code == 400
+    assert (await client.get(DOCUMENTS_URL, params={"limit": too_many})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_other_users_documents_are_not_found(db_client):
+    """
+    Test that a user can neither see nor change another user's document.
+
+    Args:
+        db_client: HTTP client, session factory and user.
+
+    Returns:
+        None
+    """
+    client, session_factory, _ = db_client
+    other = uuid.uuid4()
+    async with session_factory() as session:
+        session.add(User(id=other, email="other@example.com", password_hash="not-a-real-hash"))
+        await session.commit()
+    await seed_documents(session_factory, other, 1)
+    async with session_factory() as session:
+        document_id = await session.scalar(select(Document.id))
+
+    listed = (await client.get(DOCUMENTS_URL)).json()
+    updated = await client.patch(f"{DOCUMENTS_URL}/{document_id}", json={"title": "Mine"})
+    deleted = await client.delete(f"{DOCUMENTS_URL}/{document_id}")
+
+    assert listed["items"] == []
+    assert updated.status_code == 404
+    assert deleted.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_history_lists_versions_and_returns_any_of_them(db_client):
+    """
+    Test that every saved version can be listed without content and fetched in full.
+
+    Args:
+        db_client: HTTP client, session factory and user.
+
+    Returns:
+        None
+    """
+    client, _, _ = db_client
+    texts = ["# Notes\n\n" + "".join(f"Point {i}.\n" for i in range(50))]
+    for i in range(4):
+        texts.append(texts[-1].replace(f"Point {i}.", f"Point {i}, revised."))
+    created = await client.post(DOCUMENTS_URL, json={"title": "Notes", "content": texts[0]})
+    document_id = created.json()["id"]
+    for text in texts[1:]:
+        await client.patch(f"{DOCUMENTS_URL}/{document_id}", json={"content": text})
+
+    history_url = f"{DOCUMENTS_URL}/{document_id}/history"
+    first_page = (await client.get(history_url, params={"limit": 3})).json()
+    second_page = (
+        await client.get(history_url, params={"limit": 3, "cursor": first_page["next_cursor"]})
+    ).json()
+    versions = first_page["items"] + second_page["items"]
+
+    assert [item["version"] for item in versions] == [5, 4, 3, 2, 1]
+    assert [item["keyframe"] for item in versions] == [False, False, False, False, True]
+    assert all("content" not in item for item in versions)
+    assert second_page["next_cursor"] is None
+    for version, text in enumerate(texts, start=1):
+        fetched = (await client.get(f"{history_url}/{version}")).json()
+        assert fetched["content"] == text
+        assert fetched["content_length"] == len(text)
+    assert (await client.get(f"{history_url}/6")).status_code == 404
+    assert (await client.get(f"{DOCUMENTS_URL}/{uuid.uuid4()}/history")).status_code == 404
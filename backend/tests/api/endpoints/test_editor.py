@@ -0,0 +1,91 @@
+"""
+Tests for the WebSocket editor session endpoint.
+"""
+
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.endpoints import editor
+from app.core.config import settings
+from app.main import app
+from app.services.llm_manager import StreamChunk, llm_manager
+from app.services.llm_registry import llm_registry
+
+client = TestClient(app)
+
+SESSION_URL = f"{settings.API_V1_STR}/editor/session"
+
+
+def test_editor_session_rejects_an_invalid_token(monkeypatch):
+    """
+    Test that a socket whose first message does not authenticate is closed with 4401.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+
+    async def reject(token):
+        return None
+
+    monkeypatch.setattr(editor, "authenticate_token", reject)
+
+    with client.websocket_connect(SESSION_URL) as websocket:
+        websocket.send_json({"type": "auth", "token": "not-a-token"})
+        with pytest.raises(WebSocketDisconnect) as disconnect:
+            websocket.receive_json()
+
+    assert disconnect.value.code == editor.WS_UNAUTHORIZED
+
+
+def test_editor_session_streams_a_chat_reply(mock_llm_manager, monkeypatch):
+    """
+    Test that an authenticated session answers a chat request about its document.
+
+    Args:
+        mock_llm_manager: Mocked LLM manager.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    user = SimpleNamespace(id=uuid.uuid4())
+
+    async def accept(token):
+        return user
+
+    monkeypatch.setattr(editor, "authenticate_token", accept)
+    monkeypatch.setattr(llm_registry, "resolve", lambda user, profile=None: llm_manager)
+
+    async def mock_stream_text(prompt, *args, **kwargs):
+        for token in ("This is ", "a mock ", "response"):
+            yield StreamChunk(delta=token)
+
+    monkeypatch.setattr(llm_manager, "stream_text", mock_stream_text)
+
+    with client.websocket_connect(SESSION_URL) as websocket:
+        websocket.send_json({"type": "auth", "token": "valid"})
+        ready = websocket.receive_json()
+        websocket.send_text("not json")
+        invalid = websocket.receive_json()
+        websocket.send_json({"type": "document", "text": "This is a test text.", "version": 1})
+        ack = websocket.receive_json()
+        websocket.send_json({"type": "chat", "id": "c1", "message": "Is this clear?"})
+        messages = [websocket.receive_json()]
+        while messages[-1]["type"] not in ("done", "error"):
+            messages.append(websocket.receive_json())
+
+    assert ready == {"type": "ready", "user_id": str(user.id)}
+    assert invalid["type"] == "error"
+    assert ack == {"type": "ack", "version": 1}
+    assert all(m["id"] == "c1" for m in messages)
+    assert (
+        "".join(m["delta"] for m in messages if m["type"] == "token") == "This is a mock response"
+    )
+    assert messages[-1]["version"] == 1
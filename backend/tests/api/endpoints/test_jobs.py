@@ -0,0 +1,175 @@
+"""
+Tests for the background job endpoints.
+"""
+
+import asyncio
+import json
+import uuid
+
+import httpx
+import pytest
+
+from app.api.deps import current_user_dependency
+from app.api.endpoints import jobs
+from app.core.config import settings
+from app.main import app
+from app.models.user import User
+from app.services.job_manager import JobManager
+from app.services.llm_manager import llm_manager
+
+ACTION = {
+    "text": "This is a test text.",
+    "action": "expand",
+    "action_description": "Make the text longer",
+    "about_me": "I am a writer",
+    "preferred_style": "Clear and concise",
+    "tone": "professional",
+}
+
+
+@pytest.fixture
+def signed_in():
+    """
+    Sign requests in as the user a test sets, without a token or database lookup.
+
+    Returns:
+        Dict whose ``user`` entry is the current user.
+    """
+    current = {"user": User(id=uuid.uuid4(), email="writer@example.com")}
+    app.dependency_overrides[current_user_dependency] = lambda: current["user"]
+    yield current
+    app.dependency_overrides.pop(current_user_dependency, None)
+
+
+def _parse_sse(body):
+    """
+    Parse a server-sent event stream into (event, data) pairs.
+
+    Args:
+        body: Raw response text.
+
+    Returns:
+        List of (event name, decoded JSON data) tuples.
+    """
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields.get("event"), json.loads(fields["data"])))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_action_job_returns_an_id_then_its_result(
+    mock_llm_manager, anonymous_user, signed_in, monkeypatch
+):
+    """
+    Test that an action job is accepted at once and its result can be streamed and polled.
+
+    Args:
+        mock_llm_manager: Mocked LLM manager.
+        anonymous_user: Anonymous user override.
+        signed_in: Current user override.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    manager = JobManager()
+    monkeypatch.setattr(jobs, "job_manager", manager)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        submitted = await client.post(f"{settings.API_V1_STR}/jobs/actions", json=ACTION)
+        job_id = submitted.json()["id"]
+        events = _parse_sse((await client.get(f"{settings.API_V1_STR}/jobs/{job_id}/events")).text)
+        polled = await client.get(f"{settings.API_V1_STR}/jobs/{job_id}")
+        missing = await client.get(f"{settings.API_V1_STR}/jobs/not-a-job")
+
+    assert submitted.status_code == 202
+    assert submitted.json()["status"] == "queued"
+    assert events[-1][0] == "done"
+    assert events[-1][1]["status"] == "succeeded"
+    assert polled.json()["result"]["text"] == "This is a mock response"
+    assert missing.status_code == 404
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_action_jobs_are_capped_per_user(
+    mock_llm_manager, anonymous_user, signed_in, monkeypatch
+):
+    """
+    Test that a user over the unfinished job cap gets a 429 with Retry-After.
+
+    Args:
+        mock_llm_manager: Mocked LLM manager.
+        anonymous_user: Anonymous user override.
+        signed_in: Current user override.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    manager = JobManager()
+    monkeypatch.setattr(jobs, "job_manager", manager)
+    monkeypatch.setattr(settings, "JOB_MAX_ACTIVE_PER_USER", 1)
+
+    async def slow_generate_text(prompt, **kwargs):
+        await asyncio.sleep(10)
+        return "Too late"
+
+    monkeypatch.setattr(llm_manager, "generate_text", slow_generate_text)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.post(f"{settings.API_V1_STR}/jobs/actions", json=ACTION)
+        second = await client.post(f"{settings.API_V1_STR}/jobs/actions", json=ACTION)
+        cancelled = await client.delete(f"{settings.API_V1_STR}/jobs/{first.json()['id']}")
+        third = await client.post(f"{settings.API_V1_STR}/jobs/actions", json=ACTION)
+
+    assert first.status_code == 202
+    assert second.status_code == 429
+    assert second.headers["Retry-After"] == str(settings.LLM_RETRY_AFTER_SECONDS)
+    assert cancelled.json()["status"] == "cancelled"
+    assert third.status_code == 202
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_jobs_belong_to_the_user_who_queued_them(
+    mock_llm_manager, anonymous_user, signed_in, monkeypatch
+):
+    """
+    Test that jobs need a signed-in user and are hidden from every other user.
+
+    Args:
+        mock_llm_manager: Mocked LLM manager.
+        anonymous_user: Anonymous user override.
+        signed_in: Current user override.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    manager = JobManager()
+    monkeypatch.setattr(jobs, "job_manager", manager)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        submitted = await client.post(f"{settings.API_V1_STR}/jobs/actions", json=ACTION)
+        job_url = f"{settings.API_V1_STR}/jobs/{submitted.json()['id']}"
+
+        signed_in["user"] = User(id=uuid.uuid4(), email="other@example.com")
+        other_get = await client.get(job_url)
+        other_events = await client.get(f"{job_url}/events")
+        other_cancel = await client.delete(job_url)
+
+        app.dependency_overrides.pop(current_user_dependency)
+        anonymous_submit = await client.post(f"{settings.API_V1_STR}/jobs/actions", json=ACTION)
+        anonymous_get = await client.get(job_url)
+
+    assert submitted.status_code == 202
+    assert other_get.status_code == 404
+    assert other_events.status_code == 404
+    assert other_cancel.status_code == 404
+    assert anonymous_submit.status_code == 401
+    assert anonymous_get.status_code == 401
+    await manager.shutdown()
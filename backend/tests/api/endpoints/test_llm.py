@@ -2,9 +2,17 @@
 Tests for the LLM endpoints.
 """
 
+import uuid
+
 from fastapi.testclient import TestClient
 
+from app.api.deps import current_user_dependency, get_optional_current_user
+from app.core.config import settings
+from app.main import app
 from app.models.llm import LLMType
+from app.models.user import User
+from app.services.llm_manager import LLMConnectionManager
+from app.services.llm_registry import LLMConnectionRegistry, connection_key
 
 
 def test_connect_openai_success(client: TestClient, mock_llm_manager):
@@ -93,3 +101,76 @@ def test_connect_llama_missing_params(client: TestClient, mock_llm_manager):
     assert response.status_code == 200  # The endpoint handles errors internally
     assert response.json()["success"] is False
     assert "Host and port are required" in response.json()["message"]
+
+
+def test_only_admins_can_clear_the_shared_response_cache(client: TestClient, monkeypatch):
+    """
+    Test that the response cache, which every user shares, is only cleared by admins.
+
+    Args:
+        client: Test client for the FastAPI application.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", "Admin@example.com, ops@example.com")
+    url = f"{settings.API_V1_STR}/llm_cache"
+
+    anonymous = client.delete(url)
+    try:
+        app.dependency_overrides[current_user_dependency] = lambda: User(
+            id=uuid.uuid4(), email="writer@example.com"
+        )
+        user = client.delete(url)
+        app.dependency_overrides[current_user_dependency] = lambda: User(
+            id=uuid.uuid4(), email="admin@example.com"
+        )
+        admin = client.delete(url)
+    finally:
+        app.dependency_overrides.pop(current_user_dependency, None)
+
+    assert anonymous.status_code == 401
+    assert user.status_code == 403
+    assert admin.status_code == 200
+    assert admin.json()["success"] is True
+
+
+def test_connections_and_profiles_belong_to_the_user_who_connected_them(
+    client: TestClient, monkeypatch
+):
+    """
+    Test that nobody but an admin replaces the default connection, and profiles are per user.
+
+    Args:
+        client: Test client for the FastAPI application.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    default = LLMConnectionManager()
+    registry = LLMConnectionRegistry(default, max_connections=8, idle_seconds=3600)
+    monkeypatch.setattr("app.api.endpoints.llm.llm_registry", registry)
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", "admin@example.com")
+    url = f"{settings.API_V1_STR}/connect_llm"
+    owner = User(id=uuid.uuid4(), email="owner@example.com")
+    other = User(id=uuid.uuid4(), email="other@example.com")
+    simulated = {"type": LLMType.SIMULATED.value}
+
+    anonymous = client.post(url, json=simulated)
+    try:
+        app.dependency_overrides[current_user_dependency] = lambda: owner
+        app.dependency_overrides[get_optional_current_user] = lambda: owner
+        profile = client.post(url, json={**simulated, "profile": "team"})
+        replace_default = client.post(url, json={**simulated, "default": True})
+    finally:
+        app.dependency_overrides.pop(current_user_dependency, None)
+        app.dependency_overrides.pop(get_optional_current_user, None)
+
+    assert anonymous.status_code == 401
+    assert profile.json()["success"] is True
+    assert replace_default.status_code == 403
+    assert not default.is_connected
+    assert registry.resolve(owner, "team") is registry.connection_for(connection_key(owner, "team"))
+    assert registry.resolve(other, "team") is default
@@ -0,0 +1,45 @@
+"""
+Tests for the stats endpoint.
+"""
+
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.api.deps import current_user_dependency
+from app.core.config import settings
+from app.main import app
+from app.models.user import User
+
+
+def test_stats_are_only_shown_to_admins(client: TestClient, monkeypatch):
+    """
+    Test that runtime stats, which name backends and connections, need an admin.
+
+    Args:
+        client: Test client for the FastAPI application.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", "admin@example.com")
+    url = f"{settings.API_V1_STR}/stats"
+
+    anonymous = client.get(url)
+    try:
+        app.dependency_overrides[current_user_dependency] = lambda: User(
+            id=uuid.uuid4(), email="writer@example.com"
+        )
+        user = client.get(url)
+        app.dependency_overrides[current_user_dependency] = lambda: User(
+            id=uuid.uuid4(), email="admin@example.com"
+        )
+        admin = client.get(url)
+    finally:
+        app.dependency_overrides.pop(current_user_dependency, None)
+
+    assert anonymous.status_code == 401
+    assert user.status_code == 403
+    assert admin.status_code == 200
+    assert "llm_admission" in admin.json()
@@ -2,8 +2,16 @@
 Tests for the text endpoints.
 """
 
+import asyncio
+import json
+
 from fastapi.testclient import TestClient
 
+from app.core.config import settings
+from app.services.admission import AdmissionRejected
+from app.services.cancellation import time_left
+from app.services.llm_manager import StreamChunk, llm_manager
+
 
 def test_submit_action_success(client: TestClient, mock_llm_manager):
     """
@@ -132,3 +140,493 @@ def test_no_llm_connection(client: TestClient, monkeypatch):
         },
     )
     assert response.status_code == 400
+
+
+def _parse_sse(body: str):
+    """
+    Parse a server-sent event stream into (event, data) pairs.
+
+    Args:
+        body: Raw event stream body.
+
+    Returns:
+        List of (event name, decoded data) tuples.
+    """
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines.get("event"), json.loads(lines["data"])))
+    return events
+
+
+def test_submit_action_stream(client: TestClient, mock_llm_manager, anonymous_user, monkeypatch):
+    """
+    Test streaming a text action as server-sent events.
+
+    Args:
+        client: Test client for the FastAPI application.
+        mock_llm_manager: Mocked LLM manager.
+        anonymous_user: Anonymous user override.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+
+    async def mock_stream_text(prompt, sticky_key=None, **kwargs):
+        for token in ["This ", "is ", "streamed"]:
+            yield StreamChunk(delta=token)
+        yield StreamChunk(usage={"prompt_tokens": 10, "completion_tokens": 3})
+
+    monkeypatch.setattr(llm_manager, "stream_text", mock_stream_text)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/submit_action/stream",
+        json={
+            "text": "This is a test text.",
+            "action": "expand",
+            "action_description": "Make the text longer",
+            "about_me": "I am a writer",
+            "preferred_style": "Clear and concise",
+            "tone": "professional",
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(response.text)
+    assert [data["delta"] for event, data in events if event == "token"] == [
+        "This ",
+        "is ",
+        "streamed",
+    ]
+    event, data = events[-1]
+    assert event == "done"
+    assert data["usage"] == {"prompt_tokens": 10, "completion_tokens": 3}
+    assert data["timing"]["total_ms"] >= 0
+
+
+def test_submit_action_trims_x_posts_to_the_limit(
+    client: TestClient, mock_llm_manager, anonymous_user, monkeypatch
+):
+    """
+    Test that X posts are generated on a small budget and trimmed to 280 characters.
+
+    Args:
+        client: Test client for the FastAPI application.
+        mock_llm_manager: Mocked LLM manager.
+        anonymous_user: Anonymous user override.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    budgets = []
+    sentence = "Remote teams write things down. "
+
+    async def mock_generate_text(prompt, budget=None, **kwargs):
+        budgets.append(budget)
+        return sentence * 20
+
+    async def mock_stream_text(prompt, sticky_key=None, budget=None, **kwargs):
+        budgets.append(budget)
+        for _ in range(20):
+            yield StreamChunk(delta=sentence)
+
+    monkeypatch.setattr(llm_manager, "generate_text", mock_generate_text)
+    monkeypatch.setattr(llm_manager, "stream_text", mock_stream_text)
+    body = {
+        "text": "A long draft about remote work. " * 50,
+        "action": "shorten",
+        "action_description": "Make the text shorter",
+        "about_me": "I am a writer",
+        "preferred_style": "Clear and concise",
+        "tone": "professional",
+        "document_type": "X",
+    }
+
+    data = client.post(f"{settings.API_V1_STR}/submit_action", json=body).json()
+    text = data["text"]
+    events = _parse_sse(client.post(f"{settings.API_V1_STR}/submit_action/stream", json=body).text)
+    streamed = "".join(data["delta"] for event, data in events if event == "token")
+
+    assert len(text) <= 280 and text.endswith("down.")
+    assert len(data["attempts"]) == settings.LLM_VALIDATION_MAX_ATTEMPTS
+    assert data["attempts"][-1]["stage"] == "condense"
+    assert len(streamed) == 280
+    assert all(budget.max_tokens < 512 for budget in budgets)
+
+
+def test_chat_stream_error(client: TestClient, mock_llm_manager, anonymous_user, monkeypatch):
+    """
+    Test that a failing chat stream ends with an error event.
+
+    Args:
+        client: Test client for the FastAPI application.
+        mock_llm_manager: Mocked LLM manager.
+        anonymous_user: Anonymous user override.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+
+    async def mock_stream_text(prompt, sticky_key=None):
+        yield StreamChunk(delta="Partial")
+        raise Exception("Upstream failed")
+
+    monkeypatch.setattr(llm_manager, "stream_text", mock_stream_text)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/chat/stream",
+        json={"message": "Hello", "context": "This is a test context."},
+    )
+
+    assert response.status_code == 200
+    events = _parse_sse(response.text)
+    assert events[0] == ("token", {"delta": "Partial"})
+    assert events[-1] == ("error", {"detail": "Upstream failed"})
+
+
+def test_submit_action_sheds_load_when_queue_full(
+    client: TestClient, mock_llm_manager, anonymous_user, monkeypatch
+):
+    """
+    Test that a saturated backend answers 503 with Retry-After.
+
+    Args:
+        client: Test client for the FastAPI application.
+        mock_llm_manager: Mocked LLM manager.
+        anonymous_user: Anonymous user override.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+
+    async def mock_generate_text(prompt, **kwargs):
+        raise AdmissionRejected("LLM backend is overloaded", retry_after=5)
+
+    monkeypatch.setattr(llm_manager, "generate_text", mock_generate_text)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/submit_action",
+        json={
+            "text": "This is a test text.",
+            "action": "expand",
+            "action_description": "Make the text longer",
+            "about_me": "I am a writer",
+            "preferred_style": "Clear and concise",
+            "tone": "professional",
+        },
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+
+def test_submit_action_honours_the_request_timeout_header(
+    client: TestClient, mock_llm_manager, anonymous_user, monkeypatch
+):
+    """
+    Test that an X-Request-Timeout header bounds the generation and answers 504.
+
+    Args:
+        client: Test client for the FastAPI application.
+        mock_llm_manager: Mocked LLM manager.
+        anonymous_user: Anonymous user override.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    deadlines = []
+
+    async def mock_generate_text(prompt, **kwargs):
+        deadlines.append(time_left())
+        await asyncio.sleep(0.1)
+        return str(time_left())
+
+    monkeypatch.setattr(llm_manager, "generate_text", mock_generate_text)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/submit_action",
+        json={
+            "text": "This is a test text.",
+            "action": "expand",
+            "action_description": "Make the text longer",
+            "about_me": "I am a writer",
+            "preferred_style": "Clear and concise",
+            "tone": "professional",
+        },
+        headers={"X-Request-Timeout": "0.05"},
+    )
+
+    assert response.status_code == 504
+    assert 0 < deadlines[0] <= 0.05
+
+
+def test_submit_action_stream_long_document(
+    client: TestClient, mock_llm_manager, anonymous_user, monkeypatch
+):
+    """
+    Test that a long document streams per-chunk progress and its chunks in order.
+
+    Args:
+        client: Test client for the FastAPI application.
+        mock_llm_manager: Mocked LLM manager.
+        anonymous_user: Anonymous user override.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(settings, "LONG_DOCUMENT_CHUNK_CHARS", 500)
+
+    async def mock_generate_text(prompt, **kwargs):
+        section = prompt.split("Original Text:\n", 1)[1].split("\n", 1)[0]
+        return f"Edited {section}"
+
+    monkeypatch.setattr(llm_manager, "generate_text", mock_generate_text)
+    text = "\n\n".join(f"## Part {i}\n\n" + "Body text. " * 40 for i in range(3))
+
+    response = client.post(
+        f"{settings.API_V1_STR}/submit_action/stream",
+        json={
+            "text": text,
+            "action": "improve",
+            "action_description": "Improve the text",
+            "about_me": "I am a writer",
+            "preferred_style": "Clear and concise",
+            "tone": "professional",
+            "long_document": True,
+        },
+    )
+
+    events = _parse_sse(response.text)
+    progress = [data for event, data in events if event == "progress"]
+    tokens = "".join(data["delta"] for event, data in events if event == "token")
+    assert sorted(p["chunk"] for p in progress) == [0, 1, 2]
+    assert all(p["total"] == 3 for p in progress)
+    assert tokens == "Edited ## Part 0\n\nEdited ## Part 1\n\nEdited ## Part 2"
+    assert events[-1][0] == "done"
+    assert events[-1][1]["chunks"] == 3
+
+
+def test_submit_evals_streams_each_result(
+    client: TestClient, mock_llm_manager, anonymous_user, monkeypatch
+):
+    """
+    Test that a batch of evaluations streams one scored result per criterion.
+
+    Args:
+        client: Test client for the FastAPI application.
+        mock_llm_manager: Mocked LLM manager.
+        anonymous_user: Anonymous user override.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    prompts = []
+
+    async def mock_generate_text(prompt, **kwargs):
+        prompts.append(prompt)
+        if "Check the tone" in prompt:
+            raise Exception("Upstream failed")
+        return "Good overall. Rating: 7/10"
+
+    monkeypatch.setattr(llm_manager, "generate_text", mock_generate_text)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/submit_evals",
+        json={
+            "text": "This is a test text.",
+            "evals": [
+                {"eval_name": "grammar", "eval_description": "Check for grammar errors"},
+                {"eval_name": "tone", "eval_description": "Check the tone"},
+            ],
+        },
+    )
+
+    assert response.status_code == 200
+    events = _parse_sse(response.text)
+    results = {data["name"]: data for event, data in events if event == "result"}
+    assert results["grammar"]["success"] is True
+    assert results["grammar"]["score"] == 7
+    assert results["tone"] == {
+        "index": 1,
+        "name": "tone",
+        "success": False,
+        "elapsed_ms": results["tone"]["elapsed_ms"],
+        "detail": "Upstream failed",
+    }
+    assert events[-1] == ("done", {**events[-1][1], "succeeded": 1, "failed": 1})
+    assert all("This is a test text." in prompt for prompt in prompts)
+
+
+def test_submit_evals_fused_uses_one_call(
+    client: TestClient, mock_llm_manager, anonymous_user, monkeypatch
+):
+    """
+    Test that a fused batch evaluates every criterion from one structured response.
+
+    Args:
+        client: Test client for the FastAPI application.
+        mock_llm_manager: Mocked LLM manager.
+        anonymous_user: Anonymous user override.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    prompts = []
+
+    async def mock_generate_text(prompt, **kwargs):
+        prompts.append(prompt)
+        return json.dumps(
+            {
+                "evaluations": [
+                    {"criterion": "grammar", "score": 8, "summary": "Clean.", "suggestions": []},
+                    {"criterion": "tone", "score": 6, "summary": "Flat.", "suggestions": ["Vary"]},
+                ]
+            }
+        )
+
+    monkeypatch.setattr(llm_manager, "generate_text", mock_generate_text)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/submit_evals",
+        json={
+            "text": "This is a test text.",
+            "evals": [
+                {"eval_name": "grammar", "eval_description": "Check for grammar errors"},
+                {"eval_name": "tone", "eval_description": "Check the tone"},
+            ],
+            "fused": True,
+        },
+    )
+
+    assert response.status_code == 200
+    results = {data["name"]: data for event, data in _parse_sse(response.text) if event == "result"}
+    assert len(prompts) == 1
+    assert results["grammar"]["score"] == 8
+    assert results["tone"]["suggestions"] == ["Vary"]
+    assert "Rating: 6/10" in results["tone"]["result"]
+    assert {data["mode"] for data in results.values()} == {"fused"}
+
+
+def test_submit_actions_rejects_oversized_batches(
+    client: TestClient, mock_llm_manager, anonymous_user, monkeypatch
+):
+    """
+    Test that batches above the configured size are rejected up front.
+
+    Args:
+        client: Test client for the FastAPI application.
+        mock_llm_manager: Mocked LLM manager.
+        anonymous_user: Anonymous user override.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(settings, "BATCH_MAX_ITEMS", 1)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/submit_actions",
+        json={
+            "text": "This is a test text.",
+            "about_me": "I am a writer",
+            "preferred_style": "Clear and concise",
+            "tone": "professional",
+            "actions": [
+                {"action": "expand", "action_description": "Make the text longer"},
+                {"action": "shorten", "action_description": "Make the text shorter"},
+            ],
+        },
+    )
+
+    assert response.status_code == 400
+
+
+def test_chat_sends_only_relevant_passages_of_a_long_context(
+    client: TestClient, mock_llm_manager, anonymous_user, monkeypatch
+):
+    """
+    Test that a long chat context is cut to the passages the message is about.
+
+    Args:
+        client: Test client for the FastAPI application.
+        mock_llm_manager: Mocked LLM manager.
+        anonymous_user: Anonymous user override.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(settings, "CHAT_CONTEXT_TOKENS", 200)
+    prompts = []
+
+    async def mock_generate_text(prompt, **kwargs):
+        prompts.append(prompt)
+        return "This is a mock response"
+
+    monkeypatch.setattr(llm_manager, "generate_text", mock_generate_text)
+    context = "\n\n".join(
+        f"## Section {i}\n\n" + ("Filler about nothing in particular. " * 20) for i in range(10)
+    )
+    context += "\n\n## Pricing\n\nThe plan costs twelve dollars per seat."
+
+    response = client.post(
+        f"{settings.API_V1_STR}/chat",
+        json={"message": "What does the plan cost per seat?", "context": context},
+    )
+
+    assert response.status_code == 200
+    assert "twelve dollars per seat" in prompts[0]
+    assert len(prompts[0]) < len(context) / 2
+
+
+def test_actions_are_generated_afresh_unless_the_client_opts_into_the_cache(
+    client: TestClient, mock_llm_manager, anonymous_user, monkeypatch
+):
+    """
+    Test that actions skip the response cache by default while evaluations use it.
+
+    Args:
+        client: Test client for the FastAPI application.
+        mock_llm_manager: Mocked LLM manager.
+        anonymous_user: Anonymous user override.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    options = []
+
+    async def mock_generate_text(prompt, **kwargs):
+        options.append((kwargs.get("use_cache"), kwargs.get("refresh_cache")))
+        return "Rating: 7/10"
+
+    monkeypatch.setattr(llm_manager, "generate_text", mock_generate_text)
+    action = {
+        "text": "This is a test text.",
+        "action": "rewrite",
+        "action_description": "Rewrite the text",
+        "about_me": "I am a writer",
+        "preferred_style": "Clear and concise",
+        "tone": "professional",
+    }
+    evaluation = {"text": "This is a test text.", "eval_name": "Clarity", "eval_description": "?"}
+
+    client.post(f"{settings.API_V1_STR}/submit_action", json=action)
+    client.post(
+        f"{settings.API_V1_STR}/submit_action", json=action, headers={"Cache-Control": "max-stale"}
+    )
+    client.post(f"{settings.API_V1_STR}/submit_eval", json=evaluation)
+    client.post(
+        f"{settings.API_V1_STR}/submit_eval", json=evaluation, headers={"Cache-Control": "no-cache"}
+    )
+
+    assert options == [(False, False), (True, False), (True, False), (True, True)]
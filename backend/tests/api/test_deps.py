@@ -0,0 +1,242 @@
+"""
+Tests for API dependencies and database connection usage.
+"""
+
+import asyncio
+import importlib
+import uuid
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.database import Base, pool_stats
+from app.main import app
+from app.models.user import User
+from app.services.llm_registry import connection_key, llm_registry
+from app.services.user_cache import UserCache
+from app.services.user_service import user_claims
+
+POOL_SIZE = 2
+CONCURRENT_REQUESTS = 8
+LLM_DELAY_SECONDS = 0.3
+
+
+@pytest_asyncio.fixture
+async def small_pool_session(tmp_path, monkeypatch):
+    """
+    Route short-lived auth sessions through a database pool smaller than the request load.
+
+    Args:
+        tmp_path: Pytest temporary directory.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        User: A user stored in the database.
+    """
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=LLM_DELAY_SECONDS / 2,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[User.__table__])
+
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        user = User(email="pool@example.com", password_hash="not-a-real-hash")
+        session.add(user)
+        await session.commit()
+
+    monkeypatch.setattr(
+        importlib.import_module("app.api.deps"), "AsyncSessionLocal", session_factory
+    )
+    yield user
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_llm_calls_do_not_hold_database_connections(small_pool_session, monkeypatch):
+    """
+    Test that authenticated generations above the pool size run concurrently.
+
+    Each request authenticates through the database, then waits on a slow LLM call.
+    If the connection were held for the LLM call, requests beyond the pool size would
+    time out waiting for a connection.
+
+    Args:
+        small_pool_session: User stored behind a small connection pool.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+
+    user_manager = llm_registry.connection_for(connection_key(small_pool_session))
+    monkeypatch.setattr(user_manager, "is_connected", True)
+
+    async def slow_generate_text(prompt, **kwargs):
+        await asyncio.sleep(LLM_DELAY_SECONDS)
+        return "Generated for the authenticated user"
+
+    monkeypatch.setattr(user_manager, "generate_text", slow_generate_text)
+    token = create_access_token(small_pool_session.id)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(
+            *(
+                client.post(
+                    f"{settings.API_V1_STR}/chat",
+                    json={"message": "Hello"},
+                    headers={"Authorization": f"Bearer {token}"},
+                )
+                for _ in range(CONCURRENT_REQUESTS)
+            )
+        )
+
+    assert CONCURRENT_REQUESTS > POOL_SIZE
+    # Every request must have resolved the user; a pool timeout would fall back to anonymous
+    assert [response.json() for response in responses] == [
+        {"text": "Generated for the authenticated user"}
+    ] * CONCURRENT_REQUESTS
+
+
+@pytest.mark.asyncio
+async def test_optional_user_without_token(mock_llm_manager):
+    """
+    Test that the optional user dependency allows anonymous requests.
+
+    Args:
+        mock_llm_manager: Mocked LLM manager.
+
+    Returns:
+        None
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(f"{settings.API_V1_STR}/chat", json={"message": "Hello"})
+
+    assert response.status_code == 200
+    assert response.json() == {"text": "This is a mock response"}
+
+
+@pytest.mark.asyncio
+async def test_database_failures_do_not_make_users_anonymous(monkeypatch):
+    """
+    Test that only an invalid token resolves to no user; a failed lookup is an error.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    deps = importlib.import_module("app.api.deps")
+
+    async def database_down(db, user_id):
+        raise ConnectionError("database is down")
+
+    monkeypatch.setattr(deps, "get_user_by_id", database_down)
+    monkeypatch.setattr(
+        deps, "user_cache", UserCache(max_entries=10, ttl_seconds=60, trust_claims=False)
+    )
+
+    assert await deps.authenticate_token("not-a-jwt") is None
+    with pytest.raises(HTTPException) as error:
+        await deps.authenticate_token(create_access_token(uuid.uuid4()))
+    assert error.value.status_code == 500
+
+
+@pytest.mark.asyncio
+async def test_current_user_is_cached_between_requests(monkeypatch):
+    """
+    Test that repeated requests with one token query the database once.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    deps = importlib.import_module("app.api.deps")
+    user = User(id=uuid.uuid4(), email="cached@example.com", password_hash="hash")
+    lookups = []
+
+    async def mock_get_user_by_id(db, user_id):
+        lookups.append(user_id)
+        return user
+
+    monkeypatch.setattr(deps, "get_user_by_id", mock_get_user_by_id)
+    monkeypatch.setattr(
+        deps, "user_cache", UserCache(max_entries=10, ttl_seconds=60, trust_claims=False)
+    )
+    token = create_access_token(user.id)
+
+    for _ in range(5):
+        assert (await deps.get_current_user(None, token)).id == user.id
+
+    assert lookups == [user.id]
+    assert deps.user_cache.stats()["db_queries_per_request"] == 0.2
+
+
+@pytest.mark.asyncio
+async def test_trusted_claims_skip_the_database(monkeypatch):
+    """
+    Test that trusted token claims resolve the user without a database lookup.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    deps = importlib.import_module("app.api.deps")
+    user = User(id=uuid.uuid4(), email="claims@example.com", password_hash="hash")
+
+    async def mock_get_user_by_id(db, user_id):
+        raise AssertionError("The database should not be queried")
+
+    monkeypatch.setattr(deps, "get_user_by_id", mock_get_user_by_id)
+    monkeypatch.setattr(
+        deps, "user_cache", UserCache(max_entries=10, ttl_seconds=60, trust_claims=True)
+    )
+    token = create_access_token(user.id, claims=user_claims(user))
+
+    resolved = await deps.get_current_user(None, token)
+
+    assert resolved.id == user.id
+    assert resolved.email == "claims@example.com"
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_reports_saturation(tmp_path):
+    """
+    Test that pool statistics count checked-out connections against pool capacity.
+
+    Args:
+        tmp_path: Pytest temporary directory.
+
+    Returns:
+        None
+    """
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=0,
+    )
+    async with engine.connect():
+        stats = pool_stats(engine)
+    await engine.dispose()
+
+    assert stats["checked_out"] == 1
+    assert stats["saturation"] == 0.5
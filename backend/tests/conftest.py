@@ -7,6 +7,7 @@ import asyncio
 import pytest
 from fastapi.testclient import TestClient
 
+from app.api.deps import get_optional_current_user
 from app.main import app
 from app.services.llm_manager import llm_manager
 
@@ -38,17 +39,36 @@ def mock_llm_manager(monkeypatch):
     monkeypatch.setattr(llm_manager, "llm_type", "openai")
 
     # Mock the LLM manager methods
-    monkeypatch.setattr(llm_manager, "connect_openai", lambda api_key: None)
-    monkeypatch.setattr(llm_manager, "connect_llama", lambda host, port: None)
+    async def mock_connect_openai(api_key):
+        return None
+
+    async def mock_connect_llama(host, port):
+        return None
+
+    monkeypatch.setattr(llm_manager, "connect_openai", mock_connect_openai)
+    monkeypatch.setattr(llm_manager, "connect_llama", mock_connect_llama)
     monkeypatch.setattr(llm_manager, "disconnect", lambda: None)
 
     # Mock the async generate_text method
-    async def mock_generate_text(prompt, max_tokens=None, temperature=None):
+    async def mock_generate_text(prompt, **kwargs):
         return "This is a mock response"
 
     monkeypatch.setattr(llm_manager, "generate_text", mock_generate_text)
 
 
+@pytest.fixture
+def anonymous_user():
+    """
+    Resolve the optional current user to None without a token or database lookup.
+
+    Returns:
+        None
+    """
+    app.dependency_overrides[get_optional_current_user] = lambda: None
+    yield None
+    app.dependency_overrides.pop(get_optional_current_user, None)
+
+
 @pytest.fixture(scope="module")
 def event_loop():
     """
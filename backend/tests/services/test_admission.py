@@ -0,0 +1,102 @@
+"""
+Tests for LLM admission control.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionRejected, Priority
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_and_priority_order():
+    """
+    Test that at most N requests run at once and interactive waiters go first.
+
+    Returns:
+        None
+    """
+    controller = AdmissionController(max_concurrency=1, max_queue=10, retry_after=5)
+    order = []
+    release = asyncio.Event()
+
+    async def run(name, priority):
+        async with controller.slot(priority):
+            order.append(name)
+            if name == "first":
+                await release.wait()
+
+    first = asyncio.ensure_future(run("first", Priority.INTERACTIVE))
+    await asyncio.sleep(0.01)
+    background = asyncio.ensure_future(run("eval", Priority.BACKGROUND))
+    await asyncio.sleep(0.01)
+    interactive = asyncio.ensure_future(run("chat", Priority.INTERACTIVE))
+    await asyncio.sleep(0.01)
+
+    assert controller.active == 1
+    assert controller.queued == 2
+
+    release.set()
+    await asyncio.gather(first, background, interactive)
+
+    assert order == ["first", "chat", "eval"]
+    assert controller.active == 0
+    assert controller.stats()["admitted"] == 3
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_immediately():
+    """
+    Test that requests beyond the queue bound are rejected with a retry hint.
+
+    Returns:
+        None
+    """
+    controller = AdmissionController(max_concurrency=1, max_queue=1, retry_after=7)
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.slot():
+            await release.wait()
+
+    running = asyncio.ensure_future(hold())
+    queued = asyncio.ensure_future(hold())
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        async with controller.slot():
+            pass
+
+    assert exc_info.value.retry_after == 7
+    assert controller.stats()["rejected"] == 1
+    release.set()
+    await asyncio.gather(running, queued)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_up_its_place():
+    """
+    Test that a cancelled waiter does not leak a slot or block the queue.
+
+    Returns:
+        None
+    """
+    controller = AdmissionController(max_concurrency=1, max_queue=5, retry_after=5)
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.slot():
+            await release.wait()
+
+    running = asyncio.ensure_future(hold())
+    await asyncio.sleep(0.01)
+    waiter = asyncio.ensure_future(hold())
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.sleep(0.01)
+
+    assert controller.queued == 0
+    release.set()
+    await running
+    assert controller.active == 0
@@ -0,0 +1,66 @@
+"""
+Tests for the batch runner.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionRejected
+from app.services.batch_runner import run_batch
+
+
+@pytest.mark.asyncio
+async def test_results_arrive_as_items_finish():
+    """
+    Test that fast items are reported before slow ones, with bounded parallelism.
+
+    Returns:
+        None
+    """
+    active = 0
+    max_active = 0
+
+    def task(delay, value):
+        async def run():
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(delay)
+            active -= 1
+            return {"value": value}
+
+        return run
+
+    tasks = [task(0.05, "slow"), task(0.01, "fast"), task(0.02, "medium")]
+
+    results = [result async for result in run_batch(tasks, max_parallel=2)]
+
+    assert [r.data["value"] for r in results] == ["fast", "medium", "slow"]
+    assert [r.index for r in results] == [1, 2, 0]
+    assert max_active == 2
+
+
+@pytest.mark.asyncio
+async def test_failures_are_isolated_per_item():
+    """
+    Test that failing items are reported without failing the rest of the batch.
+
+    Returns:
+        None
+    """
+
+    async def ok():
+        return {"value": 1}
+
+    async def broken():
+        raise Exception("Upstream failed")
+
+    async def rejected():
+        raise AdmissionRejected("LLM backend is overloaded", retry_after=5)
+
+    results = {r.index: r async for r in run_batch([ok, broken, rejected], max_parallel=3)}
+
+    assert results[0].success and results[0].data == {"value": 1}
+    assert not results[1].success and results[1].detail == "Upstream failed"
+    assert not results[2].success and results[2].retry_after == 5
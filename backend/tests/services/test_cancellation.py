@@ -0,0 +1,193 @@
+"""
+Tests for request deadlines and cancellation of abandoned generations.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.cancellation import (
+    ClientDisconnected,
+    DeadlineExceeded,
+    cancellation_stats,
+    request_timeout,
+    reset_deadline,
+    run_until_disconnected,
+    start_deadline,
+    stream_until_disconnected,
+)
+from app.services.document_limits import GenerationBudget
+from app.services.llm_manager import LLMConnectionManager
+from app.services.llm_simulator import SimulatorConfig
+
+
+async def simulated_manager(**config) -> LLMConnectionManager:
+    """
+    Connect a manager to a slow simulated model.
+
+    Args:
+        config: Simulator settings to override.
+
+    Returns:
+        The connected manager.
+    """
+    manager = LLMConnectionManager()
+    await manager.connect_simulated(
+        SimulatorConfig(**{"ttft_ms": 10.0, "tokens_per_second": 50.0, **config})
+    )
+    return manager
+
+
+def test_request_timeout_header_can_only_shorten_the_default(monkeypatch):
+    """
+    Test that the header shortens the configured deadline and bad values are ignored.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(settings, "REQUEST_DEADLINE_SECONDS", 60.0)
+
+    assert request_timeout(None) == 60.0
+    assert request_timeout("5") == 5.0
+    assert request_timeout("600") == 60.0
+    assert request_timeout("soon") == 60.0
+    assert request_timeout("-1") == 60.0
+
+    monkeypatch.setattr(settings, "REQUEST_DEADLINE_SECONDS", 0.0)
+    assert request_timeout(None) is None
+    assert request_timeout("5") == 5.0
+
+
+@pytest.mark.asyncio
+async def test_deadline_cancels_the_upstream_generation():
+    """
+    Test that a generation past the request's deadline is cancelled, not left running.
+
+    Returns:
+        None
+    """
+    manager = await simulated_manager(output_tokens=500)
+    cancelled_before = cancellation_stats.generations_cancelled
+    saved_before = cancellation_stats.tokens_saved
+
+    token = start_deadline(0.1)
+    try:
+        with pytest.raises(DeadlineExceeded):
+            await manager.generate_text("Prompt", budget=GenerationBudget(max_tokens=400))
+    finally:
+        reset_deadline(token)
+    await asyncio.sleep(0)
+
+    assert manager.admission().active == 0
+    assert manager.single_flight.stats()["in_flight"] == 0
+    assert cancellation_stats.generations_cancelled == cancelled_before + 1
+    assert cancellation_stats.tokens_saved == saved_before + 400
+
+
+@pytest.mark.asyncio
+async def test_expired_deadline_skips_the_generation():
+    """
+    Test that no generation starts once the deadline has passed.
+
+    Returns:
+        None
+    """
+    manager = await simulated_manager()
+
+    token = start_deadline(0.0)
+    try:
+        with pytest.raises(DeadlineExceeded):
+            await manager.generate_text("Prompt")
+    finally:
+        reset_deadline(token)
+
+    assert manager.single_flight.stats()["started"] == 0
+
+
+@pytest.mark.asyncio
+async def test_deadline_stops_a_stream_and_counts_tokens_generated():
+    """
+    Test that a stream past its deadline fails and its upstream stream is closed.
+
+    Returns:
+        None
+    """
+    manager = await simulated_manager(output_tokens=500, tokens_per_second=200.0)
+    generated_before = cancellation_stats.tokens_generated
+    cancelled_before = cancellation_stats.generations_cancelled
+    deltas = []
+
+    token = start_deadline(0.2)
+    try:
+        with pytest.raises(DeadlineExceeded):
+            async for chunk in manager.stream_text("Prompt"):
+                deltas.append(chunk.delta)
+    finally:
+        reset_deadline(token)
+    await asyncio.sleep(0)
+
+    assert deltas
+    assert manager.admission().active == 0
+    assert cancellation_stats.generations_cancelled == cancelled_before + 1
+    assert cancellation_stats.tokens_generated > generated_before
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_the_work():
+    """
+    Test that work is cancelled as soon as the client is seen to have gone.
+
+    Returns:
+        None
+    """
+    manager = await simulated_manager(output_tokens=500)
+    disconnects_before = cancellation_stats.requests["disconnect"]
+    polls = []
+
+    async def is_disconnected():
+        polls.append(True)
+        return len(polls) >= 2
+
+    with pytest.raises(ClientDisconnected):
+        await run_until_disconnected(
+            manager.generate_text("Prompt"), is_disconnected, poll_seconds=0.02
+        )
+
+    assert manager.admission().active == 0
+    assert manager.single_flight.stats()["in_flight"] == 0
+    assert cancellation_stats.requests["disconnect"] == disconnects_before + 1
+
+
+@pytest.mark.asyncio
+async def test_disconnect_closes_a_stream_between_items():
+    """
+    Test that a stream ends quietly and closes its source when the client goes.
+
+    Returns:
+        None
+    """
+    closed = []
+    connected = [True]
+
+    async def events():
+        try:
+            yield "first"
+            await asyncio.sleep(10)
+            yield "never"
+        finally:
+            closed.append(True)
+
+    async def is_disconnected():
+        return not connected[0]
+
+    received = []
+    async for event in stream_until_disconnected(events(), is_disconnected, poll_seconds=0.02):
+        received.append(event)
+        connected[0] = False
+
+    assert received == ["first"]
+    assert closed == [True]
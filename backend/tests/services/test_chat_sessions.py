@@ -0,0 +1,197 @@
+"""
+Tests for chat session memory: budgets, folding and incremental summaries.
+"""
+
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.models.chat import ChatMessage, ChatSession
+from app.models.text import ChatRequest
+from app.services import chat_sessions
+from app.services.chat_sessions import messages_to_fold, prepare_turn
+from app.services.document_limits import estimate_tokens
+
+
+def make_messages(count, tokens=100, start=1):
+    """
+    Build alternating user and assistant messages.
+
+    Args:
+        count: Number of messages.
+        tokens: Estimated tokens per message.
+        start: Sequence number of the first message.
+
+    Returns:
+        List of unsaved chat messages.
+    """
+    return [
+        ChatMessage(
+            seq=seq,
+            role="user" if seq % 2 else "assistant",
+            content=f"message {seq} " + "x" * (tokens * 4 - 12),
+            tokens=tokens,
+        )
+        for seq in range(start, start + count)
+    ]
+
+
+class SummarizingManager:
+    """LLM manager stand-in that records summary prompts and returns a short summary."""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_text(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return f"Summary {len(self.prompts)}."
+
+
+class FakeDatabase:
+    """Database session stand-in for turns on a session without a stored document."""
+
+    def __init__(self):
+        self.commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    """
+    Use a small history budget.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(settings, "CHAT_HISTORY_TOKENS", 1000)
+    monkeypatch.setattr(settings, "CHAT_HISTORY_LOW_WATER", 0.5)
+    monkeypatch.setattr(settings, "CHAT_SUMMARY_TOKENS", 100)
+    monkeypatch.setattr(settings, "CHAT_KEEP_RECENT_MESSAGES", 2)
+
+
+def test_nothing_is_folded_within_budget(budget):
+    """
+    Test that a history inside the budget is sent as it is.
+
+    Args:
+        budget: Small history budget.
+
+    Returns:
+        None
+    """
+    assert messages_to_fold(0, make_messages(8), 100) == 0
+    assert messages_to_fold(100, make_messages(8), 100) == 0
+
+
+def test_folding_goes_down_to_the_low_water_mark_in_whole_exchanges(budget):
+    """
+    Test that folding leaves room for several turns and never splits an exchange.
+
+    Args:
+        budget: Small history budget.
+
+    Returns:
+        None
+    """
+    messages = make_messages(10)
+
+    count = messages_to_fold(100, messages, 100)
+
+    assert count == 8
+    assert messages[count - 1].role == "assistant"
+    assert 100 + sum(m.tokens for m in messages[count:]) + 100 <= 500
+
+
+def test_the_most_recent_messages_are_never_folded(budget):
+    """
+    Test that long recent messages stay verbatim even when over budget.
+
+    Args:
+        budget: Small history budget.
+
+    Returns:
+        None
+    """
+    assert messages_to_fold(0, make_messages(5, tokens=800), 100) == 2
+    assert messages_to_fold(0, make_messages(2, tokens=800), 100) == 0
+
+
+@pytest.mark.asyncio
+async def test_history_stays_bounded_and_summaries_are_incremental(budget, monkeypatch):
+    """
+    Test a long conversation: the history stays in budget and each fold sees only new turns.
+
+    Args:
+        budget: Small history budget.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    stored = []
+
+    async def get_messages(db, session_id, after_seq=0):
+        return [m for m in stored if m.seq > after_seq]
+
+    monkeypatch.setattr(chat_sessions, "get_messages", get_messages)
+    manager = SummarizingManager()
+    db = FakeDatabase()
+    chat_session = ChatSession(
+        id=uuid.uuid4(), context="The document.", summarized_through=0, message_count=0
+    )
+
+    history_sizes = []
+    for turn in range(40):
+        message = f"question {turn} " + "q" * 300
+        prompt = await prepare_turn(db, manager, chat_session, ChatRequest(message=message))
+        unsummarized = [m for m in stored if m.seq > chat_session.summarized_through]
+        history_sizes.append(
+            estimate_tokens(chat_session.summary) + sum(m.tokens for m in unsummarized)
+        )
+        assert prompt.startswith("Context: The document.")
+        assert prompt.endswith(f"User: {message}\nAssistant:")
+        stored.extend(make_messages(2, tokens=100, start=len(stored) + 1))
+
+    assert max(history_sizes) <= settings.CHAT_HISTORY_TOKENS
+    # Folds happen every few turns, not on every turn
+    assert 1 < len(manager.prompts) < 40 / 2
+    assert db.commits == len(manager.prompts)
+    # Each fold carries the previous summary and only the turns not yet summarized
+    assert "message 1 " in manager.prompts[0]
+    assert "Summary 1." in manager.prompts[1] and "message 1 " not in manager.prompts[1]
+    assert all(len(p) < len(manager.prompts[0]) * 2 for p in manager.prompts)
+
+
+@pytest.mark.asyncio
+async def test_new_context_replaces_the_stored_document(monkeypatch):
+    """
+    Test that context is only needed when the document changed.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+
+    async def get_messages(db, session_id, after_seq=0):
+        return []
+
+    monkeypatch.setattr(chat_sessions, "get_messages", get_messages)
+    db = FakeDatabase()
+    chat_session = ChatSession(id=uuid.uuid4(), context="Old draft.", summarized_through=0)
+
+    updated = await prepare_turn(
+        db, None, chat_session, ChatRequest(message="Hi", context="New draft.")
+    )
+    reused = await prepare_turn(db, None, chat_session, ChatRequest(message="Again"))
+
+    assert "New draft." in updated and "New draft." in reused
+    assert "Old draft." not in reused
+    assert db.commits == 1
@@ -0,0 +1,163 @@
+"""
+Tests for chunked long-document actions.
+"""
+
+import asyncio
+
+import pytest
+
+from app.models.text import ActionRequest
+from app.services import chunked_action
+from app.services.chunked_action import (
+    PHASE_ACTION,
+    PHASE_CONSISTENCY,
+    ChunkedAction,
+    use_long_document_mode,
+)
+
+
+class RecordingManager:
+    """LLM manager stand-in that records prompts and concurrency."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.prompts = []
+        self.active = 0
+        self.max_active = 0
+
+    async def generate_text(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        section = prompt.split("Original Text:\n", 1)[-1].split("\n", 1)[0]
+        return f"Edited {section}"
+
+
+def _request(sections=6, **kwargs):
+    """
+    Build an action request for a document with one heading per section.
+
+    Args:
+        sections: Number of sections.
+        **kwargs: Extra request fields.
+
+    Returns:
+        ActionRequest: The request.
+    """
+    text = "\n\n".join(f"## Part {i}\n\n" + "Body text. " * 40 for i in range(sections))
+    return ActionRequest(
+        action="improve",
+        action_description="Improve the text",
+        text=text,
+        about_me="I am a writer",
+        preferred_style="Clear",
+        tone="professional",
+        document_type="Essay",
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """
+    Make every section of the test documents its own chunk.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(chunked_action.settings, "LONG_DOCUMENT_CHUNK_CHARS", 500)
+
+
+@pytest.mark.asyncio
+async def test_chunks_run_in_parallel_and_stitch_in_order(small_chunks):
+    """
+    Test bounded parallelism, shared context and in-order stitching.
+
+    Args:
+        small_chunks: Small chunk size override.
+
+    Returns:
+        None
+    """
+    manager = RecordingManager()
+    action = ChunkedAction(manager, _request(), max_parallel=2)
+
+    text = await action.run()
+
+    assert len(action.chunks) == 6
+    assert manager.max_active == 2
+    assert text == "\n\n".join(f"Edited ## Part {i}" for i in range(6))
+    assert all("Style: Clear" in prompt for prompt in manager.prompts)
+    assert all("## Part 5" in prompt.split("Document outline:")[1] for prompt in manager.prompts)
+
+
+@pytest.mark.asyncio
+async def test_consistency_pass_reports_progress_per_chunk(small_chunks):
+    """
+    Test that the consistency pass revises every chunk with its neighbours' edges.
+
+    Args:
+        small_chunks: Small chunk size override.
+
+    Returns:
+        None
+    """
+    manager = RecordingManager()
+    action = ChunkedAction(manager, _request(sections=3), consistency_pass=True)
+
+    results = [result async for result in action.progress()]
+
+    assert [r.phase for r in results] == [PHASE_ACTION] * 3 + [PHASE_CONSISTENCY] * 3
+    assert sorted(r.index for r in results if r.phase == PHASE_CONSISTENCY) == [0, 1, 2]
+    consistency_prompts = manager.prompts[3:]
+    middle = next(p for p in consistency_prompts if "Section to revise:\nEdited ## Part 1" in p)
+    assert "Edited ## Part 0" in middle
+    assert "Edited ## Part 2" in middle
+
+
+@pytest.mark.asyncio
+async def test_failed_chunk_fails_the_action(small_chunks):
+    """
+    Test that one failing chunk fails the action.
+
+    Args:
+        small_chunks: Small chunk size override.
+
+    Returns:
+        None
+    """
+    manager = RecordingManager()
+
+    async def failing_generate_text(prompt, **kwargs):
+        raise Exception("Upstream failed")
+
+    manager.generate_text = failing_generate_text
+
+    with pytest.raises(Exception, match="Upstream failed"):
+        await ChunkedAction(manager, _request()).run()
+
+
+def test_long_document_mode_selection(monkeypatch):
+    """
+    Test automatic and explicit selection of long-document mode.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(chunked_action.settings, "LONG_DOCUMENT_THRESHOLD_CHARS", 1000)
+
+    assert use_long_document_mode(_request())
+    assert not use_long_document_mode(_request(sections=1))
+    assert use_long_document_mode(_request(sections=1, long_document=True))
+    assert not use_long_document_mode(_request(long_document=False))
+    assert not use_long_document_mode(_request().model_copy(update={"document_type": "X"}))
@@ -0,0 +1,82 @@
+"""
+Tests for Markdown-aware document chunking.
+"""
+
+from app.services.document_chunker import outline, split_markdown
+
+
+def _document(sections=4, sentences=30):
+    """
+    Build a Markdown document with a title and several sections.
+
+    Args:
+        sections: Number of level-two sections.
+        sentences: Sentences per section paragraph.
+
+    Returns:
+        str: The document.
+    """
+    body = " ".join(["This sentence belongs to the section."] * sentences)
+    parts = ["# Title", "An introduction."]
+    for i in range(sections):
+        parts += [f"## Section {i}", body]
+    return "\n\n".join(parts)
+
+
+def test_short_text_is_one_chunk():
+    """
+    Test that text under the limit is returned unchanged.
+
+    Returns:
+        None
+    """
+    assert split_markdown("Short text.", 100) == ["Short text."]
+
+
+def test_chunks_break_before_headings_and_round_trip():
+    """
+    Test that chunks start at headings, stay under the limit and rebuild the document.
+
+    Returns:
+        None
+    """
+    document = _document()
+
+    chunks = split_markdown(document, 1500)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 1500 for chunk in chunks)
+    assert all(chunk.startswith("#") for chunk in chunks)
+    assert "\n\n".join(chunks) == document
+    assert outline(document) == ["# Title"] + [f"## Section {i}" for i in range(4)]
+
+
+def test_oversized_paragraph_is_split_on_sentences():
+    """
+    Test that a paragraph longer than the limit is split at sentence boundaries.
+
+    Returns:
+        None
+    """
+    paragraph = " ".join(f"Sentence number {i} is here." for i in range(100))
+
+    chunks = split_markdown(paragraph, 500)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    assert all(chunk.endswith(".") for chunk in chunks)
+
+
+def test_code_fences_are_not_split():
+    """
+    Test that a fenced code block with blank lines stays in one chunk.
+
+    Returns:
+        None
+    """
+    code = "```python\n" + "\n\n".join(f"x_{i} = {i}" for i in range(40)) + "\n```"
+    document = "\n\n".join(["Intro paragraph.", code, "Closing paragraph."])
+
+    chunks = split_markdown(document, 200)
+
+    assert code in chunks
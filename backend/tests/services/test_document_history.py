@@ -0,0 +1,196 @@
+"""
+Tests for delta-encoded document history.
+"""
+
+import random
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.database import Base
+from app.models.document import Document, DocumentHistory
+from app.models.user import User
+from app.services.document_history import (
+    apply_delta,
+    encode_delta,
+    get_version,
+    list_versions,
+    make_delta,
+    record_version,
+)
+
+PARAGRAPHS = [f"Paragraph {i} says something about topic {i}.\n\n" for i in range(40)]
+
+
+def edit(text, rng):
+    """
+    Make a random autosave-sized edit: insert, delete or change a few characters.
+
+    Args:
+        text: Text to edit.
+        rng: Random number generator.
+
+    Returns:
+        The edited text.
+    """
+    start = rng.randrange(len(text) + 1)
+    end = min(len(text), start + rng.randrange(12))
+    return text[:start] + rng.choice(["", "new words", "\n", "x"]) + text[end:]
+
+
+@pytest_asyncio.fixture
+async def document_db(tmp_path, monkeypatch):
+    """
+    Store a document in a SQLite database and use a short keyframe interval.
+
+    Args:
+        tmp_path: Pytest temporary directory.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        Tuple of (session factory, document id).
+    """
+    monkeypatch.setattr(settings, "DOCUMENT_HISTORY_KEYFRAME_INTERVAL", 4)
+    monkeypatch.setattr(settings, "DOCUMENT_HISTORY_MAX_DELTA_RATIO", 0.5)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'history.db'}")
+    tables = [User.__table__, Document.__table__, DocumentHistory.__table__]
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    user_id, document_id = uuid.uuid4(), uuid.uuid4()
+    async with session_factory() as session:
+        session.add(User(id=user_id, email="history@example.com", password_hash="not-a-hash"))
+        session.add(
+            Document(id=document_id, user_id=user_id, title="Draft", document_type="Custom")
+        )
+        await session.commit()
+    yield session_factory, document_id
+    await engine.dispose()
+
+
+async def save_versions(session_factory, document_id, texts):
+    """
+    Record each text as the document's next version.
+
+    Args:
+        session_factory: Database session factory.
+        document_id: Document the versions belong to.
+        texts: Texts of the versions, in order.
+
+    Returns:
+        None
+    """
+    previous = None
+    for text in texts:
+        async with session_factory() as session:
+            await record_version(session, document_id, previous, text)
+            await session.commit()
+        previous = text
+
+
+def test_deltas_rebuild_the_new_text_and_store_only_the_edit():
+    """
+    Test that random edits round-trip and a small edit makes a small delta.
+
+    Returns:
+        None
+    """
+    rng = random.Random(7)
+    text = "".join(PARAGRAPHS)
+    for _ in range(200):
+        edited = edit(text, rng)
+        assert apply_delta(text, make_delta(text, edited)) == edited
+        text = edited
+
+    text = "".join(PARAGRAPHS)
+    changed = text.replace("topic 20.", "topic twenty.")
+    start = text.index("topic 20.") + len("topic ")
+    assert make_delta(text, changed) == [(start, start + 2, "twenty")]
+    assert make_delta(text, text) == []
+    assert apply_delta("", make_delta("", text)) == text
+
+
+def test_keyframes_are_stored_on_schedule_and_for_large_changes(monkeypatch):
+    """
+    Test when a version is stored as a keyframe instead of a delta.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(settings, "DOCUMENT_HISTORY_KEYFRAME_INTERVAL", 4)
+    monkeypatch.setattr(settings, "DOCUMENT_HISTORY_MAX_DELTA_RATIO", 0.5)
+    text = "".join(PARAGRAPHS)
+    small_edit = text + "One more line.\n"
+
+    assert encode_delta(text, small_edit, chain_length=3) is not None
+    assert encode_delta(text, small_edit, chain_length=4) is None
+    assert encode_delta(None, small_edit, chain_length=1) is None
+    assert encode_delta(text, "Rewritten from scratch.", chain_length=1) is None
+
+
+@pytest.mark.asyncio
+async def test_every_version_is_rebuilt_from_its_keyframe(document_db):
+    """
+    Test that each version is rebuilt exactly, from a keyframe at most a few deltas back.
+
+    Args:
+        document_db: Session factory and document id.
+
+    Returns:
+        None
+    """
+    session_factory, document_id = document_db
+    rng = random.Random(11)
+    texts = ["".join(PARAGRAPHS)]
+    for _ in range(9):
+        texts.append(edit(texts[-1], rng))
+    await save_versions(session_factory, document_id, texts)
+
+    async with session_factory() as session:
+        rows = (
+            await session.execute(select(DocumentHistory).order_by(DocumentHistory.version))
+        ).scalars()
+        keyframes = [row.version for row in rows if row.content is not None]
+        for version, text in enumerate(texts, start=1):
+            row, content = await get_version(session, document_id, version)
+            assert content == text
+            assert row.content_length == len(text)
+            assert version - row.keyframe_version < settings.DOCUMENT_HISTORY_KEYFRAME_INTERVAL
+        assert await get_version(session, document_id, len(texts) + 1) is None
+
+    assert keyframes == [1, 5, 9]
+
+
+@pytest.mark.asyncio
+async def test_history_pages_newest_first(document_db):
+    """
+    Test that following cursors lists every version once, newest first.
+
+    Args:
+        document_db: Session factory and document id.
+
+    Returns:
+        None
+    """
+    session_factory, document_id = document_db
+    await save_versions(session_factory, document_id, [f"Version {i}\n" for i in range(1, 8)])
+
+    versions = []
+    cursor = None
+    async with session_factory() as session:
+        while True:
+            rows, cursor = await list_versions(session, document_id, 3, cursor)
+            versions.extend(row.version for row in rows)
+            if cursor is None:
+                break
+
+    assert versions == [7, 6, 5, 4, 3, 2, 1]
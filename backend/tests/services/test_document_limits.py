@@ -0,0 +1,105 @@
+"""
+Tests for per-document-type limits and generation budgets.
+"""
+
+from app.core.config import settings
+from app.services.document_limits import (
+    MIN_OUTPUT_TOKENS,
+    budget_for,
+    generation_budget,
+    limits_for,
+    trim_to_limit,
+)
+
+
+def test_short_form_budgets_follow_the_character_limit():
+    """
+    Test that hard-limited types get a small budget, stop sequences and a short timeout.
+
+    Returns:
+        None
+    """
+    long_text = "word " * 5000
+
+    x_budget = generation_budget("X", long_text)
+    threads_budget = generation_budget("Threads", long_text)
+
+    assert x_budget.max_tokens < threads_budget.max_tokens < MIN_OUTPUT_TOKENS
+    assert x_budget.max_tokens * 4 >= limits_for("X").max_chars
+    assert x_budget.stop
+    assert x_budget.timeout_seconds < settings.LLM_REQUEST_TIMEOUT_SECONDS
+    assert x_budget.params() == {"max_tokens": x_budget.max_tokens, "stop": list(x_budget.stop)}
+
+
+def test_long_form_budgets_scale_with_the_input(monkeypatch):
+    """
+    Test that budgets for types without a hard limit grow with the input, within caps.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(settings, "LLM_MAX_OUTPUT_TOKENS", 4000)
+
+    short = generation_budget("Blog", "A short draft.")
+    medium = generation_budget("Blog", "x" * 4800)
+    huge = generation_budget("Blog", "x" * 100000)
+
+    assert short.max_tokens == limits_for("Blog").min_output_tokens
+    assert medium.max_tokens == 3600
+    assert huge.max_tokens == 4000
+    assert huge.timeout_seconds == settings.LLM_REQUEST_TIMEOUT_SECONDS
+    assert generation_budget(None, "x" * 2000) == generation_budget("Custom", "x" * 2000)
+
+
+def test_short_prompts_expanded_to_long_form_types_get_room_for_a_full_document():
+    """
+    Test that expanding a one-line prompt is not capped at the short-form minimum.
+
+    Returns:
+        None
+    """
+    prompt = "Write a post about my trip to Japan."
+
+    essay = budget_for("Essay", prompt)
+    email = budget_for("Email", prompt)
+
+    assert essay.max_tokens > MIN_OUTPUT_TOKENS
+    # An essay of a couple of thousand words fits in the budget
+    assert essay.max_tokens * 0.75 >= 2000
+    assert email.max_tokens == MIN_OUTPUT_TOKENS
+    for document_type in ["Blog", "LinkedIn", "Reddit", "Newsletter", "Custom"]:
+        assert budget_for(document_type, prompt).max_tokens > MIN_OUTPUT_TOKENS
+
+
+def test_budgets_can_be_disabled(monkeypatch):
+    """
+    Test that disabling budgets leaves generations unbounded.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(settings, "LLM_GENERATION_BUDGETS", False)
+
+    assert budget_for("X", "Some text") is None
+
+
+def test_trim_to_limit_prefers_sentence_then_word_boundaries():
+    """
+    Test that over-long output is cut at a sentence end, else a word boundary.
+
+    Returns:
+        None
+    """
+    sentences = "First point here. Second point follows. Third point runs long"
+    words = "one two three four five six seven eight nine ten"
+
+    assert trim_to_limit(sentences, 50) == "First point here. Second point follows."
+    assert trim_to_limit(words, 20) == "one two three four"
+    assert trim_to_limit("  fits  ", 280) == "  fits  "
+    assert trim_to_limit(words, None) == words
@@ -0,0 +1,197 @@
+"""
+Tests for WebSocket editor sessions.
+"""
+
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.editor_session import EditorDocument, EditorSession, SessionError
+from app.services.llm_manager import StreamChunk
+
+PREFERENCES = {
+    "type": "preferences",
+    "about_me": "I am a writer",
+    "preferred_style": "Clear and concise",
+    "tone": "professional",
+}
+
+
+class StreamingManager:
+    """LLM manager stand-in that streams a few tokens slowly and records closed streams."""
+
+    def __init__(self, tokens=("One ", "two ", "three."), delay=0.01):
+        self.tokens = tokens
+        self.delay = delay
+        self.prompts = []
+        self.finished = 0
+        self.closed = 0
+
+    async def stream_text(self, prompt, sticky_key=None, budget=None, **kwargs):
+        self.prompts.append(prompt)
+        try:
+            for token in self.tokens:
+                await asyncio.sleep(self.delay)
+                yield StreamChunk(delta=token)
+            yield StreamChunk(usage={"completion_tokens": len(self.tokens)})
+            self.finished += 1
+        finally:
+            self.closed += 1
+
+
+async def open_session(manager):
+    """
+    Open a session that records every message it sends.
+
+    Args:
+        manager: LLM manager stand-in.
+
+    Returns:
+        Tuple of (session, sent messages).
+    """
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    session = EditorSession(manager, SimpleNamespace(id=uuid.uuid4()), send)
+    await session.handle(PREFERENCES)
+    await session.handle({"type": "document", "text": "Remote work is here.", "version": 1})
+    return session, sent
+
+
+async def settle(session):
+    """
+    Wait for a session's in-flight requests to finish.
+
+    Args:
+        session: The session.
+
+    Returns:
+        None
+    """
+    while session._tasks:
+        await asyncio.sleep(0.01)
+
+
+def test_deltas_apply_in_order_and_reject_stale_versions():
+    """
+    Test that deltas splice the document and out-of-order deltas ask for a resync.
+
+    Returns:
+        None
+    """
+    document = EditorDocument("Remote work is here.", version=1)
+
+    sent = document.apply(
+        1, 2, [{"start": 0, "end": 6, "text": "Hybrid"}, {"start": 19, "end": 19, "text": " now"}]
+    )
+
+    assert document.text == "Hybrid work is here now."
+    assert document.version == 2
+    assert sent == len("Hybrid") + len(" now")
+    with pytest.raises(SessionError):
+        document.apply(1, 3, [])
+    with pytest.raises(SessionError):
+        document.apply(2, 3, [{"start": 5, "end": 500, "text": ""}])
+    assert document.text == "Hybrid work is here now."
+
+
+@pytest.mark.asyncio
+async def test_action_runs_on_the_session_document_and_streams_tokens():
+    """
+    Test that an action uses the stored document and preferences and tags its messages.
+
+    Returns:
+        None
+    """
+    manager = StreamingManager()
+    session, sent = await open_session(manager)
+    await session.handle(
+        {
+            "type": "delta",
+            "base_version": 1,
+            "version": 2,
+            "ops": [{"start": 0, "end": 6, "text": "Hybrid"}],
+        }
+    )
+
+    await session.handle(
+        {"type": "action", "id": "a1", "action": "expand", "action_description": "Make it longer"}
+    )
+    await settle(session)
+
+    assert "Hybrid work is here." in manager.prompts[0]
+    tokens = [m["delta"] for m in sent if m["type"] == "token" and m["id"] == "a1"]
+    assert "".join(tokens) == "One two three."
+    assert sent[-1]["type"] == "done" and sent[-1]["id"] == "a1" and sent[-1]["version"] == 2
+
+
+@pytest.mark.asyncio
+async def test_new_action_supersedes_the_running_one():
+    """
+    Test that re-triggering an action cancels the one in flight and closes its stream.
+
+    Returns:
+        None
+    """
+    manager = StreamingManager(delay=0.05)
+    session, sent = await open_session(manager)
+    action = {"type": "action", "action": "expand", "action_description": "Make it longer"}
+
+    await session.handle({**action, "id": "a1"})
+    await asyncio.sleep(0.01)
+    await session.handle({**action, "id": "a2"})
+    await settle(session)
+
+    assert {"type": "cancelled", "id": "a1", "reason": "superseded"} in sent
+    assert [m["id"] for m in sent if m["type"] == "done"] == ["a2"]
+    assert manager.finished == 1 and manager.closed == 2
+
+
+@pytest.mark.asyncio
+async def test_requests_on_other_channels_run_concurrently_and_can_be_cancelled():
+    """
+    Test that chat does not supersede an action, and that cancel stops a request by id.
+
+    Returns:
+        None
+    """
+    manager = StreamingManager(delay=0.05)
+    session, sent = await open_session(manager)
+
+    await session.handle(
+        {"type": "action", "id": "a1", "action": "expand", "action_description": "Longer"}
+    )
+    await session.handle({"type": "chat", "id": "c1", "message": "Is the intro clear?"})
+    await session.handle({"type": "cancel", "id": "a1"})
+    await session.handle({"type": "cancel", "id": "missing"})
+    await settle(session)
+
+    assert {"type": "cancelled", "id": "a1", "reason": "cancelled"} in sent
+    assert [m["id"] for m in sent if m["type"] == "done"] == ["c1"]
+    assert "Remote work is here." in manager.prompts[-1]
+    assert any(m["type"] == "error" and m["id"] == "missing" for m in sent)
+
+
+@pytest.mark.asyncio
+async def test_closing_the_session_cancels_in_flight_requests():
+    """
+    Test that a closed socket cancels its requests and sends nothing more.
+
+    Returns:
+        None
+    """
+    manager = StreamingManager(delay=0.05)
+    session, sent = await open_session(manager)
+
+    await session.handle({"type": "chat", "id": "c1", "message": "Summarise this"})
+    await asyncio.sleep(0.01)
+    count = len(sent)
+    await session.close()
+    await asyncio.sleep(0.1)
+
+    assert manager.closed == 1 and manager.finished == 0
+    assert len(sent) == count
@@ -0,0 +1,229 @@
+"""
+Tests for per-criterion and fused evaluations.
+"""
+
+import json
+
+import pytest
+
+from app.models.text import EvalCriterion
+from app.services.admission import AdmissionRejected
+from app.services.cancellation import ClientDisconnected, DeadlineExceeded
+from app.services.evaluation import (
+    MODE_FUSED,
+    MODE_SINGLE,
+    FusedEvaluation,
+    MalformedEvaluation,
+    parse_fused_evaluation,
+)
+
+CRITERIA = [
+    EvalCriterion(eval_name="Clarity", eval_description="Is the text easy to follow?"),
+    EvalCriterion(eval_name="Tone", eval_description="Is the tone right?"),
+    EvalCriterion(eval_name="Grammar", eval_description="Is the grammar correct?"),
+]
+
+
+def _entry(criterion, score=7, **kwargs):
+    return {"criterion": criterion, "score": score, "summary": f"{criterion} ok", **kwargs}
+
+
+class ScriptedManager:
+    """LLM manager stand-in answering fused prompts with a fixed response."""
+
+    def __init__(self, fused_response):
+        self.fused_response = fused_response
+        self.prompts = []
+
+    async def generate_text(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        if '{"evaluations"' in prompt:
+            if isinstance(self.fused_response, Exception):
+                raise self.fused_response
+            return self.fused_response
+        return "Separate evaluation. Rating: 4/10"
+
+
+def test_parse_fused_evaluation_matches_entries_by_name():
+    """
+    Test that entries are matched to criteria by name, tolerating fences and case.
+
+    Returns:
+        None
+    """
+    response = (
+        "```json\n"
+        + json.dumps(
+            {
+                "evaluations": [
+                    _entry("grammar", 9, suggestions=["Fix commas"]),
+                    _entry("Clarity", 6),
+                ]
+            }
+        )
+        + "\n```"
+    )
+
+    parsed = parse_fused_evaluation(response, [c.eval_name for c in CRITERIA])
+
+    assert sorted(parsed) == [0, 2]
+    assert parsed[0].score == 6
+    assert parsed[2].suggestions == ["Fix commas"]
+
+
+def test_parse_fused_evaluation_drops_invalid_entries():
+    """
+    Test that out-of-range, incomplete, unknown and duplicate entries are dropped.
+
+    Returns:
+        None
+    """
+    response = json.dumps(
+        {
+            "evaluations": [
+                _entry("Clarity", 11),
+                {"criterion": "Tone", "score": 5},
+                _entry("Style"),
+                _entry("Grammar", 8),
+                _entry("Grammar", 2),
+            ]
+        }
+    )
+
+    parsed = parse_fused_evaluation(response, [c.eval_name for c in CRITERIA])
+
+    assert list(parsed) == [2]
+    assert parsed[2].score == 8
+
+
+@pytest.mark.parametrize(
+    "response", ["Rating: 7/10", "{not json}", json.dumps({"scores": []}), "[1, 2]"]
+)
+def test_parse_fused_evaluation_rejects_malformed_responses(response):
+    """
+    Test that responses without an evaluations list are rejected.
+
+    Args:
+        response: Malformed LLM response.
+
+    Returns:
+        None
+    """
+    with pytest.raises(MalformedEvaluation):
+        parse_fused_evaluation(response, ["Clarity"])
+
+
+@pytest.mark.asyncio
+async def test_fused_evaluation_uses_one_call():
+    """
+    Test that a valid fused response evaluates every criterion in a single call.
+
+    Returns:
+        None
+    """
+    manager = ScriptedManager(
+        json.dumps({"evaluations": [_entry(c.eval_name, 8) for c in CRITERIA]})
+    )
+
+    results = [r async for r in FusedEvaluation(manager, "Some text", CRITERIA).results()]
+
+    assert len(manager.prompts) == 1
+    assert manager.prompts[0].count("Some text") == 1
+    assert [r.index for r in results] == [0, 1, 2]
+    assert all(r.success and r.data["mode"] == MODE_FUSED for r in results)
+    assert results[0].data["score"] == 8
+    assert "Rating: 8/10" in results[0].data["result"]
+
+
+@pytest.mark.asyncio
+async def test_fused_evaluation_falls_back_for_missing_criteria():
+    """
+    Test that criteria without a valid fused entry are evaluated separately.
+
+    Returns:
+        None
+    """
+    manager = ScriptedManager(json.dumps({"evaluations": [_entry("Tone", 9)]}))
+
+    results = [r async for r in FusedEvaluation(manager, "Some text", CRITERIA).results()]
+
+    assert len(manager.prompts) == 3
+    by_index = {r.index: r for r in results}
+    assert sorted(by_index) == [0, 1, 2]
+    assert by_index[1].data["mode"] == MODE_FUSED
+    assert by_index[0].data["mode"] == MODE_SINGLE
+    assert by_index[2].data["score"] == 4
+
+
+@pytest.mark.asyncio
+async def test_fused_evaluation_falls_back_on_malformed_output():
+    """
+    Test that an unparseable fused response falls back to per-criterion calls.
+
+    Returns:
+        None
+    """
+    manager = ScriptedManager("Clarity: good. Tone: fine.")
+
+    results = [r async for r in FusedEvaluation(manager, "Some text", CRITERIA).results()]
+
+    assert len(manager.prompts) == 1 + len(CRITERIA)
+    assert sorted(r.index for r in results) == [0, 1, 2]
+    assert all(r.success and r.data["mode"] == MODE_SINGLE for r in results)
+
+
+@pytest.mark.asyncio
+async def test_fused_evaluation_does_not_fan_out_when_overloaded():
+    """
+    Test that a rejected fused call fails every criterion instead of retrying each.
+
+    Returns:
+        None
+    """
+    manager = ScriptedManager(AdmissionRejected("Backend is busy", retry_after=2))
+
+    results = [r async for r in FusedEvaluation(manager, "Some text", CRITERIA).results()]
+
+    assert len(manager.prompts) == 1
+    assert [r.retry_after for r in results] == [2, 2, 2]
+    assert not any(r.success for r in results)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "error", [DeadlineExceeded("Request deadline exceeded"), RuntimeError("Backend error")]
+)
+async def test_fused_evaluation_does_not_fan_out_when_the_call_fails(error):
+    """
+    Test that a fused call that fails, rather than returning bad output, is not retried.
+
+    Args:
+        error: Error raised by the fused call.
+
+    Returns:
+        None
+    """
+    manager = ScriptedManager(error)
+
+    results = [r async for r in FusedEvaluation(manager, "Some text", CRITERIA).results()]
+
+    assert len(manager.prompts) == 1
+    assert [r.index for r in results] == [0, 1, 2]
+    assert not any(r.success or r.retry_after for r in results)
+    assert all(r.detail == str(error) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_fused_evaluation_stops_when_the_client_disconnects():
+    """
+    Test that a disconnected client ends the evaluation instead of starting fallbacks.
+
+    Returns:
+        None
+    """
+    manager = ScriptedManager(ClientDisconnected("Client disconnected"))
+
+    with pytest.raises(ClientDisconnected):
+        [r async for r in FusedEvaluation(manager, "Some text", CRITERIA).results()]
+
+    assert len(manager.prompts) == 1
@@ -0,0 +1,272 @@
+"""
+Tests for the background job manager.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.database import Base
+from app.models.job import Job
+from app.services import job_manager
+from app.services.job_manager import (
+    JOB_CANCELLED,
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    JobLimitExceeded,
+    JobManager,
+    JobRecord,
+    PostgresJobStore,
+)
+
+
+class MemoryJobStore:
+    """Job store stand-in that keeps copies of saved records, like a database would."""
+
+    def __init__(self):
+        self.rows = {}
+        self.recovered = 0
+
+    async def save(self, record):
+        self.rows[record.id] = type(record)(**vars(record))
+
+    async def load(self, job_id):
+        return self.rows.get(job_id)
+
+    async def purge(self, now):
+        self.rows = {k: v for k, v in self.rows.items() if not v.expired(now)}
+
+    async def renew_leases(self, instance_id, job_ids, lease_expires_at):
+        pass
+
+    async def fail_abandoned(self, instance_id, now, expires_at):
+        self.recovered += 1
+
+
+@pytest_asyncio.fixture
+async def job_store(tmp_path, monkeypatch):
+    """
+    Point the job store at a SQLite database holding the jobs table.
+
+    Args:
+        tmp_path: Pytest temporary directory.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        The job store.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[Job.__table__])
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(job_manager, "AsyncSessionLocal", session_factory)
+    yield PostgresJobStore()
+    await engine.dispose()
+
+
+def returning(result, delay=0.0):
+    """
+    Build job work that returns a result after a delay.
+
+    Args:
+        result: Result to return.
+        delay: Seconds to wait first.
+
+    Returns:
+        The work factory.
+    """
+
+    async def work():
+        await asyncio.sleep(delay)
+        return result
+
+    return work
+
+
+@pytest.mark.asyncio
+async def test_job_runs_in_the_background_and_reports_each_status():
+    """
+    Test that a job is queued, run by a worker and its result kept.
+
+    Returns:
+        None
+    """
+    manager = JobManager()
+
+    record = await manager.submit("user-1", "shorten", returning({"text": "Done"}, 0.01))
+    statuses = [job.status async for job in manager.watch(record.id)]
+
+    assert statuses == [JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED]
+    finished = await manager.get(record.id)
+    assert finished.result == {"text": "Done"}
+    assert finished.expires_at > finished.finished_at
+    assert manager.stats()["succeeded"] == 1
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_failed_work_is_reported_as_a_failed_job():
+    """
+    Test that an exception in the work fails the job with its message.
+
+    Returns:
+        None
+    """
+    manager = JobManager()
+
+    async def work():
+        raise Exception("No active LLM connection")
+
+    record = await manager.submit("user-1", "expand", work)
+    jobs = [job async for job in manager.watch(record.id)]
+
+    assert jobs[-1].status == JOB_FAILED
+    assert jobs[-1].error == "No active LLM connection"
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_unfinished_jobs_are_capped_per_user(monkeypatch):
+    """
+    Test that a user over the cap is rejected while other users are not.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(settings, "JOB_MAX_ACTIVE_PER_USER", 2)
+    manager = JobManager()
+
+    first = await manager.submit("user-1", "a", returning({}, 0.05))
+    await manager.submit("user-1", "b", returning({}, 0.05))
+    with pytest.raises(JobLimitExceeded):
+        await manager.submit("user-1", "c", returning({}))
+    await manager.submit("user-2", "a", returning({}))
+
+    [job async for job in manager.watch(first.id)]
+    await manager.submit("user-1", "c", returning({}))
+    assert manager.stats()["rejected"] == 1
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancelling_a_running_job_cancels_its_work():
+    """
+    Test that cancelling a running job cancels the coroutine doing the work.
+
+    Returns:
+        None
+    """
+    manager = JobManager()
+    started = asyncio.Event()
+    cancelled = []
+
+    async def work():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return {}
+
+    record = await manager.submit("user-1", "expand", work)
+    await started.wait()
+    await manager.cancel(record.id)
+    await asyncio.sleep(0)
+
+    assert record.status == JOB_CANCELLED
+    assert cancelled == [True]
+    assert manager.stats()["running"] == 0
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_results_expire(monkeypatch):
+    """
+    Test that finished jobs are dropped once their results expire.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(settings, "JOB_RESULT_TTL_SECONDS", 0.0)
+    manager = JobManager()
+
+    record = await manager.submit("user-1", "expand", returning({"text": "Done"}))
+    [job async for job in manager.watch(record.id)]
+
+    assert await manager.get(record.id) is None
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_persisted_results_survive_a_restart():
+    """
+    Test that a new manager reads finished results from the store and fails stale jobs.
+
+    Returns:
+        None
+    """
+    store = MemoryJobStore()
+    manager = JobManager(store)
+    record = await manager.submit("user-1", "expand", returning({"text": "Done"}))
+    [job async for job in manager.watch(record.id)]
+    await manager.shutdown()
+
+    restarted = JobManager(store)
+    await restarted.recover()
+    loaded = await restarted.get(record.id)
+
+    assert loaded.status == JOB_SUCCEEDED
+    assert loaded.result == {"text": "Done"}
+    assert store.recovered == 1
+
+
+@pytest.mark.asyncio
+async def test_only_jobs_whose_lease_lapsed_are_failed_on_startup(job_store, monkeypatch):
+    """
+    Test that a starting process fails abandoned jobs but not those of a live process.
+
+    Args:
+        job_store: Job store backed by SQLite.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 0.3)
+    live = JobManager(job_store)
+    running = await live.submit("user-1", "expand", returning({}, 10))
+    stopped = JobRecord(
+        str(uuid.uuid4()),
+        "user-2",
+        "expand",
+        status=JOB_RUNNING,
+        created_at=datetime.utcnow(),
+        instance_id=uuid.uuid4().hex,
+        lease_expires_at=datetime.utcnow() - timedelta(seconds=1),
+    )
+    await job_store.save(stopped)
+    # Long enough for the live job's first lease to lapse had it not been renewed
+    await asyncio.sleep(0.5)
+
+    await JobManager(job_store).recover()
+
+    assert (await job_store.load(running.id)).status == JOB_RUNNING
+    failed = await job_store.load(stopped.id)
+    assert failed.status == JOB_FAILED
+    assert failed.expires_at > failed.finished_at
+    await live.shutdown()
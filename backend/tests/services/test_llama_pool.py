@@ -0,0 +1,98 @@
+"""
+Tests for the load-balanced Llama.cpp backend pool.
+"""
+
+import httpx
+import pytest
+
+from app.services.llama_pool import ROUTING_POWER_OF_TWO, LlamaBackendPool, normalize_base_url
+
+URLS = ["http://llama-a:8080", "http://llama-b:8080", "http://llama-c:8080"]
+
+
+def test_normalize_base_url():
+    """
+    Test that a scheme is added only when missing.
+
+    Returns:
+        None
+    """
+    assert normalize_base_url("localhost", "8080") == "http://localhost:8080"
+    assert normalize_base_url("https://llama", "443") == "https://llama:443"
+
+
+@pytest.mark.asyncio
+async def test_least_outstanding_routing():
+    """
+    Test that generations go to the backend with the fewest requests in flight.
+
+    Returns:
+        None
+    """
+    pool = LlamaBackendPool(URLS)
+    pool.backends[0].in_flight = 2
+    pool.backends[1].in_flight = 1
+
+    async with pool.acquire() as backend:
+        assert backend.base_url == "http://llama-c:8080"
+        assert backend.in_flight == 1
+
+    assert pool.backends[2].in_flight == 0
+    assert pool.backends[2].requests == 1
+    assert pool.backends[2].latency_ewma_ms is not None
+
+
+def test_power_of_two_choices_avoids_busiest_backend():
+    """
+    Test that power-of-two routing never picks the single busiest backend.
+
+    Returns:
+        None
+    """
+    pool = LlamaBackendPool(URLS, routing=ROUTING_POWER_OF_TWO)
+    pool.backends[0].in_flight = 10
+
+    chosen = {pool.choose().base_url for _ in range(50)}
+
+    assert "http://llama-a:8080" not in chosen
+
+
+def test_sticky_routing_is_stable_and_fails_over():
+    """
+    Test that a sticky key keeps hitting one backend until that backend goes down.
+
+    Returns:
+        None
+    """
+    pool = LlamaBackendPool(URLS, sticky=True)
+    first = pool.choose("user-1")
+    first.in_flight = 5
+
+    assert pool.choose("user-1") is first
+
+    first.healthy = False
+    assert pool.choose("user-1") is not first
+
+
+@pytest.mark.asyncio
+async def test_failed_backend_leaves_rotation_until_health_check_passes():
+    """
+    Test that a transport failure removes a backend and a health check restores it.
+
+    Returns:
+        None
+    """
+    pool = LlamaBackendPool(URLS[:2])
+
+    with pytest.raises(httpx.ConnectError):
+        async with pool.acquire():
+            raise httpx.ConnectError("Connection refused")
+
+    assert pool.backends[0].healthy is False
+    assert pool.backends[0].failures == 1
+    assert pool.choose().base_url == "http://llama-b:8080"
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+    await pool.check_health(client)
+
+    assert all(backend.healthy for backend in pool.backends)
@@ -0,0 +1,133 @@
+"""
+Tests for the LLM response cache.
+"""
+
+import pytest
+
+from app.services.llm_cache import LLMResponseCache, make_cache_key
+
+
+def test_cache_key_normalizes_whitespace():
+    """
+    Test that insignificant whitespace does not change the cache key.
+
+    Returns:
+        None
+    """
+    key = make_cache_key("Line one\n\n\n\nLine two  \n", "llama", "model", {"max_tokens": 5})
+
+    assert key == make_cache_key("Line one\n\nLine two", "llama", "model", {"max_tokens": 5})
+    assert key != make_cache_key("Line one\n\nLine two", "openai", "model", {"max_tokens": 5})
+    assert key != make_cache_key("Line one\n\nLine two", "llama", "model", {"max_tokens": 6})
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_stats():
+    """
+    Test that the least recently used entry is evicted first.
+
+    Returns:
+        None
+    """
+    cache = LLMResponseCache(max_entries=2, ttl_seconds=60)
+
+    await cache.set("a", "A")
+    await cache.set("b", "B")
+    assert await cache.get("a") == "A"
+    await cache.set("c", "C")
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "A"
+    assert await cache.get("c") == "C"
+    stats = cache.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_ttl_expiry(monkeypatch):
+    """
+    Test that expired entries are treated as misses.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    now = [1000.0]
+    monkeypatch.setattr("app.services.llm_cache.time.time", lambda: now[0])
+    cache = LLMResponseCache(max_entries=10, ttl_seconds=5)
+
+    await cache.set("key", "value")
+    now[0] += 10
+
+    assert await cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_sqlite_tier_survives_restart(tmp_path):
+    """
+    Test that entries stored in the SQLite tier are served by a new cache instance.
+
+    Args:
+        tmp_path: Pytest temporary directory.
+
+    Returns:
+        None
+    """
+    path = str(tmp_path / "cache.db")
+    cache = LLMResponseCache(max_entries=10, ttl_seconds=60, sqlite_path=path)
+    await cache.set("key", "value")
+    cache.close()
+
+    restarted = LLMResponseCache(max_entries=10, ttl_seconds=60, sqlite_path=path)
+    assert await restarted.get("key") == "value"
+    assert restarted.stats()["disk_hits"] == 1
+
+    await restarted.invalidate()
+    assert await restarted.get("key") is None
+    restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_tier_prunes_expired_and_least_recently_used_rows(tmp_path, monkeypatch):
+    """
+    Test that the SQLite tier stays within its bound instead of growing with every write.
+
+    Args:
+        tmp_path: Pytest temporary directory.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    now = [1000.0]
+    monkeypatch.setattr("app.services.llm_cache.time.time", lambda: now[0])
+    monkeypatch.setattr("app.services.llm_cache._SQLiteTier.PRUNE_EVERY", 1)
+    path = str(tmp_path / "cache.db")
+    cache = LLMResponseCache(max_entries=1, ttl_seconds=60, sqlite_path=path, sqlite_max_entries=3)
+
+    await cache.set("stale", "S")
+    now[0] += 100
+    for key in ("a", "b", "c"):
+        await cache.set(key, key.upper())
+        now[0] += 1
+    # Read "a" from disk so "b" becomes the least recently used row
+    cache._entries.clear()
+    assert await cache.get("a") == "A"
+    await cache.set("d", "D")
+    assert cache.stats()["disk_pruned"] == 2
+    cache.close()
+
+    restarted = LLMResponseCache(max_entries=10, ttl_seconds=60, sqlite_path=path)
+    assert [await restarted.get(key) for key in ("stale", "a", "b", "c", "d")] == [
+        None,
+        "A",
+        None,
+        "C",
+        "D",
+    ]
+    restarted.close()
@@ -2,12 +2,21 @@
 Tests for the LLM manager service.
 """
 
-from unittest.mock import MagicMock, patch
+import asyncio
+import importlib
+import json
+import time
+from unittest.mock import patch
 
+import httpx
 import pytest
 
+from app.core.config import settings
 from app.models.llm import LLMType
+from app.services.document_limits import GenerationBudget
+from app.services.llm_cache import LLMResponseCache
 from app.services.llm_manager import LLMConnectionManager
+from app.services.prompt_cache import PromptCacheStats
 
 
 @pytest.fixture
@@ -21,7 +30,8 @@ def llm_manager():
     return LLMConnectionManager()
 
 
-def test_connect_openai(llm_manager, monkeypatch):
+@pytest.mark.asyncio
+async def test_connect_openai(llm_manager, monkeypatch):
     """
     Test connecting to OpenAI.
 
@@ -34,7 +44,7 @@ def test_connect_openai(llm_manager, monkeypatch):
     """
 
     # Create a mock implementation of connect_openai
-    def mock_connect_openai(api_key):
+    async def mock_connect_openai(api_key):
         llm_manager.llm_type = LLMType.OPENAI
         llm_manager.api_key = api_key
         llm_manager.is_connected = True
@@ -45,7 +55,7 @@ def test_connect_openai(llm_manager, monkeypatch):
 
     try:
         # Test connection
-        llm_manager.connect_openai("test_api_key")
+        await llm_manager.connect_openai("test_api_key")
 
         # Verify
         assert llm_manager.is_connected is True
@@ -56,7 +66,8 @@ def test_connect_openai(llm_manager, monkeypatch):
         llm_manager.connect_openai = original_method
 
 
-def test_connect_llama(llm_manager):
+@pytest.mark.asyncio
+async def test_connect_llama(llm_manager):
     """
     Test connecting to Llama.
 
@@ -66,20 +77,21 @@ def test_connect_llama(llm_manager):
     Returns:
         None
     """
-    with patch("requests.get") as mock_get:
-        # Setup mock
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_get.return_value = mock_response
 
-        # Test connection
-        llm_manager.connect_llama("localhost", "8080")
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url == "http://localhost:8080/v1/models"
+        return httpx.Response(200, json={"data": []})
 
-        # Verify
-        assert llm_manager.is_connected is True
-        assert llm_manager.llm_type == LLMType.LLAMA
-        assert llm_manager.host == "http://localhost"
-        assert llm_manager.port == "8080"
+    llm_manager._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    # Test connection
+    await llm_manager.connect_llama("localhost", "8080")
+
+    # Verify
+    assert llm_manager.is_connected is True
+    assert llm_manager.llm_type == LLMType.LLAMA
+    assert llm_manager.host == "http://localhost"
+    assert llm_manager.port == "8080"
 
 
 def test_disconnect(llm_manager):
@@ -154,3 +166,209 @@ async def test_generate_text_llama(llm_manager):
 
         # Verify
         assert response == "Test response"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_llama_generations_do_not_serialize(llm_manager):
+    """
+    Test that concurrent Llama generations overlap instead of blocking each other.
+
+    Args:
+        llm_manager: LLM manager instance.
+
+    Returns:
+        None
+    """
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "Done"}}]})
+
+    llm_manager._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    llm_manager.llm_type = LLMType.LLAMA
+    llm_manager.host = "http://localhost"
+    llm_manager.port = "8080"
+    llm_manager.is_connected = True
+
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(llm_manager.generate_text("Prompt") for _ in range(5)))
+    elapsed = time.perf_counter() - start
+
+    assert responses == ["Done"] * 5
+    assert elapsed < 0.6
+
+
+@pytest.mark.asyncio
+async def test_stream_text_llama(llm_manager):
+    """
+    Test streaming text with Llama.
+
+    Args:
+        llm_manager: LLM manager instance.
+
+    Returns:
+        None
+    """
+    body = (
+        'data: {"choices": [{"delta": {"content": "Hello"}}]}\n\n'
+        'data: {"choices": [{"delta": {"content": " world"}}]}\n\n'
+        'data: {"choices": [], "usage": {"prompt_tokens": 4, "completion_tokens": 2}}\n\n'
+        "data: [DONE]\n\n"
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, text=body, headers={"Content-Type": "text/event-stream"})
+
+    llm_manager._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    llm_manager.llm_type = LLMType.LLAMA
+    llm_manager.host = "http://localhost"
+    llm_manager.port = "8080"
+    llm_manager.is_connected = True
+
+    chunks = [chunk async for chunk in llm_manager.stream_text("Test prompt")]
+
+    assert "".join(chunk.delta for chunk in chunks) == "Hello world"
+    assert chunks[-1].usage == {"prompt_tokens": 4, "completion_tokens": 2}
+
+
+@pytest.mark.asyncio
+async def test_generate_text_uses_response_cache(llm_manager, monkeypatch):
+    """
+    Test that cached generations skip the upstream call unless refreshed.
+
+    Args:
+        llm_manager: LLM manager instance.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(
+        importlib.import_module("app.services.llm_manager"),
+        "response_cache",
+        LLMResponseCache(max_entries=10, ttl_seconds=60),
+    )
+    llm_manager.llm_type = LLMType.OPENAI
+    llm_manager.is_connected = True
+
+    with patch.object(
+        llm_manager, "_generate_openai_text", side_effect=["First", "Second"]
+    ) as mock_generate:
+        assert await llm_manager.generate_text("Prompt", use_cache=True) == "First"
+        assert await llm_manager.generate_text("Prompt", use_cache=True) == "First"
+        assert (
+            await llm_manager.generate_text("Prompt", use_cache=True, refresh_cache=True)
+            == "Second"
+        )
+        assert await llm_manager.generate_text("Prompt", use_cache=True) == "Second"
+
+    assert mock_generate.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_connect_llama_pool_skips_unreachable_endpoints(llm_manager):
+    """
+    Test connecting to several Llama servers when one of them is down.
+
+    Args:
+        llm_manager: LLM manager instance.
+
+    Returns:
+        None
+    """
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "llama-a":
+            raise httpx.ConnectError("Connection refused")
+        if request.url.path == "/v1/models":
+            return httpx.Response(200, json={"data": []})
+        return httpx.Response(200, json={"choices": [{"message": {"content": request.url.host}}]})
+
+    llm_manager._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    await llm_manager.connect_llama_pool([("llama-a", "8080"), ("llama-b", "8080")])
+    try:
+        assert llm_manager.is_connected is True
+        assert llm_manager.host == "http://llama-b"
+        assert await llm_manager.generate_text("Prompt") == "llama-b"
+        stats = llm_manager.llama_pool.stats()
+        assert [backend["healthy"] for backend in stats["backends"]] == [False, True]
+    finally:
+        llm_manager.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_llama_requests_use_prompt_cache(llm_manager, monkeypatch):
+    """
+    Test that Llama.cpp requests ask for prompt caching on a sticky slot and record timings.
+
+    Args:
+        llm_manager: LLM manager instance.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    manager_module = importlib.import_module("app.services.llm_manager")
+    stats = PromptCacheStats()
+    monkeypatch.setattr(manager_module, "prompt_cache_stats", stats)
+    monkeypatch.setattr(settings, "LLAMA_SLOTS_PER_SERVER", 4)
+    payloads = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payloads.append(json.loads(request.content))
+        timings = {"prompt_n": 20, "cache_n": 180, "prompt_ms": 50.0}
+        return httpx.Response(
+            200, json={"choices": [{"message": {"content": "Done"}}], "timings": timings}
+        )
+
+    llm_manager._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    llm_manager.llm_type = LLMType.LLAMA
+    llm_manager.host = "http://localhost"
+    llm_manager.port = "8080"
+    llm_manager.is_connected = True
+
+    await llm_manager.generate_text("First prompt", sticky_key="user-1")
+    await llm_manager.generate_text("Second prompt", sticky_key="user-1")
+
+    assert all(payload["cache_prompt"] is True for payload in payloads)
+    assert payloads[0]["id_slot"] == payloads[1]["id_slot"]
+    assert 0 <= payloads[0]["id_slot"] < 4
+    assert stats.stats()["prompt_tokens_cached"] == 360
+    assert stats.stats()["estimated_ms_saved"] == 900.0
+
+
+@pytest.mark.asyncio
+async def test_generation_budget_bounds_llama_requests(llm_manager):
+    """
+    Test that a generation budget sets max_tokens and stop sequences, and times out.
+
+    Args:
+        llm_manager: LLM manager instance.
+
+    Returns:
+        None
+    """
+    payloads = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        payloads.append(json.loads(request.content))
+        await asyncio.sleep(payloads[-1]["max_tokens"] / 1000)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "Done"}}]})
+
+    llm_manager._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    llm_manager.llm_type = LLMType.LLAMA
+    llm_manager.host = "http://localhost"
+    llm_manager.port = "8080"
+    llm_manager.is_connected = True
+
+    fast = GenerationBudget(max_tokens=10, stop=("\n\nNote:",), timeout_seconds=1.0)
+    assert await llm_manager.generate_text("Prompt", budget=fast) == "Done"
+    assert payloads[0]["max_tokens"] == 10
+    assert payloads[0]["stop"] == ["\n\nNote:"]
+    assert llm_manager.cache_key("Prompt", fast) != llm_manager.cache_key("Prompt")
+
+    slow = GenerationBudget(max_tokens=500, timeout_seconds=0.05)
+    with pytest.raises(Exception, match="timed out"):
+        await llm_manager.generate_text("Prompt", budget=slow)
@@ -0,0 +1,166 @@
+"""
+Tests for the per-user LLM connection registry.
+"""
+
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.models.llm import LLMType
+from app.services.admission import AdmissionRejected
+from app.services.llm_manager import LLMConnectionManager
+from app.services.llm_registry import (
+    DEFAULT_CONNECTION_KEY,
+    LLMConnectionRegistry,
+    ProfileRequiresUser,
+    connection_key,
+)
+
+
+def _user():
+    """
+    Create a stand-in user with a random ID.
+
+    Returns:
+        SimpleNamespace: Object with an ``id`` attribute.
+    """
+    return SimpleNamespace(id=uuid.uuid4())
+
+
+def _connect(manager: LLMConnectionManager) -> None:
+    """
+    Mark a manager as connected to Llama without any network access.
+
+    Args:
+        manager: LLM manager instance.
+
+    Returns:
+        None
+    """
+    manager.llm_type = LLMType.LLAMA
+    manager.host = "http://localhost"
+    manager.port = "8080"
+    manager.is_connected = True
+
+
+@pytest.fixture
+def registry():
+    """
+    Create a registry with a fresh default connection.
+
+    Returns:
+        LLMConnectionRegistry: A registry that holds at most two user connections.
+    """
+    return LLMConnectionRegistry(LLMConnectionManager(), max_connections=2, idle_seconds=3600)
+
+
+def test_connection_key():
+    """
+    Test registry keys for anonymous users, users and named profiles.
+
+    Returns:
+        None
+    """
+    user, other = _user(), _user()
+
+    assert connection_key(None) == DEFAULT_CONNECTION_KEY
+    assert connection_key(user) == f"user:{user.id}"
+    assert connection_key(user, "team-a") == f"user:{user.id}:profile:team-a"
+    assert connection_key(other, "team-a") != connection_key(user, "team-a")
+    with pytest.raises(ProfileRequiresUser):
+        connection_key(None, "team-a")
+
+
+def test_users_get_isolated_connections(registry):
+    """
+    Test that one user's connection does not replace another's or the default.
+
+    Args:
+        registry: Registry instance.
+
+    Returns:
+        None
+    """
+    alice, bob = _user(), _user()
+    _connect(registry.connection_for(connection_key(alice)))
+
+    assert registry.resolve(alice) is not registry.default
+    assert registry.resolve(alice).is_connected is True
+    # Users without their own connection fall back to the default one
+    assert registry.resolve(bob) is registry.default
+    assert registry.default.is_connected is False
+
+
+def test_lru_eviction_skips_busy_connections(registry):
+    """
+    Test that the least recently used idle connection is evicted at capacity.
+
+    Args:
+        registry: Registry instance.
+
+    Returns:
+        None
+    """
+    first, second, third = _user(), _user(), _user()
+    busy = registry.connection_for(connection_key(first))
+    _connect(busy)
+    busy.in_flight = 1
+    idle = registry.connection_for(connection_key(second))
+    _connect(idle)
+
+    registry.connection_for(connection_key(third))
+
+    assert registry.resolve(first) is busy
+    assert registry.resolve(second) is registry.default
+    assert idle.is_connected is False
+    assert registry.stats()["evictions"] == 1
+
+
+def test_idle_connections_expire(registry):
+    """
+    Test that connections idle longer than the limit are evicted.
+
+    Args:
+        registry: Registry instance.
+
+    Returns:
+        None
+    """
+    user = _user()
+    manager = registry.connection_for(connection_key(user))
+    _connect(manager)
+    manager.last_used -= 7200
+
+    registry.connection_for(connection_key(_user()))
+
+    assert registry.resolve(user) is registry.default
+
+
+@pytest.mark.asyncio
+async def test_users_on_different_api_keys_do_not_share_admission_slots(registry, monkeypatch):
+    """
+    Test that one user's busy API key does not use up another user's generation slots.
+
+    Args:
+        registry: Registry instance.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY_PER_BACKEND", 1)
+    monkeypatch.setattr(settings, "LLM_MAX_QUEUE_PER_BACKEND", 0)
+    controllers = []
+    for _ in range(2):
+        manager = registry.connection_for(connection_key(_user()))
+        manager.llm_type, manager.api_key = LLMType.OPENAI, f"sk-{uuid.uuid4().hex}"
+        controllers.append(manager.admission())
+    alice, bob = controllers
+
+    async with alice.slot():
+        with pytest.raises(AdmissionRejected):
+            alice.check()
+        async with bob.slot():
+            assert bob.active == 1
@@ -0,0 +1,150 @@
+"""
+Tests for the deterministic LLM simulator and its stand-in server.
+"""
+
+import time
+
+import httpx
+import pytest
+
+from app.models.llm import LLMType
+from app.services.llm_manager import LLMConnectionManager
+from app.services.llm_simulator import LLMSimulator, SimulatedError, SimulatorConfig
+from app.simulator import create_simulator_app
+
+FAST = SimulatorConfig(ttft_ms=0, tokens_per_second=0, output_tokens=16)
+
+
+@pytest.mark.asyncio
+async def test_completions_are_deterministic():
+    """
+    Test that a prompt always yields the same completion, and other prompts differ.
+
+    Returns:
+        None
+    """
+    simulator = LLMSimulator(FAST)
+
+    first = await simulator.complete("Rewrite this")
+    second = await simulator.complete("Rewrite this")
+    other = await simulator.complete("Summarize this")
+    streamed = "".join([token async for token in simulator.stream("Rewrite this")])
+
+    assert first == second == streamed
+    assert first != other
+    assert len(first.split()) == 16
+    assert len((await simulator.complete("Rewrite this", max_tokens=4)).split()) == 4
+
+
+@pytest.mark.asyncio
+async def test_error_rate_is_reproducible():
+    """
+    Test that injected errors follow the configured rate and repeat with the same seed.
+
+    Returns:
+        None
+    """
+
+    async def outcomes(seed):
+        simulator = LLMSimulator(
+            SimulatorConfig(ttft_ms=0, tokens_per_second=0, error_rate=0.3, seed=seed)
+        )
+        results = []
+        for _ in range(200):
+            try:
+                await simulator.complete("prompt")
+                results.append(True)
+            except SimulatedError:
+                results.append(False)
+        return results
+
+    first = await outcomes(seed=7)
+
+    assert first == await outcomes(seed=7)
+    assert 40 < first.count(False) < 80
+
+
+@pytest.mark.asyncio
+async def test_stream_timing_follows_config():
+    """
+    Test that the first token waits for the TTFT and the rest follow the token rate.
+
+    Returns:
+        None
+    """
+    simulator = LLMSimulator(SimulatorConfig(ttft_ms=50, tokens_per_second=100, output_tokens=6))
+    start = time.perf_counter()
+    arrivals = []
+
+    async for _ in simulator.stream("prompt"):
+        arrivals.append(time.perf_counter() - start)
+
+    assert arrivals[0] >= 0.05
+    assert arrivals[-1] >= 0.05 + 5 * 0.01
+    assert simulator.stats()["tokens"] == 6
+
+
+@pytest.mark.asyncio
+async def test_simulated_connection_generates_and_streams():
+    """
+    Test the built-in simulated provider through the LLM manager.
+
+    Returns:
+        None
+    """
+    manager = LLMConnectionManager()
+    await manager.connect_simulated(FAST)
+
+    text = await manager.generate_text("Improve this paragraph")
+    chunks = [chunk async for chunk in manager.stream_text("Improve this paragraph")]
+
+    assert manager.llm_type == LLMType.SIMULATED
+    assert manager.model == "simulated"
+    assert "".join(chunk.delta for chunk in chunks) == text
+    assert chunks[-1].usage["completion_tokens"] == 16
+
+
+@pytest.mark.asyncio
+async def test_stand_in_server_speaks_the_llama_api():
+    """
+    Test that the Llama.cpp client path works unchanged against the stand-in server.
+
+    Returns:
+        None
+    """
+    simulator = LLMSimulator(FAST)
+    manager = LLMConnectionManager()
+    manager._http_client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_simulator_app(simulator))
+    )
+
+    await manager.connect_llama("simulator", "8081")
+    text = await manager.generate_text("Improve this paragraph")
+    chunks = [chunk async for chunk in manager.stream_text("Improve this paragraph")]
+
+    assert len(text.split()) == 16
+    assert "".join(chunk.delta for chunk in chunks) == text
+    assert chunks[-1].usage["completion_tokens"] == 16
+    assert simulator.stats()["requests"] == 2
+    await manager.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stand_in_server_reports_injected_errors():
+    """
+    Test that injected failures surface as server errors.
+
+    Returns:
+        None
+    """
+    app = create_simulator_app(
+        LLMSimulator(SimulatorConfig(ttft_ms=0, tokens_per_second=0, error_rate=1.0))
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://simulator") as client:
+        for stream in (False, True):
+            response = await client.post(
+                "/v1/chat/completions",
+                json={"messages": [{"role": "user", "content": "hi"}], "stream": stream},
+            )
+            assert response.status_code == 500
@@ -0,0 +1,101 @@
+"""
+Tests for output validation and the condense retry loop.
+"""
+
+import pytest
+
+from app.services.output_validator import (
+    STAGE_CONDENSE,
+    STAGE_GENERATE,
+    generate_validated,
+    validate_output,
+)
+
+
+class ScriptedManager:
+    """LLM manager stand-in returning scripted responses in order."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.prompts = []
+        self.budgets = []
+
+    async def generate_text(self, prompt, budget=None, **kwargs):
+        self.prompts.append(prompt)
+        self.budgets.append(budget)
+        return self.responses.pop(0)
+
+
+def test_validate_output_checks_length_and_markdown():
+    """
+    Test that limits and plain-text rules are enforced per document type.
+
+    Returns:
+        None
+    """
+    assert validate_output("Short and plain #remote", "X") == []
+    assert validate_output("x" * 281, "X") == ["is 281 characters long; the limit is 280"]
+    assert validate_output("# Title\n**Bold** claim", "Threads") == [
+        "uses Markdown headings",
+        "uses bold Markdown",
+    ]
+    assert validate_output("# Title\n" + "x" * 1000, "Blog") == []
+
+
+@pytest.mark.asyncio
+async def test_valid_output_needs_one_attempt():
+    """
+    Test that valid output is returned after the first generation.
+
+    Returns:
+        None
+    """
+    manager = ScriptedManager(["A tidy post."])
+
+    text, attempts = await generate_validated(manager, "Prompt", "X", "Source text")
+
+    assert text == "A tidy post."
+    assert [a.stage for a in attempts] == [STAGE_GENERATE]
+    assert attempts[0].violations == []
+
+
+@pytest.mark.asyncio
+async def test_invalid_output_is_condensed_not_regenerated():
+    """
+    Test that a failing output is condensed with a prompt built from the output itself.
+
+    Returns:
+        None
+    """
+    too_long = "Remote teams write things down. " * 12
+    manager = ScriptedManager([too_long, "Remote teams write things down."])
+
+    text, attempts = await generate_validated(manager, "Original prompt", "X", "Source")
+
+    assert text == "Remote teams write things down."
+    assert [a.stage for a in attempts] == [STAGE_GENERATE, STAGE_CONDENSE]
+    assert attempts[0].violations and not attempts[1].violations
+    assert all(a.elapsed_ms >= 0 for a in attempts)
+    assert too_long.strip() in manager.prompts[1]
+    assert "Original prompt" not in manager.prompts[1]
+    assert manager.budgets[1].max_tokens < 512
+
+
+@pytest.mark.asyncio
+async def test_retries_are_bounded_then_trimmed():
+    """
+    Test that output still failing after the last attempt is trimmed locally.
+
+    Returns:
+        None
+    """
+    too_long = "Remote teams write things down. " * 20
+    manager = ScriptedManager([too_long] * 5)
+
+    text, attempts = await generate_validated(
+        manager, "Prompt", "Threads", "Source", max_attempts=2
+    )
+
+    assert len(attempts) == 2
+    assert attempts[-1].violations
+    assert len(text) <= 500
@@ -0,0 +1,92 @@
+"""
+Tests for the pooled password hasher.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.security import get_password_hash
+from app.services.admission import AdmissionRejected
+from app.services.password_hasher import PasswordHasher
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_round_trip():
+    """
+    Test that hashes produced in the pool verify in the pool.
+
+    Returns:
+        None
+    """
+    hasher = PasswordHasher(executor="thread", max_workers=2, max_queue=4, retry_after=1)
+
+    password_hash = await hasher.hash("Password123!")
+
+    assert await hasher.verify("Password123!", password_hash)
+    assert not await hasher.verify("wrong-password", password_hash)
+    assert hasher.stats()["admitted"] == 3
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_while_hashing():
+    """
+    Test that the event loop keeps running other work during concurrent verifications.
+
+    Returns:
+        None
+    """
+    hasher = PasswordHasher(executor="thread", max_workers=2, max_queue=16, retry_after=1)
+    password_hash = get_password_hash("Password123!")
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.005)
+
+    tick_task = asyncio.ensure_future(ticker())
+    await asyncio.gather(*(hasher.verify("Password123!", password_hash) for _ in range(6)))
+    tick_task.cancel()
+
+    gaps = [later - earlier for earlier, later in zip(ticks, ticks[1:])]
+    # A single inline bcrypt verification would block the loop for far longer than this
+    assert max(gaps) < 0.1
+    assert hasher.stats()["wait_ms_max"] > 0
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects():
+    """
+    Test that calls beyond the pool and queue capacity are rejected.
+
+    Returns:
+        None
+    """
+    hasher = PasswordHasher(executor="thread", max_workers=1, max_queue=1, retry_after=3)
+    password_hash = get_password_hash("Password123!")
+
+    results = await asyncio.gather(
+        *(hasher.verify("Password123!", password_hash) for _ in range(3)),
+        return_exceptions=True,
+    )
+
+    rejected = [r for r in results if isinstance(r, AdmissionRejected)]
+    assert len(rejected) == 1
+    assert rejected[0].retry_after == 3
+    assert hasher.stats()["rejected"] == 1
+    hasher.shutdown()
+
+
+def test_unknown_executor():
+    """
+    Test that an unknown executor kind is refused.
+
+    Returns:
+        None
+    """
+    with pytest.raises(ValueError):
+        PasswordHasher(executor="fiber", max_workers=1, max_queue=1, retry_after=1)
@@ -0,0 +1,143 @@
+"""
+Tests for chat context retrieval.
+"""
+
+import pytest
+
+from app.core.config import settings
+from app.services.document_limits import estimate_tokens
+from app.services.retrieval import BM25Index, RetrievalIndexCache, select_context
+
+TOPICS = {
+    "Hiring": "Recruiters screen candidates, schedule interviews and negotiate salary offers.",
+    "Onboarding": "New hires get a laptop, a buddy and a checklist for their first week.",
+    "Security": "Laptops use disk encryption and every account needs two-factor login.",
+    "Meetings": "Standups are short; decisions from long meetings are written down.",
+    "Budget": "Travel spending is capped per quarter and approved by the finance team.",
+}
+
+
+def long_document(repeat=6):
+    """
+    Build a Markdown document with one long section per topic.
+
+    Args:
+        repeat: Times each section's paragraph is repeated.
+
+    Returns:
+        The document text.
+    """
+    sections = []
+    for title, sentence in TOPICS.items():
+        paragraphs = "\n\n".join(f"{sentence} Note {i}." for i in range(repeat))
+        sections.append(f"## {title}\n\n{paragraphs}")
+    return "# Team handbook\n\n" + "\n\n".join(sections)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """
+    Use a fresh index cache and a small context budget.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        The cache.
+    """
+    cache = RetrievalIndexCache(max_entries=2)
+    monkeypatch.setattr("app.services.retrieval.retrieval_cache", cache)
+    monkeypatch.setattr(settings, "CHAT_CONTEXT_TOKENS", 300)
+    monkeypatch.setattr(settings, "RETRIEVAL_PASSAGE_CHARS", 400)
+    monkeypatch.setattr(settings, "RETRIEVAL_TOP_K", 2)
+    return cache
+
+
+def test_bm25_ranks_the_passage_about_the_query_first():
+    """
+    Test that rare query terms outweigh common ones.
+
+    Returns:
+        None
+    """
+    index = BM25Index(list(TOPICS.values()))
+
+    ranked = index.search("Do laptops use disk encryption?", k=3)
+
+    assert ranked[0][0] == list(TOPICS).index("Security")
+    assert index.search("unrelated words entirely", k=3) == []
+
+
+def test_short_contexts_are_sent_whole(cache):
+    """
+    Test that a context within the budget is left alone and nothing is indexed.
+
+    Args:
+        cache: Fresh index cache.
+
+    Returns:
+        None
+    """
+    context = "A short draft about hiring."
+
+    assert select_context(context, "Is this clear?") is context
+    assert select_context(None, "Hello") is None
+    assert cache.builds == 0
+
+
+def test_long_contexts_keep_the_outline_and_relevant_passages_in_budget(cache):
+    """
+    Test that a long context is cut to its outline and the passages the message is about.
+
+    Args:
+        cache: Fresh index cache.
+
+    Returns:
+        None
+    """
+    document = long_document()
+
+    selected = select_context(document, "What does the handbook say about two-factor login?")
+
+    assert estimate_tokens(selected) <= settings.CHAT_CONTEXT_TOKENS < estimate_tokens(document)
+    assert selected.startswith("Document outline:\n# Team handbook\n## Hiring")
+    assert "two-factor login" in selected
+    assert "salary offers" not in selected
+    assert "(from ## Security)" in selected or "## Security\n" in selected
+
+
+def test_indexes_are_built_once_per_document_version(cache):
+    """
+    Test that repeated questions reuse the index and an edited document gets a new one.
+
+    Args:
+        cache: Fresh index cache.
+
+    Returns:
+        None
+    """
+    document = long_document()
+
+    select_context(document, "salary offers")
+    select_context(document, "travel spending")
+    select_context(document + "\n\nOne more line.", "travel spending")
+
+    assert cache.builds == 2
+    assert cache.hits == 1
+    assert cache.stats()["queries"] == 3
+
+
+def test_messages_matching_nothing_get_the_start_of_the_document(cache):
+    """
+    Test that a vague message still gets some of the document.
+
+    Args:
+        cache: Fresh index cache.
+
+    Returns:
+        None
+    """
+    selected = select_context(long_document(), "Summarize this")
+
+    assert TOPICS["Hiring"] in selected
+    assert TOPICS["Budget"] not in selected
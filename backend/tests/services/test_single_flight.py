@@ -0,0 +1,147 @@
+"""
+Tests for single-flight request coalescing.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_upstream_call():
+    """
+    Test that concurrent calls with the same key run the upstream call once.
+
+    Returns:
+        None
+    """
+    flight = SingleFlight()
+    calls = 0
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    results = await asyncio.gather(*(flight.do("key", upstream) for _ in range(3)))
+
+    assert results == ["result"] * 3
+    assert calls == 1
+    assert flight.stats()["coalesced"] == 2
+    assert flight.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter():
+    """
+    Test that an upstream error is raised in every waiter.
+
+    Returns:
+        None
+    """
+    flight = SingleFlight()
+
+    async def upstream():
+        await asyncio.sleep(0.01)
+        raise Exception("Upstream failed")
+
+    results = await asyncio.gather(
+        flight.do("key", upstream), flight.do("key", upstream), return_exceptions=True
+    )
+
+    assert [str(result) for result in results] == ["Upstream failed"] * 2
+
+
+@pytest.mark.asyncio
+async def test_upstream_cancelled_only_after_last_waiter_leaves():
+    """
+    Test that cancelling one waiter leaves the shared call running for the others.
+
+    Returns:
+        None
+    """
+    flight = SingleFlight()
+    upstream_cancelled = asyncio.Event()
+
+    async def upstream():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            upstream_cancelled.set()
+            raise
+
+    first = asyncio.ensure_future(flight.do("key", upstream))
+    second = asyncio.ensure_future(flight.do("key", upstream))
+    await asyncio.sleep(0.01)
+
+    first.cancel()
+    await asyncio.sleep(0.01)
+    assert not upstream_cancelled.is_set()
+
+    second.cancel()
+    await asyncio.sleep(0.01)
+    assert upstream_cancelled.is_set()
+    assert flight.stats()["cancelled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_callers_after_a_cancel_start_a_new_call():
+    """
+    Test that a caller arriving while an abandoned call is still cancelling is not joined to it.
+
+    Returns:
+        None
+    """
+    flight = SingleFlight()
+
+    async def slow_to_cancel():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            # Closing the upstream connection takes a while
+            await asyncio.sleep(0.05)
+            raise
+
+    async def fresh():
+        return "fresh"
+
+    abandoned = asyncio.ensure_future(flight.do("key", slow_to_cancel))
+    await asyncio.sleep(0.01)
+    abandoned.cancel()
+    await asyncio.sleep(0)
+
+    assert await flight.do("key", fresh) == "fresh"
+    assert flight.stats()["started"] == 2
+    # Let the abandoned call finish cancelling
+    await asyncio.sleep(0.1)
+
+
+@pytest.mark.asyncio
+async def test_streams_are_shared_and_replayed():
+    """
+    Test that concurrent subscribers share one upstream stream and see every item.
+
+    Returns:
+        None
+    """
+    flight = SingleFlight()
+    calls = 0
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        for token in ["a", "b", "c"]:
+            await asyncio.sleep(0.01)
+            yield token
+
+    async def consume(delay):
+        await asyncio.sleep(delay)
+        return [item async for item in flight.stream("key", upstream)]
+
+    results = await asyncio.gather(consume(0), consume(0.015))
+
+    assert results == [["a", "b", "c"], ["a", "b", "c"]]
+    assert calls == 1
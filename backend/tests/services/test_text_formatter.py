@@ -2,8 +2,17 @@
 Tests for the text formatter service.
 """
 
-from app.models.text import ActionRequest, EvalRequest
-from app.services.text_formatter import format_action_prompt, format_eval_prompt
+from app.models.text import ActionRequest, EvalCriterion, EvalRequest
+from app.services.text_formatter import (
+    format_action_prompt,
+    format_chat_summary_prompt,
+    format_chunk_action_prompt,
+    format_condense_prompt,
+    format_consistency_prompt,
+    format_eval_prompt,
+    format_fused_eval_prompt,
+    parse_eval_score,
+)
 
 
 def test_format_action_prompt_expand():
@@ -113,3 +122,113 @@ def test_format_eval_prompt_clarity():
     assert "This is a test text" in prompt
     assert "clarity" in prompt.lower()
     assert "score" in prompt.lower() or "rating" in prompt.lower()
+
+
+def test_parse_eval_score():
+    """Test extracting the score from an evaluation, with a default when there is none."""
+    assert parse_eval_score("Solid text.\n\n**Rating: 8/10**") == 8
+    assert parse_eval_score("Score: 3") == 3
+    assert parse_eval_score("Rating: 7/10, score: 2") == 7
+    assert parse_eval_score("Rating: 42/10") == 5
+    assert parse_eval_score("No number here") == 5
+
+
+def test_action_prompts_share_a_prefix_up_to_the_task():
+    """
+    Test that actions on the same text differ only after the text, for prompt caching.
+
+    Returns:
+        None
+    """
+    common = {
+        "text": "This is a test.",
+        "about_me": "I am a writer",
+        "preferred_style": "Clear and concise",
+        "tone": "professional",
+        "document_type": "Blog",
+    }
+    expand = format_action_prompt(
+        ActionRequest(action="expand", action_description="Make the text longer", **common)
+    )
+    shorten = format_action_prompt(
+        ActionRequest(action="shorten", action_description="Make the text shorter", **common)
+    )
+
+    prefix, _ = expand.split("Task:", 1)
+
+    assert shorten.startswith(prefix)
+    assert prefix.index("I am a writer") < prefix.index("This is a test.")
+    assert expand.endswith("Task: Make the text longer")
+
+
+def test_long_document_prompts_contain_only_instructions():
+    """
+    Test that the chunk and consistency prompts carry no source-code comments.
+
+    Returns:
+        None
+    """
+    request = ActionRequest(
+        text="First part.\n\nSecond part.",
+        action="rewrite",
+        action_description="Rewrite the text",
+        about_me="I am a writer",
+        preferred_style="Clear and concise",
+        tone="professional",
+    )
+    prompts = [
+        format_chunk_action_prompt(request, "Second part.", 1, 2, ["# Draft"]),
+        format_consistency_prompt(request, "Second part.", "First part.", ""),
+    ]
+
+    assert all("noqa" not in prompt for prompt in prompts)
+    assert prompts[1].startswith("As a writing assistant, you are making one section")
+
+
+def test_evaluation_prompts_contain_only_instructions():
+    """
+    Test that the single and fused evaluation prompts carry no source-code comments.
+
+    Returns:
+        None
+    """
+    criterion = EvalCriterion(eval_name="Clarity", eval_description="Is it clear?")
+    prompts = [
+        format_eval_prompt(EvalRequest(text="This is a test.", **criterion.model_dump())),
+        format_fused_eval_prompt("This is a test.", [criterion]),
+    ]
+
+    assert all("noqa" not in prompt for prompt in prompts)
+    assert prompts[1].endswith('- "Clarity": Is it clear?')
+
+
+def test_condense_prompt_contains_only_instructions():
+    """
+    Test that the condense prompt carries no source-code comments.
+
+    Returns:
+        None
+    """
+    prompt = format_condense_prompt("A post that is too long.", "X", ["Over 280 characters"])
+
+    assert "noqa" not in prompt
+    assert prompt.startswith("Revise the following X post so that it meets its requirements.\n")
+
+
+def test_chat_summary_prompt_contains_only_instructions():
+    """
+    Test that the chat summary prompt carries no source-code comments.
+
+    Returns:
+        None
+    """
+    prompt = format_chat_summary_prompt(None, [("user", "Make it shorter.")], 120)
+
+    assert "noqa" not in prompt
+    assert prompt.startswith(
+        "You are keeping a running summary of a conversation between a user and a writing "
+        "assistant about the user's document.\n\nSummary so far:\n(none yet)\n"
+    )
+    assert prompt.endswith(
+        "drop pleasantries. Write at most 120 words of plain prose and reply with the summary only."
+    )
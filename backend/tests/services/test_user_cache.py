@@ -0,0 +1,89 @@
+"""
+Tests for the authenticated-user cache.
+"""
+
+import time
+import uuid
+
+from app.models.user import User
+from app.services.user_cache import UserCache
+
+
+def _user():
+    """
+    Create a user that is not stored in any database.
+
+    Returns:
+        User: A user with a random ID.
+    """
+    return User(id=uuid.uuid4(), email="cache@example.com", password_hash="hash", is_verified=True)
+
+
+def test_put_and_get_returns_detached_snapshot():
+    """
+    Test that a cached token resolves to a copy of the user.
+
+    Returns:
+        None
+    """
+    cache = UserCache(max_entries=10, ttl_seconds=60, trust_claims=False)
+    user = _user()
+
+    snapshot = cache.put("token", user)
+
+    assert snapshot is not user
+    assert cache.get("token").id == user.id
+    assert cache.stats()["hits"] == 1
+
+
+def test_entries_expire_with_the_token():
+    """
+    Test that an entry never outlives the token it was cached for.
+
+    Returns:
+        None
+    """
+    cache = UserCache(max_entries=10, ttl_seconds=60, trust_claims=False)
+
+    cache.put("token", _user(), token_expires_at=time.time() - 1)
+
+    assert cache.get("token") is None
+
+
+def test_size_bound_evicts_oldest():
+    """
+    Test that the cache holds at most max_entries tokens.
+
+    Returns:
+        None
+    """
+    cache = UserCache(max_entries=2, ttl_seconds=60, trust_claims=False)
+    for token in ["a", "b", "c"]:
+        cache.put(token, _user())
+
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["entries"] == 2
+
+
+def test_invalidate_user_drops_tokens_and_stale_claims():
+    """
+    Test that invalidating a user drops cached tokens and rejects older token claims.
+
+    Returns:
+        None
+    """
+    cache = UserCache(max_entries=10, ttl_seconds=60, trust_claims=True)
+    user = _user()
+    cache.put("first", user)
+    cache.put("second", user)
+    claims = {"email": user.email, "ver": True, "iat": int(time.time()) - 10}
+
+    assert cache.from_claims(user.id, claims).email == user.email
+
+    cache.invalidate_user(user.id)
+
+    assert cache.get("first") is None
+    assert cache.get("second") is None
+    assert cache.from_claims(user.id, claims) is None
+    assert cache.from_claims(user.id, {**claims, "iat": int(time.time()) + 1}) is not None
@@ -0,0 +1,258 @@
+"""
+Tests for the database migrations.
+"""
+
+import json
+import uuid
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from app.db.init_db import ALEMBIC_INI, migrate
+
+# The tables as the original models created them, before there were migrations
+original = sa.MetaData()
+users = sa.Table(
+    "users",
+    original,
+    sa.Column("id", UUID(as_uuid=True), primary_key=True),
+    sa.Column("email", sa.String, unique=True, index=True, nullable=False),
+    sa.Column("password_hash", sa.String, nullable=False),
+    sa.Column("is_verified", sa.Boolean, default=False),
+)
+documents = sa.Table(
+    "documents",
+    original,
+    sa.Column("id", UUID(as_uuid=True), primary_key=True),
+    sa.Column(
+        "user_id",
+        UUID(as_uuid=True),
+        sa.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    ),
+    sa.Column("title", sa.String(255), nullable=False),
+    sa.Column("content", sa.Text, nullable=True),
+    sa.Column("document_type", sa.String(50), nullable=False),
+    sa.Column("created_at", sa.DateTime),
+    sa.Column("updated_at", sa.DateTime),
+)
+document_history = sa.Table(
+    "document_history",
+    original,
+    sa.Column("id", UUID(as_uuid=True), primary_key=True),
+    sa.Column(
+        "document_id",
+        UUID(as_uuid=True),
+        sa.ForeignKey("documents.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    ),
+    sa.Column("content", sa.Text, nullable=False),
+    sa.Column("created_at", sa.DateTime),
+)
+
+
+def alembic_config(connection=None):
+    """
+    Build the Alembic configuration the app migrates with.
+
+    Args:
+        connection: Database connection to run migrations on, if any.
+
+    Returns:
+        The Alembic configuration.
+    """
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def head_revision():
+    """
+    Return the latest migration.
+
+    Returns:
+        The head revision id.
+    """
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def create_original_database(engine, user_id, document_ids, created):
+    """
+    Create the original tables with a user, documents and full-copy history rows.
+
+    Each document gets three history rows, one day apart, inserted newest first.
+
+    Args:
+        engine: Database engine.
+        user_id: Id of the user owning the documents.
+        document_ids: Ids of the documents; the first one was never updated.
+        created: Creation time of the documents and their first history row.
+
+    Returns:
+        None
+    """
+    with engine.begin() as connection:
+        original.create_all(connection)
+        connection.execute(
+            users.insert(), {"id": user_id, "email": "a@example.com", "password_hash": "x"}
+        )
+        for index, document_id in enumerate(document_ids):
+            connection.execute(
+                documents.insert(),
+                {
+                    "id": document_id,
+                    "user_id": user_id,
+                    "title": f"Document {index}",
+                    "document_type": "Custom",
+                    "created_at": created,
+                    "updated_at": None if index == 0 else datetime(2024, 2, 1),
+                },
+            )
+            for day in reversed(range(3)):
+                connection.execute(
+                    document_history.insert(),
+                    {
+                        "id": uuid.uuid4(),
+                        "document_id": document_id,
+                        "content": f"Document {index} on day {day}" + "!" * day,
+                        "created_at": created + timedelta(days=day),
+                    },
+                )
+
+
+def current_revision(connection):
+    """
+    Return the revision a database is stamped with.
+
+    Args:
+        connection: Database connection.
+
+    Returns:
+        The stamped revision id.
+    """
+    return connection.execute(sa.text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def test_a_database_from_before_migrations_is_migrated(tmp_path):
+    """
+    Test that the original tables are altered in place and their rows kept.
+
+    Args:
+        tmp_path: Pytest temporary directory.
+
+    Returns:
+        None
+    """
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'original.db'}")
+    user_id, stale_id, fresh_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    created = datetime(2024, 1, 1)
+    create_original_database(engine, user_id, [stale_id, fresh_id], created)
+
+    with engine.begin() as connection:
+        migrate(connection)
+
+    with engine.connect() as connection:
+        inspector = sa.inspect(connection)
+        indexes = {index["name"] for index in inspector.get_indexes("documents")}
+        updated_at = next(
+            c for c in inspector.get_columns("documents") if c["name"] == "updated_at"
+        )
+        rows = dict(connection.execute(sa.select(documents.c.id, documents.c.updated_at)).all())
+        history = connection.execute(
+            sa.text(
+                "SELECT version, keyframe_version, content, delta, content_length"
+                " FROM document_history ORDER BY document_id, version"
+            )
+        ).all()
+        history_indexes = {index["name"] for index in inspector.get_indexes("document_history")}
+        tables = set(inspector.get_table_names())
+        revision = current_revision(connection)
+
+    assert "ix_documents_user_updated_id" in indexes
+    assert "ix_documents_user_id" not in indexes
+    assert updated_at["nullable"] is False
+    assert rows == {stale_id: created, fresh_id: datetime(2024, 2, 1)}
+    # Every old row is a keyframe, numbered per document in the order it was created
+    assert [row.version for row in history] == [1, 2, 3, 1, 2, 3]
+    assert all(row.keyframe_version == row.version and row.delta is None for row in history)
+    assert all(row.content.endswith("!" * (row.version - 1)) for row in history)
+    assert all(row.content_length == len(row.content) for row in history)
+    assert "ix_document_history_document_id" not in history_indexes
+    # Tables added to the models since are created
+    assert "jobs" in tables
+    assert revision == head_revision()
+    engine.dispose()
+
+
+def test_a_new_database_is_created_at_the_latest_migration(tmp_path):
+    """
+    Test that a new database gets the models' tables and is not migrated again.
+
+    Args:
+        tmp_path: Pytest temporary directory.
+
+    Returns:
+        None
+    """
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    with engine.begin() as connection:
+        migrate(connection)
+    with engine.begin() as connection:
+        migrate(connection)
+
+    with engine.connect() as connection:
+        indexes = {index["name"] for index in sa.inspect(connection).get_indexes("documents")}
+        revision = current_revision(connection)
+
+    assert "ix_documents_user_updated_id" in indexes
+    assert revision == head_revision()
+    engine.dispose()
+
+
+def test_downgrading_restores_full_copies_of_delta_versions(tmp_path):
+    """
+    Test that a downgrade rebuilds the text of versions stored as deltas.
+
+    Args:
+        tmp_path: Pytest temporary directory.
+
+    Returns:
+        None
+    """
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'downgrade.db'}")
+    document_id = uuid.uuid4()
+    create_original_database(engine, uuid.uuid4(), [document_id], datetime(2024, 1, 1))
+    with engine.begin() as connection:
+        migrate(connection)
+        connection.execute(
+            sa.text(
+                "INSERT INTO document_history (id, document_id, version, keyframe_version,"
+                " delta, content_length) VALUES (:id, :document_id, 4, 3, :delta, 18)"
+            ),
+            {
+                "id": uuid.uuid4().hex,
+                "document_id": document_id.hex,
+                "delta": json.dumps([[0, 8, "Draft"]]),
+            },
+        )
+
+    with engine.begin() as connection:
+        command.downgrade(alembic_config(connection), "base")
+
+    with engine.connect() as connection:
+        contents = connection.execute(
+            sa.select(document_history.c.content).order_by(document_history.c.created_at)
+        ).scalars()
+        columns = {c["name"] for c in sa.inspect(connection).get_columns("document_history")}
+
+    assert "Draft 0 on day 2!!" in list(contents)
+    assert "version" not in columns
+    engine.dispose()
@@ -49,6 +49,7 @@ export default function Home() {
     handleLLMConnect,
     handleActionClick,
     handleEvalClick,
+    handleRunAllEvals,
     handleSendMessage,
     handleResetConfig,
     handleTabChange,
@@ -148,6 +149,7 @@ export default function Home() {
           onUpdateContent={setEditorContent}
           onActionClick={handleActionClick}
           onEvalClick={handleEvalClick}
+          onRunAllEvals={handleRunAllEvals}
           onDialogOpenChange={handleDialogOpenChange}
           onSendMessage={handleSendMessage}
           onConnectLLM={handleLLMConnect}
@@ -18,6 +18,7 @@ interface EvalButtonsProps {
   isProcessing: boolean;
   isLLMConnected: boolean;
   onEvalClick: (evalItem: EvalItem) => void;
+  onRunAllEvals?: () => void;
   openEvalDialogId?: string | null;
   onDialogOpenChange?: (id: string | null) => void;
 }
@@ -27,6 +28,7 @@ export function EvalButtons({
   isProcessing,
   isLLMConnected,
   onEvalClick,
+  onRunAllEvals,
   openEvalDialogId,
   onDialogOpenChange,
 }: EvalButtonsProps) {
@@ -65,6 +67,16 @@ export function EvalButtons({
         className={`transition-all duration-200 ease-in-out ${isCollapsed ? 'h-0' : 'max-h-[300px] overflow-y-auto'}`}
       >
         <div className="space-y-2 p-2">
+          {onRunAllEvals && evals.length > 1 && (
+            <Button
+              variant="outline"
+              className="h-10 w-full text-base font-medium"
+              onClick={onRunAllEvals}
+              disabled={isProcessing || !isLLMConnected}
+            >
+              Run all evals
+            </Button>
+          )}
           {evals.map(evalItem => (
             <div key={evalItem.id} className="mb-2">
               <div className="flex items-center gap-2">
@@ -29,6 +29,7 @@ interface WriteTabProps {
   onUpdateContent: (content: string) => void;
   onActionClick: (action: ActionButton) => void;
   onEvalClick: (evalItem: EvalItem) => void;
+  onRunAllEvals?: () => void;
   onDialogOpenChange?: (id: string | null) => void;
   onSendMessage: (message: string) => void;
   onConnectLLM: (config: LLMConfig) => void;
@@ -56,6 +57,7 @@ export function WriteTab({
   onUpdateContent,
   onActionClick,
   onEvalClick,
+  onRunAllEvals,
   onDialogOpenChange,
   onSendMessage,
   onConnectLLM,
@@ -112,6 +114,7 @@ export function WriteTab({
                 isProcessing={isProcessing}
                 isLLMConnected={!!llmConfig.type}
                 onEvalClick={onEvalClick}
+                onRunAllEvals={onRunAllEvals}
                 openEvalDialogId={openEvalDialogId}
                 onDialogOpenChange={onDialogOpenChange}
               />
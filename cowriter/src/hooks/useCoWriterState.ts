@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import {
   HistoryItem,
   ActionButton,
@@ -23,7 +23,7 @@ import {
   createNewDocument,
   extractScoreFromResult,
 } from '@/utils/helpers';
-import { connectLLM, submitAction, submitEval, sendChatMessage } from '@/utils/api';
+import { connectLLM, submitAction, submitEval, submitEvals, sendChatMessage } from '@/utils/api';
 
 export function useCoWriterState() {
   // Tab state
@@ -52,6 +52,8 @@ export function useCoWriterState() {
   // Processing state
   const [isProcessing, setIsProcessing] = useState(false);
   const [isChatProcessing, setIsChatProcessing] = useState(false);
+  // In-flight action request, aborted when superseded or when its document is left
+  const actionRequest = useRef<AbortController | null>(null);
 
   // Chat state
   const [messages, setMessages] = useState<Message[]>([
@@ -189,6 +191,11 @@ export function useCoWriterState() {
     }
   }, [selectedHistoryId, history]);
 
+  // Abandon an in-flight action when switching documents or unmounting
+  useEffect(() => {
+    return () => actionRequest.current?.abort();
+  }, [selectedHistoryId]);
+
   // Reset eval scores when editor content changes
   useEffect(() => {
     if (editorContent) {
@@ -272,6 +279,11 @@ export function useCoWriterState() {
       return;
     }
 
+    // A re-triggered action supersedes the one still running
+    actionRequest.current?.abort();
+    const controller = new AbortController();
+    actionRequest.current = controller;
+
     setIsProcessing(true);
     try {
       const selectedItem = history.find(item => item.id === selectedHistoryId);
@@ -283,17 +295,22 @@ export function useCoWriterState() {
         aboutMe,
         preferredStyle,
         tone,
-        documentType
+        documentType,
+        controller.signal
       );
 
       setEditorContent(data.text);
     } catch (error) {
+      if (controller.signal.aborted) return;
       console.error('Action processing failed:', error);
       const errorMessage =
         error instanceof Error ? error.message : 'Failed to process action. Please try again.';
       alert(errorMessage);
     } finally {
-      setIsProcessing(false);
+      if (actionRequest.current === controller) {
+        actionRequest.current = null;
+        setIsProcessing(false);
+      }
     }
   };
 
@@ -393,6 +410,42 @@ export function useCoWriterState() {
     }
   };
 
+  // Run every eval in one request; scores fill in as each eval finishes
+  const handleRunAllEvals = async () => {
+    if (!llmConfig.type) {
+      alert('Please connect to an LLM first');
+      return;
+    }
+
+    if (!editorContent.trim()) {
+      alert('Please enter some text in the editor first');
+      return;
+    }
+
+    setIsProcessing(true);
+    try {
+      const { failed } = await submitEvals(evals, editorContent, result => {
+        if (!result.success) return;
+        const evalId = evals[result.index].id;
+        setEvals(prevEvals =>
+          prevEvals.map(e =>
+            e.id === evalId ? { ...e, score: result.score ?? undefined, result: result.result } : e
+          )
+        );
+      });
+      if (failed > 0) {
+        alert(`${failed} evaluation(s) failed. Please try them again individually.`);
+      }
+    } catch (error) {
+      console.error('Batch eval processing failed:', error);
+      const errorMessage =
+        error instanceof Error ? error.message : 'Failed to process evaluations. Please try again.';
+      alert(errorMessage);
+    } finally {
+      setIsProcessing(false);
+    }
+  };
+
   const handleDialogOpenChange = (id: string | null) => {
     setOpenEvalDialogId(id);
   };
@@ -433,6 +486,7 @@ export function useCoWriterState() {
     handleLLMConnect,
     handleActionClick,
     handleEvalClick,
+    handleRunAllEvals,
     handleSendMessage,
     handleResetConfig,
     handleTabChange,
@@ -27,6 +27,104 @@ const createHeaders = (includeContentType = true): HeadersInit => {
   return headers;
 };
 
+// Create a more specific action description based on document type
+const buildActionDescription = (action: ActionButton, documentType: string): string => {
+  if (documentType === 'X') {
+    return `${action.action} optimized for Twitter/X (under 280 characters, engaging, shareable)`;
+  } else if (documentType === 'LinkedIn') {
+    return `${action.action} formatted for a professional LinkedIn post`;
+  } else if (documentType === 'Blog') {
+    return `${action.action} formatted as a blog post with proper structure`;
+  } else if (documentType === 'Essay') {
+    return `${action.action} formatted as a formal essay`;
+  } else if (documentType === 'Threads') {
+    return `${action.action} formatted as a Twitter/X thread with numbered points`;
+  } else if (documentType === 'Reddit') {
+    return `${action.action} formatted for a Reddit post`;
+  }
+  return `${action.action} for a ${documentType} format`;
+};
+
+export interface StreamDone {
+  usage: Record<string, number> | null;
+  timing: { time_to_first_token_ms: number | null; total_ms: number };
+  chunks?: number;
+}
+
+// Long documents are processed in chunks; each finished chunk reports its progress
+export interface ChunkProgress {
+  phase: 'action' | 'consistency';
+  chunk: number;
+  total: number;
+  elapsed_ms: number;
+}
+
+// Read a server-sent event stream, calling onEvent with each event's name and payload.
+const readEvents = async (
+  response: Response,
+  onEvent: (event: string, payload: Record<string, unknown>) => void
+): Promise<void> => {
+  if (!response.body) {
+    throw new Error('Streaming is not supported by this browser');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  for (;;) {
+    const { value, done: finished } = await reader.read();
+    if (finished) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+
+      let event = 'message';
+      let data = '';
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      if (!data) continue;
+
+      const payload = JSON.parse(data);
+      if (event === 'error') {
+        throw new Error((payload.detail as string) || 'Streaming failed');
+      }
+      onEvent(event, payload);
+    }
+  }
+};
+
+// Read a token stream, calling onToken for each token and resolving
+// with the full text and the final usage/timing event.
+const readTokenStream = async (
+  response: Response,
+  onToken: (delta: string) => void,
+  onProgress?: (progress: ChunkProgress) => void
+): Promise<{ text: string; done: StreamDone | null }> => {
+  let text = '';
+  let done: StreamDone | null = null;
+
+  await readEvents(response, (event, payload) => {
+    if (event === 'token') {
+      const delta = payload.delta as string;
+      text += delta;
+      onToken(delta);
+    } else if (event === 'progress') {
+      onProgress?.(payload as unknown as ChunkProgress);
+    } else if (event === 'done') {
+      done = payload as unknown as StreamDone;
+    }
+  });
+
+  return { text, done };
+};
+
 export async function login(
   usernameOrEmail: string,
   password: string
@@ -164,30 +262,17 @@ export async function submitAction(
   aboutMe: string,
   preferredStyle: string,
   tone: string,
-  documentType: string
+  documentType: string,
+  signal?: AbortSignal
 ): Promise<{ text: string }> {
   try {
-    // Create a more specific action description based on document type
-    let actionDescription = '';
-    if (documentType === 'X') {
-      actionDescription = `${action.action} optimized for Twitter/X (under 280 characters, engaging, shareable)`;
-    } else if (documentType === 'LinkedIn') {
-      actionDescription = `${action.action} formatted for a professional LinkedIn post`;
-    } else if (documentType === 'Blog') {
-      actionDescription = `${action.action} formatted as a blog post with proper structure`;
-    } else if (documentType === 'Essay') {
-      actionDescription = `${action.action} formatted as a formal essay`;
-    } else if (documentType === 'Threads') {
-      actionDescription = `${action.action} formatted as a Twitter/X thread with numbered points`;
-    } else if (documentType === 'Reddit') {
-      actionDescription = `${action.action} formatted for a Reddit post`;
-    } else {
-      actionDescription = `${action.action} for a ${documentType} format`;
-    }
+    const actionDescription = buildActionDescription(action, documentType);
 
+    // Aborting closes the connection, which makes the server cancel the generation
     const response = await fetch(`${API_BASE_URL}/submit_action`, {
       method: 'POST',
       headers: createHeaders(),
+      signal,
       body: JSON.stringify({
         action: action.name.toLowerCase(),
         action_description: actionDescription,
@@ -211,6 +296,43 @@ export async function submitAction(
   }
 }
 
+export async function submitActionStream(
+  action: ActionButton,
+  text: string,
+  aboutMe: string,
+  preferredStyle: string,
+  tone: string,
+  documentType: string,
+  onToken: (delta: string) => void,
+  onProgress?: (progress: ChunkProgress) => void
+): Promise<{ text: string; done: StreamDone | null }> {
+  try {
+    const response = await fetch(`${API_BASE_URL}/submit_action/stream`, {
+      method: 'POST',
+      headers: createHeaders(),
+      body: JSON.stringify({
+        action: action.name.toLowerCase(),
+        action_description: buildActionDescription(action, documentType),
+        text,
+        about_me: aboutMe,
+        preferred_style: preferredStyle,
+        tone,
+        document_type: documentType,
+      }),
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.detail || 'Failed to process action');
+    }
+
+    return await readTokenStream(response, onToken, onProgress);
+  } catch (error) {
+    console.error('Action streaming failed:', error);
+    throw error;
+  }
+}
+
 export async function submitEval(
   evalItem: EvalItem,
   text: string
@@ -238,6 +360,61 @@ export async function submitEval(
   }
 }
 
+// One finished item of a batch; items arrive in completion order
+export interface BatchResult {
+  index: number;
+  name: string;
+  success: boolean;
+  elapsed_ms: number;
+  result?: string;
+  score?: number;
+  summary?: string;
+  suggestions?: string[];
+  mode?: 'fused' | 'single';
+  detail?: string;
+  retry_after?: number;
+}
+
+export async function submitEvals(
+  evalItems: EvalItem[],
+  text: string,
+  onResult: (result: BatchResult) => void
+): Promise<{ succeeded: number; failed: number }> {
+  try {
+    const response = await fetch(`${API_BASE_URL}/submit_evals`, {
+      method: 'POST',
+      headers: createHeaders(),
+      body: JSON.stringify({
+        text,
+        evals: evalItems.map(evalItem => ({
+          eval_name: evalItem.name.toLowerCase(),
+          eval_description: evalItem.description,
+        })),
+        // Evaluate all criteria in one LLM call, sending the document once
+        fused: true,
+      }),
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.detail || 'Failed to process evaluations');
+    }
+
+    let summary = { succeeded: 0, failed: 0 };
+    await readEvents(response, (event, payload) => {
+      if (event === 'result') {
+        onResult(payload as unknown as BatchResult);
+      } else if (event === 'done') {
+        summary = payload as unknown as { succeeded: number; failed: number };
+      }
+    });
+    return summary;
+  } catch (error) {
+    console.error('Batch eval processing failed:', error);
+    throw error;
+  }
+}
+
 export async function sendChatMessage(
   message: string,
   editorContent?: string
@@ -262,3 +439,29 @@ export async function sendChatMessage(
     throw error;
   }
 }
+
+export async function sendChatMessageStream(
+  message: string,
+  editorContent: string | undefined,
+  onToken: (delta: string) => void
+): Promise<{ text: string; done: StreamDone | null }> {
+  try {
+    const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+      method: 'POST',
+      headers: createHeaders(),
+      body: JSON.stringify({
+        message,
+        context: editorContent ? `Current editor content: ${editorContent}` : undefined,
+      }),
+    });
+
+    if (!response.ok) {
+      throw new Error('Failed to send message');
+    }
+
+    return await readTokenStream(response, onToken);
+  } catch (error) {
+    console.error('Chat streaming error:', error);
+    throw error;
+  }
+}